@@ -0,0 +1,164 @@
+from pathlib import Path
+from typing import Optional
+
+import click
+from click import Choice
+from click_option_group import optgroup
+
+from wpextract.cli._download import dl_types
+from wpextract.cli._shared import (
+    EPILOG,
+    empty_directory,
+    logging_options,
+    setup_logging,
+    setup_tqdm_redirect,
+)
+from wpextract.util.str import ensure_prefixes, ensure_suffix
+
+
+@click.command(short_help="Download multiple WordPress sites.", epilog=EPILOG)
+@click.argument(
+    "targets_file", type=click.Path(exists=True, dir_okay=False, path_type=Path)
+)
+@click.argument("out_dir", type=click.Path(), callback=empty_directory)
+@click.option(
+    "--media",
+    is_flag=True,
+    default=False,
+    help="Also download media files, to a media directory within each site's directory",
+)
+@click.option(
+    "-P", "--json-prefix", type=str, help="Prefix to add to output file names"
+)
+@click.option(
+    "--skip-type",
+    "skip_types",
+    type=Choice(dl_types, case_sensitive=False),
+    default=[],
+    multiple=True,
+    help="Don't download the provided types. All others will be downloaded, default is to download all.",
+)
+@optgroup.group("scheduling")  # type: ignore[misc]
+@optgroup.option(
+    "--concurrency",
+    type=click.IntRange(min=1),
+    default=4,
+    help="Maximum number of requests in progress across all sites",
+    show_default=True,
+)
+@optgroup.option(
+    "--per-host",
+    type=click.IntRange(min=1),
+    default=1,
+    help="Maximum number of requests in progress to each host",
+    show_default=True,
+)
+@optgroup.option(
+    "--host-interval",
+    type=click.FloatRange(min=0),
+    default=0,
+    help="Minimum time in seconds between starting requests to each host",
+    show_default=True,
+)
+@optgroup.option(
+    "--active-sites",
+    type=click.IntRange(min=1),
+    help="Maximum number of sites to download at once. Defaults to twice --concurrency.",
+)
+@optgroup.group("request behaviour")  # type: ignore[misc]
+@optgroup.option(
+    "--timeout",
+    type=int,
+    default=30,
+    help="Timeout for request in seconds",
+    show_default=True,
+)
+@optgroup.option(
+    "-w",
+    "--wait",
+    type=int,
+    help="Time each site waits between its requests in seconds. Does not affect retries.",
+)
+@optgroup.option(
+    "--max-retries",
+    type=int,
+    default=10,
+    help="Maximum number of retries before giving up",
+    show_default=True,
+)
+@optgroup.option(
+    "--backoff-factor",
+    type=float,
+    default=0.1,
+    help="Factor to apply delaying retries. Default will sleep for 0.0, 0.2, 0.4, 0.8,...",
+    show_default=True,
+)
+@optgroup.option(
+    "--user-agent",
+    type=str,
+    help="User-Agent string to use for requests. Set to a recent version of Chrome on Linux by default.",
+)
+@logging_options
+def batch(
+    targets_file: Path,
+    out_dir: Path,
+    media: bool,
+    json_prefix: Optional[str],
+    skip_types: list[str],
+    concurrency: int,
+    per_host: int,
+    host_interval: float,
+    active_sites: Optional[int],
+    timeout: int,
+    wait: Optional[int],
+    max_retries: int,
+    backoff_factor: float,
+    user_agent: Optional[str],
+    log: Optional[Path],
+    verbose: bool,
+) -> None:
+    """Download multiple sites' content using the WordPress REST API.
+
+    TARGETS_FILE is a file containing the base path of one WordPress installation per line, e.g. "https://example.org/". Blank lines and lines starting with # are ignored.
+
+    OUT_DIR is the directory to create a download directory for each site in. It must be an existing empty directory or a non-existent directory which will be created.
+    """
+    from wpextract.download import RequestSession
+    from wpextract.download.batch import download_batch, read_targets
+    from wpextract.download.scheduler import RequestScheduler
+
+    setup_logging(verbose, log)
+
+    targets = [
+        ensure_suffix(ensure_prefixes(target, ("http://", "https://"), "http://"), "/")
+        for target in read_targets(targets_file)
+    ]
+    if len(targets) == 0:
+        raise click.UsageError("TARGETS_FILE does not contain any targets.")
+
+    def session_factory() -> RequestSession:
+        return RequestSession(
+            timeout=timeout,
+            wait=wait,
+            max_retries=max_retries,
+            backoff_factor=backoff_factor,
+            user_agent=user_agent,
+        )
+
+    with setup_tqdm_redirect(log is None):
+        results = download_batch(
+            targets,
+            out_dir,
+            data_types=list(set(dl_types) - set(skip_types)),
+            scheduler=RequestScheduler(concurrency, per_host, host_interval),
+            active_sites=active_sites or concurrency * 2,
+            session_factory=session_factory,
+            media=media,
+            json_prefix=json_prefix,
+        )
+
+    n_failed = sum(not result.ok for result in results)
+    if n_failed > 0:
+        raise click.ClickException(
+            f"{n_failed} of {len(results)} sites failed, see batch.json for details."
+        )
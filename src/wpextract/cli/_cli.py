@@ -2,9 +2,12 @@ import platform
 
 import click
 
+from wpextract.cli._batch import batch
 from wpextract.cli._download import download
 from wpextract.cli._extract import extract
+from wpextract.cli._merge import merge
 from wpextract.cli._shared import EPILOG
+from wpextract.cli._sync import sync
 
 PYTHON_VERSION = platform.python_version()
 
@@ -18,5 +21,8 @@ def cli() -> None:
     """WPextract is a tool to create datasets from WordPress sites."""
 
 
+cli.add_command(batch)
 cli.add_command(download)
 cli.add_command(extract)
+cli.add_command(merge)
+cli.add_command(sync)
@@ -1,9 +1,11 @@
+import logging
+from datetime import datetime
 from pathlib import Path
 from typing import Any, Optional
 
 import click
 from click import Choice, Context, Parameter
-from click_option_group import optgroup
+from click_option_group import MutuallyExclusiveOptionGroup, optgroup
 
 from wpextract.cli._shared import (
     EPILOG,
@@ -23,17 +25,91 @@ def validate_wait(ctx: Context, param: Parameter, value: Any) -> Any:
     return value
 
 
+def parse_host_waits(
+    ctx: Context, param: Parameter, value: tuple[str, ...]
+) -> dict[str, float]:
+    host_waits = {}
+    for host_wait in value:
+        host, _, seconds = host_wait.rpartition("=")
+        try:
+            wait_s = float(seconds)
+        except ValueError as e:
+            raise click.BadParameter("must be in the format HOST=SECONDS") from e
+        if host.strip() == "" or wait_s < 0:
+            raise click.BadParameter("must be in the format HOST=SECONDS")
+        host_waits[host.strip().lower()] = wait_s
+    return host_waits
+
+
+def parse_shard(
+    ctx: Context, param: Parameter, value: Optional[str]
+) -> Optional[tuple[int, int]]:
+    if value is None:
+        return None
+    try:
+        shard_num, shard_count = (int(part) for part in value.split("/"))
+    except ValueError as e:
+        raise click.BadParameter("must be in the format i/N, e.g. 1/4") from e
+    if shard_count < 1 or not 1 <= shard_num <= shard_count:
+        raise click.BadParameter("must satisfy 1 <= i <= N")
+    return shard_num - 1, shard_count
+
+
+def output_directory(ctx: Context, param: Parameter, value: Any) -> Optional[Path]:
+    # A plan writes nothing, so the directory isn't created or required to be empty
+    if ctx.params.get("plan"):
+        return Path(value) if value is not None else None
+    return empty_directory(ctx, param, value)
+
+
 @click.command(short_help="Download a WordPress site.", epilog=EPILOG)
 @click.argument("target", type=str)
-@click.argument("out_json", type=click.Path(), callback=empty_directory)
+@click.argument("out_json", type=click.Path(), callback=output_directory)
 @click.option(
     "--media-dest",
     type=click.Path(),
-    callback=empty_directory,
+    callback=output_directory,
     required=False,
     help="Path to a directory to download media files to, skipped if not supplied",
     metavar="DIRECTORY",
 )
+@click.option(
+    "--media-size",
+    type=str,
+    help="Rendition of each media file to download with --media-dest: a size name (e.g. large) or the largest size with width and height up to a number of pixels (e.g. 1024). Falls back to the original file if there is no such size.",
+    metavar="SIZE",
+)
+@click.option(
+    "--media-dedupe",
+    is_flag=True,
+    default=False,
+    help="Store each unique media file once, named by its SHA-256 hash, and hardlink the usual file paths to it. The hash of each file is recorded in manifest.json.",
+)
+@click.option(
+    "--media-verify",
+    is_flag=True,
+    default=False,
+    help="After downloading media files with --media-dedupe, check every stored file still matches its hash, and exit with an error if any do not.",
+)
+@click.option(
+    "--media-inventory",
+    is_flag=True,
+    default=False,
+    help="Instead of downloading media files, make a HEAD request for each and record its status, size, type and last modified date in manifest.json in the --media-dest directory.",
+)
+@click.option(
+    "--media-pipeline",
+    is_flag=True,
+    default=False,
+    help="Download media files while the media list is still being crawled, as each page of it arrives, instead of afterwards.",
+)
+@click.option(
+    "--media-workers",
+    type=click.IntRange(min=1),
+    default=1,
+    help="Number of concurrent requests to make with --media-inventory or --media-pipeline. Requests share the --wait.",
+    show_default=True,
+)
 @click.option(
     "-P", "--json-prefix", type=str, help="Prefix to add to output file names"
 )
@@ -45,8 +121,29 @@ def validate_wait(ctx: Context, param: Parameter, value: Any) -> Any:
     multiple=True,
     help="Don't download the provided types. All others will be downloaded, default is to download all.",
 )
+@click.option(
+    "--metrics-out",
+    type=click.Path(dir_okay=False, path_type=Path),
+    help="Write request metrics (latency histograms, throughput and ETA per endpoint) to this file at the end of the run. Written as JSON if the file name ends in .json, otherwise in the OpenMetrics text format.",
+    metavar="FILE",
+)
+@click.option(
+    "--plan",
+    is_flag=True,
+    default=False,
+    # Processed first so output directories are left untouched when planning
+    is_eager=True,
+    help="Estimate the number of requests, data size and time of the download without performing it. Makes one request per type. OUT_JSON, --media-dest and --archive are not created or written to.",
+)
 @optgroup.group("authentication")  # type: ignore[misc]
-@optgroup.option("--proxy", type=str, help="Proxy server for requests")
+@optgroup.option(
+    "--proxy",
+    "proxies",
+    type=str,
+    multiple=True,
+    help="Proxy server for requests. Can be given multiple times to distribute requests across the proxies, taking proxies which keep failing out of rotation.",
+    metavar="PROXY",
+)
 @optgroup.option(
     "--auth",
     type=str,
@@ -69,9 +166,18 @@ def validate_wait(ctx: Context, param: Parameter, value: Any) -> Any:
     "-w",
     "--wait",
     type=int,
-    help="Time to wait between requests in seconds. Does not affect retries.",
+    help="Time to wait between requests to each host in seconds. Does not affect retries. Concurrent requests to the same host share the wait.",
     is_eager=True,  # to permit --random-wait validation
 )
+@optgroup.option(
+    "--host-wait",
+    "host_waits",
+    type=str,
+    multiple=True,
+    callback=parse_host_waits,
+    help="Time to wait between requests to a specific host in seconds, overriding --wait, e.g. cdn.example.org=0 for a media CDN. Can be given multiple times.",
+    metavar="HOST=SECONDS",
+)
 @optgroup.option(
     "--random-wait",
     is_flag=True,
@@ -104,23 +210,188 @@ def validate_wait(ctx: Context, param: Parameter, value: Any) -> Any:
     type=str,
     help="User-Agent string to use for requests. Set to a recent version of Chrome on Linux by default.",
 )
+@optgroup.option(
+    "--hedge-budget",
+    type=click.FloatRange(min=0, max=1, min_open=True),
+    help="Send a duplicate of page requests which take longer than the 95th percentile latency of their endpoint, using whichever response arrives first. At most approximately this fraction of requests (e.g. 0.05) are duplicated.",
+    metavar="FRACTION",
+)
+@optgroup.option(
+    "--fast-probe",
+    is_flag=True,
+    help="Check the site is reachable with a HEAD request and only fetch the needed parts of the API index, instead of the full home page and index.",
+)
+@optgroup.group("crawl strategy")  # type: ignore[misc]
+@optgroup.option(
+    "--partition-size",
+    type=click.IntRange(min=1),
+    help="Download posts, pages and media in date windows of approximately this many entries, avoiding slow deep pagination on large sites.",
+)
+@optgroup.option(
+    "--workers",
+    type=click.IntRange(min=1),
+    default=1,
+    help="Number of date windows to download in parallel. Only used with --partition-size.",
+    show_default=True,
+)
+@optgroup.option(
+    "--shard",
+    type=str,
+    callback=parse_shard,
+    help="Only download shard i of N (e.g. 1/4) of each type, for combining with wpextract merge.",
+    metavar="i/N",
+)
+@optgroup.option(
+    "--passthrough",
+    is_flag=True,
+    help="Write each page of the API response to a JSON Lines file without parsing it, reducing memory use and CPU time on large sites. Cannot be used with --partition-size.",
+)
+@optgroup.group("filters")  # type: ignore[misc]
+@optgroup.option(
+    "--after",
+    type=click.DateTime(),
+    help="Only download posts, pages and media published after this date (in the site's timezone)",
+)
+@optgroup.option(
+    "--before",
+    type=click.DateTime(),
+    help="Only download posts, pages and media published before this date (in the site's timezone)",
+)
+@optgroup.option(
+    "--category",
+    "categories",
+    type=int,
+    multiple=True,
+    help="Only download posts in this category ID. Can be given multiple times.",
+)
+@optgroup.option(
+    "--tag",
+    "tags",
+    type=int,
+    multiple=True,
+    help="Only download posts with this tag ID. Can be given multiple times.",
+)
+@optgroup.option(
+    "--author",
+    "authors",
+    type=int,
+    multiple=True,
+    help="Only download posts, pages and media by this user ID. Can be given multiple times.",
+)
+@optgroup.option(
+    "--search",
+    type=str,
+    help="Only download posts, pages and media matching this search string",
+)
+@optgroup.option(
+    "--status",
+    "statuses",
+    type=str,
+    multiple=True,
+    help="Only download posts and pages with this status. Can be given multiple times. Statuses other than publish usually require authentication.",
+)
+@optgroup.option(
+    "--lang",
+    type=str,
+    help="Only download posts, pages and media in this language. Requires a multilingual plugin supporting the lang parameter, such as Polylang.",
+)
+@optgroup.group("archive", cls=MutuallyExclusiveOptionGroup)  # type: ignore[misc]
+@optgroup.option(
+    "--archive",
+    "archive_path",
+    type=click.Path(file_okay=False, path_type=Path),
+    help="Record every API response (body and headers) to a compressed archive in this directory, which can be replayed later with --replay-archive. Media files are not archived.",
+    metavar="DIRECTORY",
+)
+@optgroup.option(
+    "--replay-archive",
+    type=click.Path(exists=True, file_okay=False, path_type=Path),
+    help="Rebuild the download from an archive recorded with --archive, without making any network requests. The other options should match those used when recording.",
+    metavar="DIRECTORY",
+)
+@optgroup.group("replay conditions")  # type: ignore[misc]
+@optgroup.option(
+    "--replay-latency",
+    type=click.FloatRange(min=0),
+    default=0,
+    help="Seconds of latency to add to each replayed response. Only used with --replay-archive.",
+    metavar="SECONDS",
+)
+@optgroup.option(
+    "--replay-latency-scale",
+    type=click.FloatRange(min=0),
+    default=0,
+    help="Factor of each response's recorded latency to add when replaying, e.g. 1 to replay at the original speed. Only used with --replay-archive.",
+    metavar="FACTOR",
+)
+@optgroup.option(
+    "--replay-jitter",
+    type=click.FloatRange(min=0, max=1),
+    default=0,
+    help="Fraction by which to randomly vary the latency of each replayed response. Only used with --replay-archive.",
+    metavar="FRACTION",
+)
+@optgroup.option(
+    "--replay-error-rate",
+    type=click.FloatRange(min=0, max=1),
+    default=0,
+    help="Probability of replacing each replayed response with an HTTP 503 error, which is retried as normal. Only used with --replay-archive.",
+    metavar="FRACTION",
+)
+@optgroup.option(
+    "--replay-seed",
+    type=int,
+    default=0,
+    help="Seed for the random latency and errors of replayed responses",
+    show_default=True,
+)
 @logging_options
 def download(
     target: str,
     out_json: Path,
     media_dest: Optional[Path],
+    media_size: Optional[str],
+    media_dedupe: bool,
+    media_verify: bool,
+    media_inventory: bool,
+    media_pipeline: bool,
+    media_workers: int,
     json_prefix: Optional[str],
     skip_types: list[str],
-    proxy: Optional[str],
+    metrics_out: Optional[Path],
+    plan: bool,
+    proxies: tuple[str, ...],
     auth: Optional[str],
     cookies: Optional[str],
     timeout: int,
     wait: Optional[int],
+    host_waits: dict[str, float],
     random_wait: bool,
     max_retries: int,
     backoff_factor: float,
     max_redirects: int,
     user_agent: Optional[str],
+    hedge_budget: Optional[float],
+    fast_probe: bool,
+    partition_size: Optional[int],
+    workers: int,
+    shard: Optional[tuple[int, int]],
+    passthrough: bool,
+    after: Optional[datetime],
+    before: Optional[datetime],
+    categories: tuple[int, ...],
+    tags: tuple[int, ...],
+    authors: tuple[int, ...],
+    search: Optional[str],
+    statuses: tuple[str, ...],
+    lang: Optional[str],
+    archive_path: Optional[Path],
+    replay_archive: Optional[Path],
+    replay_latency: float,
+    replay_latency_scale: float,
+    replay_jitter: float,
+    replay_error_rate: float,
+    replay_seed: int,
     log: Optional[Path],
     verbose: bool,
 ) -> None:
@@ -131,10 +402,54 @@ def download(
     OUT_JSON is the directory to output the downloaded JSON to. It must be an existing empty directory or a non-existent directory which will be created.
     """
     from wpextract import WPDownloader
-    from wpextract.download import RequestSession
+    from wpextract.download import (
+        DownloadFilter,
+        HedgePolicy,
+        MediaSize,
+        ProxyPool,
+        ReplayConditions,
+        RequestSession,
+        ResponseArchive,
+    )
 
     setup_logging(verbose, log)
 
+    if replay_archive is not None and media_dest is not None:
+        raise click.UsageError(
+            "--media-dest cannot be used with --replay-archive as media files are not archived."
+        )
+    replay_conditions = ReplayConditions(
+        latency=replay_latency,
+        recorded_latency=replay_latency_scale,
+        jitter=replay_jitter,
+        error_rate=replay_error_rate,
+        seed=replay_seed,
+    )
+    if replay_archive is None and not replay_conditions.is_empty():
+        raise click.UsageError(
+            "--replay-latency, --replay-latency-scale and --replay-error-rate can only be used with --replay-archive."
+        )
+    if passthrough and partition_size is not None:
+        raise click.UsageError("--passthrough cannot be used with --partition-size.")
+    if media_size is not None and media_dest is None:
+        raise click.UsageError("--media-size can only be used with --media-dest.")
+    if media_dedupe and media_dest is None:
+        raise click.UsageError("--media-dedupe can only be used with --media-dest.")
+    if media_verify and not media_dedupe:
+        raise click.UsageError("--media-verify can only be used with --media-dedupe.")
+    if media_inventory and media_dest is None:
+        raise click.UsageError("--media-inventory can only be used with --media-dest.")
+    if media_pipeline and media_dest is None:
+        raise click.UsageError("--media-pipeline can only be used with --media-dest.")
+    if media_pipeline and media_inventory:
+        raise click.UsageError(
+            "--media-pipeline cannot be used with --media-inventory as files are not downloaded."
+        )
+    if media_inventory and media_dedupe:
+        raise click.UsageError(
+            "--media-dedupe cannot be used with --media-inventory as files are not downloaded."
+        )
+
     types_to_dl = set(dl_types) - set(skip_types)
 
     target = ensure_prefixes(target, ("http://", "https://"), "http://")
@@ -148,17 +463,42 @@ def download(
         elif len(auth_list) >= 2:
             auth_parsed = (auth_list[0], ":".join(auth_list[1:]))
 
+    archive_dir = replay_archive if replay_archive is not None else archive_path
+    if plan and replay_archive is None:
+        # Planning doesn't record its requests, so the archive isn't created
+        archive_dir = None
+    proxy_pool = ProxyPool(list(proxies)) if len(proxies) > 1 else None
     session = RequestSession(
-        proxy=proxy,
+        proxy=proxies[0] if len(proxies) == 1 else None,
         cookies=cookies,
         authorization=auth_parsed,
         timeout=timeout,
         wait=wait,
+        host_waits=host_waits,
         random_wait=random_wait,
         max_retries=max_retries,
         backoff_factor=backoff_factor,
         max_redirects=max_redirects,
         user_agent=user_agent,
+        archive=ResponseArchive(archive_dir) if archive_dir is not None else None,
+        replay=replay_archive is not None,
+        replay_conditions=None if replay_conditions.is_empty() else replay_conditions,
+        hedge=HedgePolicy(budget=hedge_budget) if hedge_budget is not None else None,
+        proxy_pool=proxy_pool,
+    )
+    if proxy_pool is not None and replay_archive is None:
+        healthy = session.check_proxies(target)
+        logging.info(f"{len(healthy)} of {len(proxies)} proxies passed health checks")
+
+    filters = DownloadFilter(
+        after=after,
+        before=before,
+        categories=list(categories),
+        tags=list(tags),
+        author=list(authors),
+        search=search,
+        status=list(statuses),
+        lang=lang,
     )
 
     with setup_tqdm_redirect(log is None):
@@ -168,9 +508,42 @@ def download(
             data_types=list(types_to_dl),
             session=session,
             json_prefix=json_prefix,
+            partition_size=partition_size,
+            workers=workers,
+            shard=shard,
+            passthrough=passthrough,
+            fast_probe=fast_probe,
+            filters=None if filters.is_empty() else filters,
+            media_size=MediaSize.parse(media_size) if media_size is not None else None,
+            dedupe_media=media_dedupe,
         )
 
-        downloader.download()
+        if plan:
+            click.echo(downloader.plan(media_files=media_dest is not None).format())
+            return
+
+        try:
+            if media_pipeline:
+                downloader.download(media_dest=media_dest, media_workers=media_workers)
+            else:
+                downloader.download()
+
+            if media_dest is not None and media_inventory:
+                downloader.inventory_media_files(
+                    session, media_dest, workers=media_workers
+                )
+            elif media_dest is not None and not media_pipeline:
+                downloader.download_media_files(session, media_dest)
 
-        if media_dest is not None:
-            downloader.download_media_files(session, media_dest)
+            if media_dest is not None and media_verify:
+                corrupt = downloader.verify_media_files(media_dest)
+                if len(corrupt) > 0:
+                    raise click.ClickException(
+                        f"{len(corrupt)} stored media files do not match their hash."
+                    )
+        finally:
+            if proxy_pool is not None:
+                logging.info(f"Proxy usage: {proxy_pool.summary()}")
+            if metrics_out is not None:
+                session.metrics.write(metrics_out)
+                logging.info(f"Wrote request metrics to {metrics_out}")
@@ -2,6 +2,7 @@ from pathlib import Path
 from typing import Optional
 
 import click
+from click import Choice
 
 from wpextract.cli._shared import (
     EPILOG,
@@ -12,6 +13,8 @@ from wpextract.cli._shared import (
     setup_tqdm_redirect,
 )
 
+parse_backends = ["bs4", "lxml"]
+
 
 @click.command(short_help="Extract site to a dataset.", epilog=EPILOG)
 @click.argument("json_root", type=directory)
@@ -24,12 +27,29 @@ from wpextract.cli._shared import (
 @click.option(
     "-P", "--json-prefix", help="Prefix to use for input and output filenames"
 )
+@click.option(
+    "-j",
+    "--jobs",
+    type=click.IntRange(min=1),
+    default=1,
+    show_default=True,
+    help="Number of processes to extract posts and pages with",
+)
+@click.option(
+    "--backend",
+    type=Choice(parse_backends, case_sensitive=False),
+    default="bs4",
+    show_default=True,
+    help="Parser to extract text, links and images from HTML with. lxml is faster and produces the same output.",
+)
 @logging_options
 def extract(
     json_root: Path,
     out_dir: Path,
     scrape_root: Optional[Path],
     json_prefix: Optional[str],
+    jobs: int,
+    backend: str,
     log: Optional[Path],
     verbose: bool,
 ) -> None:
@@ -48,6 +68,8 @@ def extract(
             json_root=json_root,
             scrape_root=scrape_root,
             json_prefix=json_prefix,
+            jobs=jobs,
+            backend=backend,
         )
         extractor.extract()
         extractor.export(out_dir)
@@ -0,0 +1,42 @@
+from pathlib import Path
+from typing import Optional
+
+import click
+
+from wpextract.cli._shared import (
+    EPILOG,
+    directory,
+    empty_directory,
+    logging_options,
+    setup_logging,
+)
+
+
+@click.command(short_help="Merge sharded downloads.", epilog=EPILOG)
+@click.argument("partial_json", type=directory, nargs=-1, required=True)
+@click.argument("out_json", type=click.Path(), callback=empty_directory)
+@click.option(
+    "-P", "--json-prefix", type=str, help="Prefix of input and output file names"
+)
+@logging_options
+def merge(
+    partial_json: tuple[Path, ...],
+    out_json: Path,
+    json_prefix: Optional[str],
+    log: Optional[Path],
+    verbose: bool,
+) -> None:
+    """Merge the outputs of sharded downloads into a single download.
+
+    PARTIAL_JSON are the directories output by each run of wpextract download --shard.
+
+    OUT_JSON is the directory to output the merged JSON to. It must be an existing empty directory or a non-existent directory which will be created.
+    """
+    from wpextract.download.merge import merge_downloads
+
+    setup_logging(verbose, log)
+
+    try:
+        merge_downloads(list(partial_json), out_json, json_prefix)
+    except ValueError as e:
+        raise click.UsageError(str(e)) from e
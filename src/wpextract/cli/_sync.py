@@ -0,0 +1,132 @@
+from pathlib import Path
+from typing import Optional
+
+import click
+from click import Choice
+from click_option_group import optgroup
+
+from wpextract.cli._shared import (
+    EPILOG,
+    logging_options,
+    setup_logging,
+    setup_tqdm_redirect,
+)
+from wpextract.util.str import ensure_prefixes, ensure_suffix
+
+sync_types = ["media", "pages", "posts"]
+
+
+@click.command(short_help="Keep a download up to date.", epilog=EPILOG)
+@click.argument("target", type=str)
+@click.argument(
+    "out_json", type=click.Path(file_okay=False, path_type=Path), metavar="OUT_JSON"
+)
+@click.option("-P", "--json-prefix", type=str, help="Prefix of the output file names")
+@click.option(
+    "--skip-type",
+    "skip_types",
+    type=Choice(sync_types, case_sensitive=False),
+    default=[],
+    multiple=True,
+    help="Don't sync the provided types. All others will be synced, default is to sync all.",
+)
+@optgroup.group("polling")  # type: ignore[misc]
+@optgroup.option(
+    "--interval",
+    type=click.FloatRange(min=0),
+    default=60,
+    help="Time to wait between polls in seconds",
+    show_default=True,
+)
+@optgroup.option(
+    "--max-interval",
+    type=click.FloatRange(min=0),
+    default=900,
+    help="Maximum time to wait between polls in seconds. The wait doubles after each poll without changes, up to this limit.",
+    show_default=True,
+)
+@optgroup.option(
+    "--per-page",
+    type=click.IntRange(min=1, max=100),
+    default=10,
+    help="Number of objects to request per page when polling",
+    show_default=True,
+)
+@optgroup.option(
+    "--sitemap",
+    is_flag=True,
+    default=False,
+    help="Detect new and modified posts and pages from the site's sitemaps and fetch only those, instead of polling their lists. Falls back to polling if no sitemaps are found.",
+)
+@optgroup.option(
+    "--max-polls",
+    type=click.IntRange(min=1),
+    help="Stop after this many polls. Polls forever by default.",
+)
+@optgroup.group("request behaviour")  # type: ignore[misc]
+@optgroup.option(
+    "--timeout",
+    type=int,
+    default=30,
+    help="Timeout for request in seconds",
+    show_default=True,
+)
+@optgroup.option(
+    "--max-retries",
+    type=int,
+    default=10,
+    help="Maximum number of retries before giving up",
+    show_default=True,
+)
+@optgroup.option(
+    "--user-agent",
+    type=str,
+    help="User-Agent string to use for requests. Set to a recent version of Chrome on Linux by default.",
+)
+@logging_options
+def sync(
+    target: str,
+    out_json: Path,
+    json_prefix: Optional[str],
+    skip_types: list[str],
+    interval: float,
+    max_interval: float,
+    per_page: int,
+    sitemap: bool,
+    max_polls: Optional[int],
+    timeout: int,
+    max_retries: int,
+    user_agent: Optional[str],
+    log: Optional[Path],
+    verbose: bool,
+) -> None:
+    """Keep a site's download up to date by polling for new and modified content.
+
+    TARGET is the base path of the WordPress installation, e.g. "https://example.org/"
+
+    OUT_JSON is the directory of a previous download of the site, which will be updated. If it does not exist, it will be created and all content will be fetched on the first poll.
+    """
+    from wpextract.download import RequestSession
+    from wpextract.download.sync import SiteSync
+    from wpextract.download.wpapi import WPApi
+
+    setup_logging(verbose, log)
+
+    target = ensure_prefixes(target, ("http://", "https://"), "http://")
+    target = ensure_suffix(target, "/")
+    out_json.mkdir(parents=True, exist_ok=True)
+
+    session = RequestSession(
+        timeout=timeout, max_retries=max_retries, user_agent=user_agent
+    )
+    site_sync = SiteSync(
+        WPApi(target, session=session),
+        out_json,
+        data_types=sorted(set(sync_types) - set(skip_types)),
+        json_prefix=json_prefix,
+        per_page=per_page,
+        sitemap=sitemap,
+    )
+
+    with setup_tqdm_redirect(log is None):
+        site_sync.run(interval, max_interval, max_polls)
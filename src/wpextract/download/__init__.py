@@ -1,2 +1,8 @@
+from wpextract.download.archive import ReplayConditions as ReplayConditions
+from wpextract.download.archive import ResponseArchive as ResponseArchive
+from wpextract.download.filters import DownloadFilter as DownloadFilter
+from wpextract.download.hedging import HedgePolicy as HedgePolicy
+from wpextract.download.media_size import MediaSize as MediaSize
+from wpextract.download.proxy_pool import ProxyPool as ProxyPool
 from wpextract.download.requestsession import AuthorizationType as AuthorizationType
 from wpextract.download.requestsession import RequestSession as RequestSession
@@ -0,0 +1,434 @@
+import io
+import json
+import logging
+import random
+import threading
+import time
+import zlib
+from collections import Counter
+from collections.abc import Generator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Optional
+
+from requests.adapters import HTTPAdapter
+from urllib3 import HTTPResponse, Retry
+from urllib3.exceptions import MaxRetryError
+
+from wpextract.download.exceptions import ResponseNotArchived
+
+if TYPE_CHECKING:
+    from collections.abc import Mapping
+
+    from requests import PreparedRequest, Response
+
+INDEX_FILE_NAME = "index.jsonl"
+"""Name of the archive's offset index file."""
+
+SEGMENT_SIZE = 64 * 1024 * 1024
+"""Default size in bytes after which a new segment file is started."""
+
+# Headers describing the transfer of the body, which do not apply to the decoded body in the archive
+_TRANSFER_HEADERS = frozenset(
+    ["content-encoding", "content-length", "transfer-encoding"]
+)
+
+
+def _segment_name(segment: int) -> str:
+    return f"segment-{segment:05d}.bin"
+
+
+@dataclass
+class ArchivedResponse:
+    """A response read from the archive."""
+
+    method: str
+    """The HTTP method of the request."""
+    url: str
+    """The requested URL."""
+    status: int
+    """The HTTP status of the response."""
+    reason: str
+    """The HTTP status reason phrase."""
+    headers: dict[str, str]
+    """The response headers."""
+    body: bytes
+    """The decoded response body."""
+    elapsed: Optional[float] = None
+    """The time in seconds the original request took to respond, if it was recorded."""
+
+
+@dataclass
+class ReplayConditions:
+    """Network conditions simulated while replaying an archive.
+
+    Random choices are derived from the seed, the request and the number of times it has
+    been replayed, so the same requests experience the same conditions on every run
+    regardless of the order in which concurrent requests are made.
+    """
+
+    latency: float = 0.0
+    """Fixed time in seconds added to every response."""
+    recorded_latency: float = 0.0
+    """Factor of the recorded response time added to every response, e.g. 1 to replay at the original speed."""
+    jitter: float = 0.0
+    """Fraction by which the latency of each response is randomly varied, e.g. 0.5 for between 0.5 and 1.5 times."""
+    error_rate: float = 0.0
+    """Probability of each response being replaced with an `error_status` error."""
+    error_status: int = 503
+    """The HTTP status of injected errors."""
+    seed: int = 0
+    """Seed for the random choices."""
+
+    def is_empty(self) -> bool:
+        """Check if no conditions are simulated.
+
+        Returns:
+            True if responses are replayed instantly and without errors
+        """
+        return self.latency == 0 and self.recorded_latency == 0 and self.error_rate == 0
+
+
+@dataclass
+class _IndexEntry:
+    segment: int
+    offset: int
+    length: int
+
+
+class ResponseArchive:
+    """An append-only archive of raw HTTP responses.
+
+    The archive is a directory of segment files and an offset index. Each response is
+    stored as a separately zlib-compressed record (a JSON line of metadata followed by the
+    body) appended to the current segment, so any response can be read without decompressing
+    the rest of the segment. The index is a JSON Lines file with the request method and URL
+    of each record, and its segment, offset and length. If a URL is archived more than once,
+    the latest response is used.
+
+    Appending is thread-safe, and an existing archive can be reopened to append further responses.
+    """
+
+    def __init__(self, path: Path, segment_size: int = SEGMENT_SIZE) -> None:
+        """Open or create an archive.
+
+        Args:
+            path: the archive directory, created if it does not exist
+            segment_size: the size in bytes after which a new segment is started
+        """
+        self.path = path
+        self.segment_size = segment_size
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._index: dict[tuple[str, str], _IndexEntry] = {}
+        self._segment = 0
+        self._load_index()
+
+    def _load_index(self) -> None:
+        index_path = self.path / INDEX_FILE_NAME
+        if not index_path.is_file():
+            return
+        with open(index_path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip() == "":
+                    continue
+                record = json.loads(line)
+                self._index[(record["method"], record["url"])] = _IndexEntry(
+                    record["segment"], record["offset"], record["length"]
+                )
+                self._segment = max(self._segment, record["segment"])
+
+    def __len__(self) -> int:
+        """The number of distinct requests in the archive."""
+        return len(self._index)
+
+    def __contains__(self, key: tuple[str, str]) -> bool:
+        """Check if a request is in the archive.
+
+        Args:
+            key: a tuple of the HTTP method and URL of the request
+        """
+        method, url = key
+        return (method.upper(), url) in self._index
+
+    def append(
+        self,
+        method: str,
+        url: str,
+        status: int,
+        reason: str,
+        headers: "Mapping[str, str]",
+        body: bytes,
+        elapsed: Optional[float] = None,
+    ) -> None:
+        """Append a response to the archive.
+
+        Args:
+            method: the HTTP method of the request
+            url: the requested URL
+            status: the HTTP status of the response
+            reason: the HTTP status reason phrase
+            headers: the response headers
+            body: the decoded response body
+            elapsed: the time in seconds the request took to respond
+        """
+        meta: dict[str, Any] = {
+            "status": status,
+            "reason": reason,
+            "headers": {
+                key: value
+                for key, value in headers.items()
+                if key.lower() not in _TRANSFER_HEADERS
+            },
+        }
+        if elapsed is not None:
+            meta["elapsed"] = elapsed
+        record = zlib.compress(json.dumps(meta).encode("utf-8") + b"\n" + body)
+
+        with self._lock:
+            segment_path = self.path / _segment_name(self._segment)
+            if (
+                segment_path.is_file()
+                and segment_path.stat().st_size + len(record) > self.segment_size
+                and segment_path.stat().st_size > 0
+            ):
+                self._segment += 1
+                segment_path = self.path / _segment_name(self._segment)
+
+            with open(segment_path, "ab") as f:
+                offset = f.tell()
+                f.write(record)
+
+            entry = _IndexEntry(self._segment, offset, len(record))
+            with open(self.path / INDEX_FILE_NAME, "a", encoding="utf-8") as f:
+                f.write(
+                    json.dumps(
+                        {
+                            "method": method.upper(),
+                            "url": url,
+                            "status": status,
+                            "segment": entry.segment,
+                            "offset": entry.offset,
+                            "length": entry.length,
+                        }
+                    )
+                    + "\n"
+                )
+            self._index[(method.upper(), url)] = entry
+
+    def get(self, method: str, url: str) -> Optional[ArchivedResponse]:
+        """Read a response from the archive.
+
+        Args:
+            method: the HTTP method of the request
+            url: the requested URL
+
+        Returns:
+            The most recently archived response to the request, or None if it is not in the archive
+        """
+        entry = self._index.get((method.upper(), url))
+        if entry is None:
+            return None
+
+        with open(self.path / _segment_name(entry.segment), "rb") as f:
+            f.seek(entry.offset)
+            record = zlib.decompress(f.read(entry.length))
+
+        meta_line, body = record.split(b"\n", 1)
+        meta = json.loads(meta_line)
+        return ArchivedResponse(
+            method=method.upper(),
+            url=url,
+            status=meta["status"],
+            reason=meta["reason"],
+            headers=meta["headers"],
+            body=body,
+            elapsed=meta.get("elapsed"),
+        )
+
+
+class ArchivingAdapter(HTTPAdapter):
+    """Transport adapter which archives every response which is not streamed.
+
+    Archiving can be paused for requests sent by a thread, e.g. to archive only one of several
+    duplicate requests once it is known which to keep.
+    """
+
+    def __init__(self, archive: ResponseArchive, **kwargs: Any) -> None:
+        """Create an archiving adapter.
+
+        Args:
+            archive: the archive to append responses to
+            **kwargs: arguments for [`HTTPAdapter`][requests.adapters.HTTPAdapter]
+        """
+        super().__init__(**kwargs)
+        self.archive = archive
+        self._local = threading.local()
+
+    @contextmanager
+    def paused(self) -> Generator[None, None, None]:
+        """Don't archive responses to requests sent by this thread for the duration of the context.
+
+        Yields:
+            Once archiving is paused
+        """
+        self._local.paused = True
+        try:
+            yield
+        finally:
+            self._local.paused = False
+
+    def send(  # type: ignore[override]
+        self, request: "PreparedRequest", stream: bool = False, **kwargs: Any
+    ) -> "Response":
+        """Send a request, archiving the response.
+
+        Args:
+            request: the request to send
+            stream: whether to stream the response body. Streamed responses are not archived.
+            **kwargs: arguments for [`HTTPAdapter.send`][requests.adapters.HTTPAdapter.send]
+
+        Returns:
+            The response
+        """
+        response = super().send(request, stream=stream, **kwargs)
+        if not stream and not getattr(self._local, "paused", False):
+            self._append(response)
+        return response
+
+    def record(self, response: "Response") -> None:
+        """Archive a response, and any redirects leading to it, which was sent while paused.
+
+        Args:
+            response: the response
+        """
+        for r in [*response.history, response]:
+            self._append(r)
+
+    def _append(self, response: "Response") -> None:
+        request = response.request
+        if request.method is None or request.url is None:
+            return
+        self.archive.append(
+            request.method,
+            request.url,
+            response.status_code,
+            response.reason or "",
+            response.headers,
+            response.content,
+            elapsed=response.elapsed.total_seconds(),
+        )
+
+
+class ReplayAdapter(HTTPAdapter):
+    """Transport adapter which serves responses from an archive without using the network.
+
+    If [`ReplayConditions`][wpextract.download.archive.ReplayConditions] are given, latency and
+    errors are simulated, and errors are retried according to the adapter's `max_retries`.
+    """
+
+    def __init__(
+        self,
+        archive: ResponseArchive,
+        conditions: Optional[ReplayConditions] = None,
+        **kwargs: Any,
+    ) -> None:
+        """Create a replay adapter.
+
+        Args:
+            archive: the archive to read responses from
+            conditions: network conditions to simulate, None to replay instantly
+            **kwargs: arguments for [`HTTPAdapter`][requests.adapters.HTTPAdapter]
+        """
+        super().__init__(**kwargs)
+        self.archive = archive
+        self.conditions = conditions
+        self._replays: Counter[tuple[str, str]] = Counter()
+        self._lock = threading.Lock()
+
+    def send(  # type: ignore[override]
+        self, request: "PreparedRequest", stream: bool = False, **kwargs: Any
+    ) -> "Response":
+        """Serve a request from the archive.
+
+        Args:
+            request: the request to serve
+            stream: unused, the body is always available immediately
+            **kwargs: unused
+
+        Raises:
+            ResponseNotArchived: if the request is not in the archive
+
+        Returns:
+            The archived response
+        """
+        method = request.method or "GET"
+        url = request.url or ""
+        archived = self.archive.get(method, url)
+        if archived is None:
+            logging.error(f'Request for "{url}" is not in the archive')
+            raise ResponseNotArchived(
+                f'{method} "{url}" is not in the archive', request=request
+            )
+        if self.conditions is None:
+            return self.build_response(request, self._to_raw(archived))
+
+        retries: Retry = self.max_retries
+        while True:
+            raw = self._simulate(archived, self.conditions, retries)
+            if not retries.is_retry(method, raw.status):
+                break
+            try:
+                retries = retries.increment(method, url, response=raw)
+            except MaxRetryError:
+                break
+            retries.sleep(raw)
+        raw.retries = retries
+        return self.build_response(request, raw)
+
+    def _simulate(
+        self, archived: ArchivedResponse, conditions: ReplayConditions, retries: Retry
+    ) -> HTTPResponse:
+        with self._lock:
+            key = (archived.method, archived.url)
+            attempt = self._replays[key]
+            self._replays[key] += 1
+        rng = random.Random(
+            f"{conditions.seed}:{archived.method}:{archived.url}:{attempt}"
+        )
+
+        latency = conditions.latency
+        if archived.elapsed is not None:
+            latency += conditions.recorded_latency * archived.elapsed
+        latency *= rng.uniform(1 - conditions.jitter, 1 + conditions.jitter)
+        if latency > 0:
+            time.sleep(latency)
+
+        if rng.random() < conditions.error_rate:
+            return HTTPResponse(
+                body=io.BytesIO(b""),
+                headers={"Content-Length": "0"},
+                status=conditions.error_status,
+                reason="Injected Error",
+                preload_content=False,
+                decode_content=False,
+                retries=retries,
+            )
+        return self._to_raw(archived, retries)
+
+    @staticmethod
+    def _to_raw(
+        archived: ArchivedResponse, retries: Optional[Retry] = None
+    ) -> HTTPResponse:
+        headers = dict(archived.headers)
+        headers["Content-Length"] = str(len(archived.body))
+        return HTTPResponse(
+            body=io.BytesIO(archived.body),
+            headers=headers,
+            status=archived.status,
+            reason=archived.reason,
+            preload_content=False,
+            decode_content=False,
+            retries=retries,
+        )
@@ -0,0 +1,191 @@
+import json
+import logging
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Callable, Optional
+from urllib.parse import urlsplit
+
+from tqdm.auto import tqdm
+
+from wpextract.download.requestsession import RequestSession
+from wpextract.download.scheduler import RequestScheduler
+from wpextract.downloader import WPDownloader
+
+BATCH_SUMMARY_FILE_NAME = "batch.json"
+"""Name of the file summarising the result of each site in a batch."""
+
+MEDIA_DIR_NAME = "media"
+"""Name of the directory within each site's output that media files are downloaded to."""
+
+
+@dataclass
+class SiteResult:
+    """The result of downloading a site in a batch."""
+
+    target: str
+    """The site URL."""
+    directory: str
+    """The name of the directory within the batch output containing the site's download."""
+    ok: bool
+    """Whether the download completed without raising an exception."""
+    error: Optional[str]
+    """The exception which ended the download, if any."""
+    elapsed_s: float
+    """The time taken to download the site."""
+    metrics: dict[str, Any]
+    """The [summary][wpextract.download.telemetry.RequestMetrics.summary] of the site's request metrics."""
+
+
+def read_targets(path: Path) -> list[str]:
+    """Read a list of targets from a file.
+
+    The file should contain one URL per line. Blank lines and lines starting with `#` are ignored.
+
+    Args:
+        path: the file to read
+
+    Returns:
+        The target URLs
+    """
+    with open(path, encoding="utf-8") as f:
+        lines = [line.strip() for line in f]
+    return [line for line in lines if line != "" and not line.startswith("#")]
+
+
+def site_directory_names(targets: list[str]) -> list[str]:
+    """Get unique directory names for targets.
+
+    Names are made from the host and path of the URL, with other characters replaced by
+    underscores, e.g. `example.org_blog` for `https://example.org/blog/`. If targets would
+    have the same name, a number is appended.
+
+    Args:
+        targets: the target URLs
+
+    Returns:
+        The directory name of each target
+    """
+    names = []
+    seen: set[str] = set()
+    for target in targets:
+        parts = urlsplit(target)
+        base = re.sub(r"[^A-Za-z0-9.-]+", "_", (parts.netloc + parts.path).strip("/"))
+        name = base
+        suffix = 2
+        while name in seen:
+            name = f"{base}-{suffix}"
+            suffix += 1
+        seen.add(name)
+        names.append(name)
+    return names
+
+
+def _download_site(
+    target: str,
+    site_path: Path,
+    data_types: list[str],
+    session: RequestSession,
+    media: bool,
+    json_prefix: Optional[str],
+) -> SiteResult:
+    start = time.monotonic()
+    error = None
+    try:
+        site_path.mkdir(parents=True, exist_ok=True)
+        downloader = WPDownloader(
+            target=target,
+            out_path=site_path,
+            data_types=data_types,
+            session=session,
+            json_prefix=json_prefix,
+        )
+        downloader.download()
+        if media:
+            media_path = site_path / MEDIA_DIR_NAME
+            media_path.mkdir(exist_ok=True)
+            downloader.download_media_files(session, media_path)
+    except Exception as e:
+        logging.exception(f"Failed to download {target}")
+        error = repr(e)
+
+    return SiteResult(
+        target=target,
+        directory=site_path.name,
+        ok=error is None,
+        error=error,
+        elapsed_s=time.monotonic() - start,
+        metrics=session.metrics.summary(),
+    )
+
+
+def _write_summary(out_path: Path, results: list[SiteResult]) -> None:
+    with open(out_path / BATCH_SUMMARY_FILE_NAME, "w", encoding="utf-8") as f:
+        json.dump([asdict(result) for result in results], f, indent=4)
+
+
+def download_batch(
+    targets: list[str],
+    out_path: Path,
+    data_types: list[str],
+    scheduler: RequestScheduler,
+    active_sites: int,
+    session_factory: Callable[[], RequestSession] = RequestSession,
+    media: bool = False,
+    json_prefix: Optional[str] = None,
+) -> list[SiteResult]:
+    """Download multiple sites under a shared request scheduler.
+
+    Up to `active_sites` sites are downloaded at once, each with its own session and in its own
+    subdirectory of `out_path` (see [`site_directory_names`][wpextract.download.batch.site_directory_names]).
+    All sessions share `scheduler`, which limits the total and per-host number of requests in
+    progress and interleaves requests fairly between sites. A failed site does not stop the batch.
+
+    A summary of the result and request metrics of each site is written to `batch.json` in `out_path`
+    as each site finishes.
+
+    Args:
+        targets: the site URLs
+        out_path: the directory to create site directories in
+        data_types: the types to download from each site
+        scheduler: the scheduler shared between sites
+        active_sites: the maximum number of sites to download at once
+        session_factory: function to create the session for each site
+        media: whether to also download media files, to a `media` directory within each site's directory
+        json_prefix: prefix to prepend to JSON file names
+
+    Returns:
+        The result of each site, in the order of `targets`
+    """
+    names = site_directory_names(targets)
+
+    def download_site(target: str, name: str) -> SiteResult:
+        session = session_factory()
+        session.scheduler = scheduler
+        return _download_site(
+            target, out_path / name, data_types, session, media, json_prefix
+        )
+
+    results: dict[int, SiteResult] = {}
+    with ThreadPoolExecutor(max_workers=active_sites) as executor:
+        futures = {
+            executor.submit(download_site, target, name): idx
+            for idx, (target, name) in enumerate(zip(targets, names))
+        }
+        for future in tqdm(
+            as_completed(futures), total=len(futures), unit="site", desc="Sites"
+        ):
+            result = future.result()
+            results[futures[future]] = result
+            if result.ok:
+                logging.info(
+                    f"Downloaded {result.target} in {result.elapsed_s:.0f}s "
+                    f"({result.metrics['requests']} requests, {result.metrics['failures']} failed)"
+                )
+            else:
+                logging.error(f"Failed to download {result.target}: {result.error}")
+            _write_summary(out_path, [results[idx] for idx in sorted(results)])
+
+    return [results[idx] for idx in range(len(targets))]
@@ -0,0 +1,139 @@
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+from typing import Optional
+
+from wpextract.download.media_index import MediaIndex
+
+BLOB_DIR_NAME = "blobs"
+"""Name of the directory in the media directory which contains the stored blobs."""
+
+
+def _hash_file(path: Path, chunk_size: int = 65536) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(chunk_size):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ContentStore:
+    """A content-addressed store of downloaded media files.
+
+    Each file is hashed with SHA-256 as it is downloaded, and stored once under its hash at
+    `blobs/ab/abcdef...` in the media directory. Downloading the same content again, even from a
+    different URL, does not store another copy. Files may be added from multiple threads.
+
+    The file at the usual path of each URL is then created as a hardlink to its blob. If the
+    filesystem does not support hardlinks, the hash of each URL must be recorded in a
+    [`MediaIndex`][wpextract.download.media_index.MediaIndex] to find its blob.
+    """
+
+    def __init__(self, root: Path, index: Optional[MediaIndex] = None) -> None:
+        """Create a store, or open an existing one.
+
+        Args:
+            root: the media directory
+            index: if set, the hash of each file is recorded in this index as it is added
+        """
+        self.root = root
+        self.blob_root = root / BLOB_DIR_NAME
+        self.index = index
+        self.duplicates = 0
+        """The number of files added whose content was already stored."""
+        self.bytes_saved = 0
+        """The total size of the files which were not stored again as they were duplicates."""
+        self.linked = True
+        """Whether files are being hardlinked to their blobs. Set to False if a link fails."""
+        self._lock = threading.Lock()
+
+    def blob_path(self, digest: str) -> Path:
+        """Get the path of a blob in the store.
+
+        Args:
+            digest: the hex SHA-256 hash of the blob
+
+        Returns:
+            The path the blob is stored at
+        """
+        return self.blob_root / digest[:2] / digest
+
+    def add(self, url: str, chunks: Iterable[bytes], link_path: Path) -> str:
+        """Store content downloaded from a URL.
+
+        The content is written to a temporary file while it is hashed, then moved into the
+        store, or discarded if a blob with the same hash already exists.
+
+        Args:
+            url: the URL the content was downloaded from
+            chunks: the content, read one chunk at a time
+            link_path: the path to hardlink to the blob
+
+        Returns:
+            The hex SHA-256 hash of the content
+        """
+        self.blob_root.mkdir(exist_ok=True)
+        digest = hashlib.sha256()
+        size = 0
+        fd, temp_name = tempfile.mkstemp(dir=self.blob_root, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                for chunk in chunks:
+                    digest.update(chunk)
+                    size += len(chunk)
+                    f.write(chunk)
+
+            hex_digest = digest.hexdigest()
+            blob_path = self.blob_path(hex_digest)
+            with self._lock:
+                if blob_path.exists():
+                    self.duplicates += 1
+                    self.bytes_saved += size
+                else:
+                    blob_path.parent.mkdir(exist_ok=True)
+                    os.replace(temp_name, blob_path)
+        finally:
+            if os.path.exists(temp_name):
+                os.remove(temp_name)
+
+        if self.index is not None:
+            self.index.set_hash(url, hex_digest)
+        self._link(blob_path, link_path)
+        return hex_digest
+
+    def _link(self, blob_path: Path, link_path: Path) -> None:
+        if not self.linked:
+            return
+        if link_path.exists():
+            link_path.unlink()
+        try:
+            os.link(blob_path, link_path)
+        except OSError as e:
+            logging.warning(
+                f"Could not hardlink media files to their blobs ({e}), the manifest must be used to find them"
+            )
+            self.linked = False
+
+    def blobs(self) -> Iterator[Path]:
+        """Iterate over the blobs in the store.
+
+        Yields:
+            The path of each blob
+        """
+        if not self.blob_root.is_dir():
+            return
+        for path in sorted(self.blob_root.glob("*/*")):
+            if path.is_file():
+                yield path
+
+    def verify(self) -> list[Path]:
+        """Check the content of every blob in the store matches its hash.
+
+        Returns:
+            The paths of blobs whose content does not match their name
+        """
+        return [path for path in self.blobs() if _hash_file(path) != path.name]
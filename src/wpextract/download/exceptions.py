@@ -1,3 +1,6 @@
+import requests
+
+
 class NoWordpressApi(Exception):
     """No API is available at the given URL."""
 
@@ -14,3 +17,9 @@ class NSNotFoundException(Exception):
     """The specified namespace does not exist."""
 
     pass
+
+
+class ResponseNotArchived(requests.ConnectionError):
+    """A request was made in replay mode which is not in the response archive."""
+
+    pass
@@ -1,13 +1,15 @@
-import copy
-import html
 import json
+from collections.abc import Iterable, Iterator
 from pathlib import Path
 from typing import Any, Optional, Union
 from urllib import parse as urlparse
 
 from tqdm.auto import tqdm
 
+from wpextract.download.content_store import ContentStore
 from wpextract.download.requestsession import RequestSession
+from wpextract.util.file import UNESCAPE_FIELDS
+from wpextract.util.html import unescape_fields
 
 
 class Exporter:
@@ -18,52 +20,92 @@ class Exporter:
 
     @staticmethod
     def download_media(
-        session: RequestSession, media: list[str], out_path: Path
+        session: RequestSession,
+        media: Iterable[str],
+        out_path: Path,
+        total: Optional[int] = None,
+        store: Optional[ContentStore] = None,
     ) -> int:
         """Downloads the media files based on the given URLs.
 
         Args:
             session: the request session to use
-            media: the URLs as a list
+            media: the URLs, which are read one at a time
             out_path: the path to the folder where the files are being saved, it is assumed as existing
+            total: the number of URLs, for progress display if `media` has no length
+            store: if set, store each unique file once in this content-addressed store, and hardlink each file to it
 
         Returns:
             the number of files written
         """
         files_number = 0
-        for m in tqdm(media, unit="media"):
-            r = session.do_request("get", m, stream=True)
-            if r.status_code == 200:
-                http_path = urlparse.urlparse(m).path.split("/")
-                local_path = out_path
-                if len(http_path) > 1:
-                    for el in http_path[:-1]:
-                        local_path = local_path / el
-                        local_path.mkdir(exist_ok=True)
-                local_path = local_path / http_path[-1]
-                with open(local_path, "wb") as f:
-                    i = 0
-                    content_size = int(r.headers.get("Content-Length", -1))
-                    chunks_pbar = None
-                    if content_size > 0:
-                        chunks_pbar = tqdm(
-                            total=content_size,
-                            unit="B",
-                            unit_scale=True,
-                            desc=http_path[-1],
-                            leave=False,
-                        )
-                    for chunk in r.iter_content(Exporter.CHUNK_SIZE):
-                        if chunks_pbar is not None:
-                            chunks_pbar.update(Exporter.CHUNK_SIZE)
-                        f.write(chunk)
-                        i += 1
-                    if chunks_pbar is not None:
-                        chunks_pbar.update(content_size - chunks_pbar.n)
-                        chunks_pbar.close()
+        for m in tqdm(media, unit="media", total=total):
+            if Exporter.download_media_file(session, m, out_path, store=store):
                 files_number += 1
         return files_number
 
+    @staticmethod
+    def download_media_file(
+        session: RequestSession,
+        url: str,
+        out_path: Path,
+        store: Optional[ContentStore] = None,
+        progress: bool = True,
+    ) -> bool:
+        """Downloads a single media file to the path of its URL within the output folder.
+
+        Args:
+            session: the request session to use
+            url: the URL of the file
+            out_path: the path to the folder where the files are being saved, it is assumed as existing
+            store: if set, store the file in this content-addressed store, and hardlink it to the store
+            progress: whether to display the progress of the file
+
+        Returns:
+            whether the file was written
+        """
+        r = session.do_request("get", url, stream=True)
+        if r.status_code != 200:
+            return False
+        http_path = urlparse.urlparse(url).path.split("/")
+        local_path = out_path
+        if len(http_path) > 1:
+            for el in http_path[:-1]:
+                local_path = local_path / el
+                local_path.mkdir(exist_ok=True)
+        local_path = local_path / http_path[-1]
+        content_size = int(r.headers.get("Content-Length", -1))
+        chunks_pbar = None
+        if content_size > 0 and progress:
+            chunks_pbar = tqdm(
+                total=content_size,
+                unit="B",
+                unit_scale=True,
+                desc=http_path[-1],
+                leave=False,
+            )
+        chunks = Exporter._iter_chunks(r.iter_content(Exporter.CHUNK_SIZE), chunks_pbar)
+        if store is not None:
+            store.add(url, chunks, local_path)
+        else:
+            with open(local_path, "wb") as f:
+                for chunk in chunks:
+                    f.write(chunk)
+        if chunks_pbar is not None:
+            chunks_pbar.update(content_size - chunks_pbar.n)
+            chunks_pbar.close()
+        return True
+
+    @staticmethod
+    def _iter_chunks(
+        chunks: Iterable[bytes],
+        chunks_pbar: Optional[tqdm],  # type: ignore[type-arg]
+    ) -> Iterator[bytes]:
+        for chunk in chunks:
+            if chunks_pbar is not None:
+                chunks_pbar.update(Exporter.CHUNK_SIZE)
+            yield chunk
+
     @staticmethod
     def setup_export(
         vlist: list[dict[str, Any]], parameters_to_unescape: list[Union[str, list[str]]]
@@ -81,51 +123,11 @@ class Exporter:
         Returns:
             the list of objects ready to be exported
         """
-        exported_list = []
-
-        for el in vlist:
-            if el is not None:
-                # First copy the object
-                exported_el = copy.deepcopy(el)
-                # Look for parameters to HTML unescape
-                for key in parameters_to_unescape:
-                    if type(key) is str:  # If the parameter is at the root
-                        exported_el[key] = html.unescape(exported_el[key])
-                    elif type(key) is list:  # If the parameter is nested
-                        selected: Optional[Union[dict[str, Any], str]] = exported_el
-                        siblings = []
-                        fullpath: dict[str, Any] = {}
-                        # We look for the leaf first, not forgetting sibling branches for rebuilding the tree later
-                        for k in key:
-                            if type(selected) is dict and k in selected.keys():
-                                sib = {}
-                                for e in selected.keys():
-                                    if e != k:
-                                        sib[e] = selected[e]
-                                selected = selected[k]
-                                siblings.append(sib)
-                            else:
-                                selected = None
-                                break
-                        # If we can unescape the parameter, we do it and rebuild the tree starting from the leaf
-                        if selected is not None and type(selected) is str:
-                            selected = html.unescape(selected)
-                            key.reverse()
-                            fullpath[key[0]] = selected
-                            s = len(siblings) - 1
-                            for e in siblings[s].keys():
-                                fullpath[e] = siblings[s][e]
-                            for k in key[1:]:
-                                fullpath = {k: fullpath}
-                                s -= 1
-                                for e in siblings[s].keys():
-                                    fullpath[e] = siblings[s][e]
-                            key.reverse()
-                            exported_el[key[0]] = fullpath[key[0]]
-                # The resulting element is appended to the list of exported elements
-                exported_list.append(exported_el)
-
-        return exported_list
+        return [
+            unescape_fields(el, parameters_to_unescape)
+            for el in vlist
+            if el is not None
+        ]
 
     @staticmethod
     def write_file(filename: Path, data: Any) -> None:
@@ -154,10 +156,7 @@ class Exporter:
         Returns:
             the length of the list written to the file
         """
-        exported_posts = Exporter.setup_export(
-            posts,
-            [["title", "rendered"], ["content", "rendered"], ["excerpt", "rendered"]],
-        )
+        exported_posts = Exporter.setup_export(posts, UNESCAPE_FIELDS["posts"])
 
         Exporter.write_file(filename, exported_posts)
         return len(exported_posts)
@@ -222,15 +221,7 @@ class Exporter:
         Returns:
             the length of the list written to the file
         """
-        exported_pages = Exporter.setup_export(
-            pages,
-            [
-                ["guid", "rendered"],
-                ["title", "rendered"],
-                ["content", "rendered"],
-                ["excerpt", "rendered"],
-            ],
-        )
+        exported_pages = Exporter.setup_export(pages, UNESCAPE_FIELDS["pages"])
 
         Exporter.write_file(filename, exported_pages)
         return len(exported_pages)
@@ -246,15 +237,7 @@ class Exporter:
         Returns:
             the length of the list written to the file
         """
-        exported_media = Exporter.setup_export(
-            media,
-            [
-                ["guid", "rendered"],
-                ["title", "rendered"],
-                ["description", "rendered"],
-                ["caption", "rendered"],
-            ],
-        )
+        exported_media = Exporter.setup_export(media, UNESCAPE_FIELDS["media"])
 
         Exporter.write_file(filename, exported_media)
         return len(exported_media)
@@ -273,10 +256,7 @@ class Exporter:
         Returns:
             the length of the list written to the file
         """
-        exported_comments = Exporter.setup_export(
-            comments,
-            [["content", "rendered"]],
-        )
+        exported_comments = Exporter.setup_export(comments, UNESCAPE_FIELDS["comments"])
 
         Exporter.write_file(filename, exported_comments)
         return len(exported_comments)
@@ -0,0 +1,90 @@
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Optional
+
+from wpextract.download.utils import WP_DATE_FORMAT
+
+SUPPORTED_FILTERS = {
+    "posts": {
+        "after",
+        "before",
+        "author",
+        "categories",
+        "tags",
+        "search",
+        "status",
+        "lang",
+    },
+    "pages": {"after", "before", "author", "search", "status", "lang"},
+    "media": {"after", "before", "author", "search", "lang"},
+}
+"""The filters supported by the list endpoint of each filterable type."""
+
+
+@dataclass
+class DownloadFilter:
+    """Filters applied by the server to the posts, pages and media lists.
+
+    Filters are only applied to the types whose endpoint supports them, see
+    [`SUPPORTED_FILTERS`][wpextract.download.filters.SUPPORTED_FILTERS]. Other types are always
+    downloaded in full.
+    """
+
+    after: Optional[datetime] = None
+    """Only include items published after this date, in the site's timezone."""
+    before: Optional[datetime] = None
+    """Only include items published before this date, in the site's timezone."""
+    categories: list[int] = field(default_factory=list)
+    """Only include posts in any of these category IDs."""
+    tags: list[int] = field(default_factory=list)
+    """Only include posts with any of these tag IDs."""
+    author: list[int] = field(default_factory=list)
+    """Only include items by any of these user IDs."""
+    search: Optional[str] = None
+    """Only include items matching this search string."""
+    status: list[str] = field(default_factory=list)
+    """Only include items with any of these statuses. Statuses other than `publish` usually require authentication."""
+    lang: Optional[str] = None
+    """Only include items in this language. Supported by multilingual plugins such as Polylang."""
+
+    def _values(self) -> dict[str, Optional[str]]:
+        return {
+            "after": self.after.strftime(WP_DATE_FORMAT) if self.after else None,
+            "before": self.before.strftime(WP_DATE_FORMAT) if self.before else None,
+            "categories": ",".join(map(str, self.categories)) or None,
+            "tags": ",".join(map(str, self.tags)) or None,
+            "author": ",".join(map(str, self.author)) or None,
+            "search": self.search,
+            "status": ",".join(self.status) or None,
+            "lang": self.lang,
+        }
+
+    def is_empty(self) -> bool:
+        """Check if no filters are set.
+
+        Returns:
+            True if no filters are set
+        """
+        return all(value is None for value in self._values().values())
+
+    def to_params(self, type_name: str) -> dict[str, str]:
+        """Get the query parameters for a type's list endpoint.
+
+        A warning is logged for any set filters which the type does not support.
+
+        Args:
+            type_name: the name of the type, e.g. `posts`
+
+        Returns:
+            The query parameters to add to list requests. Empty if the type does not support filtering.
+        """
+        supported = SUPPORTED_FILTERS.get(type_name, set())
+        values = {key: value for key, value in self._values().items() if value}
+        unsupported = sorted(set(values.keys()) - supported)
+        if len(supported) > 0 and len(unsupported) > 0:
+            logging.warning(
+                f"Filters not supported for {type_name} will not be applied: "
+                + ", ".join(unsupported)
+            )
+        return {key: value for key, value in values.items() if key in supported}
@@ -0,0 +1,94 @@
+import threading
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    from wpextract.download.telemetry import RequestMetrics
+
+
+class HedgePolicy:
+    """Decides when a slow request should be hedged with a duplicate.
+
+    A request is hedged once it has taken longer than a percentile of the recent latencies of
+    its endpoint (see [`RequestMetrics.latency_percentile`][wpextract.download.telemetry.RequestMetrics.latency_percentile]).
+    Endpoints with too few recorded requests are never hedged.
+
+    Hedges are limited by a budget. Every request adds `budget` tokens, up to a maximum of
+    `burst`, and every hedge spends one token, so over a long crawl at most approximately
+    `budget` of requests are hedged. The budget may be shared between sessions, and is
+    thread-safe.
+    """
+
+    def __init__(
+        self,
+        budget: float = 0.05,
+        percentile: float = 95,
+        min_samples: int = 20,
+        min_delay: float = 0.05,
+        burst: float = 10,
+    ) -> None:
+        """Create a hedging policy.
+
+        Args:
+            budget: the fraction of requests which may be hedged, between 0 and 1
+            percentile: the percentile of endpoint latency after which a request is hedged
+            min_samples: the minimum number of latencies recorded for the endpoint before its requests are hedged
+            min_delay: the minimum time in seconds before hedging a request
+            burst: the maximum number of hedges which can be saved up
+
+        Raises:
+            ValueError: if `budget` is not between 0 and 1
+        """
+        if not 0 <= budget <= 1:
+            raise ValueError("The hedge budget must be between 0 and 1")
+        self.budget = budget
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.min_delay = min_delay
+        self.burst = burst
+        self.hedges = 0
+        self._tokens = 0.0
+        self._lock = threading.Lock()
+
+    def delay(self, metrics: "RequestMetrics", url: str) -> Optional[float]:
+        """Get the time after which a request should be hedged.
+
+        Every call counts as a request towards the budget.
+
+        Args:
+            metrics: the metrics of previous requests
+            url: the URL to be requested
+
+        Returns:
+            The delay in seconds, or None if the request should not be hedged
+        """
+        with self._lock:
+            self._tokens = min(self._tokens + self.budget, self.burst)
+
+        latency = metrics.latency_percentile(
+            url, self.percentile, min_samples=self.min_samples
+        )
+        if latency is None:
+            return None
+        return max(latency, self.min_delay)
+
+    def has_budget(self) -> bool:
+        """Check whether the budget has a token for a hedge, without spending it.
+
+        Returns:
+            True if a hedge could currently be made
+        """
+        with self._lock:
+            return self._tokens >= 1
+
+    def try_acquire(self) -> bool:
+        """Spend a token from the budget to make a hedge.
+
+        Returns:
+            True if the hedge may be made, False if the budget is exhausted
+        """
+        with self._lock:
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            self.hedges += 1
+            return True
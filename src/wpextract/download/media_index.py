@@ -0,0 +1,150 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import weakref
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+from typing import Any, Optional
+
+from wpextract.download.media_size import MediaSize, select_rendition
+from wpextract.download.wpapi import WPObject
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS media (
+    id INTEGER,
+    source_url TEXT NOT NULL,
+    slug TEXT,
+    url TEXT NOT NULL,
+    size TEXT NOT NULL,
+    sha256 TEXT
+);
+CREATE INDEX IF NOT EXISTS media_url ON media (url);
+"""
+
+_MANIFEST_COLUMNS = ("id", "slug", "source_url", "url", "size")
+
+
+def _remove_file(path: str) -> None:
+    if os.path.exists(path):
+        os.remove(path)
+
+
+class MediaIndex:
+    """A compact on-disk index of the media needed to download media files.
+
+    Only the fields needed to download media files are kept, in an SQLite database. By
+    default, the database is a temporary file which is deleted when the index is closed
+    or garbage collected.
+
+    If a [`MediaSize`][wpextract.download.media_size.MediaSize] is given, the rendition of each
+    media file to download is chosen as media are added.
+
+    The index may be written to from multiple threads, e.g. to record hashes of files as they
+    are downloaded.
+    """
+
+    BATCH_SIZE = 1000
+    """The number of rows read from the database at a time."""
+
+    def __init__(
+        self, path: Optional[Path] = None, size: Optional[MediaSize] = None
+    ) -> None:
+        """Create an empty index.
+
+        Args:
+            path: the database file to use, a temporary file if not set
+            size: the rendition of each media file to download, the original file if not set
+        """
+        self.size = size
+        self._finalizer: Optional[weakref.finalize] = None
+        if path is None:
+            fd, temp_path = tempfile.mkstemp(prefix="wpextract-media-", suffix=".db")
+            os.close(fd)
+            self.path = Path(temp_path)
+            self._finalizer = weakref.finalize(self, _remove_file, temp_path)
+        else:
+            self.path = path
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+
+    def add(self, media: Iterable[WPObject]) -> int:
+        """Add media objects to the index.
+
+        Objects without a `source_url` are skipped.
+
+        Args:
+            media: media objects from the API
+
+        Returns:
+            The number of objects added
+        """
+        rows = [
+            (
+                m_item.get("id"),
+                m_item["source_url"],
+                m_item.get("slug"),
+                *select_rendition(m_item, self.size),
+            )
+            for m_item in media
+            if type(m_item) is dict and m_item.get("source_url")
+        ]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT INTO media (id, source_url, slug, url, size) VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+        return len(rows)
+
+    def set_hash(self, url: str, digest: str) -> None:
+        """Record the hash of the content downloaded for a URL.
+
+        Args:
+            url: the URL of the chosen rendition of one or more media objects
+            digest: the hex SHA-256 hash of the content
+        """
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE media SET sha256 = ? WHERE url = ?", (digest, url)
+            )
+
+    def __len__(self) -> int:
+        """The number of media in the index."""
+        return int(self._conn.execute("SELECT COUNT(*) FROM media").fetchone()[0])
+
+    def _rows(self, columns: str) -> Iterator[tuple[Any, ...]]:
+        cursor = self._conn.execute(f"SELECT {columns} FROM media ORDER BY rowid")
+        while True:
+            rows = cursor.fetchmany(MediaIndex.BATCH_SIZE)
+            if len(rows) == 0:
+                return
+            yield from rows
+
+    def urls(self) -> Iterator[str]:
+        """Iterate over the URLs of the media to download, in the order they were added.
+
+        Yields:
+            The URL of the chosen rendition of each media object
+        """
+        for (url,) in self._rows("url"):
+            yield url
+
+    def entries(self, hashes: bool = False) -> Iterator[dict[str, Any]]:
+        """Iterate over the media and the rendition chosen for each, in the order they were added.
+
+        Args:
+            hashes: whether to include the `sha256` hash recorded with [`set_hash`][wpextract.download.media_index.MediaIndex.set_hash]
+
+        Yields:
+            A dictionary of the `id`, `slug`, `source_url`, chosen `url` and `size` name of each media object
+        """
+        columns = (*_MANIFEST_COLUMNS, "sha256") if hashes else _MANIFEST_COLUMNS
+        for row in self._rows(", ".join(columns)):
+            yield dict(zip(columns, row))
+
+    def close(self) -> None:
+        """Close the database, deleting it if it is a temporary file."""
+        self._conn.close()
+        if self._finalizer is not None:
+            self._finalizer()
@@ -0,0 +1,72 @@
+import logging
+from collections import deque
+from collections.abc import Iterable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Optional
+
+from tqdm.auto import tqdm
+
+from wpextract.download.requestsession import HTTPError, RequestSession
+
+InventoryEntry = dict[str, Any]
+
+
+def _head(session: RequestSession, url: str) -> InventoryEntry:
+    entry: InventoryEntry = {
+        "status": None,
+        "content_length": None,
+        "content_type": None,
+        "last_modified": None,
+    }
+    try:
+        response = session.head(url)
+    except HTTPError as e:
+        entry["status"] = e.status_code
+        return entry
+    except Exception as e:
+        # Connection errors only affect this file
+        logging.warning(f'Failed to fetch "{url}": {e!r}')
+        entry["error"] = type(e).__name__
+        return entry
+
+    entry["status"] = response.status_code
+    content_length = response.headers.get("Content-Length")
+    if content_length is not None and content_length.isdigit():
+        entry["content_length"] = int(content_length)
+    entry["content_type"] = response.headers.get("Content-Type")
+    entry["last_modified"] = response.headers.get("Last-Modified")
+    return entry
+
+
+def inventory_media(
+    session: RequestSession,
+    urls: Iterable[str],
+    workers: int = 1,
+    total: Optional[int] = None,
+) -> Iterator[InventoryEntry]:
+    """Check the availability, size and type of media files without downloading them.
+
+    A `HEAD` request is made for each URL, with up to `workers` requests at a time. The workers
+    share the session's wait (see [`RequestWait`][wpextract.download.requestsession.RequestWait]),
+    so requests are not made more often than they would be by a single worker. URLs are read
+    lazily, so only a small number are held in memory at once.
+
+    Args:
+        session: the request session to use
+        urls: the URLs of the media files
+        workers: the number of requests to make concurrently
+        total: the number of URLs, for progress display if `urls` has no length
+
+    Yields:
+        For each URL in order, a dictionary of the response `status` (None if the request failed, with the exception name as `error`), and the `content_length`, `content_type` and `last_modified` headers, which are None if not sent
+    """
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending: deque[tuple[str, Future[InventoryEntry]]] = deque()
+        for url in tqdm(urls, unit="media", total=total):
+            pending.append((url, executor.submit(_head, session, url)))
+            if len(pending) >= workers * 2:
+                done_url, future = pending.popleft()
+                yield {"url": done_url, **future.result()}
+        while pending:
+            done_url, future = pending.popleft()
+            yield {"url": done_url, **future.result()}
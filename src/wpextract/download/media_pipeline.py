@@ -0,0 +1,148 @@
+import logging
+import threading
+from collections.abc import Iterable
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from types import TracebackType
+from typing import Optional
+
+from tqdm.auto import tqdm
+
+from wpextract.download.content_store import ContentStore
+from wpextract.download.exporter import Exporter
+from wpextract.download.requestsession import HTTPError, RequestSession
+
+
+class MediaPipeline:
+    """Downloads media files in the background while the media list is still being crawled.
+
+    URLs are submitted as each page of the media list arrives (see the `on_page` argument of
+    [`WPApi.crawl_pages`][wpextract.download.wpapi.WPApi.crawl_pages]), and downloaded by a pool
+    of worker threads. Each URL is only downloaded once, however many times it is submitted.
+
+    Requests are made with the same session as the crawl, so they share its retries and any
+    [`RequestScheduler`][wpextract.download.scheduler.RequestScheduler] limiting concurrency. The
+    session's wait is shared by all workers and the crawl (see
+    [`RequestWait`][wpextract.download.requestsession.RequestWait]), so adding workers does not
+    increase the rate of requests beyond one per wait.
+
+    Files which fail with an HTTP error (e.g. a 404) are logged and counted in `failed`, and the
+    other files are still downloaded. Any other error (e.g. failing to write a file) stops the
+    pipeline.
+
+    The pipeline should be used as a context manager, or [`close`][wpextract.download.media_pipeline.MediaPipeline.close]
+    called, to wait for the downloads to finish.
+    """
+
+    def __init__(
+        self,
+        session: RequestSession,
+        dest: Path,
+        workers: int = 1,
+        store: Optional[ContentStore] = None,
+    ) -> None:
+        """Start a pipeline.
+
+        Args:
+            session: the request session to use
+            dest: destination directory for media
+            workers: the number of media files to download concurrently
+            store: if set, store files in this content-addressed store
+        """
+        self.session = session
+        self.dest = dest
+        self.store = store
+        self.downloaded = 0
+        """The number of files downloaded so far."""
+        self.failed = 0
+        """The number of files which could not be downloaded due to an HTTP error."""
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="media"
+        )
+        self._seen: set[str] = set()
+        self._lock = threading.Lock()
+        self._error: Optional[BaseException] = None
+        self._pbar = tqdm(unit="media", total=0)
+
+    def submit(self, urls: Iterable[str]) -> None:
+        """Queue media files to download.
+
+        Once downloading a file has failed with an error other than an HTTP error, further files
+        are not downloaded, and the error is raised by [`close`][wpextract.download.media_pipeline.MediaPipeline.close].
+
+        Args:
+            urls: the URLs of the files. URLs which have already been submitted are skipped.
+        """
+        with self._lock:
+            new_urls = [url for url in urls if url not in self._seen]
+            self._seen.update(new_urls)
+            self._pbar.total = len(self._seen)
+            self._pbar.refresh()
+        for url in new_urls:
+            self._executor.submit(self._download, url).add_done_callback(self._on_done)
+
+    def _download(self, url: str) -> bool:
+        if self._error is not None:
+            return False
+        try:
+            return Exporter.download_media_file(
+                self.session, url, self.dest, store=self.store, progress=False
+            )
+        except HTTPError as e:
+            # Only affects this file
+            logging.warning(f'Failed to download "{url}": {e!r}')
+            with self._lock:
+                self.failed += 1
+            return False
+
+    def _on_done(self, future: "Future[bool]") -> None:
+        with self._lock:
+            error = future.exception()
+            if error is not None:
+                if self._error is None:
+                    self._error = error
+                return
+            if future.result():
+                self.downloaded += 1
+            self._pbar.update(1)
+
+    def __len__(self) -> int:
+        """The number of unique URLs submitted."""
+        return len(self._seen)
+
+    def close(self) -> int:
+        """Wait for all submitted files to be downloaded.
+
+        Raises:
+            Exception: the first error, other than an HTTP error, raised while downloading a file
+
+        Returns:
+            The number of files downloaded
+        """
+        self._executor.shutdown(wait=True)
+        self._pbar.close()
+        if self._error is not None:
+            logging.error("Error while downloading media files")
+            raise self._error
+        return self.downloaded
+
+    def __enter__(self) -> "MediaPipeline":
+        """Use the pipeline as a context manager.
+
+        Returns:
+            The pipeline
+        """
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[type[BaseException]],
+        exc_val: Optional[BaseException],
+        exc_tb: Optional[TracebackType],
+    ) -> None:
+        """Wait for downloads to finish, raising any error unless one is already being raised."""
+        if exc_type is None:
+            self.close()
+            return
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        self._pbar.close()
@@ -0,0 +1,114 @@
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from wpextract.download.wpapi import WPObject
+
+FULL_SIZE = "full"
+"""Name of the original rendition of a media file, at `source_url`."""
+
+
+def _rendition_px(size: Any) -> Optional[int]:
+    if type(size) is not dict:
+        return None
+    width, height = size.get("width"), size.get("height")
+    if type(width) is not int or type(height) is not int:
+        return None
+    return max(width, height)
+
+
+@dataclass(frozen=True)
+class MediaSize:
+    """A choice of which rendition of each media file to download.
+
+    WordPress generates renditions of uploaded images at several sizes, which are listed in
+    the `media_details.sizes` field of media objects. Either a named size (such as `large`) or a
+    maximum dimension can be chosen. If no rendition matches, or the media has no renditions
+    (e.g. it is not an image), the original file at `source_url` is used.
+    """
+
+    name: Optional[str] = None
+    """Choose the rendition with this name, e.g. `large` or `medium`."""
+    max_px: Optional[int] = None
+    """Choose the largest rendition whose width and height are at most this many pixels."""
+
+    def __post_init__(self) -> None:
+        """Check exactly one way of choosing is set.
+
+        Raises:
+            ValueError: if both or neither of `name` and `max_px` are set
+        """
+        if (self.name is None) == (self.max_px is None):
+            raise ValueError("Exactly one of name and max_px must be set")
+
+    @classmethod
+    def parse(cls, spec: str) -> "MediaSize":
+        """Parse a size from a string.
+
+        Args:
+            spec: a maximum dimension in pixels (e.g. `1024`) or a size name (e.g. `large`)
+
+        Returns:
+            The parsed size
+        """
+        spec = spec.strip()
+        if spec.isdigit():
+            return cls(max_px=int(spec))
+        return cls(name=spec)
+
+    def select(self, media: WPObject) -> tuple[str, str]:
+        """Choose the rendition of a media object to download.
+
+        Args:
+            media: a media object from the API, with a `source_url`
+
+        Returns:
+            The URL and name of the chosen rendition. The name is `full` for the original file.
+        """
+        source_url: str = media["source_url"]
+        details = media.get("media_details")
+        sizes = details.get("sizes") if type(details) is dict else None
+        if type(sizes) is not dict:
+            return source_url, FULL_SIZE
+
+        if self.name is not None:
+            size = sizes.get(self.name)
+            if type(size) is dict and size.get("source_url"):
+                return size["source_url"], self.name
+            return source_url, FULL_SIZE
+
+        candidates = {
+            name: size
+            for name, size in sizes.items()
+            if type(size) is dict
+            and size.get("source_url")
+            and (px := _rendition_px(size)) is not None
+            and self.max_px is not None
+            and px <= self.max_px
+        }
+        if FULL_SIZE not in candidates:
+            original_px = _rendition_px(details)
+            if original_px is not None and self.max_px is not None:
+                if original_px <= self.max_px:
+                    return source_url, FULL_SIZE
+        if len(candidates) == 0:
+            return source_url, FULL_SIZE
+
+        name = max(
+            candidates, key=lambda n: candidates[n]["width"] * candidates[n]["height"]
+        )
+        return candidates[name]["source_url"], name
+
+
+def select_rendition(media: WPObject, size: Optional[MediaSize]) -> tuple[str, str]:
+    """Choose the rendition of a media object to download.
+
+    Args:
+        media: a media object from the API, with a `source_url`
+        size: the size to choose, or None for the original file
+
+    Returns:
+        The URL and name of the chosen rendition, see [`MediaSize.select`][wpextract.download.media_size.MediaSize.select]
+    """
+    if size is None:
+        return media["source_url"], FULL_SIZE
+    return size.select(media)
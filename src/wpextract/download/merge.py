@@ -0,0 +1,159 @@
+import json
+import logging
+from pathlib import Path
+from typing import Any, Optional
+
+from wpextract.download.exporter import Exporter
+from wpextract.download.wpapi import WPObject
+from wpextract.downloader import SHARD_INFO_FILE_NAME, WPDownloader
+from wpextract.util.file import read_json
+
+MERGE_FILE_NAMES = [
+    "categories",
+    "comments",
+    "media",
+    "pages",
+    "posts",
+    "tags",
+    "users",
+]
+"""Names of the download output files which can be merged."""
+
+
+def _load_json(path: Path) -> Any:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _read_shard_info(
+    partial_paths: list[Path], json_prefix: Optional[str]
+) -> list[Optional[dict[str, Any]]]:
+    infos: list[Optional[dict[str, Any]]] = []
+    for path in partial_paths:
+        info_path = path / WPDownloader.json_file_name(
+            SHARD_INFO_FILE_NAME, json_prefix
+        )
+        infos.append(_load_json(info_path) if info_path.is_file() else None)
+    return infos
+
+
+def _check_shards(infos: list[Optional[dict[str, Any]]]) -> None:
+    known = [info for info in infos if info is not None]
+    if len(known) == 0:
+        return
+
+    shard_counts = {info["shards"] for info in known}
+    if len(shard_counts) > 1:
+        raise ValueError(
+            f"Partial downloads have differing numbers of shards: {sorted(shard_counts)}"
+        )
+    targets = {info["target"] for info in known}
+    if len(targets) > 1:
+        raise ValueError(
+            f"Partial downloads are of differing targets: {sorted(targets)}"
+        )
+
+    n_shards = shard_counts.pop()
+    missing = set(range(n_shards)) - {info["shard"] for info in known}
+    if len(missing) > 0:
+        logging.warning(
+            "Merging an incomplete set of shards, missing shards "
+            + ", ".join(f"{idx + 1}/{n_shards}" for idx in sorted(missing))
+        )
+
+    list_boundaries: dict[str, list[dict[str, Any]]] = {}
+    for info in known:
+        for list_name, boundaries in info.get("boundaries", {}).items():
+            list_boundaries.setdefault(list_name, []).append(boundaries)
+    for list_name, all_boundaries in sorted(list_boundaries.items()):
+        if any(boundaries != all_boundaries[0] for boundaries in all_boundaries):
+            logging.warning(
+                f"Shards divided {list_name} differently, so some entries may be missing. "
+                "This happens if entries were added or removed between the shards' downloads. "
+                f"Probed boundaries: {all_boundaries}"
+            )
+
+
+def merge_entries(partials: list[list[WPObject]]) -> list[WPObject]:
+    """Merge lists of objects, removing duplicates by ID.
+
+    If the same ID appears multiple times, the first occurrence is kept. If all
+    objects have a `date`, the result is sorted by date and ID in reverse-chronological
+    order (the default order of the API). Otherwise, the order of the partial lists is kept.
+
+    Args:
+        partials: lists of objects to merge
+
+    Returns:
+        The merged list
+    """
+    merged: dict[Any, WPObject] = {}
+    for entries in partials:
+        for entry in entries:
+            if entry["id"] not in merged:
+                merged[entry["id"]] = entry
+
+    result = list(merged.values())
+    if all("date" in entry for entry in result):
+        result.sort(key=lambda entry: (entry["date"], entry["id"]), reverse=True)
+    return result
+
+
+def merge_downloads(
+    partial_paths: list[Path], out_path: Path, json_prefix: Optional[str] = None
+) -> dict[str, int]:
+    """Merge the partial outputs of sharded downloads into a single download output.
+
+    Partial downloads are ordered by their shard index if they were created by a sharded
+    download, otherwise by the order given. Each output file is the result of
+    [`merge_entries`][wpextract.download.merge.merge_entries] on the corresponding files of the
+    partial downloads. Files which are not present in any partial download are not created.
+
+    The outputs of passthrough downloads (`.jsonl` files) are read in place of missing `.json`
+    files, see [`read_json`][wpextract.util.file.read_json]. The
+    merged output is always written as `.json` files.
+
+    The shard descriptors of the partial downloads are checked to be of the same target and
+    number of shards. A warning is logged if any shards are missing, or if shards probed
+    different boundaries of a list (see [`ShardBoundaries`][wpextract.download.wpapi.ShardBoundaries])
+    and so may not have divided it without gaps.
+
+    Args:
+        partial_paths: directories containing partial download outputs
+        out_path: directory to write the merged output to
+        json_prefix: prefix of the JSON file names, used for both input and output
+
+    Raises:
+        ValueError: if the partial downloads are shards of different downloads
+
+    Returns:
+        The number of entries written to each output file
+    """
+    infos = _read_shard_info(partial_paths, json_prefix)
+    _check_shards(infos)
+
+    ordered_paths = [
+        path
+        for _, path in sorted(
+            zip(infos, partial_paths),
+            key=lambda info_path: -1 if info_path[0] is None else info_path[0]["shard"],
+        )
+    ]
+
+    counts = {}
+    for name in MERGE_FILE_NAMES:
+        file_name = WPDownloader.json_file_name(name, json_prefix)
+        partials = [
+            entries
+            for path in ordered_paths
+            if (entries := read_json(path / file_name)) is not None
+        ]
+        if len(partials) == 0:
+            continue
+
+        merged = merge_entries(partials)
+        Exporter.write_file(out_path / file_name, merged)
+        counts[name] = len(merged)
+        logging.info(f"Merged {len(merged)} {name} from {len(partials)} files")
+
+    return counts
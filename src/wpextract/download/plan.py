@@ -0,0 +1,241 @@
+import logging
+import math
+import time
+from dataclasses import dataclass, field
+from typing import Optional
+
+from wpextract.download.requestsession import HTTPError
+from wpextract.download.utils import add_url_template_params, url_path_join
+from wpextract.download.wpapi import DEFAULT_PER_PAGE, WPApi, WPObject
+
+PARTITIONABLE_TYPES = frozenset(["comments", "media", "pages", "posts"])
+"""Types downloaded in date windows when a partition size is set."""
+
+
+@dataclass
+class TypeEstimate:
+    """The estimated cost of downloading a single type."""
+
+    name: str
+    """The name of the type, e.g. `posts`."""
+    entries: int
+    """The total number of entries reported by the API."""
+    requests: int
+    """The expected number of requests."""
+    bytes: int
+    """The expected total size of responses."""
+    seconds: float
+    """The expected wall-clock time."""
+    available: bool = True
+    """Whether the type could be sampled. If not, e.g. because it requires authentication, it is estimated as empty."""
+
+
+@dataclass
+class DownloadPlan:
+    """The estimated cost of a download."""
+
+    types: list[TypeEstimate] = field(default_factory=list)
+    """The estimate for each type."""
+    media_files: Optional[int] = None
+    """The number of media files to download, if they are to be downloaded."""
+    seconds_per_media_file: float = 0.0
+    """The expected time to download each media file, excluding transfer time."""
+
+    @property
+    def requests(self) -> int:
+        """The expected total number of requests."""
+        return sum(est.requests for est in self.types) + (self.media_files or 0)
+
+    @property
+    def bytes(self) -> int:
+        """The expected total size of responses, excluding media files."""
+        return sum(est.bytes for est in self.types)
+
+    @property
+    def seconds(self) -> float:
+        """The expected total wall-clock time, excluding the transfer time of media files."""
+        media_seconds = (self.media_files or 0) * self.seconds_per_media_file
+        return sum(est.seconds for est in self.types) + media_seconds
+
+    def format(self) -> str:
+        """Format the plan as a table.
+
+        Returns:
+            The table text
+        """
+        rows = [("type", "entries", "requests", "size", "time")]
+        for est in self.types:
+            rows.append(
+                (
+                    est.name,
+                    str(est.entries) if est.available else "unavailable",
+                    str(est.requests),
+                    _format_bytes(est.bytes),
+                    _format_seconds(est.seconds),
+                )
+            )
+        if self.media_files is not None:
+            rows.append(
+                (
+                    "media files",
+                    str(self.media_files),
+                    str(self.media_files),
+                    "unknown",
+                    _format_seconds(self.media_files * self.seconds_per_media_file),
+                )
+            )
+        rows.append(
+            (
+                "total",
+                "",
+                str(self.requests),
+                _format_bytes(self.bytes),
+                _format_seconds(self.seconds),
+            )
+        )
+
+        widths = [max(len(row[i]) for row in rows) for i in range(len(rows[0]))]
+        return "\n".join(
+            "  ".join(
+                cell.ljust(width) if i == 0 else cell.rjust(width)
+                for i, (cell, width) in enumerate(zip(row, widths))
+            )
+            for row in rows
+        )
+
+
+def _format_bytes(n_bytes: float) -> str:
+    for unit in ["B", "kB", "MB", "GB"]:
+        if n_bytes < 1000:
+            return f"{n_bytes:.0f} {unit}" if unit == "B" else f"{n_bytes:.1f} {unit}"
+        n_bytes /= 1000
+    return f"{n_bytes:.1f} TB"
+
+
+def _format_seconds(seconds: float) -> str:
+    minutes, secs = divmod(round(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{secs:02d}"
+
+
+def _sample_type(
+    api: WPApi, type_name: str
+) -> Optional[tuple[int, float, int, Optional[WPObject]]]:
+    url = add_url_template_params(api.list_url(type_name), {"per_page": 1}) % 1
+    start = time.perf_counter()
+    try:
+        response = api.s.get(url_path_join(api.url, api.api_path, url))
+    except HTTPError as e:
+        logging.warning(f"Could not sample {type_name}, estimating it as empty: {e!r}")
+        return None
+    latency = time.perf_counter() - start
+    body = response.json()
+    entry = body[0] if isinstance(body, list) and len(body) > 0 else None
+    return (
+        int(response.headers.get("X-WP-Total", 0)),
+        latency,
+        len(response.content),
+        entry,
+    )
+
+
+def estimate_type(
+    api: WPApi,
+    type_name: str,
+    entries: int,
+    latency: float,
+    entry_bytes: int,
+    per_page: int = DEFAULT_PER_PAGE,
+) -> TypeEstimate:
+    """Estimate the cost of downloading a type from a sample.
+
+    The estimate follows the crawl strategy of `api`, including the partition size,
+    number of workers and shard, as well as the session's wait between requests.
+
+    Args:
+        api: the API instance which would perform the download
+        type_name: the name of the type, e.g. `posts`
+        entries: the total number of entries
+        latency: the sampled latency of a request in seconds
+        entry_bytes: the sampled size of an entry
+        per_page: the number of entries per page
+
+    Returns:
+        The estimate
+    """
+    shards = api.shard[1] if api.shard is not None else 1
+    pages = max(math.ceil(entries / per_page), 1)
+    concurrency = 1
+
+    if api.partition_size is not None and type_name in PARTITIONABLE_TYPES:
+        windows = max(math.ceil(entries / api.partition_size), shards)
+        # Probes of the oldest and newest entries, then a probe and the pages of each window
+        requests = 2 + math.ceil((windows + pages) / shards)
+        concurrency = api.workers
+    elif api.shard is not None:
+        requests = 1 + math.ceil(pages / shards)
+    else:
+        requests = pages
+
+    seconds = requests * (latency + api.s.waiter_for(api.url).wait_s) / concurrency
+    return TypeEstimate(
+        name=type_name,
+        entries=entries,
+        requests=requests,
+        bytes=math.ceil(entries * entry_bytes / shards),
+        seconds=seconds,
+    )
+
+
+def estimate_download(
+    api: WPApi, data_types: list[str], media_files: bool = False
+) -> DownloadPlan:
+    """Estimate the cost of a download without performing it.
+
+    A single request for a page containing one entry is made per type, to read the total
+    number of entries from the `X-WP-Total` header and sample the request latency and entry
+    size. These are extrapolated with [`estimate_type`][wpextract.download.plan.estimate_type].
+
+    The latency of a page with one entry is usually lower than that of a full page, so time
+    estimates should be treated as a lower bound.
+
+    The time per media file uses the wait of the host of the sampled media entry's file, which
+    may differ from the site's host (e.g. a CDN).
+
+    If the request for a type fails with an HTTP error (e.g. because the type requires
+    authentication), the error is logged and the type is estimated as empty and marked as
+    unavailable.
+
+    Args:
+        api: the API instance which would perform the download
+        data_types: the names of the types to download, e.g. `posts`
+        media_files: whether media files would also be downloaded
+
+    Returns:
+        The plan
+    """
+    plan = DownloadPlan()
+    media_entries = 0
+    media_latency = 0.0
+    media_entry = None
+    for type_name in sorted(data_types):
+        sample = _sample_type(api, type_name)
+        if sample is None:
+            plan.types.append(TypeEstimate(type_name, 0, 0, 0, 0.0, available=False))
+            continue
+        entries, latency, n_bytes, entry = sample
+        plan.types.append(estimate_type(api, type_name, entries, latency, n_bytes))
+        if type_name == "media":
+            media_entries, media_latency, media_entry = entries, latency, entry
+
+    if media_files:
+        if "media" not in data_types:
+            sample = _sample_type(api, "media")
+            if sample is not None:
+                media_entries, media_latency, _, media_entry = sample
+        shards = api.shard[1] if api.shard is not None else 1
+        plan.media_files = math.ceil(media_entries / shards)
+        # Media files may be served from a different host (e.g. a CDN) with its own wait
+        media_url = (media_entry or {}).get("source_url") or api.url
+        plan.seconds_per_media_file = media_latency + api.s.waiter_for(media_url).wait_s
+    return plan
@@ -0,0 +1,184 @@
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Optional
+
+import requests
+
+
+@dataclass
+class ProxyStats:
+    """The health and usage of a proxy in a [`ProxyPool`][wpextract.download.proxy_pool.ProxyPool]."""
+
+    requests: int = 0
+    """The number of requests sent through the proxy."""
+    failures: int = 0
+    """The total number of requests which failed to connect through the proxy."""
+    consecutive_failures: int = 0
+    """The number of requests which have failed since the last successful request."""
+    removed_until: float = 0
+    """The monotonic time at which the proxy returns to rotation, if it has been removed."""
+
+
+class ProxyPool:
+    """Distributes requests across multiple proxies, taking failing proxies out of rotation.
+
+    Proxies are chosen in turn. A proxy is taken out of rotation for `cooldown` seconds once
+    `max_failures` requests in a row have failed to connect through it (i.e. raised a connection
+    error or timed out; HTTP error responses from the site do not count). Once the cooldown has
+    passed it is used again, but a single further failure takes it out of rotation for twice as
+    long, up to `max_cooldown`. Failures of requests which were already in flight when the proxy
+    was taken out of rotation are counted, but don't extend its cooldown.
+
+    If every proxy is out of rotation, the one which is due back first is used, so requests are
+    never refused outright. The pool is thread-safe and may be shared between sessions.
+    """
+
+    def __init__(
+        self,
+        proxies: list[str],
+        max_failures: int = 3,
+        cooldown: float = 60,
+        max_cooldown: float = 900,
+    ) -> None:
+        """Create a proxy pool.
+
+        Args:
+            proxies: proxy URLs in the format supported by requests, e.g. `http://proxy1:3128`
+            max_failures: the number of consecutive failures after which a proxy is taken out of rotation
+            cooldown: the initial time in seconds a failing proxy is taken out of rotation for
+            max_cooldown: the maximum time in seconds a failing proxy is taken out of rotation for
+
+        Raises:
+            ValueError: if no proxies are given
+        """
+        if len(proxies) == 0:
+            raise ValueError("At least one proxy is required")
+        self.proxies = list(dict.fromkeys(proxies))
+        self.max_failures = max_failures
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.stats = {proxy: ProxyStats() for proxy in self.proxies}
+        self._cooldowns = {proxy: cooldown for proxy in self.proxies}
+        self._next = 0
+        self._lock = threading.Lock()
+
+    def is_healthy(self, proxy: str) -> bool:
+        """Check whether a proxy is in rotation.
+
+        Args:
+            proxy: a proxy in the pool
+
+        Returns:
+            True unless the proxy has been taken out of rotation and its cooldown has not passed
+        """
+        return self.stats[proxy].removed_until <= time.monotonic()
+
+    def choose(self) -> str:
+        """Choose the proxy to use for the next request.
+
+        Returns:
+            The next healthy proxy in turn, or the proxy due back in rotation soonest if none are healthy
+        """
+        with self._lock:
+            for offset in range(len(self.proxies)):
+                proxy = self.proxies[(self._next + offset) % len(self.proxies)]
+                if self.is_healthy(proxy):
+                    self._next = (self._next + offset + 1) % len(self.proxies)
+                    break
+            else:
+                proxy = min(self.proxies, key=lambda p: self.stats[p].removed_until)
+            self.stats[proxy].requests += 1
+            return proxy
+
+    def record_success(self, proxy: str) -> None:
+        """Record that a request through a proxy connected successfully.
+
+        Args:
+            proxy: the proxy used
+        """
+        with self._lock:
+            self.stats[proxy].consecutive_failures = 0
+            self.stats[proxy].removed_until = 0
+            self._cooldowns[proxy] = self.cooldown
+
+    def record_failure(self, proxy: str) -> None:
+        """Record that a request through a proxy failed to connect.
+
+        Args:
+            proxy: the proxy used
+        """
+        with self._lock:
+            stats = self.stats[proxy]
+            stats.failures += 1
+            stats.consecutive_failures += 1
+            if stats.consecutive_failures >= self.max_failures:
+                self._remove(proxy)
+
+    def _remove(self, proxy: str) -> None:
+        stats = self.stats[proxy]
+        if stats.removed_until > time.monotonic():
+            # Already out of rotation, e.g. a concurrent request failed or every proxy was removed
+            return
+        if stats.removed_until > 0:
+            # Failed again after returning to rotation
+            self._cooldowns[proxy] = min(self._cooldowns[proxy] * 2, self.max_cooldown)
+        cooldown = self._cooldowns[proxy]
+        stats.removed_until = time.monotonic() + cooldown
+        logging.warning(
+            f"Proxy {proxy} failed {stats.consecutive_failures} times in a row, "
+            f"removing it from rotation for {cooldown:.0f}s"
+        )
+
+    def check(
+        self,
+        url: str,
+        timeout: Optional[float] = 10,
+        headers: Optional[dict[str, str]] = None,
+    ) -> list[str]:
+        """Check every proxy can connect to a URL, taking those which cannot out of rotation.
+
+        Args:
+            url: the URL to request through each proxy with a `HEAD` request
+            timeout: the time in seconds to wait for each response
+            headers: headers to send with each request
+
+        Returns:
+            The proxies which could connect
+        """
+        healthy = []
+        for proxy in self.proxies:
+            try:
+                requests.head(
+                    url,
+                    proxies={"http": proxy, "https": proxy},
+                    timeout=timeout,
+                    headers=headers,
+                )
+            except requests.RequestException as e:
+                logging.warning(f"Proxy {proxy} failed health check: {e!r}")
+                with self._lock:
+                    self.stats[proxy].failures += 1
+                    self.stats[proxy].consecutive_failures += 1
+                    self._remove(proxy)
+            else:
+                self.record_success(proxy)
+                healthy.append(proxy)
+        return healthy
+
+    def summary(self) -> dict[str, Any]:
+        """Summarise the usage and health of each proxy.
+
+        Returns:
+            A dictionary of each proxy's `requests`, `failures` and whether it is `healthy`
+        """
+        with self._lock:
+            return {
+                proxy: {
+                    "requests": stats.requests,
+                    "failures": stats.failures,
+                    "healthy": self.is_healthy(proxy),
+                }
+                for proxy, stats in self.stats.items()
+            }
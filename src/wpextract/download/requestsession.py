@@ -1,18 +1,40 @@
 import logging
 import random
+import threading
 import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor
+from concurrent.futures import wait as wait_futures
+from contextlib import AbstractContextManager, nullcontext
 from http.cookies import SimpleCookie
 from typing import TYPE_CHECKING, Literal, Optional, Union
+from urllib.parse import urlsplit
 
 import requests
 from requests.adapters import HTTPAdapter
 from requests.auth import HTTPBasicAuth, HTTPDigestAuth
 from urllib3 import Retry
 
+from wpextract.download.archive import (
+    ArchivingAdapter,
+    ReplayAdapter,
+    ReplayConditions,
+    ResponseArchive,
+)
+from wpextract.download.hedging import HedgePolicy
+from wpextract.download.proxy_pool import ProxyPool
+from wpextract.download.scheduler import RequestScheduler
+from wpextract.download.telemetry import RequestMetrics
+
 if TYPE_CHECKING:
     from requests.models import Response
     from requests.sessions import _Data as RequestDataType
 
+HEDGE_THREADS = 8
+"""Number of threads of a session which send requests which may be hedged, and their hedges.
+
+While every thread is busy, requests are sent without hedging and hedges are not made.
+"""
+
 DEFAULT_UA = "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/127.0.0.0 Safari/537.36"
 
 
@@ -43,7 +65,8 @@ class ConnectionTimeout(Exception):
 class HTTPError(Exception):
     """Base class for HTTP errors."""
 
-    pass
+    status_code: Optional[int] = None
+    """The HTTP status code of the response, if the error was caused by one."""
 
 
 class HTTPError400(HTTPError):
@@ -152,14 +175,19 @@ def _handle_status(url: str, status_code: int, n_tries: Optional[int] = None) ->
         else:
             logging.error(log_msg)
 
-        if status_code in EXCEPTION_CLS:
-            raise EXCEPTION_CLS[status_code]
-        else:
-            raise HTTPError
+        error = EXCEPTION_CLS.get(status_code, HTTPError)()
+        error.status_code = status_code
+        raise error
 
 
 class RequestWait:
-    """Manages waiting between requests."""
+    """Manages waiting between requests.
+
+    The wait is shared by every thread using the same instance: a request may only start once
+    the wait has passed since the previous request finished, and since the previous request
+    started. Requests made concurrently are therefore spaced out as if they were made one at a
+    time, rather than each thread waiting separately.
+    """
 
     def __init__(
         self, wait: Optional[float] = None, random_wait: Optional[bool] = False
@@ -172,17 +200,47 @@ class RequestWait:
         """
         self.wait_s = wait or 0
         self.random_wait = random_wait
+        self._lock = threading.Lock()
+        self._next_start = 0.0
 
-    def wait(self) -> None:
-        """Perform the specified wait."""
-        if self.wait is None:
-            return
-
+    def _duration(self) -> float:
         wait_factor = 1.0
         if self.random_wait:
             wait_factor = random.uniform(0.5, 1.5)
+        return self.wait_s * wait_factor
 
-        time.sleep(self.wait_s * wait_factor)
+    def wait(self) -> float:
+        """Wait until a request may start, and reserve the start time.
+
+        Returns:
+            The time waited in seconds
+        """
+        if self.wait_s == 0:
+            return 0
+
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_start)
+            self._next_start = start + self._duration()
+        wait_s = start - now
+        if wait_s > 0:
+            time.sleep(wait_s)
+        return wait_s
+
+    def finished(self) -> None:
+        """Record that a request has finished, so the next request waits from now."""
+        if self.wait_s == 0:
+            return
+
+        with self._lock:
+            self._next_start = max(
+                self._next_start, time.monotonic() + self._duration()
+            )
+
+
+def _close_response(future: "Future[Response]") -> None:
+    if future.exception() is None:
+        future.result().close()
 
 
 AuthorizationType = Union[tuple[str, str], HTTPBasicAuth, HTTPDigestAuth]
@@ -203,20 +261,38 @@ class RequestSession:
         backoff_factor: float = 0.1,
         max_redirects: int = 20,
         user_agent: Optional[str] = None,
+        metrics: Optional[RequestMetrics] = None,
+        archive: Optional[ResponseArchive] = None,
+        replay: bool = False,
+        replay_conditions: Optional[ReplayConditions] = None,
+        scheduler: Optional[RequestScheduler] = None,
+        hedge: Optional[HedgePolicy] = None,
+        single_flight: bool = True,
+        host_waits: Optional[dict[str, float]] = None,
+        proxy_pool: Optional[ProxyPool] = None,
     ):
         """Create a new request session.
 
         Args:
-            proxy: a dict containing a proxy server string for HTTP and/or HTTPS connection
+            proxy: a proxy server URL to use for HTTP and HTTPS requests
             cookies: a string in the format of the Cookie header
             authorization: a tuple containing login and password or [`requests.auth.HTTPBasicAuth`][requests.auth.HTTPBasicAuth] for basic authentication or [`requests.auth.HTTPDigestAuth`][requests.auth.HTTPDigestAuth] for NTLM-like authentication
             timeout: maximum time in seconds to wait for a response before giving up
-            wait: wait time in seconds between requests, None to not wait
+            wait: wait time in seconds between requests, None to not wait. The wait is shared by all threads using the session, see [`RequestWait`][wpextract.download.requestsession.RequestWait].
             random_wait: If true, the wait time between requests is multiplied by a random factor between 0.5 and 1.5
             max_retries: the maximum number of retries before failing
             backoff_factor: Factor to wait between successive retries
             max_redirects: maximum number of redirects to follow
             user_agent: User agent to use for requests. Set to [`DEFAULT_UA`][wpextract.download.requestsession.DEFAULT_UA] by default.
+            metrics: recorder for request metrics. A new recorder is created by default, pass an existing one to share it between sessions.
+            archive: if set, every response which is not streamed is appended to this archive
+            replay: if True, responses are served from `archive` instead of the network. There is no wait between requests unless `replay_conditions` are set.
+            replay_conditions: network conditions to simulate while replaying, so that changes to request behaviour can be benchmarked offline
+            scheduler: if set, each request waits for a slot from this scheduler, which may be shared with other sessions
+            hedge: if set, a duplicate of a slow GET request is sent when this policy allows, and whichever response arrives first is used. Only the used response is archived. With a `scheduler`, the duplicate is only sent if it can take a slot immediately. Streamed requests, and replayed requests without `replay_conditions`, are not hedged.
+            single_flight: if True, a GET request for a URL which is already being requested by another thread waits for and shares that request's response (or exception), instead of making another request. Streamed requests are never shared.
+            host_waits: wait time in seconds between requests to specific hosts (e.g. `{"cdn.example.org": 0}`), overriding `wait`. Every host has its own waiter regardless, so requests to one host (e.g. a media CDN) never use up the wait of another.
+            proxy_pool: if set, each request is sent through a proxy chosen from this pool instead of `proxy`, and the pool is told whether it could connect
         """
         self.s = requests.Session()
         if proxy is not None:
@@ -232,9 +308,33 @@ class RequestSession:
         self.wait = wait
         self.timeout = timeout
         self.s.max_redirects = max_redirects
+        self.archive = archive
+        self.replay = replay
+        self.replay_conditions = replay_conditions
+        self.scheduler = scheduler
+        self.hedge = hedge
+        self.single_flight = single_flight
+        self.proxy_pool = proxy_pool
+        self._flights: dict[str, Future[Response]] = {}
+        self._flights_lock = threading.Lock()
+        self._archiving_adapter: Optional[ArchivingAdapter] = None
+        self._hedge_executor: Optional[ThreadPoolExecutor] = None
+        self._hedge_threads = threading.BoundedSemaphore(HEDGE_THREADS)
+        self._hedge_lock = threading.Lock()
+        if replay and archive is None:
+            raise ValueError("An archive is required to replay responses")
         self._mount_retry(backoff_factor, max_retries)
-        self.waiter = RequestWait(wait, random_wait)
+        no_wait = replay and replay_conditions is None
+        self._default_wait = None if no_wait else wait
+        self._random_wait = random_wait
+        self.host_waiters = {
+            host.lower(): RequestWait(None if no_wait else host_wait, random_wait)
+            for host, host_wait in (host_waits or {}).items()
+        }
+        """The waiter of each host which has been requested or has its own wait time."""
+        self._waiters_lock = threading.Lock()
         self.user_agent = user_agent if user_agent is not None else DEFAULT_UA
+        self.metrics = metrics if metrics is not None else RequestMetrics()
 
     def _mount_retry(self, backoff_factor: float, max_retries: int) -> None:
         retry = Retry(
@@ -243,7 +343,17 @@ class RequestSession:
             status_forcelist=RETRY_AFTER_STATUS,
             raise_on_status=False,
         )
-        adapter = HTTPAdapter(max_retries=retry)
+        adapter: HTTPAdapter
+        if self.archive is not None and self.replay:
+            adapter = ReplayAdapter(
+                self.archive, self.replay_conditions, max_retries=retry
+            )
+        elif self.archive is not None:
+            adapter = self._archiving_adapter = ArchivingAdapter(
+                self.archive, max_retries=retry
+            )
+        else:
+            adapter = HTTPAdapter(max_retries=retry)
         self.s.mount("http://", adapter)
         self.s.mount("https://", adapter)
 
@@ -258,6 +368,19 @@ class RequestSession:
         """
         return self.do_request("get", url)
 
+    def head(self, url: str) -> "Response":
+        """Calls the head function from requests but handles errors to raise proper exception following the context.
+
+        Unlike [`requests.head`][requests.head], redirects are followed.
+
+        Args:
+            url: URL to fetch
+
+        Returns:
+            the Response object
+        """
+        return self.do_request("head", url)
+
     def post(self, url: str, data: Optional["RequestDataType"] = None) -> "Response":
         """Calls the post function from requests but handles errors to raise proper exception following the context.
 
@@ -272,7 +395,7 @@ class RequestSession:
 
     def do_request(
         self,
-        method: Literal["get", "post"],
+        method: Literal["get", "post", "head"],
         url: str,
         data: Optional["RequestDataType"] = None,
         stream: bool = False,
@@ -296,16 +419,149 @@ class RequestSession:
         Returns:
             the Response object
         """
+        if method == "get" and not stream and self.single_flight:
+            response, shared = self._coalesce(url)
+            if shared:
+                return response
+        else:
+            response = self._fetch(method, url, data, stream)
+        return response
+
+    def waiter_for(self, url: str) -> RequestWait:
+        """Get the waiter used before requests to the host of a URL.
+
+        Args:
+            url: a request URL
+
+        Each host has its own waiter, created with the session's `wait` when it is first
+        requested unless it has its own wait in `host_waits`.
+
+        Returns:
+            The host's waiter
+        """
+        host = urlsplit(url).hostname or ""
+        with self._waiters_lock:
+            waiter = self.host_waiters.get(host)
+            if waiter is None:
+                waiter = RequestWait(self._default_wait, self._random_wait)
+                self.host_waiters[host] = waiter
+            return waiter
+
+    def _coalesce(self, url: str) -> tuple["Response", bool]:
+        with self._flights_lock:
+            flight = self._flights.get(url)
+            if flight is None:
+                flight = Future()
+                self._flights[url] = flight
+                leader = True
+            else:
+                leader = False
+
+        if not leader:
+            self.metrics.record_coalesced(url)
+            return flight.result(), True
+
+        try:
+            response = self._fetch("get", url, None, False)
+        except BaseException as e:
+            flight.set_exception(e)
+            raise
+        else:
+            flight.set_result(response)
+            return response, False
+        finally:
+            with self._flights_lock:
+                del self._flights[url]
+
+    def _fetch(
+        self,
+        method: Literal["get", "post", "head"],
+        url: str,
+        data: Optional["RequestDataType"],
+        stream: bool,
+    ) -> "Response":
+        # Wait before taking a slot, so waiting doesn't hold up other hosts
+        waiter = self.waiter_for(url)
+        self.metrics.record_wait(url, waiter.wait())
+        with self._slot(url):
+            start = time.perf_counter()
+            try:
+                if (
+                    self.hedge is not None
+                    and method == "get"
+                    and not stream
+                    and (not self.replay or self.replay_conditions is not None)
+                ):
+                    response = self._send_hedged(url, self.hedge)
+                else:
+                    response = self._send(method, url, data, stream)
+            except Exception:
+                self.metrics.record(url, None, time.perf_counter() - start)
+                raise
+            finally:
+                waiter.finished()
+
+        n_tries = None
+        if hasattr(response.raw, "retries") and response.raw.retries is not None:
+            # initial request + n retires = n+1 tries
+            n_tries = len(response.raw.retries.history) + 1
+
+        self._record_response(
+            url, response, time.perf_counter() - start, n_tries, stream
+        )
+
+        # If this is an HTTP 400 due to an invalid page, raise this special error early
+        if (
+            method != "head"
+            and response.status_code == 400
+            and "application/json" in response.headers.get("content-type", "")
+        ):
+            json_body = response.json()
+            if "code" in json_body and "invalid_page_number" in json_body["code"]:
+                raise HTTPErrorInvalidPage
+
+        _handle_status(url, response.status_code, n_tries)
+        return response
+
+    def _slot(self, url: str) -> AbstractContextManager[None]:
+        if self.scheduler is None:
+            return nullcontext()
+        return self.scheduler.slot(self, url)
+
+    def _send(
+        self,
+        method: Literal["get", "post", "head"],
+        url: str,
+        data: Optional["RequestDataType"],
+        stream: bool,
+    ) -> "Response":
         headers = {"User-Agent": self.user_agent}
+        proxy = self.proxy_pool.choose() if self.proxy_pool is not None else None
+        proxies = {"http": proxy, "https": proxy} if proxy is not None else None
         response = None
         try:
             if method == "post":
-                response = self.s.post(url, data, headers=headers, timeout=self.timeout)
+                response = self.s.post(
+                    url, data, headers=headers, timeout=self.timeout, proxies=proxies
+                )
+            elif method == "head":
+                response = self.s.head(
+                    url,
+                    headers=headers,
+                    timeout=self.timeout,
+                    allow_redirects=True,
+                    proxies=proxies,
+                )
             else:
                 response = self.s.get(
-                    url, headers=headers, timeout=self.timeout, stream=stream
+                    url,
+                    headers=headers,
+                    timeout=self.timeout,
+                    stream=stream,
+                    proxies=proxies,
                 )
         except requests.ConnectionError as e:
+            self._record_proxy(proxy, success=False)
             if "Errno -5" in str(e) or "Errno -2" in str(e) or "Errno -3" in str(e):
                 logging.error(f"Could not resolve host {url}")
                 raise ConnectionCouldNotResolve from e
@@ -318,29 +574,126 @@ class RequestSession:
             else:
                 raise e
         except requests.Timeout as e:
+            self._record_proxy(proxy, success=False)
             logging.error(f"Request timed out fetching {url}")
             raise ConnectionTimeout from e
         except requests.TooManyRedirects as e:
             logging.error(f'Too many redirects while fetching "{url}"')
             raise HTTPTooManyRedirects from e
 
-        # If this is an HTTP 400 due to an invalid page, raise this special error early
-        if response.status_code == 400 and "application/json" in response.headers.get(
-            "content-type", ""
+        self._record_proxy(proxy, success=True)
+        return response
+
+    def _record_proxy(self, proxy: Optional[str], success: bool) -> None:
+        if proxy is None or self.proxy_pool is None:
+            return
+        if success:
+            self.proxy_pool.record_success(proxy)
+        else:
+            self.proxy_pool.record_failure(proxy)
+
+    def _send_async(self, url: str) -> "Future[Response]":
+        # The caller acquires a thread first, so requests never queue for a thread
+        with self._hedge_lock:
+            if self._hedge_executor is None:
+                self._hedge_executor = ThreadPoolExecutor(
+                    max_workers=HEDGE_THREADS, thread_name_prefix="wpextract-hedge"
+                )
+        future = self._hedge_executor.submit(self._send_unarchived, url)
+        future.add_done_callback(lambda _: self._hedge_threads.release())
+        return future
+
+    def _send_unarchived(self, url: str) -> "Response":
+        # Only the response which is used is archived, see _send_hedged
+        if self._archiving_adapter is None:
+            return self._send("get", url, None, False)
+        with self._archiving_adapter.paused():
+            return self._send("get", url, None, False)
+
+    def _send_hedged(self, url: str, hedge: HedgePolicy) -> "Response":
+        delay = hedge.delay(self.metrics, url)
+        if (
+            delay is None
+            or not hedge.has_budget()
+            or not self._hedge_threads.acquire(blocking=False)
         ):
-            json_body = response.json()
-            if "code" in json_body and "invalid_page_number" in json_body["code"]:
-                raise HTTPErrorInvalidPage
+            return self._send("get", url, None, False)
+
+        primary = self._send_async(url)
+        done, _ = wait_futures([primary], timeout=delay)
+        if primary in done or not self._try_hedge(url, hedge):
+            return self._archived(primary.result())
+
+        logging.debug(f"Hedging request to {url} after {delay:.2f}s")
+        secondary = self._send_async(url)
+        secondary.add_done_callback(lambda _: self._release_slot(url))
+        pending = {primary, secondary}
+        winner = None
+        while winner is None and len(pending) > 0:
+            done, pending = wait_futures(pending, return_when=FIRST_COMPLETED)
+            winner = next(
+                (f for f in (primary, secondary) if f in done and not f.exception()),
+                None,
+            )
+
+        self.metrics.record_hedge(url, won=winner is secondary)
+        for future in (primary, secondary):
+            if future is not winner:
+                # The losing request can't be interrupted, so discard its response and
+                # release its connection once it arrives
+                future.add_done_callback(_close_response)
+        if winner is None:
+            return primary.result()
+        return self._archived(winner.result())
+
+    def _try_hedge(self, url: str, hedge: HedgePolicy) -> bool:
+        # Take a slot and a thread for the hedge before spending from the budget
+        if not self._try_slot(url):
+            return False
+        if self._hedge_threads.acquire(blocking=False):
+            if hedge.try_acquire():
+                return True
+            self._hedge_threads.release()
+        self._release_slot(url)
+        return False
+
+    def _archived(self, response: "Response") -> "Response":
+        if self._archiving_adapter is not None:
+            self._archiving_adapter.record(response)
+        return response
 
-        n_tries = None
-        if hasattr(response.raw, "retries") and response.raw.retries is not None:
-            # initial request + n retires = n+1 tries
-            n_tries = len(response.raw.retries.history) + 1
+    def _try_slot(self, url: str) -> bool:
+        return self.scheduler is None or self.scheduler.try_acquire(self, url)
 
-        _handle_status(url, response.status_code, n_tries)
+    def _release_slot(self, url: str) -> None:
+        if self.scheduler is not None:
+            self.scheduler.release(url)
 
-        self.waiter.wait()
-        return response
+    def _record_response(
+        self,
+        url: str,
+        response: "Response",
+        latency: float,
+        n_tries: Optional[int],
+        stream: bool,
+    ) -> None:
+        if stream:
+            # The body has not been read yet, so rely on the declared size
+            n_bytes = int(response.headers.get("Content-Length", 0) or 0)
+        else:
+            n_bytes = len(response.content or b"")
+
+        total_pages = response.headers.get("X-WP-TotalPages")
+        self.metrics.record(
+            url,
+            response.status_code,
+            latency,
+            retries=n_tries - 1 if n_tries is not None else 0,
+            n_bytes=n_bytes,
+            total_pages=int(total_pages)
+            if total_pages and total_pages.isdigit()
+            else None,
+        )
 
     def set_cookies(self, cookies: str) -> None:
         """Sets new cookies from a string.
@@ -362,15 +715,35 @@ class RequestSession:
         return self.s.cookies.get_dict()
 
     def set_proxy(self, proxy: str) -> None:
-        """Set a proxy to use for the request.
+        """Set a proxy to use for HTTP and HTTPS requests.
+
+        The scheme of the proxy URL is the protocol used to connect to the proxy, and does not
+        affect which requests it is used for.
 
         Args:
             proxy: proxy URL In the format supported by requests
         """
-        prot = "http"
-        if proxy[:5].lower() == "https":
-            prot = "https"
-        self.s.proxies = {prot: proxy}
+        self.s.proxies = {"http": proxy, "https": proxy}
+
+    def check_proxies(self, url: str) -> list[str]:
+        """Check every proxy in the proxy pool can connect to a URL.
+
+        See [`ProxyPool.check`][wpextract.download.proxy_pool.ProxyPool.check].
+
+        Args:
+            url: the URL to request through each proxy
+
+        Raises:
+            ValueError: if the session does not have a proxy pool
+
+        Returns:
+            The proxies which could connect
+        """
+        if self.proxy_pool is None:
+            raise ValueError("The session does not have a proxy pool")
+        return self.proxy_pool.check(
+            url, timeout=self.timeout, headers={"User-Agent": self.user_agent}
+        )
 
     def set_creds(self, credentials: AuthorizationType) -> None:
         """Set new credentials for the request.
@@ -0,0 +1,150 @@
+import itertools
+import threading
+import time
+from collections import Counter
+from collections.abc import Generator, Hashable
+from contextlib import contextmanager
+from typing import Optional
+from urllib.parse import urlsplit
+
+
+class RequestScheduler:
+    """Schedules the requests of multiple sessions under shared limits.
+
+    A request may only start if:
+
+    - fewer than `concurrency` requests are in progress in total
+    - fewer than `per_host` requests are in progress to the same host
+    - at least `host_interval` seconds have passed since the last request to the same host started
+
+    When several waiting requests could start, the one whose owner (usually a session, one per
+    site) least recently started a request goes first, so sites are interleaved fairly. Ties are
+    broken by the order requests started waiting.
+    """
+
+    def __init__(
+        self, concurrency: int, per_host: int = 1, host_interval: float = 0.0
+    ) -> None:
+        """Create a scheduler.
+
+        Args:
+            concurrency: the maximum number of requests in progress across all owners
+            per_host: the maximum number of requests in progress to each host
+            host_interval: the minimum time in seconds between starting requests to each host
+        """
+        self.concurrency = concurrency
+        self.per_host = per_host
+        self.host_interval = host_interval
+        self._cond = threading.Condition()
+        self._in_flight = 0
+        self._host_in_flight: Counter[str] = Counter()
+        self._host_next: dict[str, float] = {}
+        self._last_served: dict[Hashable, int] = {}
+        self._waiting: list[tuple[Hashable, str, int]] = []
+        self._sequence = itertools.count()
+
+    def _eligible(self, host: str, now: float) -> bool:
+        return (
+            self._in_flight < self.concurrency
+            and self._host_in_flight[host] < self.per_host
+            and self._host_next.get(host, 0) <= now
+        )
+
+    def _next_ticket(self, now: float) -> Optional[tuple[Hashable, str, int]]:
+        eligible = [t for t in self._waiting if self._eligible(t[1], now)]
+        if len(eligible) == 0:
+            return None
+        return min(eligible, key=lambda t: (self._last_served.get(t[0], -1), t[2]))
+
+    def _next_wakeup(self, now: float) -> Optional[float]:
+        delays = [
+            self._host_next[host] - now
+            for _, host, _ in self._waiting
+            if self._host_next.get(host, 0) > now
+        ]
+        return min(delays) if len(delays) > 0 else None
+
+    def acquire(self, owner: Hashable, url: str) -> None:
+        """Wait until a request may start, then mark it as started.
+
+        Args:
+            owner: the owner of the request, for fair scheduling
+            url: the URL to be requested
+        """
+        host = urlsplit(url).netloc
+        with self._cond:
+            ticket = (owner, host, next(self._sequence))
+            self._waiting.append(ticket)
+            try:
+                while True:
+                    now = time.monotonic()
+                    next_ticket = self._next_ticket(now)
+                    if next_ticket is ticket:
+                        break
+                    if next_ticket is not None:
+                        # Another waiting request can start instead, make sure it's awake
+                        self._cond.notify_all()
+                    self._cond.wait(timeout=self._next_wakeup(now))
+            finally:
+                self._waiting.remove(ticket)
+
+            self._in_flight += 1
+            self._host_in_flight[host] += 1
+            self._host_next[host] = now + self.host_interval
+            self._last_served[owner] = ticket[2]
+            if len(self._waiting) > 0:
+                # Other requests may be able to start too
+                self._cond.notify_all()
+
+    def try_acquire(self, owner: Hashable, url: str) -> bool:
+        """Mark a request as started if it may start now, without waiting.
+
+        The request may not start if it is over a limit, or if any other requests are already
+        waiting.
+
+        Args:
+            owner: the owner of the request, for fair scheduling
+            url: the URL to be requested
+
+        Returns:
+            True if the request was started, and must be released, False otherwise
+        """
+        host = urlsplit(url).netloc
+        with self._cond:
+            now = time.monotonic()
+            if len(self._waiting) > 0 or not self._eligible(host, now):
+                return False
+            self._in_flight += 1
+            self._host_in_flight[host] += 1
+            self._host_next[host] = now + self.host_interval
+            self._last_served[owner] = next(self._sequence)
+            return True
+
+    def release(self, url: str) -> None:
+        """Mark a request as finished.
+
+        Args:
+            url: the requested URL
+        """
+        host = urlsplit(url).netloc
+        with self._cond:
+            self._in_flight -= 1
+            self._host_in_flight[host] -= 1
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self, owner: Hashable, url: str) -> Generator[None, None, None]:
+        """Hold a request slot for the duration of the context.
+
+        Args:
+            owner: the owner of the request, for fair scheduling
+            url: the URL to be requested
+
+        Yields:
+            Once the request may start
+        """
+        self.acquire(owner, url)
+        try:
+            yield
+        finally:
+            self.release(url)
@@ -0,0 +1,160 @@
+import logging
+import re
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Optional
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from wpextract.download.requestsession import HTTPError, RequestSession
+from wpextract.download.utils import url_path_join
+
+SITEMAP_PATHS = ["wp-sitemap.xml", "sitemap_index.xml"]
+"""Paths of sitemap indexes tried in turn: the WordPress core sitemap and the Yoast SEO sitemap."""
+
+MAX_SITEMAP_DEPTH = 3
+"""The maximum depth of nested sitemap indexes to follow. Nested indexes must have `index` in their path."""
+
+_SITEMAP_TYPES = [
+    # WordPress core, e.g. wp-sitemap-posts-post-1.xml
+    (re.compile(r"wp-sitemap-posts-post-\d+\.xml$"), "posts"),
+    (re.compile(r"wp-sitemap-posts-page-\d+\.xml$"), "pages"),
+    # Yoast SEO, e.g. post-sitemap.xml, post-sitemap2.xml
+    (re.compile(r"(^|/)post-sitemap\d*\.xml$"), "posts"),
+    (re.compile(r"(^|/)page-sitemap\d*\.xml$"), "pages"),
+]
+
+_NS = "{http://www.sitemaps.org/schemas/sitemap/0.9}"
+
+_ID_PARAMS = {"posts": "p", "pages": "page_id"}
+
+
+@dataclass(frozen=True)
+class SitemapUrl:
+    """A URL listed in a sitemap."""
+
+    loc: str
+    """The URL of the object."""
+    type_name: str
+    """The type of the object, e.g. `posts`."""
+    lastmod: Optional[str] = None
+    """The last modification date in UTC, in the same format as the API's `modified_gmt`, if given."""
+
+    def object_id(self) -> Optional[int]:
+        """Get the ID of the object if it is in the URL, i.e. if the site uses plain permalinks.
+
+        Returns:
+            The ID from the `p` or `page_id` parameter, or None
+        """
+        values = parse_qs(urlsplit(self.loc).query).get(_ID_PARAMS[self.type_name])
+        if values is None or not values[0].isdigit():
+            return None
+        return int(values[0])
+
+    def slug(self) -> Optional[str]:
+        """Get the probable slug of the object from the last segment of the URL path.
+
+        Returns:
+            The slug, or None if the path is empty
+        """
+        segments = [s for s in urlsplit(self.loc).path.split("/") if s != ""]
+        if len(segments) == 0:
+            return None
+        return unquote(segments[-1]).lower()
+
+
+def parse_lastmod(lastmod: str) -> Optional[str]:
+    """Convert a sitemap `lastmod` date to the format of the API's `modified_gmt`.
+
+    Args:
+        lastmod: a W3C datetime, e.g. `2024-01-01T12:00:00+01:00` or `2024-01-01`
+
+    Returns:
+        The date in UTC formatted as `YYYY-MM-DDTHH:MM:SS`, or None if it could not be parsed
+    """
+    try:
+        date = datetime.fromisoformat(lastmod.strip().replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if date.tzinfo is not None:
+        date = date.astimezone(timezone.utc).replace(tzinfo=None)
+    return date.strftime("%Y-%m-%dT%H:%M:%S")
+
+
+def _sitemap_type(url: str) -> Optional[str]:
+    path = urlsplit(url).path
+    for pattern, type_name in _SITEMAP_TYPES:
+        if pattern.search(path):
+            return type_name
+    return None
+
+
+def _fetch_xml(session: RequestSession, url: str) -> Optional[ET.Element]:
+    try:
+        response = session.get(url)
+    except HTTPError:
+        return None
+    try:
+        return ET.fromstring(response.content)
+    except ET.ParseError:
+        logging.debug(f"Sitemap {url} is not valid XML")
+        return None
+
+
+def read_sitemaps(
+    session: RequestSession, target: str, type_names: list[str]
+) -> Optional[list[SitemapUrl]]:
+    """Read the URLs of a site's posts and pages from its sitemaps.
+
+    The sitemap indexes in [`SITEMAP_PATHS`][wpextract.download.sitemap.SITEMAP_PATHS] are tried
+    in turn. Only the sitemaps of the requested types are fetched, which are recognised by the
+    names used by WordPress core and Yoast SEO.
+
+    Args:
+        session: the request session to use
+        target: the base URL of the site
+        type_names: the types to read, any of `posts` and `pages`
+
+    Returns:
+        The URLs in the sitemaps of the types, or None if no sitemap index was found
+    """
+    for path in SITEMAP_PATHS:
+        index = _fetch_xml(session, url_path_join(target, path))
+        if index is not None and index.tag == f"{_NS}sitemapindex":
+            logging.debug(f"Reading sitemap index {path}")
+            return _read_index(session, index, type_names, depth=1)
+    return None
+
+
+def _read_index(
+    session: RequestSession, index: ET.Element, type_names: list[str], depth: int
+) -> list[SitemapUrl]:
+    urls = []
+    for loc in index.iterfind(f"{_NS}sitemap/{_NS}loc"):
+        sitemap_url = (loc.text or "").strip()
+        type_name = _sitemap_type(sitemap_url)
+        if type_name is None:
+            if depth < MAX_SITEMAP_DEPTH and "index" in urlsplit(sitemap_url).path:
+                child = _fetch_xml(session, sitemap_url)
+                if child is not None and child.tag == f"{_NS}sitemapindex":
+                    urls += _read_index(session, child, type_names, depth + 1)
+            continue
+        if type_name not in type_names:
+            continue
+        sitemap = _fetch_xml(session, sitemap_url)
+        if sitemap is None:
+            logging.warning(f"Could not read sitemap {sitemap_url}")
+            continue
+        for url in sitemap.iterfind(f"{_NS}url"):
+            url_loc = url.findtext(f"{_NS}loc")
+            if url_loc is None:
+                continue
+            lastmod = url.findtext(f"{_NS}lastmod")
+            urls.append(
+                SitemapUrl(
+                    loc=url_loc.strip(),
+                    type_name=type_name,
+                    lastmod=parse_lastmod(lastmod) if lastmod else None,
+                )
+            )
+    return urls
@@ -0,0 +1,390 @@
+import json
+import logging
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Optional
+from urllib.parse import unquote, urlsplit
+
+from wpextract.download.exporter import Exporter
+from wpextract.download.merge import merge_entries
+from wpextract.download.requestsession import HTTPErrorInvalidPage
+from wpextract.download.sitemap import SitemapUrl, read_sitemaps
+from wpextract.download.utils import (
+    add_url_template_params,
+    get_content_as_json,
+    url_path_join,
+)
+from wpextract.download.wpapi import WPApi, WPObject
+from wpextract.downloader import WPDownloader
+from wpextract.util.file import UNESCAPE_FIELDS, read_json
+
+SYNC_TYPES = ["media", "pages", "posts"]
+"""Types which can be synced, as their lists can be ordered by modification date."""
+
+SYNC_STATE_FILE_NAME = "sync"
+"""Name of the file storing the progress of syncing."""
+
+SITEMAP_TYPES = ["pages", "posts"]
+"""Types which can be synced from sitemaps."""
+
+SITEMAP_BATCH_SIZE = 100
+"""The number of objects fetched per request when syncing from sitemaps, the maximum page size."""
+
+
+def _link_key(url: str) -> str:
+    parts = urlsplit(url)
+    key = parts.netloc.lower() + parts.path.rstrip("/")
+    if parts.query:
+        key += "?" + parts.query
+    return key
+
+
+class SiteSync:
+    """Keeps a local download up to date by polling for new and modified objects.
+
+    Each type is polled by requesting its list ordered by modification date, newest first,
+    and reading pages until an object modified before the latest modification already seen is
+    reached. Usually, this is a single small request. New and changed objects are upserted into
+    the type's download output file.
+
+    The latest modification date seen for each type is stored in a `sync.json` state file in the
+    output directory. If there is no state file, it is taken from the existing output file. If
+    there is no output file either, every object is fetched on the first poll.
+
+    Deleted objects cannot be detected, so are kept in the local output.
+
+    Alternatively, posts and pages can be synced from the site's sitemaps, which list the URL
+    and usually the last modification date of every object (see
+    [`read_sitemaps`][wpextract.download.sitemap.read_sitemaps]). URLs which are not in the
+    local output, or whose modification date is later than the local copy's, are then fetched by
+    ID or slug in batches. This detects changes to objects whose modification date has not
+    changed in the list order, and gives the total number of objects, while sitemaps are usually
+    cached and cheap for the site to serve. If no sitemaps are found, the lists are polled instead.
+    URLs which can't be resolved to an object (e.g. because the last segment of the path isn't
+    the slug) are not looked up again until their modification date in the sitemaps changes.
+    """
+
+    def __init__(
+        self,
+        api: WPApi,
+        out_path: Path,
+        data_types: list[str],
+        json_prefix: Optional[str] = None,
+        per_page: int = 10,
+        sitemap: bool = False,
+    ) -> None:
+        """Create a sync of a site into a download output directory.
+
+        Args:
+            api: the API of the site
+            out_path: the download output directory
+            data_types: the types to sync, see [`SYNC_TYPES`][wpextract.download.sync.SYNC_TYPES]
+            json_prefix: prefix of the JSON file names
+            per_page: the number of objects to request per page when polling
+            sitemap: sync posts and pages from the site's sitemaps instead of polling their lists
+
+        Raises:
+            ValueError: if a type cannot be synced
+        """
+        unsupported = set(data_types) - set(SYNC_TYPES)
+        if len(unsupported) > 0:
+            raise ValueError(f"Cannot sync types: {', '.join(sorted(unsupported))}")
+
+        self.api = api
+        self.out_path = out_path
+        self.data_types = sorted(data_types)
+        self.json_prefix = json_prefix
+        self.per_page = per_page
+        self.sitemap = sitemap
+        self.sitemap_counts: dict[str, int] = {}
+        """The number of objects of each type listed in the sitemaps at the last poll."""
+        self.state = self._load_state()
+        self._modified: dict[str, dict[Any, Optional[str]]] = {}
+        self._links: dict[str, dict[str, Any]] = {}
+        # Sitemap URLs which did not resolve to an object, mapped to their lastmod
+        self._unresolved: dict[str, dict[str, Optional[str]]] = {}
+        for type_name in self.data_types:
+            self._unresolved[type_name] = {}
+            entries = self._load_entries(type_name)
+            self._modified[type_name] = {
+                entry["id"]: entry.get("modified_gmt") for entry in entries
+            }
+            self._links[type_name] = {
+                _link_key(entry["link"]): entry["id"]
+                for entry in entries
+                if entry.get("link")
+            }
+
+    def _path(self, name: str) -> Path:
+        return self.out_path / WPDownloader.json_file_name(name, self.json_prefix)
+
+    def _load_state(self) -> dict[str, Any]:
+        path = self._path(SYNC_STATE_FILE_NAME)
+        if not path.is_file():
+            return {}
+        with open(path, encoding="utf-8") as f:
+            state: dict[str, Any] = json.load(f)
+        return state
+
+    def _save_state(self) -> None:
+        with open(self._path(SYNC_STATE_FILE_NAME), "w", encoding="utf-8") as f:
+            json.dump(self.state, f, indent=4)
+
+    def _load_entries(self, type_name: str) -> list[WPObject]:
+        # Falls back to the output of a passthrough download
+        entries: Optional[list[WPObject]] = read_json(self._path(type_name))
+        return entries if entries is not None else []
+
+    def latest_modified(self, type_name: str) -> Optional[str]:
+        """Get the latest modification date of a type already synced.
+
+        Args:
+            type_name: the name of the type
+
+        Returns:
+            The latest `modified_gmt` seen, or None if no objects have been seen
+        """
+        type_state = self.state.get(type_name, {})
+        if type_state.get("modified_gmt") is not None:
+            return str(type_state["modified_gmt"])
+        dates = [date for date in self._modified[type_name].values() if date]
+        return max(dates) if len(dates) > 0 else None
+
+    def fetch_changes(self, type_name: str) -> list[WPObject]:
+        """Fetch the objects of a type which are new or modified since the last poll.
+
+        Args:
+            type_name: the name of the type
+
+        Returns:
+            The new and modified objects, as returned by the API
+        """
+        since = self.latest_modified(type_name)
+        url = add_url_template_params(
+            self.api.list_url(type_name),
+            {"orderby": "modified", "order": "desc", "per_page": self.per_page},
+        )
+        known = self._modified[type_name]
+
+        changes = []
+        page = 1
+        while True:
+            try:
+                response = self.api.s.get(
+                    url_path_join(self.api.url, self.api.api_path, url % page)
+                )
+            except HTTPErrorInvalidPage:
+                break
+            entries = get_content_as_json(response)
+            if type(entries) is not list:
+                break
+
+            reached_seen = False
+            for entry in entries:
+                modified = entry.get("modified_gmt")
+                if since is not None and modified is not None and modified < since:
+                    reached_seen = True
+                    break
+                if entry["id"] not in known or known[entry["id"]] != modified:
+                    changes.append(entry)
+
+            total_pages = int(response.headers.get("X-WP-TotalPages", page))
+            if reached_seen or len(entries) < self.per_page or page >= total_pages:
+                break
+            page += 1
+
+        return changes
+
+    def fetch_sitemap_changes(
+        self, type_name: str, urls: list[SitemapUrl]
+    ) -> list[WPObject]:
+        """Fetch the objects of a type which are new or modified according to the sitemaps.
+
+        Args:
+            type_name: the name of the type
+            urls: the URLs of the type listed in the sitemaps
+
+        Returns:
+            The new and modified objects, as returned by the API
+        """
+        known_links = self._links[type_name]
+        known = self._modified[type_name]
+        unresolved = self._unresolved[type_name]
+        ids = []
+        slugs = []
+        new_urls: dict[str, SitemapUrl] = {}
+        skipped = 0
+        for url in urls:
+            key = _link_key(url.loc)
+            obj_id = known_links.get(key)
+            if obj_id is not None:
+                known_modified = known.get(obj_id)
+                if url.lastmod is not None and (
+                    known_modified is None or url.lastmod > known_modified
+                ):
+                    ids.append(obj_id)
+                continue
+            if key in unresolved and unresolved[key] == url.lastmod:
+                skipped += 1
+                continue
+            obj_id = url.object_id()
+            slug = url.slug()
+            if obj_id is not None:
+                ids.append(obj_id)
+            elif slug is not None:
+                slugs.append(slug)
+            new_urls[key] = url
+
+        logging.info(
+            f"Sitemaps list {len(urls)} {type_name}, {len(ids) + len(slugs)} are new or modified"
+        )
+        entries = self._fetch_batches(type_name, "include", ids)
+        entries += self._fetch_batches(type_name, "slug", slugs)
+
+        by_id = {entry["id"]: entry for entry in entries}
+        by_slug = {unquote(entry.get("slug", "")).lower(): entry for entry in entries}
+        for key, url in new_urls.items():
+            obj_id = url.object_id()
+            slug = url.slug()
+            if obj_id is not None:
+                entry = by_id.get(obj_id)
+            else:
+                entry = by_slug.get(slug) if slug is not None else None
+            if entry is None:
+                unresolved[key] = url.lastmod
+            else:
+                unresolved.pop(key, None)
+                known_links[key] = entry["id"]
+        n_unresolved = sum(1 for key in new_urls if key in unresolved)
+        if n_unresolved + skipped > 0:
+            logging.info(
+                f"{n_unresolved + skipped} {type_name} URLs in the sitemaps could not be resolved "
+                f"to objects ({skipped} skipped as unchanged since they were last looked up)"
+            )
+        return [
+            entry
+            for entry in entries
+            if entry["id"] not in known
+            or known[entry["id"]] != entry.get("modified_gmt")
+        ]
+
+    def _fetch_batches(
+        self, type_name: str, param: str, values: list[Any]
+    ) -> list[WPObject]:
+        entries: list[WPObject] = []
+        for start in range(0, len(values), SITEMAP_BATCH_SIZE):
+            batch = values[start : start + SITEMAP_BATCH_SIZE]
+            url = add_url_template_params(
+                self.api.list_url(type_name),
+                {param: ",".join(str(v) for v in batch), "per_page": len(batch)},
+            )
+            response = self.api.s.get(
+                url_path_join(self.api.url, self.api.api_path, url % 1)
+            )
+            batch_entries = get_content_as_json(response)
+            if type(batch_entries) is list:
+                entries += batch_entries
+        return entries
+
+    def upsert(self, type_name: str, entries: list[WPObject]) -> None:
+        """Insert or replace objects in a type's output file.
+
+        Objects are matched by ID, and the objects are unescaped as they would be by
+        [`WPDownloader.download`][wpextract.WPDownloader.download].
+
+        Args:
+            type_name: the name of the type, e.g. `posts`
+            entries: the objects as returned by the API
+        """
+        if len(entries) == 0:
+            return
+        exported = Exporter.setup_export(entries, UNESCAPE_FIELDS.get(type_name, []))
+        merged = merge_entries([exported, self._load_entries(type_name)])
+        Exporter.write_file(self._path(type_name), merged)
+        for entry in exported:
+            self._modified[type_name][entry["id"]] = entry.get("modified_gmt")
+            if entry.get("link"):
+                self._links[type_name][_link_key(entry["link"])] = entry["id"]
+
+    def poll(self) -> dict[str, int]:
+        """Poll each type once, applying any changes.
+
+        Returns:
+            The number of new or modified objects of each type
+        """
+        sitemap_urls = None
+        sitemap_types = [t for t in self.data_types if t in SITEMAP_TYPES]
+        if self.sitemap and len(sitemap_types) > 0:
+            sitemap_urls = read_sitemaps(self.api.s, self.api.url, sitemap_types)
+            if sitemap_urls is None:
+                logging.warning("No sitemaps found, polling lists instead")
+            else:
+                self.sitemap_counts = {
+                    type_name: sum(
+                        1 for url in sitemap_urls if url.type_name == type_name
+                    )
+                    for type_name in sitemap_types
+                }
+
+        changed = {}
+        for type_name in self.data_types:
+            if sitemap_urls is not None and type_name in sitemap_types:
+                changes = self.fetch_sitemap_changes(
+                    type_name,
+                    [url for url in sitemap_urls if url.type_name == type_name],
+                )
+            else:
+                changes = self.fetch_changes(type_name)
+            self.upsert(type_name, changes)
+            changed[type_name] = len(changes)
+
+            latest = max(
+                [
+                    entry["modified_gmt"]
+                    for entry in changes
+                    if entry.get("modified_gmt")
+                ]
+                + [self.latest_modified(type_name) or ""]
+            )
+            self.state[type_name] = {
+                "modified_gmt": latest or None,
+                "last_poll": datetime.now(timezone.utc).isoformat(),
+            }
+            if len(changes) > 0:
+                logging.info(f"Synced {len(changes)} new or modified {type_name}")
+        self._save_state()
+        return changed
+
+    def run(
+        self,
+        interval: float,
+        max_interval: Optional[float] = None,
+        max_polls: Optional[int] = None,
+    ) -> None:
+        """Poll repeatedly.
+
+        After a poll without changes (or which fails), the time until the next poll is doubled,
+        up to `max_interval`. After a poll with changes, it is reset to `interval`.
+
+        Args:
+            interval: the time in seconds between polls
+            max_interval: the maximum time in seconds between polls when backing off, defaults to `interval`
+            max_polls: the number of polls to make before returning, or None to poll forever
+        """
+        max_interval = max(max_interval or interval, interval)
+        delay = interval
+        polls = 0
+        while True:
+            try:
+                n_changed = sum(self.poll().values())
+            except Exception:
+                logging.exception("Error while polling for changes")
+                n_changed = 0
+            polls += 1
+            if max_polls is not None and polls >= max_polls:
+                return
+
+            delay = interval if n_changed > 0 else min(delay * 2, max_interval)
+            logging.debug(f"Next poll in {delay:.0f}s")
+            time.sleep(delay)
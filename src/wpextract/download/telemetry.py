@@ -0,0 +1,359 @@
+import json
+import math
+import re
+import threading
+import time
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Optional
+from urllib.parse import parse_qs, urlsplit
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, math.inf)
+"""Upper bounds in seconds of the request latency histogram buckets."""
+
+LATENCY_SAMPLES = 1000
+"""The number of recent latencies kept per endpoint to calculate percentiles."""
+
+_ID_SEGMENT = re.compile(r"^\d+$")
+
+
+def endpoint_name(url: str) -> str:
+    """Group a URL into an endpoint for the purpose of aggregating metrics.
+
+    The endpoint is the host and path of the URL, with numeric path segments (such as
+    object IDs) replaced by `{id}`. Requests for files within `wp-content` are grouped
+    by the directory directly within it, e.g. `example.org/wp-content/uploads`.
+
+    Args:
+        url: a request URL
+
+    Returns:
+        The endpoint name
+    """
+    parts = urlsplit(url)
+    segments = [seg for seg in parts.path.split("/") if seg != ""]
+    if "wp-content" in segments:
+        content_idx = segments.index("wp-content")
+        segments = segments[: content_idx + 2]
+    else:
+        segments = ["{id}" if _ID_SEGMENT.match(seg) else seg for seg in segments]
+    return parts.netloc + "/" + "/".join(segments)
+
+
+def _percentile(values: list[float], pct: float) -> Optional[float]:
+    if len(values) == 0:
+        return None
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1)
+    return ordered[max(idx, 0)]
+
+
+def _format_bound(bound: float) -> str:
+    return "+Inf" if bound == math.inf else str(bound)
+
+
+@dataclass
+class EndpointStats:
+    """Aggregated metrics of requests to a single endpoint."""
+
+    requests: int = 0
+    """Number of requests made, including those which failed."""
+    failures: int = 0
+    """Number of requests which did not receive a response or received an error status."""
+    retries: int = 0
+    """Number of retries made within requests."""
+    hedges: int = 0
+    """Number of duplicate requests sent because the original was slow."""
+    hedge_wins: int = 0
+    """Number of hedges which received a response before the original request."""
+    coalesced: int = 0
+    """Number of requests which shared the response of an identical request already in progress."""
+    bytes: int = 0
+    """Total size of response bodies."""
+    latency_sum: float = 0.0
+    """Total time in seconds spent waiting for responses, including retries."""
+    wait_sum: float = 0.0
+    """Total time in seconds spent waiting between requests."""
+    latency_buckets: list[int] = field(
+        default_factory=lambda: [0] * len(LATENCY_BUCKETS)
+    )
+    """Non-cumulative counts of requests in each of [`LATENCY_BUCKETS`][wpextract.download.telemetry.LATENCY_BUCKETS]."""
+    latencies: deque[float] = field(
+        default_factory=lambda: deque(maxlen=LATENCY_SAMPLES)
+    )
+    """The most recent request latencies."""
+    statuses: Counter[str] = field(default_factory=Counter)
+    """Number of responses by HTTP status, or `error` if no response was received."""
+    first_request: Optional[float] = None
+    """Monotonic time the first request started."""
+    last_request: Optional[float] = None
+    """Monotonic time the most recent request finished."""
+    pages_remaining: Optional[int] = None
+    """Pages of the list left to fetch after the most recent request, if it was paginated."""
+
+    def percentile(self, pct: float) -> Optional[float]:
+        """Get a percentile of recent request latencies.
+
+        Args:
+            pct: the percentile, between 0 and 100
+
+        Returns:
+            The latency in seconds, or None if no requests have been made
+        """
+        return _percentile(list(self.latencies), pct)
+
+    def summary(self) -> dict[str, Any]:
+        """Summarise the statistics.
+
+        Returns:
+            A JSON-serialisable dictionary of statistics, including throughput and, for
+            paginated lists, an estimate of the time to fetch the remaining pages.
+        """
+        elapsed = 0.0
+        if self.first_request is not None and self.last_request is not None:
+            elapsed = self.last_request - self.first_request
+        mean_latency = self.latency_sum / self.requests if self.requests else None
+
+        eta = None
+        if self.pages_remaining is not None and self.requests > 0:
+            eta = self.pages_remaining * (self.latency_sum + self.wait_sum)
+            eta /= self.requests
+
+        cumulative = 0
+        buckets = {}
+        for bound, count in zip(LATENCY_BUCKETS, self.latency_buckets):
+            cumulative += count
+            buckets[_format_bound(bound)] = cumulative
+
+        return {
+            "requests": self.requests,
+            "failures": self.failures,
+            "retries": self.retries,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "coalesced": self.coalesced,
+            "bytes": self.bytes,
+            "statuses": dict(self.statuses),
+            "latency_s": {
+                "sum": self.latency_sum,
+                "mean": mean_latency,
+                "p50": self.percentile(50),
+                "p95": self.percentile(95),
+                "max": max(self.latencies) if self.latencies else None,
+                "buckets": buckets,
+            },
+            "wait_s": self.wait_sum,
+            "requests_per_s": self.requests / elapsed if elapsed > 0 else None,
+            "bytes_per_s": self.bytes / elapsed if elapsed > 0 else None,
+            "eta_s": eta,
+        }
+
+
+class RequestMetrics:
+    """Records and aggregates metrics of requests made by a session.
+
+    Metrics are aggregated by endpoint, see [`endpoint_name`][wpextract.download.telemetry.endpoint_name].
+    Recording is thread-safe, so an instance can be shared between sessions.
+    """
+
+    endpoints: dict[str, EndpointStats]
+    """Statistics of each endpoint."""
+
+    def __init__(self) -> None:
+        """Create an empty metrics recorder."""
+        self.endpoints = {}
+        self.started = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _stats(self, url: str) -> EndpointStats:
+        endpoint = endpoint_name(url)
+        if endpoint not in self.endpoints:
+            self.endpoints[endpoint] = EndpointStats()
+        return self.endpoints[endpoint]
+
+    def record(
+        self,
+        url: str,
+        status: Optional[int],
+        latency: float,
+        retries: int = 0,
+        n_bytes: int = 0,
+        total_pages: Optional[int] = None,
+    ) -> None:
+        """Record a completed request.
+
+        Args:
+            url: the requested URL
+            status: the HTTP status of the response, or None if no response was received
+            latency: time in seconds from starting the request to receiving the response
+            retries: the number of retries made
+            n_bytes: the size of the response body
+            total_pages: the number of pages in the list, if the request was for a page
+        """
+        now = time.monotonic()
+        with self._lock:
+            stats = self._stats(url)
+            stats.requests += 1
+            stats.retries += retries
+            stats.bytes += n_bytes
+            stats.latency_sum += latency
+            stats.latencies.append(latency)
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if latency <= bound:
+                    stats.latency_buckets[i] += 1
+                    break
+            if status is None or status >= 400:
+                stats.failures += 1
+            stats.statuses["error" if status is None else str(status)] += 1
+            if stats.first_request is None:
+                stats.first_request = now - latency
+            stats.last_request = now
+
+            if total_pages is not None:
+                page = parse_qs(urlsplit(url).query).get("page", ["1"])[0]
+                if page.isdigit():
+                    stats.pages_remaining = max(total_pages - int(page), 0)
+
+    def record_wait(self, url: str, wait: float) -> None:
+        """Record time spent waiting after a request.
+
+        Args:
+            url: the URL of the request the wait followed
+            wait: the time waited in seconds
+        """
+        with self._lock:
+            self._stats(url).wait_sum += wait
+
+    def record_hedge(self, url: str, won: bool) -> None:
+        """Record a hedged request.
+
+        Args:
+            url: the requested URL
+            won: whether the hedge received a response before the original request
+        """
+        with self._lock:
+            stats = self._stats(url)
+            stats.hedges += 1
+            if won:
+                stats.hedge_wins += 1
+
+    def record_coalesced(self, url: str) -> None:
+        """Record a request which shared the response of an identical request in progress.
+
+        Args:
+            url: the requested URL
+        """
+        with self._lock:
+            self._stats(url).coalesced += 1
+
+    def latency_percentile(
+        self, url: str, pct: float, min_samples: int = 1
+    ) -> Optional[float]:
+        """Get a percentile of recent latencies of the endpoint of a URL.
+
+        Args:
+            url: a URL of the endpoint
+            pct: the percentile, between 0 and 100
+            min_samples: the minimum number of recent latencies needed to calculate the percentile
+
+        Returns:
+            The latency in seconds, or None if fewer than `min_samples` requests have been made to the endpoint
+        """
+        with self._lock:
+            stats = self.endpoints.get(endpoint_name(url))
+            if stats is None or len(stats.latencies) < min_samples:
+                return None
+            return stats.percentile(pct)
+
+    def summary(self) -> dict[str, Any]:
+        """Summarise the metrics of all endpoints.
+
+        Returns:
+            A JSON-serialisable dictionary of overall statistics and the summary of each endpoint.
+        """
+        with self._lock:
+            elapsed = time.monotonic() - self.started
+            endpoints = {
+                name: stats.summary() for name, stats in sorted(self.endpoints.items())
+            }
+        requests = sum(stats["requests"] for stats in endpoints.values())
+        n_bytes = sum(stats["bytes"] for stats in endpoints.values())
+        return {
+            "elapsed_s": elapsed,
+            "requests": requests,
+            "failures": sum(stats["failures"] for stats in endpoints.values()),
+            "bytes": n_bytes,
+            "requests_per_s": requests / elapsed if elapsed > 0 else None,
+            "bytes_per_s": n_bytes / elapsed if elapsed > 0 else None,
+            "endpoints": endpoints,
+        }
+
+    def to_openmetrics(self) -> str:
+        """Format the metrics in the OpenMetrics text format.
+
+        Returns:
+            The metrics exposition text
+        """
+        summary = self.summary()
+        lines = [
+            "# TYPE wpextract_request_duration_seconds histogram",
+            "# UNIT wpextract_request_duration_seconds seconds",
+        ]
+        for name, stats in summary["endpoints"].items():
+            label = f'endpoint="{_escape_label(name)}"'
+            for bound, count in stats["latency_s"]["buckets"].items():
+                lines.append(
+                    f'wpextract_request_duration_seconds_bucket{{{label},le="{bound}"}} {count}'
+                )
+            lines.append(
+                f"wpextract_request_duration_seconds_sum{{{label}}} {stats['latency_s']['sum']}"
+            )
+            lines.append(
+                f"wpextract_request_duration_seconds_count{{{label}}} {stats['requests']}"
+            )
+
+        lines.append("# TYPE wpextract_requests counter")
+        for name, stats in summary["endpoints"].items():
+            for status, count in sorted(stats["statuses"].items()):
+                lines.append(
+                    f'wpextract_requests_total{{endpoint="{_escape_label(name)}",status="{status}"}} {count}'
+                )
+
+        for metric, key, unit in [
+            ("wpextract_retries", "retries", None),
+            ("wpextract_hedges", "hedges", None),
+            ("wpextract_coalesced_requests", "coalesced", None),
+            ("wpextract_response_bytes", "bytes", "bytes"),
+            ("wpextract_wait_seconds", "wait_s", "seconds"),
+        ]:
+            lines.append(f"# TYPE {metric} counter")
+            if unit is not None:
+                lines.append(f"# UNIT {metric} {unit}")
+            for name, stats in summary["endpoints"].items():
+                lines.append(
+                    f'{metric}_total{{endpoint="{_escape_label(name)}"}} {stats[key]}'
+                )
+
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: Path) -> None:
+        """Write the metrics to a file.
+
+        If the file name ends in `.json`, the [summary][wpextract.download.telemetry.RequestMetrics.summary]
+        is written as JSON, otherwise the [OpenMetrics text][wpextract.download.telemetry.RequestMetrics.to_openmetrics]
+        is written.
+
+        Args:
+            path: the file to write
+        """
+        with open(path, "w", encoding="utf-8") as f:
+            if path.suffix.lower() == ".json":
+                json.dump(self.summary(), f, indent=4)
+            else:
+                f.write(self.to_openmetrics())
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
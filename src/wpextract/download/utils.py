@@ -1,10 +1,13 @@
 import json
-from collections.abc import Iterable, Sequence
+from collections.abc import Iterable, Mapping, Sequence
 from typing import Any, Optional, Union
-from urllib.parse import urlsplit, urlunsplit
+from urllib.parse import urlencode, urlsplit, urlunsplit
 
 from requests import Response
 
+WP_DATE_FORMAT = "%Y-%m-%dT%H:%M:%S"
+"""The format of dates used by the WordPress API, without timezone."""
+
 
 def get_by_id(
     value: Sequence[Union[dict[Any, Any], None]], idx: Any
@@ -50,6 +53,45 @@ def url_path_join(*parts: str) -> str:
     return urlunsplit((scheme, netloc, path, query, fragment))
 
 
+def add_url_template_params(url: str, params: Mapping[str, Any]) -> str:
+    """Append query parameters to a URL template containing a ``%d`` page placeholder.
+
+    Any ``%`` produced by URL-encoding the parameters is escaped so the result can
+    still be formatted with the page number.
+
+    Args:
+        url: the URL template, e.g. ``wp/v2/posts?page=%d``
+        params: the query parameters to append
+
+    Returns:
+        The URL template with the parameters appended
+    """
+    if len(params) == 0:
+        return url
+    separator = "&" if "?" in url else "?"
+    return url + separator + urlencode(params).replace("%", "%%")
+
+
+def passthrough_segment(content: bytes) -> Optional[bytes]:
+    """Prepare the body of a list response to be written as a line of a JSON Lines file.
+
+    The body is not decoded. Line breaks can only appear in JSON as whitespace between
+    tokens, so are replaced with spaces.
+
+    Args:
+        content: the response body, which should be a JSON array
+
+    Returns:
+        The body on a single line, or None if it is not a non-empty JSON array
+    """
+    if content[:3] == b"\xef\xbb\xbf":  # UTF-8 BOM
+        content = content[3:]
+    segment = content.strip().replace(b"\r", b" ").replace(b"\n", b" ")
+    if not segment.startswith(b"[") or segment[1:].strip() == b"]":
+        return None
+    return segment
+
+
 def first(sequence: Iterable[str], default: str = "") -> str:
     """Return the first element of an iterable sequence or a default value.
 
@@ -1,8 +1,11 @@
 import copy
 import logging
 import math
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
 from json.decoder import JSONDecodeError
-from typing import Any, Literal, Optional, Union
+from typing import Any, Callable, Literal, Optional, Union
+from urllib.parse import urlsplit
 
 from tqdm.auto import tqdm
 
@@ -11,6 +14,7 @@ from wpextract.download.exceptions import (
     NSNotFoundException,
     WordPressApiNotV2,
 )
+from wpextract.download.filters import DownloadFilter
 from wpextract.download.requestsession import (
     HTTPError,
     HTTPError404,
@@ -18,13 +22,93 @@ from wpextract.download.requestsession import (
     RequestSession,
 )
 from wpextract.download.utils import (
+    WP_DATE_FORMAT,
+    add_url_template_params,
     get_by_id,
     get_content_as_json,
+    passthrough_segment,
     url_path_join,
 )
 
 WPObject = dict[str, Any]
+BASIC_INFO_FIELDS = ["name", "description", "namespaces"]
+"""Fields of the API index requested by a fast probe."""
 ObjectsAndTotal = tuple[list[WPObject], Optional[int]]
+DateWindow = tuple[datetime, datetime]
+"""A date range from the first (inclusive) to the second (exclusive) datetime."""
+
+Shard = tuple[int, int]
+"""A zero-based shard index and the total number of shards."""
+
+ShardBoundaries = dict[str, Any]
+"""The probed extent of a list which a shard's part was chosen from.
+
+Contains the `total` number of entries, the dates of the `oldest` and `newest` entries (`None` if
+not probed) and the number of date `windows` (`None` if the list was divided into pages). Shards of
+the same list only divide it consistently if their boundaries are equal.
+"""
+
+PageCallback = Callable[[list[WPObject]], None]
+"""Called with the new entries of each page as it is crawled."""
+
+ONE_SECOND = timedelta(seconds=1)
+DEFAULT_PER_PAGE = 10
+"""The number of entries per page when not specified, the WordPress default."""
+
+
+def split_date_range(start: datetime, end: datetime, n: int) -> list[DateWindow]:
+    """Split a date range into ``n`` contiguous windows of equal length.
+
+    Window boundaries are rounded to whole seconds, the precision of WordPress dates,
+    so fewer than ``n`` windows may be returned for very short ranges.
+
+    Args:
+        start: the start of the range (inclusive)
+        end: the end of the range (exclusive)
+        n: the number of windows to create
+
+    Returns:
+        A list of windows in chronological order
+    """
+    span_s = int((end - start).total_seconds())
+    n = max(1, min(n, span_s))
+    boundaries = [start + timedelta(seconds=(span_s * i) // n) for i in range(n)]
+    boundaries.append(end)
+    return [
+        (boundaries[i], boundaries[i + 1])
+        for i in range(n)
+        if boundaries[i] < boundaries[i + 1]
+    ]
+
+
+def _window_params(
+    window: DateWindow, open_start: bool = False, open_end: bool = False
+) -> dict[str, str]:
+    # after and before are both exclusive in WordPress
+    params = {}
+    if not open_start:
+        params["after"] = (window[0] - ONE_SECOND).strftime(WP_DATE_FORMAT)
+    if not open_end:
+        params["before"] = window[1].strftime(WP_DATE_FORMAT)
+    return params
+
+
+def shard_page_range(total_pages: int, shard: Shard) -> tuple[int, int]:
+    """Get the contiguous range of pages assigned to a shard.
+
+    Args:
+        total_pages: the number of pages available
+        shard: the shard to get pages for
+
+    Returns:
+        The first and last page (inclusive). If the shard has no pages, the first
+        page will be greater than the last.
+    """
+    index, count = shard
+    pages_per_shard = math.ceil(total_pages / count)
+    first_page = index * pages_per_shard + 1
+    last_page = min((index + 1) * pages_per_shard, total_pages)
+    return first_page, last_page
 
 
 class WPApi:
@@ -62,6 +146,11 @@ class WPApi:
         target: str,
         api_path: str = "wp-json/",
         session: Optional[RequestSession] = None,
+        partition_size: Optional[int] = None,
+        workers: int = 1,
+        shard: Optional[Shard] = None,
+        fast_probe: bool = False,
+        filters: Optional[DownloadFilter] = None,
     ) -> None:
         """Creates a new instance of WPApi.
 
@@ -69,6 +158,16 @@ class WPApi:
             target: the target of the scan
             api_path: the api path, if non-default
             session: the requests session object to use for HTTP requests
+            partition_size: if set, crawl types which support date filtering in date
+                windows of approximately this many entries. See
+                [`crawl_date_windows`][wpextract.download.wpapi.WPApi.crawl_date_windows].
+            workers: the number of date windows to crawl in parallel
+            shard: if set, only crawl the part of each list assigned to this shard. See
+                [`crawl_pages`][wpextract.download.wpapi.WPApi.crawl_pages].
+            fast_probe: if true, only request the fields of the API index needed for basic
+                information. The full index, which lists every route and can be very
+                large, is only fetched if routes are needed.
+            filters: filters to apply to the lists of posts, pages and media
         """
         self.api_path = api_path
         self.has_v2: Optional[bool] = None
@@ -76,6 +175,14 @@ class WPApi:
         self.description = None
         self.url = target
         self.basic_info: Optional[dict[str, Any]] = None
+        self.routes: Optional[dict[str, Any]] = None
+        self.fast_probe = fast_probe
+        self.filters = filters
+        self.partition_size = partition_size
+        self.workers = workers
+        self.shard = shard
+        self.shard_boundaries: dict[str, ShardBoundaries] = {}
+        """The boundaries of each list crawled as a shard, by list name (e.g. `posts`)."""
 
         if session is not None:
             self.s = session
@@ -95,6 +202,11 @@ class WPApi:
         if self.basic_info is not None:
             return self.basic_info
 
+        if self.fast_probe:
+            # The API path may already have a query, e.g. ?rest_route=/
+            separator = "&" if "?" in rest_url else "?"
+            rest_url += separator + "_fields=" + ",".join(BASIC_INFO_FIELDS)
+
         try:
             req = self.s.get(rest_url)
         except Exception as e:
@@ -127,6 +239,8 @@ class WPApi:
         start: Optional[int] = None,
         num: Optional[int] = None,
         display_progress: bool = True,
+        partition_size: Optional[int] = None,
+        on_page: Optional[PageCallback] = None,
     ) -> tuple[list[WPObject], int]:
         """Crawls all pages while there is at least one result for the given endpoint or tries to get pages from start to end.
 
@@ -135,6 +249,17 @@ class WPApi:
             start: the start index
             num: the number of entries to retrieve
             display_progress: whether to display a progress bar
+            partition_size: if set, and neither `start` nor `num` are, crawl in date
+                windows of approximately this many entries using
+                [`crawl_date_windows`][wpextract.download.wpapi.WPApi.crawl_date_windows].
+                The endpoint must support the `after` and `before` parameters.
+            on_page: if set, called with the entries of each page as soon as it is crawled, before
+                all pages have been crawled. When crawling date windows, it may be called from
+                multiple threads, and entries at window boundaries may be passed more than once.
+
+        If this instance has a [`shard`][wpextract.download.wpapi.WPApi] set and neither `start`
+        nor `num` are, only the date windows (if `partition_size` is set) or contiguous
+        range of pages (otherwise) assigned to the shard are crawled.
 
         Raises:
             WordPressApiNotV2: The target does not support the WordPress API v2
@@ -143,6 +268,29 @@ class WPApi:
         Returns:
             A tuple containing the list of entries and the total number of entries
         """
+        if start is None and num is None:
+            if partition_size is not None:
+                return self.crawl_date_windows(
+                    url,
+                    partition_size,
+                    display_progress=display_progress,
+                    on_page=on_page,
+                )
+            if self.shard is not None:
+                return self.crawl_page_shard(
+                    url, display_progress=display_progress, on_page=on_page
+                )
+
+        return self._crawl_pages(url, start, num, display_progress, on_page)
+
+    def _crawl_pages(
+        self,
+        url: str,
+        start: Optional[int] = None,
+        num: Optional[int] = None,
+        display_progress: bool = True,
+        on_page: Optional[PageCallback] = None,
+    ) -> tuple[list[WPObject], int]:
         page = 1
         total_entries = 0
         total_pages = 0
@@ -150,7 +298,7 @@ class WPApi:
         entries: list[WPObject] = []
         base_url = url
         entries_left = 1
-        per_page = 10
+        per_page = DEFAULT_PER_PAGE
         if start is not None:
             page = math.floor(start / per_page) + 1
         if num is not None:
@@ -194,6 +342,7 @@ class WPApi:
             try:
                 json_content = get_content_as_json(req)
                 if type(json_content) is list and len(json_content) > 0:
+                    n_before = len(entries)
                     if (
                         start is None
                         or (
@@ -223,6 +372,9 @@ class WPApi:
                             entries += json_content[:entries_left]
                             entries_left = 0
 
+                    if on_page is not None and len(entries) > n_before:
+                        on_page(entries[n_before:])
+
                     if display_progress:
                         if num is None and start is None and total_entries >= 0:
                             if pbar is None:
@@ -249,6 +401,349 @@ class WPApi:
 
         return (entries, total_entries)
 
+    def crawl_pages_raw(
+        self,
+        url: str,
+        write: Callable[[bytes], None],
+        display_progress: bool = True,
+    ) -> int:
+        """Crawl all pages of a list, passing the undecoded body of each page to a function.
+
+        Each page is passed through [`passthrough_segment`][wpextract.download.utils.passthrough_segment],
+        so is a JSON array on a single line. Crawling stops at the first page which is empty or not
+        a JSON array. If this instance has a [`shard`][wpextract.download.wpapi.WPApi] set, only the
+        range of pages assigned to the shard is crawled.
+
+        Args:
+            url: the URL template to crawl, containing "%d" for the page number
+            write: function called with each page
+            display_progress: whether to display a progress bar
+
+        Raises:
+            HTTPError: An HTTP error is encountered before any content is retrieved
+
+        Returns:
+            The total number of entries in the list
+        """
+        first_page = 1
+        last_page: Optional[int] = None
+        total_entries = 0
+        total_pages = None
+        if self.shard is not None:
+            total_entries, newest = self.probe_total(url)
+            self._record_boundaries(url, total_entries, newest=newest)
+            total_pages = math.ceil(total_entries / DEFAULT_PER_PAGE)
+            first_page, last_page = shard_page_range(total_pages, self.shard)
+
+        pbar = None
+        page = first_page
+        while last_page is None or page <= last_page:
+            try:
+                req = self.s.get(url_path_join(self.url, self.api_path, url % page))
+            except HTTPErrorInvalidPage:
+                logging.debug(
+                    "Received HTTP 400 error which appears to be an invalid page error, probably reached the end."
+                )
+                break
+            except HTTPError as e:
+                if page == first_page:
+                    raise e
+                logging.exception(
+                    f"Error while fetching page {page}. Stopping at page {page - 1}."
+                )
+                break
+
+            if page == first_page and "X-WP-Total" in req.headers:
+                total_entries = int(req.headers["X-WP-Total"])
+                total_pages = int(req.headers.get("X-WP-TotalPages", 0))
+                logging.info("Total number of entries: %d" % total_entries)
+
+            segment = passthrough_segment(req.content)
+            if segment is None:
+                break
+            write(segment)
+
+            if display_progress and total_pages is not None:
+                if pbar is None:
+                    pbar = tqdm(
+                        total=total_pages
+                        if last_page is None
+                        else last_page - first_page + 1
+                    )
+                pbar.update(1)
+            page += 1
+
+        if pbar is not None:
+            pbar.close()
+        return total_entries
+
+    def probe_total(
+        self, url: str, params: Optional[dict[str, str]] = None
+    ) -> tuple[int, Optional[WPObject]]:
+        """Cheaply fetch the total number of entries and the first entry of a list endpoint.
+
+        Makes a single request for a page containing one entry.
+
+        Args:
+            url: the URL template to probe, containing "%d" for the page number
+            params: additional query parameters
+
+        Returns:
+            The value of the `X-WP-Total` header and the first entry, if any.
+        """
+        probe_url = add_url_template_params(url, {**(params or {}), "per_page": 1})
+        req = self.s.get(url_path_join(self.url, self.api_path, probe_url % 1))
+        total = int(req.headers.get("X-WP-Total", 0))
+        try:
+            content = get_content_as_json(req)
+        except JSONDecodeError:
+            return total, None
+        if type(content) is list and len(content) > 0 and type(content[0]) is dict:
+            return total, content[0]
+        return total, None
+
+    def _record_boundaries(
+        self,
+        url: str,
+        total: int,
+        oldest: Optional[WPObject] = None,
+        newest: Optional[WPObject] = None,
+        windows: Optional[int] = None,
+    ) -> None:
+        if self.shard is None:
+            return
+        list_name = urlsplit(url).path.rstrip("/").rsplit("/", 1)[-1]
+        self.shard_boundaries[list_name] = {
+            "total": total,
+            "oldest": oldest.get("date") if oldest is not None else None,
+            "newest": newest.get("date") if newest is not None else None,
+            "windows": windows,
+        }
+
+    def _crawl_undated(
+        self,
+        url: str,
+        display_progress: bool = True,
+        on_page: Optional[PageCallback] = None,
+    ) -> tuple[list[WPObject], int]:
+        if self.shard is not None:
+            return self.crawl_page_shard(
+                url, display_progress=display_progress, on_page=on_page
+            )
+        return self._crawl_pages(
+            url, display_progress=display_progress, on_page=on_page
+        )
+
+    def crawl_date_windows(
+        self,
+        url: str,
+        partition_size: int,
+        display_progress: bool = True,
+        on_page: Optional[PageCallback] = None,
+    ) -> tuple[list[WPObject], int]:
+        """Crawl a list endpoint by splitting it into date windows.
+
+        WordPress implements pagination with an SQL `OFFSET`, so requesting late pages of large
+        collections is slow. Instead, the publication date range is split into windows
+        expected to contain approximately `partition_size` entries, based on the
+        `X-WP-Total` header. Each window is crawled separately with the `after` and
+        `before` parameters, so no window is paginated deeply. Windows which turn out to
+        contain far more entries than expected are split further. The first and last
+        windows are open-ended, so entries published during the crawl are not missed.
+
+        Windows are crawled in parallel by up to [`workers`][wpextract.download.wpapi.WPApi]
+        threads. Results are merged in reverse-chronological order (the default order
+        of the API) and deduplicated by ID.
+
+        If a [`shard`][wpextract.download.wpapi.WPApi] is set, at least one window is created per
+        shard, and windows are assigned to shards in turn. The probed boundaries are recorded in
+        [`shard_boundaries`][wpextract.download.wpapi.WPApi].
+
+        If the oldest or newest entry can't be probed (e.g. the response can't be decoded), the
+        list is crawled by page instead, or by [`crawl_page_shard`][wpextract.download.wpapi.WPApi.crawl_page_shard]
+        if a shard is set.
+
+        Args:
+            url: the URL template to crawl, containing "%d" for the page number
+            partition_size: the approximate number of entries per window
+            display_progress: whether to display a progress bar of windows
+            on_page: if set, called with the entries of each page as soon as it is crawled, from the thread crawling its window
+
+        Returns:
+            A tuple containing the list of entries and the total number of entries
+        """
+        total_entries, oldest = self.probe_total(
+            url, {"orderby": "date", "order": "asc"}
+        )
+        if oldest is None:
+            return self._crawl_undated(url, display_progress, on_page)
+        if self.shard is None and total_entries <= partition_size:
+            return self._crawl_pages(
+                url, display_progress=display_progress, on_page=on_page
+            )
+
+        _, newest = self.probe_total(url, {"orderby": "date", "order": "desc"})
+        if newest is None:
+            return self._crawl_undated(url, display_progress, on_page)
+
+        n_windows = math.ceil(total_entries / partition_size)
+        if self.shard is not None:
+            n_windows = max(n_windows, self.shard[1])
+        windows = split_date_range(
+            datetime.fromisoformat(oldest["date"]),
+            datetime.fromisoformat(newest["date"]) + ONE_SECOND,
+            n_windows,
+        )
+        self._record_boundaries(url, total_entries, oldest, newest, len(windows))
+        last_idx = len(windows) - 1
+        # Newest first, to match the API order
+        assigned = list(reversed(list(enumerate(windows))))
+        if self.shard is not None:
+            shard_idx, shard_count = self.shard
+            assigned = [(i, w) for i, w in assigned if i % shard_count == shard_idx]
+            logging.info(
+                f"Total number of entries: {total_entries}, crawling {len(assigned)} "
+                f"of {len(windows)} date windows as shard {shard_idx + 1}/{shard_count}"
+            )
+        else:
+            logging.info(
+                f"Total number of entries: {total_entries}, "
+                f"crawling in {len(windows)} date windows"
+            )
+
+        pbar = tqdm(total=len(assigned), unit="window") if display_progress else None
+
+        def crawl_window(indexed_window: tuple[int, DateWindow]) -> list[WPObject]:
+            idx, window = indexed_window
+            window_entries = self._crawl_window(
+                url,
+                window,
+                partition_size,
+                open_start=idx == 0,
+                open_end=idx == last_idx,
+                on_page=on_page,
+            )
+            if pbar is not None:
+                pbar.update(1)
+            return window_entries
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            window_results = list(executor.map(crawl_window, assigned))
+
+        if pbar is not None:
+            pbar.close()
+
+        entries: list[WPObject] = []
+        seen_ids = set()
+        for window_entries in window_results:
+            for entry in window_entries:
+                if entry.get("id") in seen_ids:
+                    continue
+                seen_ids.add(entry.get("id"))
+                entries.append(entry)
+
+        return entries, total_entries
+
+    def _crawl_window(
+        self,
+        url: str,
+        window: DateWindow,
+        partition_size: int,
+        open_start: bool = False,
+        open_end: bool = False,
+        on_page: Optional[PageCallback] = None,
+    ) -> list[WPObject]:
+        window_url = add_url_template_params(
+            url, _window_params(window, open_start, open_end)
+        )
+        window_total, _ = self.probe_total(window_url)
+        if window_total == 0:
+            return []
+
+        start, end = window
+        if window_total > 2 * partition_size and end - start > ONE_SECOND:
+            mid = start + (end - start) // 2
+            mid = mid.replace(microsecond=0)
+            logging.debug(
+                f"Window {start} to {end} has {window_total} entries, splitting"
+            )
+            # Newest first, to match the API order
+            return self._crawl_window(
+                url, (mid, end), partition_size, open_end=open_end, on_page=on_page
+            ) + self._crawl_window(
+                url,
+                (start, mid),
+                partition_size,
+                open_start=open_start,
+                on_page=on_page,
+            )
+
+        entries, _ = self._crawl_pages(
+            window_url, display_progress=False, on_page=on_page
+        )
+        return entries
+
+    def crawl_page_shard(
+        self,
+        url: str,
+        display_progress: bool = True,
+        on_page: Optional[PageCallback] = None,
+    ) -> tuple[list[WPObject], int]:
+        """Crawl the contiguous range of pages assigned to this instance's shard.
+
+        The pages of the list are divided into as many contiguous ranges as there are
+        shards, see [`shard_page_range`][wpextract.download.wpapi.shard_page_range]. The probed
+        boundaries are recorded in [`shard_boundaries`][wpextract.download.wpapi.WPApi].
+
+        Args:
+            url: the URL template to crawl, containing "%d" for the page number
+            display_progress: whether to display a progress bar
+            on_page: if set, called with the entries of each page as soon as it is crawled
+
+        Raises:
+            ValueError: if this instance does not have a shard set
+
+        Returns:
+            A tuple containing the list of entries and the total number of entries
+        """
+        if self.shard is None:
+            raise ValueError("Cannot crawl a shard without a shard set")
+
+        total_entries, newest = self.probe_total(url)
+        self._record_boundaries(url, total_entries, newest=newest)
+        total_pages = math.ceil(total_entries / DEFAULT_PER_PAGE)
+        first_page, last_page = shard_page_range(total_pages, self.shard)
+        logging.info(
+            f"Total number of entries: {total_entries}, crawling pages "
+            f"{first_page} to {last_page} of {total_pages} as shard "
+            f"{self.shard[0] + 1}/{self.shard[1]}"
+        )
+        if first_page > last_page:
+            return [], total_entries
+
+        entries, _ = self._crawl_pages(
+            url,
+            start=(first_page - 1) * DEFAULT_PER_PAGE,
+            num=(last_page - first_page + 1) * DEFAULT_PER_PAGE,
+            display_progress=display_progress,
+            on_page=on_page,
+        )
+        return entries, total_entries
+
+    def list_url(self, type_name: str) -> str:
+        """Get the URL template of a type's list, with any filters applied.
+
+        Args:
+            type_name: the name of the type's endpoint, e.g. `posts`
+
+        Returns:
+            The URL template relative to the API root, containing "%d" for the page number
+        """
+        url = f"wp/v2/{type_name}?page=%d"
+        if self.filters is None:
+            return url
+        return add_url_template_params(url, self.filters.to_params(type_name))
+
     def crawl_single_page(self, url: str) -> Any:
         """Crawls a single URL.
 
@@ -291,7 +786,12 @@ class WPApi:
         Returns:
             The list of comments and total number of comments available
         """
-        return self.crawl_pages("wp/v2/comments?page=%d", start, num)
+        return self.crawl_pages(
+            "wp/v2/comments?page=%d",
+            start,
+            num,
+            partition_size=self.partition_size,
+        )
 
     def get_posts(
         self,
@@ -316,7 +816,12 @@ class WPApi:
         if not self.has_v2:
             raise WordPressApiNotV2
 
-        return self.crawl_pages("wp/v2/posts?page=%d", start=start, num=num)
+        return self.crawl_pages(
+            self.list_url("posts"),
+            start=start,
+            num=num,
+            partition_size=self.partition_size,
+        )
 
     def get_tags(
         self,
@@ -370,17 +875,25 @@ class WPApi:
         self,
         start: Optional[int] = None,
         num: Optional[int] = None,
+        on_page: Optional[PageCallback] = None,
     ) -> ObjectsAndTotal:
         """Retrieves all media objects.
 
         Args:
             start: the start index
             num: the number of entries to retrieve
+            on_page: if set, called with the media of each page as soon as it is crawled
 
         Returns:
             The list of media objects
         """
-        return self.crawl_pages("wp/v2/media?page=%d", start=start, num=num)
+        return self.crawl_pages(
+            self.list_url("media"),
+            start=start,
+            num=num,
+            partition_size=self.partition_size,
+            on_page=on_page,
+        )
 
     def get_media_urls(
         self,
@@ -447,7 +960,12 @@ class WPApi:
         Returns:
             The list of pages
         """
-        return self.crawl_pages("wp/v2/pages?page=%d", start=start, num=num)
+        return self.crawl_pages(
+            self.list_url("pages"),
+            start=start,
+            num=num,
+            partition_size=self.partition_size,
+        )
 
     def get_namespaces(
         self,
@@ -482,15 +1000,32 @@ class WPApi:
     def get_routes(self) -> dict[str, Any]:
         """Retrieves a dictionary of routes.
 
+        If the basic information was retrieved with a fast probe, the full API index is
+        fetched the first time this is called.
+
         Returns:
             The dictionary of routes
         """
+        if self.routes is not None:
+            return self.routes
         if self.has_v2 is None:
             self.get_basic_info()
         if self.basic_info is None:
             return {}
-        if "routes" in self.basic_info.keys():
-            return self.basic_info["routes"]  # type: ignore[no-any-return]
+
+        index = self.basic_info
+        if self.fast_probe:
+            try:
+                index = get_content_as_json(
+                    self.s.get(url_path_join(self.url, self.api_path))
+                )
+            except (HTTPError, JSONDecodeError):
+                logging.exception("Unable to retrieve the full API index")
+                return {}
+
+        if "routes" in index.keys():
+            self.routes = index["routes"]
+            return self.routes
         return {}
 
     def crawl_namespaces(self, ns: Union[Literal["all"], str]) -> dict[str, Any]:
@@ -1,14 +1,32 @@
+import json
 import logging
 from pathlib import Path
-from typing import Any, Callable, Optional, TypedDict
+from typing import TYPE_CHECKING, Any, Callable, Optional, TypedDict
 
+from wpextract.download.content_store import ContentStore
 from wpextract.download.exceptions import WordPressApiNotV2
 from wpextract.download.exporter import Exporter
+from wpextract.download.filters import DownloadFilter
+from wpextract.download.media_index import MediaIndex
+from wpextract.download.media_inventory import inventory_media
+from wpextract.download.media_pipeline import MediaPipeline
+from wpextract.download.media_size import MediaSize, select_rendition
+from wpextract.download.plan import DownloadPlan, estimate_download
 from wpextract.download.requestsession import HTTPError, RequestSession
-from wpextract.download.wpapi import WPApi, WPObject
+from wpextract.download.wpapi import Shard, WPApi, WPObject
+from wpextract.util.file import PASSTHROUGH_EXTENSION
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
 
 ExportCallable = Callable[[list[WPObject], Path], int]
 
+SHARD_INFO_FILE_NAME = "shard"
+"""Name of the file describing which shard a partial download contains."""
+
+MEDIA_MANIFEST_FILE_NAME = "manifest.json"
+"""Name of the file in the media directory recording which rendition of each media file was downloaded."""
+
 
 class _ObjTypeFetchData(TypedDict):
     export_func: ExportCallable
@@ -25,6 +43,14 @@ class WPDownloader:
         data_types: list[str],
         session: Optional[RequestSession] = None,
         json_prefix: Optional[str] = None,
+        partition_size: Optional[int] = None,
+        workers: int = 1,
+        shard: Optional[Shard] = None,
+        fast_probe: bool = False,
+        filters: Optional[DownloadFilter] = None,
+        passthrough: bool = False,
+        media_size: Optional[MediaSize] = None,
+        dedupe_media: bool = False,
     ) -> None:
         """Initializes the WPDownloader object.
 
@@ -34,26 +60,77 @@ class WPDownloader:
             data_types: set of data types to download
             session: request session. Will be created from default constructor if not provided.
             json_prefix: prefix to prepend to JSON file names
+            partition_size: if set, download posts, pages, media and comments in date windows of approximately this many entries
+            workers: number of date windows to download in parallel
+            shard: if set, only download the part of each type assigned to this zero-indexed shard (of the total number of shards), to be merged with [`merge_downloads`][wpextract.download.merge.merge_downloads]
+            fast_probe: check the site is reachable with a HEAD request instead of fetching the home page, and only request the parts of the API index which are needed
+            filters: filters for the server to apply to the posts, pages and media downloaded
+            passthrough: write the undecoded body of each page to a JSON Lines file per type, instead of decoding, unescaping and re-encoding lists. Cannot be used with `partition_size`.
+            media_size: the rendition of each media file to download with [`download_media_files`][wpextract.WPDownloader.download_media_files], the original file if not set
+            dedupe_media: store media files downloaded with [`download_media_files`][wpextract.WPDownloader.download_media_files] in a [`ContentStore`][wpextract.download.content_store.ContentStore], so that files with the same content are only stored once
+
+        Raises:
+            ValueError: if both `passthrough` and `partition_size` are set
         """
+        if passthrough and partition_size is not None:
+            raise ValueError("Passthrough downloads cannot be partitioned")
+
         self.target = target
         self.out_path = out_path
         self.data_types = data_types
         self.session = session if session else RequestSession()
+        self.fast_probe = fast_probe
+        self.passthrough = passthrough
         self._test_session()
-        self.scanner = WPApi(self.target, session=self.session)
+        self.scanner = WPApi(
+            self.target,
+            session=self.session,
+            partition_size=partition_size,
+            workers=workers,
+            shard=shard,
+            fast_probe=fast_probe,
+            filters=filters,
+        )
+        self.shard = shard
         self.json_prefix = json_prefix
-        self.media_cache: Optional[list[WPObject]] = None
+        self.media_size = media_size
+        self.dedupe_media = dedupe_media
+        self.media_index: Optional[MediaIndex] = None
+        self._media_pipeline: Optional[MediaPipeline] = None
 
     def _test_session(self) -> None:
         try:
-            self.session.get(self.target)
+            if self.fast_probe:
+                self._probe_target()
+            else:
+                self.session.get(self.target)
             logging.info("Connected successfully")
         except Exception as e:
             logging.error("Failed to connect to the server")
             raise e
 
-    def download(self) -> None:
-        """Download and export the requested data lists."""
+    def _probe_target(self) -> None:
+        try:
+            self.session.head(self.target)
+        except HTTPError:
+            # Some servers do not support HEAD requests
+            logging.info("HEAD request failed, retrying with GET")
+            self.session.get(self.target)
+
+    def download(
+        self, media_dest: Optional[Path] = None, media_workers: int = 1
+    ) -> None:
+        """Download and export the requested data lists.
+
+        Args:
+            media_dest: if set, also download media files to this directory. If media are being
+                downloaded, files are downloaded while the media list is still being crawled (see
+                [`MediaPipeline`][wpextract.download.media_pipeline.MediaPipeline]), otherwise
+                with [`download_media_files`][wpextract.WPDownloader.download_media_files] at the end.
+            media_workers: the number of media files to download concurrently while crawling the media list
+        """
+        if self.shard is not None:
+            self._write_shard_info()
         if "users" in self.data_types:
             self._list_obj(WPApi.USER)
         if "tags" in self.data_types:
@@ -67,25 +144,200 @@ class WPDownloader:
         if "comments" in self.data_types:
             self._list_obj(WPApi.COMMENT)
         if "media" in self.data_types:
-            self._list_obj(WPApi.MEDIA)
+            if media_dest is not None:
+                self._list_media_pipelined(media_dest, media_workers)
+            else:
+                self._list_obj(WPApi.MEDIA)
+        elif media_dest is not None:
+            self.download_media_files(self.session, media_dest)
+        if self.shard is not None:
+            # Rewritten with the boundaries probed while crawling, to be checked when merging
+            self._write_shard_info()
+
+    def plan(self, media_files: bool = False) -> DownloadPlan:
+        """Estimate the cost of the download without performing it.
+
+        See [`estimate_download`][wpextract.download.plan.estimate_download].
+
+        Args:
+            media_files: whether to include downloading media files in the estimate
+
+        Returns:
+            The estimated number of requests, size and time of the download
+        """
+        return estimate_download(self.scanner, self.data_types, media_files)
+
+    def _write_shard_info(self) -> None:
+        if self.shard is None:
+            return
+        shard_file = self.out_path / WPDownloader.json_file_name(
+            SHARD_INFO_FILE_NAME, self.json_prefix
+        )
+        with open(shard_file, "w") as f:
+            json.dump(
+                {
+                    "target": self.target,
+                    "shard": self.shard[0],
+                    "shards": self.shard[1],
+                    "data_types": sorted(self.data_types),
+                    "boundaries": self.scanner.shard_boundaries,
+                },
+                f,
+                indent=4,
+            )
 
     def download_media_files(self, session: RequestSession, dest: Path) -> None:
         """Download site media files.
 
+        If media were downloaded by [`download`][wpextract.WPDownloader.download], their URLs are
+        read from the on-disk [`MediaIndex`][wpextract.download.media_index.MediaIndex], otherwise
+        the media list is fetched again.
+
+        If a `media_size` was given or `dedupe_media` is set, a manifest is written to the destination
+        directory recording the rendition downloaded for each media object and the SHA-256 hash of
+        its content.
+
         Args:
             session: the request session to use
             dest: destination directory for media
         """
-        logging.info("Pulling media URLs")
-        media, slugs = self.scanner.get_media_urls("all", media_cache=self.media_cache)
+        media: Iterable[str]
+        write_manifest = self.media_size is not None or self.dedupe_media
+        if write_manifest:
+            self._ensure_media_index()
 
-        if len(media) == 0:
+        if self.media_index is not None:
+            media = self.media_index.urls()
+            n_media = len(self.media_index)
+        else:
+            logging.info("Pulling media URLs")
+            media, _ = self.scanner.get_media_urls("all")
+            n_media = len(media)
+
+        if n_media == 0:
             logging.warning("No media found corresponding to the criteria")
             return
-        logging.info(f"{len(media)} media URLs found")
+        logging.info(f"{n_media} media URLs found")
 
-        number_dl = Exporter.download_media(session, media, dest)
+        store = ContentStore(dest, self.media_index) if self.dedupe_media else None
+        number_dl = Exporter.download_media(
+            session, media, dest, total=n_media, store=store
+        )
         logging.info(f"Downloaded {number_dl} media files")
+        if store is not None:
+            logging.info(
+                f"{store.duplicates} media files were duplicates, saving {store.bytes_saved} bytes"
+            )
+
+        if write_manifest:
+            self._write_media_manifest(dest, store)
+
+    def _write_media_manifest(self, dest: Path, store: Optional[ContentStore]) -> None:
+        if self.media_index is None:
+            return
+        manifest = list(self.media_index.entries(hashes=store is not None))
+        Exporter.write_file(dest / MEDIA_MANIFEST_FILE_NAME, manifest)
+
+    def _list_media_pipelined(self, dest: Path, workers: int) -> None:
+        # Media are indexed as they are listed, so their hashes can be recorded
+        media_index = self._index_media([])
+        store = ContentStore(dest, media_index) if self.dedupe_media else None
+        with MediaPipeline(self.session, dest, workers, store=store) as pipeline:
+            self._media_pipeline = pipeline
+            try:
+                self._list_obj(WPApi.MEDIA)
+            finally:
+                self._media_pipeline = None
+        logging.info(f"Downloaded {pipeline.downloaded} media files")
+        if pipeline.failed > 0:
+            logging.warning(
+                f"{pipeline.failed} media files could not be downloaded due to HTTP errors"
+            )
+        if store is not None:
+            logging.info(
+                f"{store.duplicates} media files were duplicates, saving {store.bytes_saved} bytes"
+            )
+
+        if self.media_size is not None or self.dedupe_media:
+            self._write_media_manifest(dest, store)
+
+    def _add_media(self, media: list[WPObject]) -> None:
+        if self.media_index is not None:
+            self.media_index.add(media)
+        if self._media_pipeline is None:
+            return
+        self._media_pipeline.submit(
+            select_rendition(m_item, self.media_size)[0]
+            for m_item in media
+            if type(m_item) is dict and m_item.get("source_url")
+        )
+
+    def verify_media_files(self, dest: Path) -> list[Path]:
+        """Check the media files stored with `dedupe_media` have not been corrupted.
+
+        See [`ContentStore.verify`][wpextract.download.content_store.ContentStore.verify].
+
+        Args:
+            dest: destination directory for media
+
+        Returns:
+            The paths of stored files whose content does not match their hash
+        """
+        corrupt = ContentStore(dest).verify()
+        for path in corrupt:
+            logging.error(f"Stored media file {path} does not match its hash")
+        return corrupt
+
+    def inventory_media_files(
+        self, session: RequestSession, dest: Path, workers: int = 1
+    ) -> None:
+        """Check the availability, size and type of site media files without downloading them.
+
+        A `HEAD` request is made for each file (see [`inventory_media`][wpextract.download.media_inventory.inventory_media]),
+        and the results are written to a manifest in the destination directory, in the same format as
+        [`download_media_files`][wpextract.WPDownloader.download_media_files] with additional fields
+        for the response.
+
+        Args:
+            session: the request session to use
+            dest: destination directory for the manifest
+            workers: the number of requests to make concurrently, sharing the session's wait
+        """
+        media_index = self._ensure_media_index()
+        n_media = len(media_index)
+        if n_media == 0:
+            logging.warning("No media found corresponding to the criteria")
+            return
+        logging.info(f"{n_media} media URLs found")
+
+        manifest = []
+        for entry, inventory in zip(
+            media_index.entries(),
+            inventory_media(session, media_index.urls(), workers, total=n_media),
+        ):
+            inventory.pop("url")
+            manifest.append({**entry, **inventory})
+        Exporter.write_file(dest / MEDIA_MANIFEST_FILE_NAME, manifest)
+
+        available = [entry for entry in manifest if entry["status"] == 200]
+        total_size = sum(entry["content_length"] or 0 for entry in available)
+        logging.info(
+            f"{len(available)} of {n_media} media files are available, totalling {total_size} bytes"
+        )
+
+    def _ensure_media_index(self) -> MediaIndex:
+        if self.media_index is not None:
+            return self.media_index
+        logging.info("Pulling media list")
+        media_list, _ = self.scanner.get_media()
+        return self._index_media(media_list)
+
+    def _index_media(self, media: list[WPObject]) -> MediaIndex:
+        if self.media_index is not None:
+            self.media_index.close()
+        self.media_index = MediaIndex(size=self.media_size)
+        self.media_index.add(media)
+        return self.media_index
 
     def _get_fetch_or_list_type(
         self, obj_type: int, plural: bool = False
@@ -143,17 +395,25 @@ class WPDownloader:
         logging.info(f"Downloading {prop['obj_name']}")
 
         try:
-            obj_list, _ = self.scanner.get_obj_list(obj_type, start, limit)
-
-            WPDownloader.export_decorator(
-                export_func=prop["export_func"],
-                file_name=prop["obj_name"].lower(),
-                json_path=self.out_path,
-                json_prefix=self.json_prefix,
-                values=obj_list,
-            )
-            if obj_type == WPApi.MEDIA:
-                self.media_cache = obj_list
+            if self.passthrough:
+                self._list_obj_raw(obj_type, prop["obj_name"].lower())
+            else:
+                if obj_type == WPApi.MEDIA and self._media_pipeline is not None:
+                    obj_list, _ = self.scanner.get_media(
+                        start, limit, on_page=self._add_media
+                    )
+                else:
+                    obj_list, _ = self.scanner.get_obj_list(obj_type, start, limit)
+
+                WPDownloader.export_decorator(
+                    export_func=prop["export_func"],
+                    file_name=prop["obj_name"].lower(),
+                    json_path=self.out_path,
+                    json_prefix=self.json_prefix,
+                    values=obj_list,
+                )
+                if obj_type == WPApi.MEDIA and self._media_pipeline is None:
+                    self._index_media(obj_list)
         except HTTPError:
             logging.exception(
                 f"An HTTP error was encountered while downloading {prop['obj_name']}"
@@ -164,6 +424,29 @@ class WPDownloader:
             logging.error(f"Could not open {e.filename} for writing")
         logging.info(f"Completed downloading {prop['obj_name']}")
 
+    def _list_obj_raw(self, obj_type: int, type_name: str) -> None:
+        if obj_type == WPApi.POST:
+            # Matches the check made by WPApi.get_posts
+            if self.scanner.has_v2 is None:
+                self.scanner.get_basic_info()
+            if not self.scanner.has_v2:
+                raise WordPressApiNotV2
+
+        if obj_type == WPApi.MEDIA and self._media_pipeline is None:
+            self._index_media([])
+
+        path = self.out_path / WPDownloader.json_file_name(
+            type_name, self.json_prefix, PASSTHROUGH_EXTENSION
+        )
+        with open(path, "wb") as f:
+
+            def write_page(segment: bytes) -> None:
+                f.write(segment + b"\n")
+                if obj_type == WPApi.MEDIA:
+                    self._add_media(json.loads(segment))
+
+            self.scanner.crawl_pages_raw(self.scanner.list_url(type_name), write_page)
+
     @staticmethod
     def export_decorator(
         export_func: ExportCallable,
@@ -185,9 +468,24 @@ class WPDownloader:
         """
         kwargs = kwargs or {}
 
-        filename = file_name + ".json"
+        json_file = json_path / WPDownloader.json_file_name(file_name, json_prefix)
+        export_func(values, json_file, **kwargs)
+
+    @staticmethod
+    def json_file_name(
+        file_name: str, json_prefix: Optional[str], extension: str = ".json"
+    ) -> str:
+        """Construct the name of an output JSON file.
+
+        Args:
+            file_name: the name of the file without extension
+            json_prefix: a prefix for the file, separated from the name with a hyphen
+            extension: the file extension, including the dot
+
+        Returns:
+            The full file name
+        """
+        filename = file_name + extension
         if json_prefix is not None:
             filename = json_prefix + "-" + filename
-
-        json_file = json_path / filename
-        export_func(values, json_file, **kwargs)
+        return filename
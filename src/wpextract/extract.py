@@ -17,6 +17,7 @@ from wpextract.extractors.posts import (
 )
 from wpextract.extractors.tags import load_tags
 from wpextract.extractors.users import load_users
+from wpextract.parse.html import PARSE_BACKENDS
 from wpextract.parse.translations import PickerListType
 from wpextract.scrape.crawler import ScrapeCrawl
 from wpextract.util.file import prefix_filename
@@ -29,6 +30,8 @@ class WPExtractor:
     scrape_root: Optional[Path]
     json_prefix: Optional[str]
     translation_pickers: Optional[PickerListType]
+    jobs: int
+    backend: str
 
     link_registry: LinkRegistry
     """Registry of known URLs and their corresponding data items."""
@@ -54,6 +57,8 @@ class WPExtractor:
         scrape_root: Optional[Path] = None,
         json_prefix: Optional[str] = None,
         translation_pickers: Optional[PickerListType] = None,
+        jobs: int = 1,
+        backend: str = "bs4",
     ) -> None:
         """Create a new extractor.
 
@@ -62,12 +67,25 @@ class WPExtractor:
             scrape_root: Path to scrape directory
             json_prefix: Prefix of files in ``json_root``
             translation_pickers: Supply a custom list of translation pickers
+            jobs: Number of processes to extract posts and pages with. Custom translation
+                pickers must be importable by the processes if this is more than 1.
+            backend: Backend to parse post, page and media HTML with, one of
+                [`PARSE_BACKENDS`][wpextract.parse.html.PARSE_BACKENDS]
+
+        Raises:
+            ValueError: if the backend is not supported
         """
+        if backend not in PARSE_BACKENDS:
+            raise ValueError(
+                f"Unknown parse backend: {backend}, must be one of {', '.join(PARSE_BACKENDS)}"
+            )
         self.json_root = json_root
         self.scrape_root = scrape_root
         self.json_prefix = json_prefix
         self.link_registry = LinkRegistry()
         self.translation_pickers = translation_pickers
+        self.jobs = jobs
+        self.backend = backend
 
     def extract(self) -> None:
         """Perform the extraction."""
@@ -110,11 +128,13 @@ class WPExtractor:
             link_registry=self.link_registry,
             scrape_urls_files=self.scrape_url_mapping,
             translation_pickers=self.translation_pickers,
+            jobs=self.jobs,
+            backend=self.backend,
         )
 
     def _extract_media(self) -> None:
         json_file = self.json_root / self._prefix_filename("media.json")
-        self.media = load_media(json_file, self.link_registry)
+        self.media = load_media(json_file, self.link_registry, backend=self.backend)
 
     def _extract_tags(self) -> None:
         json_file = self.json_root / self._prefix_filename("tags.json")
@@ -130,7 +150,9 @@ class WPExtractor:
 
     def _extract_pages(self) -> None:
         json_file = self.json_root / self._prefix_filename("pages.json")
-        self.pages = load_pages(json_file, self.link_registry)
+        self.pages = load_pages(
+            json_file, self.link_registry, jobs=self.jobs, backend=self.backend
+        )
 
     def _resolve_post_links(self) -> None:
         if self.posts is None:
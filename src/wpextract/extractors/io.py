@@ -10,21 +10,22 @@ from langcodes import Language
 from pandas import DataFrame
 from pandas import Timestamp as PdTimestamp
 
+from wpextract.util.file import read_json
+
 
 def load_from_path(path: Path) -> Any:
     """Loads and parses a JSON file.
 
+    If the file does not exist but the output of a passthrough download (with the extension
+    `.jsonl`) does, that is loaded instead, see [`read_json`][wpextract.util.file.read_json].
+
     Args:
         path: The path to load
 
     Returns:
         The decoded JSON object. None if the file does not exist.
     """
-    if not path.is_file():
-        return None
-
-    with open(path) as f:
-        return json.load(f)
+    return read_json(path)
 
 
 def load_df(path: Path, index_col: str = "id") -> Optional[pd.DataFrame]:
@@ -6,7 +6,7 @@ from bs4 import Tag
 
 from wpextract.extractors.data.links import LinkRegistry
 from wpextract.extractors.io import load_df
-from wpextract.parse.html import extract_html_text
+from wpextract.parse.html import extract_html_text, extract_html_text_lxml
 
 EXPORT_COLUMNS = [
     "alt_text",
@@ -53,7 +53,9 @@ RENAME_COLUMNS = {
 }
 
 
-def load_media(path: Path, link_registry: LinkRegistry) -> Optional[pd.DataFrame]:
+def load_media(
+    path: Path, link_registry: LinkRegistry, backend: str = "bs4"
+) -> Optional[pd.DataFrame]:
     """Load media from a JSON file.
 
     The JSON file is expected to be in the response format of the WordPress media API.
@@ -61,6 +63,8 @@ def load_media(path: Path, link_registry: LinkRegistry) -> Optional[pd.DataFrame
     Args:
         path: The path to the JSON file
         link_registry: A link registry to populate
+        backend: The backend to parse media HTML with, see
+            [`PARSE_BACKENDS`][wpextract.parse.html.PARSE_BACKENDS].
 
     Returns:
         A dataframe of the media
@@ -78,11 +82,10 @@ def load_media(path: Path, link_registry: LinkRegistry) -> Optional[pd.DataFrame
     # Convert post ID to a NA-able integer
     media_df["post"] = media_df["post"].astype("Int64")
 
-    media_df["description.text"] = media_df["description.rendered"].apply(
-        extract_html_text
-    )
-    media_df["caption.text"] = media_df["caption.rendered"].apply(extract_html_text)
-    media_df["title.text"] = media_df["title.rendered"].apply(extract_html_text)
+    html_text = extract_html_text_lxml if backend == "lxml" else extract_html_text
+    media_df["description.text"] = media_df["description.rendered"].apply(html_text)
+    media_df["caption.text"] = media_df["caption.rendered"].apply(html_text)
+    media_df["title.text"] = media_df["title.rendered"].apply(html_text)
 
     media_df.loc[media_df["description.text"] == "\n", "description.text"] = ""
 
@@ -6,8 +6,9 @@ from tqdm.auto import tqdm
 
 from wpextract.extractors.data.links import LinkRegistry
 from wpextract.extractors.io import load_df
-from wpextract.parse.content import extract_content_data
-from wpextract.parse.html import extract_html_text, parse_html
+from wpextract.extractors.parallel import extract_html_parallel
+from wpextract.parse.content import extract_content_data, extract_content_data_lxml
+from wpextract.parse.html import extract_html_text, extract_html_text_lxml, parse_html
 from wpextract.util.locale import extract_locale
 
 EXPORT_COLUMNS = [
@@ -41,7 +42,9 @@ RENAME_COLUMNS = {
 }
 
 
-def load_pages(path: Path, link_registry: LinkRegistry) -> Optional[pd.DataFrame]:
+def load_pages(
+    path: Path, link_registry: LinkRegistry, jobs: int = 1, backend: str = "bs4"
+) -> Optional[pd.DataFrame]:
     """Load the pages from a JSON file.
 
     The JSON file is expected to be in the response format of the WordPress posts API.
@@ -49,6 +52,10 @@ def load_pages(path: Path, link_registry: LinkRegistry) -> Optional[pd.DataFrame
     Args:
         path: The path to the JSON file
         link_registry: The link registry to populate
+        jobs: The number of processes to parse and extract the content with, see
+            [`extract_html_parallel`][wpextract.extractors.parallel.extract_html_parallel].
+        backend: The backend to parse page HTML with, see
+            [`PARSE_BACKENDS`][wpextract.parse.html.PARSE_BACKENDS].
 
     Returns:
         A dataframe of the pages
@@ -64,19 +71,32 @@ def load_pages(path: Path, link_registry: LinkRegistry) -> Optional[pd.DataFrame
 
     pages_df["link_locale"] = pages_df["link"].apply(extract_locale)
 
-    pages_df["title.text"] = pages_df["title.rendered"].apply(extract_html_text)
-    pages_df["excerpt.text"] = pages_df["excerpt.rendered"].apply(extract_html_text)
-
-    tqdm.pandas(desc="Parsing post content")
-    pages_df["content.bs"] = pages_df["content.rendered"].progress_apply(parse_html)
-
-    tqdm.pandas(desc="Extracting post content")
-    pages_df[
-        ["content.text", "links.internal", "links.external", "embeds", "images"]
-    ] = pages_df.progress_apply(
-        lambda r: extract_content_data(r["content.bs"], r["link"]), axis=1
-    )  # type: ignore[operator]
-    #   progress_apply is not stubbed, so mypy believes it is an attribute returning a series
+    html_text = extract_html_text_lxml if backend == "lxml" else extract_html_text
+    pages_df["title.text"] = pages_df["title.rendered"].apply(html_text)
+    pages_df["excerpt.text"] = pages_df["excerpt.rendered"].apply(html_text)
+
+    if jobs > 1:
+        extracted = extract_html_parallel(
+            pages_df, jobs, desc="Extracting pages", backend=backend
+        )
+        pages_df[list(extracted.columns)] = extracted
+    else:
+        if backend == "bs4":
+            tqdm.pandas(desc="Parsing post content")
+            pages_df["content.bs"] = pages_df["content.rendered"].progress_apply(
+                parse_html
+            )
+
+        tqdm.pandas(desc="Extracting post content")
+        pages_df[
+            ["content.text", "links.internal", "links.external", "embeds", "images"]
+        ] = pages_df.progress_apply(
+            lambda r: extract_content_data(r["content.bs"], r["link"])
+            if backend == "bs4"
+            else extract_content_data_lxml(r["content.rendered"], r["link"]),
+            axis=1,
+        )  # type: ignore[operator]
+        #   progress_apply is not stubbed, so mypy believes it is an attribute returning a series
 
     pages_df = pages_df[pages_df.columns.intersection(EXPORT_COLUMNS)]
     pages_df = pages_df.rename(columns=RENAME_COLUMNS, errors="ignore")
@@ -0,0 +1,120 @@
+import math
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Optional
+
+import pandas as pd
+from tqdm.auto import tqdm
+
+from wpextract.parse.content import extract_content_data, extract_content_data_lxml
+from wpextract.parse.html import parse_html
+from wpextract.parse.translations import PickerListType, extract_translations
+from wpextract.scrape.scrape import load_scrape
+
+CONTENT_COLUMNS = [
+    "content.text",
+    "links.internal",
+    "links.external",
+    "embeds",
+    "images",
+]
+"""Columns extracted from the content of each row."""
+
+TRANSLATION_COLUMNS = ["language", "translations"]
+"""Columns extracted from the scrape of each row, if a scrape is given."""
+
+MAX_CHUNK_SIZE = 50
+"""The maximum number of rows sent to a worker process at once."""
+
+_Chunk = list[tuple[str, str]]
+
+
+def _extract_chunk(
+    chunk: _Chunk,
+    scrape_urls_files: Optional[dict[str, Path]],
+    translation_pickers: Optional[PickerListType],
+    backend: str,
+) -> list[list[Any]]:
+    records = []
+    for html, link in chunk:
+        record: list[Any] = []
+        if scrape_urls_files is not None:
+            record += extract_translations(
+                load_scrape(scrape_urls_files, link), link, translation_pickers
+            ).to_list()
+        if backend == "lxml":
+            record += extract_content_data_lxml(html, link).to_list()
+        else:
+            record += extract_content_data(parse_html(html), link).to_list()
+        records.append(record)
+    return records
+
+
+def extract_html_parallel(
+    df: pd.DataFrame,
+    jobs: int,
+    desc: str,
+    scrape_urls_files: Optional[dict[str, Path]] = None,
+    translation_pickers: Optional[PickerListType] = None,
+    backend: str = "bs4",
+) -> pd.DataFrame:
+    """Parse and extract data from the HTML content of each row with a pool of processes.
+
+    The rows are split into chunks which are processed by the pool. Each process parses the
+    content (and scrape, if given) of its rows and extracts the same data as
+    [`extract_content_data`][wpextract.parse.content.extract_content_data] and
+    [`extract_translations`][wpextract.parse.translations.extract_translations], but only returns
+    the extracted records, so parsed documents are never sent between processes.
+
+    Args:
+        df: a dataframe with `content.rendered` and `link` columns
+        jobs: the number of processes to use
+        desc: the description of the progress bar
+        scrape_urls_files: if set, a dictionary of site URLs to scrape file paths to extract translations from
+        translation_pickers: custom list of translation pickers
+        backend: the backend to parse the content with, see [`PARSE_BACKENDS`][wpextract.parse.html.PARSE_BACKENDS]
+
+    Returns:
+        A dataframe with the same index as `df` and the
+        [`TRANSLATION_COLUMNS`][wpextract.extractors.parallel.TRANSLATION_COLUMNS] if
+        `scrape_urls_files` is set, followed by the
+        [`CONTENT_COLUMNS`][wpextract.extractors.parallel.CONTENT_COLUMNS].
+    """
+    columns = list(CONTENT_COLUMNS)
+    if scrape_urls_files is not None:
+        # Translations are extracted first when processing serially, so come first
+        columns = TRANSLATION_COLUMNS + columns
+
+    rows = list(zip(df["content.rendered"].to_list(), df["link"].to_list()))
+    chunk_size = max(1, min(MAX_CHUNK_SIZE, math.ceil(len(rows) / jobs)))
+    chunks = [rows[i : i + chunk_size] for i in range(0, len(rows), chunk_size)]
+
+    def _chunk_scrapes(chunk: _Chunk) -> Optional[dict[str, Path]]:
+        # Only send the scrape paths the chunk needs, not the whole mapping
+        if scrape_urls_files is None:
+            return None
+        return {
+            link: scrape_urls_files[link]
+            for _, link in chunk
+            if link in scrape_urls_files
+        }
+
+    records: list[list[Any]] = []
+    with (
+        ProcessPoolExecutor(max_workers=jobs) as executor,
+        tqdm(desc=desc, total=len(rows)) as pbar,
+    ):
+        for chunk, chunk_records in zip(
+            chunks,
+            executor.map(
+                _extract_chunk,
+                chunks,
+                [_chunk_scrapes(chunk) for chunk in chunks],
+                [translation_pickers] * len(chunks),
+                [backend] * len(chunks),
+            ),
+        ):
+            records += chunk_records
+            pbar.update(len(chunk))
+
+    return pd.DataFrame(records, index=df.index, columns=columns)
@@ -11,8 +11,9 @@ from wpextract.extractors.data.images import resolve_images
 from wpextract.extractors.data.link_resolver import resolve_links
 from wpextract.extractors.data.links import LinkRegistry
 from wpextract.extractors.io import load_df
-from wpextract.parse.content import extract_content_data
-from wpextract.parse.html import extract_html_text, parse_html
+from wpextract.extractors.parallel import extract_html_parallel
+from wpextract.parse.content import extract_content_data, extract_content_data_lxml
+from wpextract.parse.html import extract_html_text, extract_html_text_lxml, parse_html
 from wpextract.parse.translations import PickerListType, extract_translations
 from wpextract.parse.translations._resolver import TranslationLink
 from wpextract.scrape.scrape import load_scrape
@@ -60,6 +61,8 @@ def load_posts(
     link_registry: LinkRegistry,
     scrape_urls_files: dict[str, Path],
     translation_pickers: Optional[PickerListType] = None,
+    jobs: int = 1,
+    backend: str = "bs4",
 ) -> Optional[pd.DataFrame]:
     """Load the posts from a JSON file.
 
@@ -70,6 +73,11 @@ def load_posts(
         link_registry: The Link Registry to populate
         scrape_urls_files: A dictionary of site URLs to scrape file paths
         translation_pickers: Custom list of translation pickers.
+        jobs: The number of processes to parse and extract the content and scrape with, see
+            [`extract_html_parallel`][wpextract.extractors.parallel.extract_html_parallel].
+        backend: The backend to parse post HTML with, see
+            [`PARSE_BACKENDS`][wpextract.parse.html.PARSE_BACKENDS]. Scrapes are always parsed
+            with BeautifulSoup, as translation pickers use it.
 
     Returns:
         A dataframe of the posts.
@@ -97,13 +105,25 @@ def load_posts(
 
     posts_df["link_locale"] = posts_df["link"].apply(extract_locale)
 
-    posts_df["title.text"] = posts_df["title.rendered"].apply(extract_html_text)
-    posts_df["excerpt.text"] = posts_df["excerpt.rendered"].apply(extract_html_text)
-
-    tqdm.pandas(desc="Parsing Content")
-    posts_df["content.bs"] = posts_df["content.rendered"].progress_apply(parse_html)
+    html_text = extract_html_text_lxml if backend == "lxml" else extract_html_text
+    posts_df["title.text"] = posts_df["title.rendered"].apply(html_text)
+    posts_df["excerpt.text"] = posts_df["excerpt.rendered"].apply(html_text)
+
+    if jobs > 1:
+        extracted = extract_html_parallel(
+            posts_df,
+            jobs,
+            desc="Extracting posts",
+            scrape_urls_files=scrape_urls_files if scrape_urls_files != {} else None,
+            translation_pickers=translation_pickers,
+            backend=backend,
+        )
+        posts_df[list(extracted.columns)] = extracted
+    elif backend == "bs4":
+        tqdm.pandas(desc="Parsing Content")
+        posts_df["content.bs"] = posts_df["content.rendered"].progress_apply(parse_html)
 
-    if scrape_urls_files != {}:
+    if scrape_urls_files != {} and jobs == 1:
         tqdm.pandas(desc="Parsing Scrape")
         posts_df["scrape_bs"] = posts_df["link"].progress_apply(
             lambda link: load_scrape(scrape_urls_files, link)
@@ -114,20 +134,24 @@ def load_posts(
             ),
             axis=1,
         )
-    else:
+    elif scrape_urls_files == {}:
         logging.info("SKipping translation extraction")
 
     link_registry.add_linkables(
         "post", posts_df["link"].to_list(), posts_df.index.to_list()
     )
 
-    tqdm.pandas(desc="Extracting from text")
-    posts_df[
-        ["content.text", "links.internal", "links.external", "embeds", "images"]
-    ] = posts_df.progress_apply(
-        lambda r: extract_content_data(r["content.bs"], r["link"]), axis=1
-    )  # type: ignore[operator]
-    #   progress_apply is not stubbed, so mypy believes it is an attribute returning a series
+    if jobs == 1:
+        tqdm.pandas(desc="Extracting from text")
+        posts_df[
+            ["content.text", "links.internal", "links.external", "embeds", "images"]
+        ] = posts_df.progress_apply(
+            lambda r: extract_content_data(r["content.bs"], r["link"])
+            if backend == "bs4"
+            else extract_content_data_lxml(r["content.rendered"], r["link"]),
+            axis=1,
+        )  # type: ignore[operator]
+        #   progress_apply is not stubbed, so mypy believes it is an attribute returning a series
 
     posts_df = posts_df[posts_df.columns.intersection(EXPORT_COLUMNS)]
     posts_df = posts_df.rename(columns=RENAME_COLUMNS, errors="ignore")
@@ -1,18 +1,22 @@
-import copy
 import logging
-from typing import Any
+from typing import Any, Optional, Union, cast
 from urllib.parse import urljoin, urlparse, urlunparse
 
 import pandas as pd
-from bs4 import BeautifulSoup, Comment, NavigableString, Tag
+from bs4 import BeautifulSoup, Comment, NavigableString, PageElement, Tag
+from lxml import etree
 
 from wpextract.extractors.data.images import MediaUse, ResolvableMediaUse
 from wpextract.extractors.data.links import Link, ResolvableLink
 from wpextract.extractors.media import get_caption
+from wpextract.parse.html import get_text_lxml, parse_html_lxml
+from wpextract.util.html import attr_concat
 from wpextract.util.str import squash_whitespace
 
 EXCLUDED_CONTENT_TAGS = {"figcaption", "table"}
+"""Tags whose text is excluded from the text content."""
 NEWLINE_TAGS = {"br", "p"}
+"""Tags which start a new line of the text content."""
 
 
 InternalLinks = list[ResolvableLink]
@@ -118,28 +122,138 @@ def extract_images(doc: BeautifulSoup, self_link: str) -> Images:
     return media_uses
 
 
-def _get_text(doc: BeautifulSoup) -> str:
-    """Custom function to get document text.
+class _FigureCaption:
+    """The caption of a figure, set when its first `figcaption` is visited."""
 
-    Extracts text from all elements, inserting newlines for <p> and <br> tags.
+    __slots__ = ("caption",)
 
-    Returns:
-        The extracted text content
+    def __init__(self) -> None:
+        self.caption: Optional[Tag] = None
+
+
+class _ContentVisitor:
+    """Collects the links, embeds, images and text of a document in one traversal.
+
+    Produces the same results as [`extract_links`][wpextract.parse.content.extract_links],
+    [`extract_embeds`][wpextract.parse.content.extract_embeds],
+    [`extract_images`][wpextract.parse.content.extract_images] and extracting the text with the
+    [`EXCLUDED_CONTENT_TAGS`][wpextract.parse.content.EXCLUDED_CONTENT_TAGS] removed, without
+    searching the document for each or copying it. Only the subtrees of links and captions are
+    read again to get their text.
     """
-    text = ""
-    for e in doc.descendants:
-        # Comments are a subtype of NavigableString, they need to be excluded
-        if isinstance(e, NavigableString) and not isinstance(e, Comment):
-            text += e
-        elif isinstance(e, Tag) and e.name in NEWLINE_TAGS:
-            text += "\n"
-    return text
+
+    def __init__(self, self_link: str) -> None:
+        self.self_link = self_link
+        self.netloc = urlparse(self_link).netloc
+        self.internal_links: InternalLinks = []
+        self.external_links: ExternalLinks = []
+        self.embeds: Embeds = []
+        self._images: list[tuple[Tag, Optional[_FigureCaption]]] = []
+        self._text: list[str] = []
+        self._figures: list[_FigureCaption] = []
+        self._excluded_depth = 0
+
+    def visit(self, doc: BeautifulSoup) -> None:
+        # Iterative, as deeply nested documents could exceed the recursion limit
+        stack: list[tuple[PageElement, bool]] = [(doc, True)]
+        while stack:
+            element, entering = stack.pop()
+            if isinstance(element, Tag):
+                if not entering:
+                    self._leave(element)
+                    continue
+                self._enter(element)
+                stack.append((element, False))
+                stack.extend((child, True) for child in reversed(element.contents))
+            elif isinstance(element, NavigableString):
+                # Comments are a subtype of NavigableString, they need to be excluded
+                if self._excluded_depth == 0 and not isinstance(element, Comment):
+                    self._text.append(element)
+
+    def _enter(self, tag: Tag) -> None:
+        if tag.name in EXCLUDED_CONTENT_TAGS:
+            self._excluded_depth += 1
+        elif tag.name in NEWLINE_TAGS and self._excluded_depth == 0:
+            self._text.append("\n")
+
+        if tag.name == "a":
+            self._add_link(tag)
+        elif tag.name == "iframe":
+            self.embeds.append(attr_concat(tag["src"]))
+        elif tag.name == "img":
+            self._images.append((tag, self._figures[-1] if self._figures else None))
+        elif tag.name == "figure":
+            self._figures.append(_FigureCaption())
+        elif tag.name == "figcaption":
+            # Each open figure's caption is the first figcaption it contains
+            for figure in self._figures:
+                if figure.caption is None:
+                    figure.caption = tag
+
+    def _leave(self, tag: Tag) -> None:
+        if tag.name in EXCLUDED_CONTENT_TAGS:
+            self._excluded_depth -= 1
+        if tag.name == "figure":
+            self._figures.pop()
+
+    def _add_link(self, link: Tag) -> None:
+        if not link.has_attr("href"):
+            self.external_links.append(Link(squash_whitespace(link.get_text()), None))
+            return
+
+        href = attr_concat(link["href"])
+        href_parsed = urlparse(urljoin(self.self_link, href))
+        if href_parsed.netloc == self.netloc:
+            self.internal_links.append(
+                ResolvableLink(
+                    text=squash_whitespace(link.get_text()),
+                    href=urlunparse(href_parsed),
+                    destination=None,
+                )
+            )
+        else:
+            self.external_links.append(
+                Link(text=squash_whitespace(link.get_text()), href=href)
+            )
+
+    def images(self) -> Images:
+        media_uses: Images = []
+        for img, figure in self._images:
+            caption = (
+                figure.caption.get_text()
+                if figure is not None and figure.caption is not None
+                else None
+            )
+            media_data: dict[str, Any] = {"alt": img.get("alt"), "caption": caption}
+            if not img.has_attr("src"):
+                logging.warning(f"Image without source in {self.self_link}")
+                media_uses.append(MediaUse(src="", **media_data))
+                continue
+
+            src_parsed = urlparse(urljoin(self.self_link, attr_concat(img["src"])))
+            media_data["src"] = urlunparse(src_parsed)
+            if src_parsed.netloc == self.netloc:
+                media_uses.append(ResolvableMediaUse(**media_data))
+            else:
+                media_uses.append(MediaUse(**media_data))
+        return media_uses
+
+    def text(self) -> str:
+        return squash_whitespace("".join(self._text))
 
 
 # Return type has to be Any because the pd.Series type from pandas-stubs is generic with a single parameter
 def extract_content_data(doc: BeautifulSoup, self_link: str) -> "pd.Series[Any]":
     """Extract the links, embeds, images and text content of the document.
 
+    The document is traversed once, collecting the same data as
+    [`extract_links`][wpextract.parse.content.extract_links],
+    [`extract_embeds`][wpextract.parse.content.extract_embeds] and
+    [`extract_images`][wpextract.parse.content.extract_images]. The text content excludes the
+    [`EXCLUDED_CONTENT_TAGS`][wpextract.parse.content.EXCLUDED_CONTENT_TAGS], with newlines
+    inserted for the [`NEWLINE_TAGS`][wpextract.parse.content.NEWLINE_TAGS]. The document is
+    not modified.
+
     Args:
         doc: A parsed document body.
         self_link: The URL of the page.
@@ -147,18 +261,124 @@ def extract_content_data(doc: BeautifulSoup, self_link: str) -> "pd.Series[Any]"
     Returns:
         A series with the text, internal links, external links, embeds and images.
     """
-    internal_links, external_links = extract_links(doc, self_link)
-    embeds = extract_embeds(doc)
-    images = extract_images(doc, self_link)
+    visitor = _ContentVisitor(self_link)
+    visitor.visit(doc)
+
+    return pd.Series(
+        [
+            visitor.text(),
+            visitor.internal_links,
+            visitor.external_links,
+            visitor.embeds,
+            visitor.images(),
+        ]
+    )
+
+
+_IN_EXCLUDED = " or ".join(f"ancestor::{tag}" for tag in sorted(EXCLUDED_CONTENT_TAGS))
+_NEWLINES = " | ".join(f"//{tag}[not({_IN_EXCLUDED})]" for tag in sorted(NEWLINE_TAGS))
+
+# Text nodes outside excluded tags, and newline tags, in document order
+_CONTENT_TEXT_XPATH = etree.XPath(
+    f"//text()[not({_IN_EXCLUDED})] | {_NEWLINES}", smart_strings=False
+)
+
+# The first figcaption in the image's closest figure, as found by get_caption
+_CAPTION_XPATH = etree.XPath("(ancestor::figure[1]//figcaption)[1]")
+
+
+def _extract_links_lxml(
+    root: etree._Element, self_link: str
+) -> tuple[InternalLinks, ExternalLinks]:
+    internal_links = []
+    external_links = []
+
+    self_link_parsed = urlparse(self_link)
 
-    doc_c = copy.copy(doc)
-    for child in list(doc_c.descendants):
-        if child.decomposed or isinstance(child, NavigableString):
+    for link in root.iter("a"):
+        text = squash_whitespace(get_text_lxml(link))
+        href = link.get("href")
+        if href is None:
+            external_links.append(Link(text, None))
             continue
 
-        if isinstance(child, Tag) and child.name in EXCLUDED_CONTENT_TAGS:
-            child.decompose()
+        href_parsed = urlparse(urljoin(self_link, href))
+        if href_parsed.netloc == self_link_parsed.netloc:
+            internal_links.append(
+                ResolvableLink(
+                    text=text, href=urlunparse(href_parsed), destination=None
+                )
+            )
+        else:
+            external_links.append(Link(text=text, href=href))
+
+    return internal_links, external_links
+
+
+def _extract_images_lxml(root: etree._Element, self_link: str) -> Images:
+    media_uses: Images = []
+
+    self_link_parsed = urlparse(self_link)
+
+    for img in root.iter("img"):
+        captions = cast(list[etree._Element], _CAPTION_XPATH(img))
+        media_data: dict[str, Any] = {
+            "alt": img.get("alt"),
+            "caption": get_text_lxml(captions[0]) if len(captions) > 0 else None,
+        }
+        src = img.get("src")
+        if src is None:
+            logging.warning(f"Image without source in {self_link}")
+            media_uses.append(MediaUse(src="", **media_data))
+            continue
+
+        src_parsed = urlparse(urljoin(self_link, src))
+        media_data["src"] = urlunparse(src_parsed)
+        if src_parsed.netloc == self_link_parsed.netloc:
+            media_uses.append(ResolvableMediaUse(**media_data))
+        else:
+            media_uses.append(MediaUse(**media_data))
+
+    return media_uses
+
+
+def _extract_text_lxml(root: etree._Element) -> str:
+    return squash_whitespace(
+        "".join(
+            node if isinstance(node, str) else "\n"
+            for node in cast(
+                list[Union[str, etree._Element]], _CONTENT_TEXT_XPATH(root)
+            )
+        )
+    )
+
+
+# Return type has to be Any because the pd.Series type from pandas-stubs is generic with a single parameter
+def extract_content_data_lxml(html: str, self_link: str) -> "pd.Series[Any]":
+    """Parse a document with lxml and extract its links, embeds, images and text content.
+
+    Equivalent to parsing the document with [`parse_html`][wpextract.parse.html.parse_html] and
+    extracting with [`extract_content_data`][wpextract.parse.content.extract_content_data], but
+    without building a BeautifulSoup tree. Elements are found with lxml's iterators and XPath.
+
+    The only difference is that the text of a full document does not start with its `DOCTYPE`
+    declaration, which BeautifulSoup includes as a string. These are not present in post content.
+
+    Args:
+        html: An HTML document body as a string.
+        self_link: The URL of the page.
+
+    Returns:
+        A series with the text, internal links, external links, embeds and images.
+    """
+    root = parse_html_lxml(html)
+    if root is None:
+        return pd.Series(["", [], [], [], []])
 
-    content_text = squash_whitespace(_get_text(doc_c))
+    internal_links, external_links = _extract_links_lxml(root, self_link)
+    embeds: Embeds = [str(iframe.attrib["src"]) for iframe in root.iter("iframe")]
+    images = _extract_images_lxml(root, self_link)
 
-    return pd.Series([content_text, internal_links, external_links, embeds, images])
+    return pd.Series(
+        [_extract_text_lxml(root), internal_links, external_links, embeds, images]
+    )
@@ -1,11 +1,28 @@
 import re
+from typing import Optional, cast
 
 from bs4 import BeautifulSoup
+from lxml import etree
 
 from wpextract.util.str import squash_whitespace
 
 PROBABLY_HTML = re.compile(r"<|&\S+;")
 
+PARSE_BACKENDS = ["bs4", "lxml"]
+"""Backends which can be used to parse HTML when extracting.
+
+`bs4` builds a BeautifulSoup tree of each document. `lxml` uses lxml's tree directly (see
+[`extract_html_text_lxml`][wpextract.parse.html.extract_html_text_lxml] and
+[`extract_content_data_lxml`][wpextract.parse.content.extract_content_data_lxml]), which is
+faster and produces the same output.
+"""
+
+# Text nodes as included by BeautifulSoup's get_text, which skips scripts, styles and templates
+_TEXT_XPATH = etree.XPath(
+    ".//text()[not(parent::script or parent::style or ancestor::template)]",
+    smart_strings=False,
+)
+
 
 def parse_html(html: str) -> BeautifulSoup:
     """Helper to parse HTML into a BeautifulSoup document.
@@ -35,3 +52,55 @@ def extract_html_text(html: str) -> str:
         return html
 
     return squash_whitespace(parse_html(html).get_text())
+
+
+def parse_html_lxml(html: str) -> Optional[etree._Element]:
+    """Parse HTML into an lxml tree.
+
+    The document is parsed in the same way as BeautifulSoup's `lxml` parser, so the tree has the
+    same structure as one from [`parse_html`][wpextract.parse.html.parse_html].
+
+    Args:
+        html: an HTML document as a string.
+
+    Returns:
+        The root element of the document, or None if it is empty
+    """
+    parser = etree.HTMLParser()
+    try:
+        parser.feed(html)
+        return parser.close()
+    except etree.XMLSyntaxError:
+        return None
+
+
+def get_text_lxml(element: etree._Element) -> str:
+    """Get the text of an element, equivalent to BeautifulSoup's `get_text`.
+
+    Args:
+        element: an element
+
+    Returns:
+        The text of the element and its descendants, excluding comments, scripts and styles
+    """
+    return "".join(cast(list[str], _TEXT_XPATH(element)))
+
+
+def extract_html_text_lxml(html: str) -> str:
+    """Extract text from an HTML document with lxml.
+
+    Equivalent to [`extract_html_text`][wpextract.parse.html.extract_html_text].
+
+    Args:
+        html: A string containing HTML.
+
+    Returns:
+        The extracted text from the document
+    """
+    if PROBABLY_HTML.search(html) is None:
+        return html
+
+    root = parse_html_lxml(html)
+    if root is None:
+        return ""
+    return squash_whitespace(get_text_lxml(root))
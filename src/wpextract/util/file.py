@@ -1,4 +1,33 @@
-from typing import Optional
+import json
+from pathlib import Path
+from typing import Any, Optional, Union
+
+from wpextract.util.html import unescape_fields
+
+PASSTHROUGH_EXTENSION = ".jsonl"
+"""Extension of the files written by passthrough downloads."""
+
+UNESCAPE_FIELDS: dict[str, list[Union[str, list[str]]]] = {
+    "posts": [
+        ["title", "rendered"],
+        ["content", "rendered"],
+        ["excerpt", "rendered"],
+    ],
+    "pages": [
+        ["guid", "rendered"],
+        ["title", "rendered"],
+        ["content", "rendered"],
+        ["excerpt", "rendered"],
+    ],
+    "media": [
+        ["guid", "rendered"],
+        ["title", "rendered"],
+        ["description", "rendered"],
+        ["caption", "rendered"],
+    ],
+    "comments": [["content", "rendered"]],
+}
+"""The fields of each type which are HTML unescaped in downloaded files."""
 
 
 def prefix_filename(file_name: str, prefix: Optional[str]) -> str:
@@ -17,3 +46,55 @@ def prefix_filename(file_name: str, prefix: Optional[str]) -> str:
         prefix = ""
 
     return prefix + file_name
+
+
+def read_json(path: Path) -> Any:
+    """Reads a JSON file, or the output of a passthrough download in its place.
+
+    If the file does not exist but the output of a passthrough download (with the extension
+    `.jsonl`) does, that is read instead with [`read_passthrough`][wpextract.util.file.read_passthrough].
+
+    Args:
+        path: The path of the file.
+
+    Returns:
+        The decoded JSON object. None if neither file exists.
+    """
+    if not path.is_file():
+        passthrough_path = path.with_suffix(PASSTHROUGH_EXTENSION)
+        if passthrough_path.is_file():
+            return read_passthrough(passthrough_path)
+        return None
+
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def read_passthrough(path: Path) -> list[dict[str, Any]]:
+    """Reads the output of a passthrough download.
+
+    Each line of the file is a page of the API response, which are concatenated and
+    deduplicated by ID. As passthrough downloads are not unescaped, the fields of the type
+    (determined from the end of the file name, e.g. `posts` for `prefix-posts.jsonl`) are
+    unescaped as they would have been by a normal download.
+
+    Args:
+        path: The path of the file.
+
+    Returns:
+        The list of objects.
+    """
+    entries = []
+    seen_ids = set()
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip() == "":
+                continue
+            for entry in json.loads(line):
+                if entry.get("id") in seen_ids:
+                    continue
+                seen_ids.add(entry.get("id"))
+                entries.append(entry)
+
+    fields = UNESCAPE_FIELDS.get(path.stem.rsplit("-", 1)[-1], [])
+    return [unescape_fields(entry, fields) for entry in entries]
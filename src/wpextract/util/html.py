@@ -1,4 +1,6 @@
-from typing import Union
+import copy
+import html
+from typing import Any, Union
 
 
 def attr_concat(val: Union[str, list[str]]) -> str:
@@ -18,3 +20,34 @@ def attr_concat(val: Union[str, list[str]]) -> str:
     if isinstance(val, list):
         return " ".join(val)
     return val
+
+
+def unescape_fields(
+    obj: dict[str, Any], fields: list[Union[str, list[str]]]
+) -> dict[str, Any]:
+    """HTML unescape fields of an object.
+
+    Args:
+        obj: the object, which is not modified
+        fields: names of fields at the root of the object, or lists of keys of nested
+            fields (e.g. `["title", "rendered"]`). Nested fields which are missing or are not
+            strings are skipped.
+
+    Returns:
+        a deep copy of the object with the fields unescaped
+    """
+    unescaped = copy.deepcopy(obj)
+    for field in fields:
+        if isinstance(field, str):
+            unescaped[field] = html.unescape(unescaped[field])
+            continue
+        parent: Any = unescaped
+        for key in field[:-1]:
+            parent = parent.get(key) if isinstance(parent, dict) else None
+        if (
+            isinstance(parent, dict)
+            and len(field) > 0
+            and isinstance(parent.get(field[-1]), str)
+        ):
+            parent[field[-1]] = html.unescape(parent[field[-1]])
+    return unescaped
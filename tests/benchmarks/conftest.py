@@ -0,0 +1,90 @@
+import json
+import time
+from pathlib import Path
+
+import pytest
+
+BASELINE_PATH = Path(__file__).parent / "baseline.json"
+
+_results = []
+
+
+def _load_results(path):
+    with open(path) as f:
+        results = json.load(f)
+    # --benchmark-json output is a list, baseline.json is keyed by name
+    if isinstance(results, list):
+        return {result["name"]: result for result in results}
+    return results
+
+
+class BenchmarkRecorder:
+    def __init__(self, name, config):
+        self.name = name
+        self.elapsed = None
+        self.baseline = _load_results(BASELINE_PATH).get(name)
+        compare_path = config.getoption("--benchmark-compare")
+        self.compare = (
+            _load_results(compare_path).get(name) if compare_path is not None else None
+        )
+        self.tolerance = config.getoption("--benchmark-tolerance")
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *args):
+        self.elapsed = time.perf_counter() - self._start
+
+    def record(self, session, entries):
+        summary = session.metrics.summary()
+        result = {
+            "name": self.name,
+            "elapsed_s": self.elapsed,
+            "requests": summary["requests"],
+            "bytes": summary["bytes"],
+            "entries": entries,
+            "requests_per_s": summary["requests"] / self.elapsed,
+            "entries_per_s": entries / self.elapsed,
+        }
+        _results.append(result)
+        self._check(result)
+
+    def _check(self, result):
+        # Request counts don't depend on the machine, so are always checked
+        assert self.baseline is not None, f"{self.name} is missing from baseline.json"
+        assert result["entries"] == self.baseline["entries"]
+        assert result["requests"] <= self.baseline["requests"], (
+            f"{self.name} made {result['requests']} requests, "
+            f"baseline is {self.baseline['requests']}"
+        )
+        if self.compare is not None:
+            limit = self.compare["elapsed_s"] * (1 + self.tolerance)
+            assert result["elapsed_s"] <= limit, (
+                f"{self.name} took {result['elapsed_s']:.2f}s, "
+                f"compared run took {self.compare['elapsed_s']:.2f}s"
+            )
+
+
+@pytest.fixture()
+def benchmark(request):
+    return BenchmarkRecorder(request.node.name, request.config)
+
+
+def pytest_terminal_summary(terminalreporter, exitstatus, config):
+    if len(_results) == 0:
+        return
+    terminalreporter.section("download benchmarks")
+    terminalreporter.write_line(
+        f"{'name':<45} {'time (s)':>9} {'requests':>9} {'req/s':>8} {'entries/s':>10}"
+    )
+    for result in _results:
+        terminalreporter.write_line(
+            f"{result['name']:<45} {result['elapsed_s']:>9.2f} {result['requests']:>9} "
+            f"{result['requests_per_s']:>8.1f} {result['entries_per_s']:>10.1f}"
+        )
+
+    json_path = config.getoption("--benchmark-json")
+    if json_path is not None:
+        with open(json_path, "w") as f:
+            json.dump(_results, f, indent=4)
@@ -0,0 +1,107 @@
+import json
+
+import pytest
+from helpers.wp_server import MockWordPressServer, SiteConfig
+from wpextract import WPDownloader
+from wpextract.download import RequestSession
+from wpextract.extractors.io import load_from_path
+
+pytestmark = pytest.mark.benchmark
+
+DL_TYPES = ["categories", "media", "pages", "posts", "tags", "users"]
+LARGE_SITE = SiteConfig(
+    posts=2000, pages=100, media=500, tags=200, categories=20, users=10
+)
+
+
+def _total_entries(config):
+    return sum(getattr(config, type_name) for type_name in DL_TYPES)
+
+
+def _assert_complete(out_path, config):
+    for type_name in DL_TYPES:
+        entries = load_from_path(out_path / f"{type_name}.json")
+        assert len(entries) == getattr(config, type_name), type_name
+
+
+def _assert_concurrent(benchmark, session, latency):
+    # A serial download can't be faster than the server latency of every request,
+    # so concurrent workers must beat it regardless of the machine
+    serial_min = session.metrics.summary()["requests"] * latency
+    assert benchmark.elapsed < serial_min
+
+
+def _download(benchmark, config, tmp_path, **kwargs):
+    with MockWordPressServer(config) as server:
+        session = RequestSession(max_retries=10, backoff_factor=0)
+        downloader = WPDownloader(
+            target=server.url,
+            out_path=tmp_path,
+            data_types=DL_TYPES,
+            session=session,
+            **kwargs,
+        )
+        with benchmark:
+            downloader.download()
+    benchmark.record(session, _total_entries(config))
+    _assert_complete(tmp_path, config)
+    return server, session
+
+
+def test_download(benchmark, tmp_path):
+    _download(benchmark, LARGE_SITE, tmp_path)
+
+
+def test_download_passthrough(benchmark, tmp_path):
+    _download(benchmark, LARGE_SITE, tmp_path, passthrough=True)
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_download_partitioned_latency(benchmark, tmp_path, workers):
+    config = SiteConfig(posts=1000, pages=100, media=200, latency=0.02)
+    _, session = _download(
+        benchmark, config, tmp_path, partition_size=100, workers=workers
+    )
+    if workers > 1:
+        _assert_concurrent(benchmark, session, config.latency)
+
+
+def test_download_rate_limited(benchmark, tmp_path):
+    config = SiteConfig(posts=1000, rate_limit=20, retry_after=1)
+    server, _ = _download(benchmark, config, tmp_path)
+    assert server.throttled_count > 0
+
+
+def test_download_media_files(benchmark, tmp_path):
+    config = SiteConfig(posts=0, pages=0, media=500)
+    with MockWordPressServer(config) as server:
+        downloader = WPDownloader(
+            target=server.url, out_path=tmp_path, data_types=["media"]
+        )
+        downloader.download()
+        media_path = tmp_path / "media_files"
+        media_path.mkdir()
+        session = RequestSession(backoff_factor=0)
+        with benchmark:
+            downloader.download_media_files(session, media_path)
+    benchmark.record(session, config.media)
+    assert len(list(media_path.glob("**/*.jpg"))) == config.media
+    assert len(json.loads((tmp_path / "media.json").read_text())) == config.media
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_download_media_pipelined(benchmark, tmp_path, workers):
+    config = SiteConfig(posts=0, pages=0, media=500, latency=0.005)
+    media_path = tmp_path / "media_files"
+    media_path.mkdir()
+    with MockWordPressServer(config) as server:
+        session = RequestSession(backoff_factor=0)
+        downloader = WPDownloader(
+            target=server.url, out_path=tmp_path, data_types=["media"], session=session
+        )
+        with benchmark:
+            downloader.download(media_dest=media_path, media_workers=workers)
+    benchmark.record(session, config.media)
+    assert len(list(media_path.glob("**/*.jpg"))) == config.media
+    if workers > 1:
+        _assert_concurrent(benchmark, session, config.latency)
@@ -0,0 +1,86 @@
+import json
+
+import pytest
+from helpers.wp_server import MockWordPressServer, SiteConfig
+from wpextract import WPDownloader
+from wpextract.download import RequestSession
+from wpextract.download.requestsession import HTTPError, HTTPErrorInvalidPage
+
+
+@pytest.fixture()
+def server():
+    with MockWordPressServer(SiteConfig(posts=25, pages=3, media=5)) as server:
+        yield server
+
+
+@pytest.fixture()
+def session():
+    return RequestSession(max_retries=0)
+
+
+def test_pagination(server, session):
+    resp = session.get(f"{server.url}wp-json/wp/v2/posts?page=3")
+
+    assert resp.headers["X-WP-Total"] == "25"
+    assert resp.headers["X-WP-TotalPages"] == "3"
+    assert len(resp.json()) == 5
+    with pytest.raises(HTTPErrorInvalidPage):
+        session.get(f"{server.url}wp-json/wp/v2/posts?page=4")
+
+
+def test_per_page_limit(server, session):
+    resp = session.get(f"{server.url}wp-json/wp/v2/posts?per_page=100")
+    assert len(resp.json()) == 25
+
+    with pytest.raises(HTTPError):
+        session.get(f"{server.url}wp-json/wp/v2/posts?per_page=101")
+
+
+def test_fields_include(server, session):
+    resp = session.get(f"{server.url}wp-json/wp/v2/posts?_fields=id,date&include=2,4")
+
+    assert sorted(resp.json(), key=lambda e: e["id"]) == [
+        {"id": 2, "date": server.data["posts"][1]["date"]},
+        {"id": 4, "date": server.data["posts"][3]["date"]},
+    ]
+
+
+def test_date_filters(server, session):
+    after = server.data["posts"][9]["date"]
+    before = server.data["posts"][14]["date"]
+    resp = session.get(
+        f"{server.url}wp-json/wp/v2/posts?after={after}&before={before}&order=asc&per_page=100"
+    )
+
+    assert [e["id"] for e in resp.json()] == [11, 12, 13, 14]
+
+
+def test_rate_limit():
+    config = SiteConfig(rate_limit=2, retry_after=1)
+    with MockWordPressServer(config) as server:
+        session = RequestSession(max_retries=0)
+        for _ in range(2):
+            session.get(f"{server.url}wp-json/wp/v2/tags")
+        with pytest.raises(HTTPError):
+            session.get(f"{server.url}wp-json/wp/v2/tags")
+
+        assert server.throttled_count == 1
+        # Retries wait for the Retry-After header then succeed
+        RequestSession(max_retries=3, backoff_factor=0).get(
+            f"{server.url}wp-json/wp/v2/tags"
+        )
+
+
+def test_download(server, tmp_path):
+    downloader = WPDownloader(
+        target=server.url,
+        out_path=tmp_path,
+        data_types=["categories", "media", "pages", "posts", "tags", "users"],
+    )
+    downloader.download()
+
+    for type_name, n in [("posts", 25), ("pages", 3), ("media", 5), ("users", 3)]:
+        entries = json.loads((tmp_path / f"{type_name}.json").read_text())
+        assert len(entries) == n
+    posts = json.loads((tmp_path / "posts.json").read_text())
+    assert posts[0]["title"]["rendered"] == "Entry 25 & more"
@@ -0,0 +1,68 @@
+import pytest
+from wpextract.cli import cli
+from wpextract.download.batch import SiteResult
+
+
+@pytest.fixture()
+def targets_file(tmp_path):
+    path = tmp_path / "targets.txt"
+    path.write_text("example.org\nhttps://example.com/blog\n")
+    return path
+
+
+def _result(ok):
+    return SiteResult("https://example.org/", "example.org", ok, None, 1, {})
+
+
+def test_batch(mocker, runner, tmp_path, targets_file):
+    batch_mock = mocker.patch(
+        "wpextract.download.batch.download_batch", return_value=[_result(True)]
+    )
+
+    result = runner.invoke(
+        cli,
+        [
+            "batch",
+            str(targets_file),
+            str(tmp_path / "out"),
+            "--concurrency",
+            "3",
+            "--per-host",
+            "2",
+            "--host-interval",
+            "0.5",
+            "--skip-type",
+            "users",
+        ],
+    )
+
+    assert result.exit_code == 0
+    args, kwargs = batch_mock.call_args
+    assert args[0] == ["http://example.org/", "https://example.com/blog/"]
+    assert "users" not in kwargs["data_types"]
+    assert kwargs["scheduler"].concurrency == 3
+    assert kwargs["scheduler"].per_host == 2
+    assert kwargs["scheduler"].host_interval == 0.5
+    assert kwargs["active_sites"] == 6
+    assert kwargs["session_factory"]().timeout == 30
+
+
+def test_batch_failed_sites(mocker, runner, tmp_path, targets_file):
+    mocker.patch(
+        "wpextract.download.batch.download_batch",
+        return_value=[_result(True), _result(False)],
+    )
+
+    result = runner.invoke(cli, ["batch", str(targets_file), str(tmp_path / "out")])
+
+    assert result.exit_code == 1
+    assert "1 of 2 sites failed" in result.output
+
+
+def test_batch_no_targets(runner, tmp_path):
+    targets_file = tmp_path / "targets.txt"
+    targets_file.write_text("# nothing\n")
+
+    result = runner.invoke(cli, ["batch", str(targets_file), str(tmp_path / "out")])
+
+    assert result.exit_code == 2
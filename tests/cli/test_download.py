@@ -1,4 +1,8 @@
+from datetime import datetime
+
+import pytest
 from wpextract.cli import cli
+from wpextract.download import DownloadFilter, MediaSize
 
 
 def mock_cls_invoke(mocker, runner, datadir, args=None):
@@ -58,3 +62,367 @@ def test_custom_ua(mocker, runner, datadir):
 
     req_mock.assert_called_once()
     assert req_mock.call_args.kwargs["user_agent"] == "test"
+
+
+def test_hedge_budget(mocker, runner, datadir):
+    req_mock, dl_mock, result = mock_cls_invoke_req_sess(
+        mocker, runner, datadir, ["--hedge-budget", "0.1"]
+    )
+    assert result.exit_code == 0
+    assert req_mock.call_args.kwargs["hedge"].budget == 0.1
+
+    req_mock, dl_mock, result = mock_cls_invoke_req_sess(mocker, runner, datadir)
+    assert req_mock.call_args.kwargs["hedge"] is None
+
+
+def test_proxy(mocker, runner, datadir):
+    req_mock, dl_mock, result = mock_cls_invoke_req_sess(
+        mocker, runner, datadir, ["--proxy", "http://proxy1:3128"]
+    )
+    assert result.exit_code == 0
+    assert req_mock.call_args.kwargs["proxy"] == "http://proxy1:3128"
+    assert req_mock.call_args.kwargs["proxy_pool"] is None
+    req_mock.return_value.check_proxies.assert_not_called()
+
+
+def test_proxy_pool(mocker, runner, datadir):
+    req_mock, dl_mock, result = mock_cls_invoke_req_sess(
+        mocker,
+        runner,
+        datadir,
+        ["--proxy", "http://proxy1:3128", "--proxy", "http://proxy2:3128"],
+    )
+    assert result.exit_code == 0
+    assert req_mock.call_args.kwargs["proxy"] is None
+    assert req_mock.call_args.kwargs["proxy_pool"].proxies == [
+        "http://proxy1:3128",
+        "http://proxy2:3128",
+    ]
+    req_mock.return_value.check_proxies.assert_called_once_with("https://example.org/")
+
+
+def test_host_wait(mocker, runner, datadir):
+    req_mock, dl_mock, result = mock_cls_invoke_req_sess(
+        mocker,
+        runner,
+        datadir,
+        ["--wait", "2", "--host-wait", "CDN.example.org=0.5", "--host-wait", "b.org=0"],
+    )
+    assert result.exit_code == 0
+    assert req_mock.call_args.kwargs["wait"] == 2
+    assert req_mock.call_args.kwargs["host_waits"] == {
+        "cdn.example.org": 0.5,
+        "b.org": 0,
+    }
+
+
+@pytest.mark.parametrize("host_wait", ["cdn.example.org", "=1", "a.org=-1", "a.org=x"])
+def test_host_wait_invalid(mocker, runner, datadir, host_wait):
+    dl_mock, result = mock_cls_invoke(
+        mocker, runner, datadir, ["--host-wait", host_wait]
+    )
+    assert result.exit_code == 2
+
+
+def test_partition_args(mocker, runner, datadir):
+    dl_mock, result = mock_cls_invoke(
+        mocker, runner, datadir, ["--partition-size", "500", "--workers", "4"]
+    )
+    assert result.exit_code == 0
+
+    assert dl_mock.call_args.kwargs["partition_size"] == 500
+    assert dl_mock.call_args.kwargs["workers"] == 4
+
+
+def test_shard(mocker, runner, datadir):
+    dl_mock, result = mock_cls_invoke(mocker, runner, datadir, ["--shard", "2/4"])
+    assert result.exit_code == 0
+    assert dl_mock.call_args.kwargs["shard"] == (1, 4)
+
+
+@pytest.mark.parametrize("shard", ["0/4", "5/4", "1-4", "a/b", "1/0"])
+def test_shard_invalid(mocker, runner, datadir, shard):
+    dl_mock, result = mock_cls_invoke(mocker, runner, datadir, ["--shard", shard])
+    assert result.exit_code == 2
+
+
+def test_fast_probe(mocker, runner, datadir):
+    dl_mock, result = mock_cls_invoke(mocker, runner, datadir, ["--fast-probe"])
+    assert result.exit_code == 0
+    assert dl_mock.call_args.kwargs["fast_probe"] is True
+
+
+def test_passthrough(mocker, runner, datadir):
+    dl_mock, result = mock_cls_invoke(mocker, runner, datadir, ["--passthrough"])
+    assert result.exit_code == 0
+    assert dl_mock.call_args.kwargs["passthrough"] is True
+
+
+def test_passthrough_partitioned(mocker, runner, datadir):
+    dl_mock, result = mock_cls_invoke(
+        mocker, runner, datadir, ["--passthrough", "--partition-size", "500"]
+    )
+    assert result.exit_code == 2
+    dl_mock.assert_not_called()
+
+
+@pytest.mark.parametrize(
+    ("spec", "expected"),
+    [("large", MediaSize(name="large")), ("1024", MediaSize(max_px=1024))],
+)
+def test_media_size(mocker, runner, datadir, tmp_path, spec, expected):
+    dl_mock, result = mock_cls_invoke(
+        mocker,
+        runner,
+        datadir,
+        ["--media-dest", str(tmp_path / "media"), "--media-size", spec],
+    )
+    assert result.exit_code == 0
+    assert dl_mock.call_args.kwargs["media_size"] == expected
+
+
+def test_media_size_no_dest(mocker, runner, datadir):
+    dl_mock, result = mock_cls_invoke(
+        mocker, runner, datadir, ["--media-size", "large"]
+    )
+    assert result.exit_code == 2
+    dl_mock.assert_not_called()
+
+
+def test_media_dedupe(mocker, runner, datadir, tmp_path):
+    dl_mock, result = mock_cls_invoke(
+        mocker,
+        runner,
+        datadir,
+        ["--media-dest", str(tmp_path / "media"), "--media-dedupe"],
+    )
+    assert result.exit_code == 0
+    assert dl_mock.call_args.kwargs["dedupe_media"] is True
+
+
+def test_media_dedupe_no_dest(mocker, runner, datadir):
+    dl_mock, result = mock_cls_invoke(mocker, runner, datadir, ["--media-dedupe"])
+    assert result.exit_code == 2
+    dl_mock.assert_not_called()
+
+
+def test_media_verify(mocker, runner, datadir, tmp_path):
+    media_dest = tmp_path / "media"
+    args = ["--media-dest", str(media_dest), "--media-dedupe", "--media-verify"]
+    dl_mock, result = mock_cls_invoke(mocker, runner, datadir, args)
+    assert result.exit_code == 0
+    dl_mock.return_value.verify_media_files.assert_called_once_with(media_dest)
+
+    dl_mock.return_value.verify_media_files.return_value = [media_dest / "a"]
+    result = runner.invoke(
+        cli, ["download", "https://example.org", str(datadir), *args]
+    )
+    assert result.exit_code == 1
+    assert "1 stored media files do not match" in result.output
+
+
+def test_media_verify_no_dedupe(mocker, runner, datadir, tmp_path):
+    dl_mock, result = mock_cls_invoke(
+        mocker,
+        runner,
+        datadir,
+        ["--media-dest", str(tmp_path / "media"), "--media-verify"],
+    )
+    assert result.exit_code == 2
+    dl_mock.assert_not_called()
+
+
+def test_media_inventory(mocker, runner, datadir, tmp_path):
+    media_dest = tmp_path / "media"
+    dl_mock, result = mock_cls_invoke(
+        mocker,
+        runner,
+        datadir,
+        ["--media-dest", str(media_dest), "--media-inventory", "--media-workers", "4"],
+    )
+    assert result.exit_code == 0
+    dl_mock.return_value.inventory_media_files.assert_called_once()
+    assert dl_mock.return_value.inventory_media_files.call_args.args[1] == media_dest
+    assert dl_mock.return_value.inventory_media_files.call_args.kwargs["workers"] == 4
+    dl_mock.return_value.download_media_files.assert_not_called()
+
+
+def test_media_inventory_dedupe(mocker, runner, datadir, tmp_path):
+    dl_mock, result = mock_cls_invoke(
+        mocker,
+        runner,
+        datadir,
+        [
+            "--media-dest",
+            str(tmp_path / "media"),
+            "--media-inventory",
+            "--media-dedupe",
+        ],
+    )
+    assert result.exit_code == 2
+    dl_mock.assert_not_called()
+
+
+def test_media_pipeline(mocker, runner, datadir, tmp_path):
+    media_dest = tmp_path / "media"
+    dl_mock, result = mock_cls_invoke(
+        mocker,
+        runner,
+        datadir,
+        ["--media-dest", str(media_dest), "--media-pipeline", "--media-workers", "3"],
+    )
+    assert result.exit_code == 0
+    dl_mock.return_value.download.assert_called_once_with(
+        media_dest=media_dest, media_workers=3
+    )
+    dl_mock.return_value.download_media_files.assert_not_called()
+
+
+def test_media_pipeline_no_dest(mocker, runner, datadir):
+    dl_mock, result = mock_cls_invoke(mocker, runner, datadir, ["--media-pipeline"])
+    assert result.exit_code == 2
+    dl_mock.assert_not_called()
+
+
+def test_no_filters(mocker, runner, datadir):
+    dl_mock, result = mock_cls_invoke(mocker, runner, datadir)
+    assert dl_mock.call_args.kwargs["filters"] is None
+
+
+def test_filters(mocker, runner, datadir):
+    dl_mock, result = mock_cls_invoke(
+        mocker,
+        runner,
+        datadir,
+        [
+            *("--after", "2024-01-01", "--before", "2024-02-01T12:00:00"),
+            *("--category", "1", "--category", "2", "--tag", "3"),
+            *("--author", "4", "--search", "example"),
+            *("--status", "publish", "--lang", "fr"),
+        ],
+    )
+    assert result.exit_code == 0
+
+    filters = dl_mock.call_args.kwargs["filters"]
+    assert filters == DownloadFilter(
+        after=datetime(2024, 1, 1),
+        before=datetime(2024, 2, 1, 12),
+        categories=[1, 2],
+        tags=[3],
+        author=[4],
+        search="example",
+        status=["publish"],
+        lang="fr",
+    )
+
+
+def test_metrics_out(mocker, runner, datadir, tmp_path):
+    req_mock, dl_mock, result = mock_cls_invoke_req_sess(
+        mocker, runner, datadir, ["--metrics-out", str(tmp_path / "metrics.json")]
+    )
+
+    assert result.exit_code == 0
+    req_mock.return_value.metrics.write.assert_called_once_with(
+        tmp_path / "metrics.json"
+    )
+
+
+def test_archive(mocker, runner, datadir, tmp_path):
+    req_mock, dl_mock, result = mock_cls_invoke_req_sess(
+        mocker, runner, datadir, ["--archive", str(tmp_path / "archive")]
+    )
+
+    assert result.exit_code == 0
+    assert req_mock.call_args.kwargs["archive"].path == tmp_path / "archive"
+    assert req_mock.call_args.kwargs["replay"] is False
+
+
+def test_replay_archive(mocker, runner, datadir, tmp_path):
+    req_mock, dl_mock, result = mock_cls_invoke_req_sess(
+        mocker, runner, datadir, ["--replay-archive", str(tmp_path)]
+    )
+
+    assert result.exit_code == 0
+    assert req_mock.call_args.kwargs["archive"].path == tmp_path
+    assert req_mock.call_args.kwargs["replay"] is True
+
+
+def test_replay_conditions(mocker, runner, datadir, tmp_path):
+    req_mock, dl_mock, result = mock_cls_invoke_req_sess(
+        mocker,
+        runner,
+        datadir,
+        [
+            "--replay-archive",
+            str(tmp_path),
+            "--replay-latency",
+            "0.2",
+            "--replay-error-rate",
+            "0.1",
+            "--replay-seed",
+            "3",
+        ],
+    )
+
+    assert result.exit_code == 0
+    conditions = req_mock.call_args.kwargs["replay_conditions"]
+    assert conditions.latency == 0.2
+    assert conditions.error_rate == 0.1
+    assert conditions.seed == 3
+
+
+def test_replay_conditions_without_replay(mocker, runner, datadir):
+    dl_mock, result = mock_cls_invoke(
+        mocker, runner, datadir, ["--replay-latency", "0.2"]
+    )
+
+    assert result.exit_code == 2
+    dl_mock.assert_not_called()
+
+
+def test_archive_exclusive(mocker, runner, datadir, tmp_path):
+    dl_mock, result = mock_cls_invoke(
+        mocker,
+        runner,
+        datadir,
+        ["--archive", str(tmp_path / "a"), "--replay-archive", str(tmp_path)],
+    )
+
+    assert result.exit_code == 2
+
+
+def test_plan(mocker, runner, datadir):
+    dl_mock, result = mock_cls_invoke(mocker, runner, datadir, ["--plan"])
+
+    assert result.exit_code == 0
+    dl_mock.return_value.plan.assert_called_once_with(media_files=False)
+    dl_mock.return_value.download.assert_not_called()
+
+
+def test_plan_output_untouched(mocker, runner, tmp_path):
+    out_path = tmp_path / "out"
+    (tmp_path / "existing").mkdir()
+    (tmp_path / "existing" / "posts.json").write_text("[]")
+
+    _, result = mock_cls_invoke(mocker, runner, out_path, ["--plan"])
+    assert result.exit_code == 0
+    assert not out_path.exists()
+
+    _, result = mock_cls_invoke(
+        mocker,
+        runner,
+        tmp_path / "existing",
+        ["--plan", "--media-dest", str(tmp_path / "media")],
+    )
+    assert result.exit_code == 0
+    assert (tmp_path / "existing" / "posts.json").read_text() == "[]"
+    assert not (tmp_path / "media").exists()
+
+
+def test_plan_archive_not_created(mocker, runner, datadir, tmp_path):
+    _, result = mock_cls_invoke(
+        mocker, runner, datadir, ["--plan", "--archive", str(tmp_path / "archive")]
+    )
+
+    assert result.exit_code == 0
+    assert not (tmp_path / "archive").exists()
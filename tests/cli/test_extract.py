@@ -27,6 +27,27 @@ def test_default_args(mocker, runner, datadir):
     assert dl_mock.call_args.kwargs["json_root"] == datadir / "json_in"
     assert dl_mock.call_args.kwargs["scrape_root"] is None
     assert dl_mock.call_args.kwargs["json_prefix"] is None
+    assert dl_mock.call_args.kwargs["jobs"] == 1
+    assert dl_mock.call_args.kwargs["backend"] == "bs4"
 
     dl_mock.return_value.extract.assert_called_once()
     dl_mock.return_value.export.assert_called_once_with(datadir / "json_out")
+
+
+def test_jobs(mocker, runner, datadir):
+    dl_mock, result = mock_cls_invoke(mocker, runner, datadir, ["--jobs", "4"])
+    assert result.exit_code == 0
+
+    assert dl_mock.call_args.kwargs["jobs"] == 4
+
+
+def test_jobs_invalid(mocker, runner, datadir):
+    _, result = mock_cls_invoke(mocker, runner, datadir, ["--jobs", "0"])
+    assert result.exit_code == 2
+
+
+def test_backend(mocker, runner, datadir):
+    dl_mock, result = mock_cls_invoke(mocker, runner, datadir, ["--backend", "lxml"])
+    assert result.exit_code == 0
+
+    assert dl_mock.call_args.kwargs["backend"] == "lxml"
@@ -0,0 +1,28 @@
+from wpextract.cli import cli
+
+
+def test_merge(mocker, runner, tmp_path):
+    merge_mock = mocker.patch("wpextract.download.merge.merge_downloads")
+    in_a = tmp_path / "a"
+    in_b = tmp_path / "b"
+    in_a.mkdir()
+    in_b.mkdir()
+    out = tmp_path / "out"
+
+    result = runner.invoke(cli, ["merge", str(in_a), str(in_b), str(out)])
+
+    assert result.exit_code == 0
+    merge_mock.assert_called_once_with([in_a, in_b], out, None)
+
+
+def test_merge_error(mocker, runner, tmp_path):
+    mocker.patch(
+        "wpextract.download.merge.merge_downloads", side_effect=ValueError("bad")
+    )
+    in_a = tmp_path / "a"
+    in_a.mkdir()
+
+    result = runner.invoke(cli, ["merge", str(in_a), str(tmp_path / "out")])
+
+    assert result.exit_code == 2
+    assert "bad" in result.output
@@ -0,0 +1,42 @@
+from wpextract.cli import cli
+
+
+def test_sync(mocker, runner, tmp_path):
+    sync_mock = mocker.patch("wpextract.download.sync.SiteSync")
+
+    result = runner.invoke(
+        cli,
+        [
+            "sync",
+            "example.org",
+            str(tmp_path / "out"),
+            "--skip-type",
+            "media",
+            "--interval",
+            "5",
+            "--max-polls",
+            "3",
+            "--per-page",
+            "20",
+        ],
+    )
+
+    assert result.exit_code == 0
+    assert (tmp_path / "out").is_dir()
+    args, kwargs = sync_mock.call_args
+    assert args[0].url == "http://example.org/"
+    assert kwargs["data_types"] == ["pages", "posts"]
+    assert kwargs["per_page"] == 20
+    assert kwargs["sitemap"] is False
+    sync_mock.return_value.run.assert_called_once_with(5, 900, 3)
+
+
+def test_sync_sitemap(mocker, runner, tmp_path):
+    sync_mock = mocker.patch("wpextract.download.sync.SiteSync")
+
+    result = runner.invoke(
+        cli, ["sync", "example.org", str(tmp_path / "out"), "--sitemap"]
+    )
+
+    assert result.exit_code == 0
+    assert sync_mock.call_args.kwargs["sitemap"] is True
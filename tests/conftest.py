@@ -6,7 +6,8 @@ from urllib3 import HTTPConnectionPool
 
 @pytest.fixture(autouse=True)
 def _no_http_requests(monkeypatch):
-    allowed_hosts = {}
+    # Only the local mock WordPress server (helpers.wp_server) may be connected to
+    allowed_hosts = {"127.0.0.1"}
     original_urlopen = HTTPConnectionPool.urlopen
 
     def urlopen_mock(self, method, url, *args, **kwargs):
@@ -22,6 +23,39 @@ def _no_http_requests(monkeypatch):
     )
 
 
+def pytest_addoption(parser):
+    parser.addoption(
+        "--benchmark",
+        action="store_true",
+        help="Run benchmarks against a local mock WordPress server",
+    )
+    parser.addoption(
+        "--benchmark-json",
+        metavar="FILE",
+        help="Write benchmark results to this JSON file",
+    )
+    parser.addoption(
+        "--benchmark-compare",
+        metavar="FILE",
+        help="Fail benchmarks which are slower than the results in this JSON file",
+    )
+    parser.addoption(
+        "--benchmark-tolerance",
+        type=float,
+        default=0.25,
+        help="Fraction a benchmark may be slower than --benchmark-compare results",
+    )
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption("--benchmark"):
+        return
+    skip_benchmark = pytest.mark.skip(reason="needs --benchmark to run")
+    for item in items:
+        if "benchmark" in item.keywords:
+            item.add_marker(skip_benchmark)
+
+
 @pytest.fixture()
 def runner() -> CliRunner:
     """Fixture for invoking command-line interfaces."""
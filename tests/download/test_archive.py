@@ -0,0 +1,183 @@
+import pytest
+from wpextract.download import ReplayConditions, RequestSession, ResponseArchive
+from wpextract.download.archive import INDEX_FILE_NAME
+from wpextract.download.exceptions import ResponseNotArchived
+from wpextract.download.requestsession import HTTPError, HTTPError404
+
+
+@pytest.fixture()
+def archive(tmp_path):
+    return ResponseArchive(tmp_path / "archive")
+
+
+def test_append_get(archive):
+    archive.append(
+        "get", "https://example.org/a", 200, "OK", {"X-WP-Total": "1"}, b"body a"
+    )
+    archive.append("GET", "https://example.org/b", 404, "Not Found", {}, b"")
+
+    assert len(archive) == 2
+    assert ("GET", "https://example.org/a") in archive
+
+    resp = archive.get("GET", "https://example.org/a")
+    assert resp.status == 200
+    assert resp.reason == "OK"
+    assert resp.headers == {"X-WP-Total": "1"}
+    assert resp.body == b"body a"
+
+    assert archive.get("GET", "https://example.org/b").status == 404
+    assert archive.get("POST", "https://example.org/a") is None
+
+
+def test_latest_response_used(archive):
+    archive.append("GET", "https://example.org/a", 500, "", {}, b"error")
+    archive.append("GET", "https://example.org/a", 200, "OK", {}, b"success")
+
+    assert archive.get("GET", "https://example.org/a").body == b"success"
+
+
+def test_transfer_headers_removed(archive):
+    archive.append(
+        "GET",
+        "https://example.org/a",
+        200,
+        "OK",
+        {"Content-Encoding": "gzip", "Content-Length": "5", "Content-Type": "text"},
+        b"decoded body",
+    )
+
+    assert archive.get("GET", "https://example.org/a").headers == {
+        "Content-Type": "text"
+    }
+
+
+def test_reopen(tmp_path, archive):
+    archive.append("GET", "https://example.org/a", 200, "OK", {}, b"body a")
+
+    reopened = ResponseArchive(tmp_path / "archive")
+    reopened.append("GET", "https://example.org/b", 200, "OK", {}, b"body b")
+
+    assert reopened.get("GET", "https://example.org/a").body == b"body a"
+    assert reopened.get("GET", "https://example.org/b").body == b"body b"
+    assert len((tmp_path / "archive" / INDEX_FILE_NAME).read_text().splitlines()) == 2
+
+
+def test_segments(tmp_path):
+    archive = ResponseArchive(tmp_path / "archive", segment_size=100)
+    for i in range(5):
+        archive.append("GET", f"https://example.org/{i}", 200, "OK", {}, bytes(200))
+
+    assert len(list((tmp_path / "archive").glob("segment-*.bin"))) == 5
+    reopened = ResponseArchive(tmp_path / "archive", segment_size=100)
+    for i in range(5):
+        assert reopened.get("GET", f"https://example.org/{i}").body == bytes(200)
+
+
+def test_record_replay(mocked_responses, archive):
+    recorder = RequestSession(archive=archive)
+    mocked_responses.get(
+        "https://example.org/a",
+        json={"a": 1},
+        headers={"X-WP-TotalPages": "2"},
+    )
+    mocked_responses.get("https://example.org/b", status=404)
+    mocked_responses.get("https://example.org/c", body="streamed")
+
+    recorder.get("https://example.org/a")
+    with pytest.raises(HTTPError404):
+        recorder.get("https://example.org/b")
+    recorder.do_request("get", "https://example.org/c", stream=True)
+
+    replayer = RequestSession(archive=archive, replay=True)
+    resp = replayer.get("https://example.org/a")
+    assert resp.json() == {"a": 1}
+    assert resp.headers["X-WP-TotalPages"] == "2"
+    with pytest.raises(HTTPError404):
+        replayer.get("https://example.org/b")
+    with pytest.raises(ResponseNotArchived):
+        replayer.get("https://example.org/c")
+    assert len(mocked_responses.calls) == 3
+
+
+def test_replay_requires_archive():
+    with pytest.raises(ValueError, match="archive is required"):
+        RequestSession(replay=True)
+
+
+class TestReplayConditions:
+    URLS = tuple(f"https://example.org/{i}" for i in range(10))
+
+    @pytest.fixture()
+    def recorded(self, archive):
+        for url in self.URLS:
+            archive.append("GET", url, 200, "OK", {}, b"body", elapsed=0.5)
+        return archive
+
+    @pytest.fixture()
+    def mocked_sleep(self, mocker):
+        return mocker.patch("time.sleep")
+
+    def _replay(self, archive, conditions, **kwargs):
+        sess = RequestSession(
+            archive=archive, replay=True, replay_conditions=conditions, **kwargs
+        )
+        statuses = []
+        for url in self.URLS:
+            try:
+                statuses.append(sess.get(url).status_code)
+            except HTTPError:
+                statuses.append(None)
+        return sess, statuses
+
+    def test_recorded_elapsed(self, mocked_responses, archive):
+        mocked_responses.get("https://example.org/a", body="a")
+        RequestSession(archive=archive).get("https://example.org/a")
+
+        assert archive.get("GET", "https://example.org/a").elapsed is not None
+
+    def test_no_conditions(self, recorded, mocked_sleep):
+        self._replay(recorded, None, wait=1)
+
+        mocked_sleep.assert_not_called()
+
+    def test_latency(self, recorded, mocked_sleep):
+        conditions = ReplayConditions(latency=0.1, recorded_latency=2)
+        self._replay(recorded, conditions)
+
+        assert [c.args[0] for c in mocked_sleep.call_args_list] == [1.1] * 10
+
+    def test_jitter_deterministic(self, recorded, mocked_sleep):
+        conditions = ReplayConditions(latency=1, jitter=0.5, seed=1)
+        self._replay(recorded, conditions)
+        first = [c.args[0] for c in mocked_sleep.call_args_list]
+        mocked_sleep.reset_mock()
+        self._replay(recorded, conditions)
+
+        assert [c.args[0] for c in mocked_sleep.call_args_list] == first
+        assert all(0.5 <= latency <= 1.5 for latency in first)
+        assert len(set(first)) == 10
+
+    def test_errors_deterministic(self, recorded, mocked_sleep):
+        conditions = ReplayConditions(error_rate=0.5, seed=1)
+        _, first = self._replay(recorded, conditions, max_retries=0)
+        _, second = self._replay(recorded, conditions, max_retries=0)
+
+        assert first == second
+        assert 200 in first
+        assert None in first
+
+    def test_errors_retried(self, recorded, mocked_sleep):
+        conditions = ReplayConditions(error_rate=1)
+        sess, statuses = self._replay(recorded, conditions, max_retries=2)
+
+        assert statuses == [None] * 10
+        stats = sess.metrics.summary()["endpoints"]["example.org/{id}"]
+        assert stats["retries"] == 20
+        assert stats["statuses"] == {"503": 10}
+
+    def test_wait(self, recorded, mocked_sleep):
+        conditions = ReplayConditions(latency=0.1)
+        self._replay(recorded, conditions, wait=1)
+
+        # 10 latencies, and a wait before each request after the first
+        assert mocked_sleep.call_count == 19
@@ -0,0 +1,100 @@
+import json
+
+import pytest
+from wpextract.download.batch import (
+    BATCH_SUMMARY_FILE_NAME,
+    download_batch,
+    read_targets,
+    site_directory_names,
+)
+from wpextract.download.scheduler import RequestScheduler
+
+
+def test_read_targets(tmp_path):
+    targets_file = tmp_path / "targets.txt"
+    targets_file.write_text(
+        "https://example.org/\n\n# a comment\n  https://example.com/blog/  \n"
+    )
+
+    assert read_targets(targets_file) == [
+        "https://example.org/",
+        "https://example.com/blog/",
+    ]
+
+
+def test_site_directory_names():
+    assert site_directory_names(
+        [
+            "https://example.org/",
+            "https://example.org/blog/",
+            "http://example.org/",
+            "https://localhost:8080/",
+        ]
+    ) == ["example.org", "example.org_blog", "example.org-2", "localhost_8080"]
+
+
+@pytest.fixture()
+def mock_downloader(mocker):
+    return mocker.patch("wpextract.download.batch.WPDownloader")
+
+
+def test_download_batch(mocker, tmp_path, mock_downloader):
+    session_factory = mocker.Mock()
+    session_factory.return_value.metrics.summary.return_value = {
+        "requests": 5,
+        "failures": 0,
+    }
+    scheduler = RequestScheduler(2)
+
+    results = download_batch(
+        ["https://example.org/", "https://example.com/"],
+        tmp_path,
+        ["posts"],
+        scheduler,
+        active_sites=2,
+        session_factory=session_factory,
+    )
+
+    assert [result.directory for result in results] == ["example.org", "example.com"]
+    assert all(result.ok for result in results)
+    assert (tmp_path / "example.org").is_dir()
+    assert session_factory.return_value.scheduler is scheduler
+    mock_downloader.assert_any_call(
+        target="https://example.org/",
+        out_path=tmp_path / "example.org",
+        data_types=["posts"],
+        session=session_factory.return_value,
+        json_prefix=None,
+    )
+    mock_downloader.return_value.download_media_files.assert_not_called()
+
+    summary = json.loads((tmp_path / BATCH_SUMMARY_FILE_NAME).read_text())
+    assert [site["target"] for site in summary] == [
+        "https://example.org/",
+        "https://example.com/",
+    ]
+    assert summary[0]["metrics"]["requests"] == 5
+
+
+def test_download_batch_failure(mocker, tmp_path, mock_downloader, caplog):
+    def make_downloader(target, **kwargs):
+        if target == "https://broken.org/":
+            raise ConnectionError("Could not connect")
+        return mocker.Mock()
+
+    mock_downloader.side_effect = make_downloader
+
+    results = download_batch(
+        ["https://broken.org/", "https://example.org/"],
+        tmp_path,
+        ["posts"],
+        RequestScheduler(1),
+        active_sites=1,
+        media=True,
+    )
+
+    assert not results[0].ok
+    assert "Could not connect" in results[0].error
+    assert results[1].ok
+    assert (tmp_path / "example.org" / "media").is_dir()
+    assert "Failed to download https://broken.org/" in caplog.text
@@ -0,0 +1,67 @@
+import hashlib
+
+from wpextract.download.content_store import ContentStore
+from wpextract.download.media_index import MediaIndex
+
+
+def _sha256(content):
+    return hashlib.sha256(content).hexdigest()
+
+
+def test_add(tmp_path):
+    index = MediaIndex()
+    index.add([{"id": 1, "source_url": "https://example.org/a.jpg"}])
+    store = ContentStore(tmp_path, index)
+
+    digest = store.add(
+        "https://example.org/a.jpg", [b"abc", b"def"], tmp_path / "a.jpg"
+    )
+
+    assert digest == _sha256(b"abcdef")
+    assert store.blob_path(digest).read_bytes() == b"abcdef"
+    assert store.blob_path(digest).parent.name == digest[:2]
+    assert (tmp_path / "a.jpg").read_bytes() == b"abcdef"
+    assert [entry["sha256"] for entry in index.entries(hashes=True)] == [digest]
+
+
+def test_duplicates_stored_once(tmp_path):
+    store = ContentStore(tmp_path)
+
+    first = store.add("https://example.org/a.jpg", [b"same"], tmp_path / "a.jpg")
+    second = store.add("https://example.org/b.jpg", [b"same"], tmp_path / "b.jpg")
+    store.add("https://example.org/c.jpg", [b"different"], tmp_path / "c.jpg")
+
+    assert first == second
+    assert len(list(store.blobs())) == 2
+    assert store.duplicates == 1
+    assert store.bytes_saved == 4
+    assert (tmp_path / "a.jpg").stat().st_ino == (tmp_path / "b.jpg").stat().st_ino
+    assert not list(store.blob_root.glob(".tmp-*"))
+
+
+def test_link_unsupported(tmp_path, mocker, caplog):
+    mocker.patch("os.link", side_effect=OSError("not supported"))
+    store = ContentStore(tmp_path)
+
+    digest = store.add("https://example.org/a.jpg", [b"abc"], tmp_path / "a.jpg")
+    store.add("https://example.org/b.jpg", [b"def"], tmp_path / "b.jpg")
+
+    assert not store.linked
+    assert not (tmp_path / "a.jpg").exists()
+    assert store.blob_path(digest).read_bytes() == b"abc"
+    assert caplog.text.count("Could not hardlink") == 1
+
+
+def test_verify(tmp_path):
+    store = ContentStore(tmp_path)
+    good = store.add("https://example.org/a.jpg", [b"good"], tmp_path / "a.jpg")
+    bad = store.add("https://example.org/b.jpg", [b"bad"], tmp_path / "b.jpg")
+    (tmp_path / "b.jpg").unlink()
+    store.blob_path(bad).write_bytes(b"corrupted")
+
+    assert ContentStore(tmp_path).verify() == [store.blob_path(bad)]
+    assert store.blob_path(good).exists()
+
+
+def test_verify_empty(tmp_path):
+    assert ContentStore(tmp_path).verify() == []
@@ -1,10 +1,18 @@
+import json
 import logging
 
 import pytest
 from wpextract import WPDownloader
+from wpextract.download import MediaSize
+from wpextract.download.content_store import ContentStore
 from wpextract.download.exceptions import WordPressApiNotV2
-from wpextract.download.requestsession import ConnectionRefused, HTTPError500
+from wpextract.download.requestsession import (
+    ConnectionRefused,
+    HTTPError,
+    HTTPError500,
+)
 from wpextract.download.wpapi import WPApi
+from wpextract.downloader import MEDIA_MANIFEST_FILE_NAME
 
 
 def _make_downloader(datadir, mocker, datatypes, json_prefix=None):
@@ -53,6 +61,28 @@ def test_session_test_fail(datadir, mock_request_session, caplog, mocker):
     assert "Failed to connect" in caplog.text
 
 
+def test_fast_probe_head(datadir, mocker, mock_request_session):
+    WPDownloader(
+        target="https://example.org",
+        out_path=datadir,
+        data_types=["posts"],
+        fast_probe=True,
+    )
+    mock_request_session.head.assert_called_once_with("https://example.org")
+    mock_request_session.get.assert_not_called()
+
+
+def test_fast_probe_head_unsupported(datadir, mocker, mock_request_session):
+    mock_request_session.head.side_effect = HTTPError
+    WPDownloader(
+        target="https://example.org",
+        out_path=datadir,
+        data_types=["posts"],
+        fast_probe=True,
+    )
+    mock_request_session.get.assert_called_once_with("https://example.org")
+
+
 @pytest.mark.parametrize(
     ("datatype", "value"),
     [
@@ -125,7 +155,209 @@ def test_download_media_files(datadir, mocker, mock_request_session):
 
     downloader.download_media_files(mock_request_session, datadir)
 
-    exporter_func.assert_called_once_with(mock_request_session, MEDIA_DATA[0], datadir)
+    exporter_func.assert_called_once_with(
+        mock_request_session, MEDIA_DATA[0], datadir, total=10, store=None
+    )
+
+
+def test_download_media_files_indexed(datadir, mocker, mock_request_session):
+    downloader = _make_downloader(datadir, mocker, ["media"])
+    downloader.scanner.get_obj_list.return_value = (
+        [
+            {"id": n, "slug": slug, "source_url": url}
+            for n, (url, slug) in enumerate(zip(*MEDIA_DATA))
+        ],
+        10,
+    )
+    _mocked_exporter(mocker, "media")
+    downloaded = []
+    exporter_func = _mocked_exporter(mocker, "media_files")
+    exporter_func.side_effect = (
+        lambda session, media, dest, total, store: downloaded.extend(media)
+    )
+
+    downloader.download()
+    downloader.download_media_files(mock_request_session, datadir)
+
+    downloader.scanner.get_media_urls.assert_not_called()
+    assert exporter_func.call_args.kwargs["total"] == 10
+    assert downloaded == MEDIA_DATA[0]
+
+
+def test_download_media_files_sized(datadir, mocker, mock_request_session):
+    downloader = _make_downloader(datadir, mocker, ["media"])
+    downloader.media_size = MediaSize(name="large")
+    downloader.scanner.get_media.return_value = (
+        [
+            {
+                "id": 1,
+                "slug": "image1",
+                "source_url": "https://example.org/image1.jpg",
+                "media_details": {
+                    "sizes": {
+                        "large": {"source_url": "https://example.org/image1-1024.jpg"}
+                    }
+                },
+            },
+            {"id": 2, "slug": "doc2", "source_url": "https://example.org/doc2.pdf"},
+        ],
+        2,
+    )
+    downloaded = []
+    exporter_func = _mocked_exporter(mocker, "media_files")
+    exporter_func.side_effect = (
+        lambda session, media, dest, total, store: downloaded.extend(media)
+    )
+
+    downloader.download_media_files(mock_request_session, datadir)
+
+    downloader.scanner.get_media_urls.assert_not_called()
+    assert downloaded == [
+        "https://example.org/image1-1024.jpg",
+        "https://example.org/doc2.pdf",
+    ]
+    manifest = json.loads((datadir / MEDIA_MANIFEST_FILE_NAME).read_text())
+    assert [(entry["id"], entry["size"]) for entry in manifest] == [
+        (1, "large"),
+        (2, "full"),
+    ]
+
+
+def test_download_media_files_dedupe(datadir, mocker, mock_request_session):
+    downloader = _make_downloader(datadir, mocker, ["media"])
+    downloader.dedupe_media = True
+    downloader.scanner.get_media.return_value = (
+        [
+            {"id": n, "slug": f"image{n}", "source_url": f"https://example.org/{n}.jpg"}
+            for n in range(2)
+        ],
+        2,
+    )
+    exporter_func = _mocked_exporter(mocker, "media_files")
+
+    def download_media(session, media, dest, total, store):
+        for url in media:
+            store.index.set_hash(url, "abc123")
+
+    exporter_func.side_effect = download_media
+
+    downloader.download_media_files(mock_request_session, datadir)
+
+    assert isinstance(exporter_func.call_args.kwargs["store"], ContentStore)
+    manifest = json.loads((datadir / MEDIA_MANIFEST_FILE_NAME).read_text())
+    assert [entry["sha256"] for entry in manifest] == ["abc123", "abc123"]
+
+
+def test_inventory_media_files(datadir, mocker, mock_request_session):
+    downloader = _make_downloader(datadir, mocker, ["media"])
+    downloader.scanner.get_media.return_value = (
+        [
+            {"id": n, "slug": f"image{n}", "source_url": f"https://example.org/{n}.jpg"}
+            for n in range(2)
+        ],
+        2,
+    )
+    inventory_func = mocker.patch("wpextract.downloader.inventory_media")
+    inventory_func.side_effect = lambda session, urls, workers, total: (
+        {"url": url, "status": 200, "content_length": 10} for url in urls
+    )
+    download_func = _mocked_exporter(mocker, "media_files")
+
+    downloader.inventory_media_files(mock_request_session, datadir, workers=3)
+
+    download_func.assert_not_called()
+    assert inventory_func.call_args.args[2] == 3
+    manifest = json.loads((datadir / MEDIA_MANIFEST_FILE_NAME).read_text())
+    assert manifest[1] == {
+        "id": 1,
+        "slug": "image1",
+        "source_url": "https://example.org/1.jpg",
+        "url": "https://example.org/1.jpg",
+        "size": "full",
+        "status": 200,
+        "content_length": 10,
+    }
+
+
+def test_verify_media_files(datadir, mocker, mock_request_session, tmp_path):
+    downloader = _make_downloader(datadir, mocker, ["media"])
+    store = ContentStore(tmp_path)
+    digest = store.add("https://example.org/a.jpg", [b"abc"], tmp_path / "a.jpg")
+    assert downloader.verify_media_files(tmp_path) == []
+
+    store.blob_path(digest).write_bytes(b"corrupt")
+    assert downloader.verify_media_files(tmp_path) == [store.blob_path(digest)]
+
+
+def test_download_media_pipelined(datadir, mocker, mock_request_session, tmp_path):
+    downloader = _make_downloader(datadir, mocker, ["media"])
+    media = [
+        {"id": n, "slug": f"image{n}", "source_url": f"https://example.org/{n}.jpg"}
+        for n in range(4)
+    ]
+    downloaded = []
+
+    def get_media(start, limit, on_page):
+        on_page(media[:2])
+        on_page(media[2:])
+        return media, 4
+
+    downloader.scanner.get_media.side_effect = get_media
+    download_func = mocker.patch(
+        "wpextract.download.exporter.Exporter.download_media_file", return_value=True
+    )
+    download_func.side_effect = lambda session, url, dest, store, progress: (
+        downloaded.append(url)
+    )
+
+    downloader.download(media_dest=tmp_path, media_workers=2)
+
+    downloader.scanner.get_obj_list.assert_not_called()
+    assert sorted(downloaded) == [m["source_url"] for m in media]
+    assert len(json.loads((datadir / "media.json").read_text())) == 4
+    assert list(downloader.media_index.urls()) == [m["source_url"] for m in media]
+
+
+def test_download_media_pipelined_dedupe(
+    datadir, mocker, mock_request_session, tmp_path
+):
+    downloader = _make_downloader(datadir, mocker, ["media"])
+    downloader.dedupe_media = True
+    media = [
+        {"id": n, "slug": f"image{n}", "source_url": f"https://example.org/{n}.jpg"}
+        for n in range(4)
+    ]
+
+    def get_media(start, limit, on_page):
+        on_page(media[:2])
+        on_page(media[2:])
+        return media, 4
+
+    downloader.scanner.get_media.side_effect = get_media
+    download_func = mocker.patch(
+        "wpextract.download.exporter.Exporter.download_media_file", return_value=True
+    )
+    # Hashes are recorded while media are still being listed
+    download_func.side_effect = lambda session, url, dest, store, progress: (
+        store.index.set_hash(url, "abc123")
+    )
+
+    downloader.download(media_dest=tmp_path, media_workers=2)
+
+    manifest = json.loads((tmp_path / MEDIA_MANIFEST_FILE_NAME).read_text())
+    assert [entry["sha256"] for entry in manifest] == ["abc123"] * 4
+
+
+def test_download_media_pipelined_no_media_type(
+    datadir, mocker, mock_request_session, tmp_path
+):
+    downloader = _make_downloader(datadir, mocker, ["posts"])
+    _mocked_exporter(mocker, "posts")
+    download_files = mocker.patch.object(downloader, "download_media_files")
+
+    downloader.download(media_dest=tmp_path)
+
+    download_files.assert_called_once_with(downloader.session, tmp_path)
 
 
 def test_download_media_files_no_media(datadir, mocker, caplog, mock_request_session):
@@ -147,3 +379,62 @@ def test_http_error_getting_object(datadir, mocker, caplog, mock_request_session
     pages_exporter.assert_called_once()
 
     assert "while downloading Posts" in caplog.text
+
+
+def test_shard_info(datadir, mocker, mock_request_session):
+    downloader = WPDownloader(
+        target="https://example.org",
+        out_path=datadir,
+        data_types=["posts"],
+        shard=(1, 4),
+    )
+    boundaries = {"total": 5, "oldest": None, "newest": None, "windows": None}
+
+    def list_obj(obj_type):
+        downloader.scanner.shard_boundaries["posts"] = boundaries
+
+    downloader._list_obj = mocker.Mock(side_effect=list_obj)
+    downloader.download()
+
+    shard_info = json.loads((datadir / "shard.json").read_text())
+    assert shard_info["shard"] == 1
+    assert shard_info["shards"] == 4
+    assert shard_info["boundaries"] == {"posts": boundaries}
+    assert downloader.scanner.shard == (1, 4)
+
+
+def test_passthrough(datadir, mocker, mock_request_session):
+    downloader = _make_downloader(datadir, mocker, ["posts", "media"])
+    downloader.passthrough = True
+    downloader.scanner.list_url.side_effect = lambda type_name: type_name
+    pages = {
+        "posts": [b'[{"id": 1}, {"id": 2}]', b'[{"id": 3}]'],
+        "media": [
+            b'[{"id": 1, "slug": "image0", "source_url": "%s"}]'
+            % MEDIA_DATA[0][0].encode()
+        ],
+    }
+
+    def crawl_pages_raw(url, write):
+        for page in pages[url]:
+            write(page)
+
+    downloader.scanner.crawl_pages_raw.side_effect = crawl_pages_raw
+    downloader.download()
+
+    downloader.scanner.get_obj_list.assert_not_called()
+    posts_lines = (datadir / "posts.jsonl").read_bytes().splitlines()
+    assert posts_lines == pages["posts"]
+    assert not (datadir / "posts.json").exists()
+    assert list(downloader.media_index.urls()) == [MEDIA_DATA[0][0]]
+
+
+def test_passthrough_partitioned(datadir, mock_request_session):
+    with pytest.raises(ValueError, match="cannot be partitioned"):
+        WPDownloader(
+            target="https://example.org",
+            out_path=datadir,
+            data_types=["posts"],
+            partition_size=100,
+            passthrough=True,
+        )
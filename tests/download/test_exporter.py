@@ -1,4 +1,6 @@
+from wpextract.download.content_store import ContentStore
 from wpextract.download.exporter import Exporter
+from wpextract.download.requestsession import RequestSession
 
 
 def test_setup_escaping():
@@ -22,3 +24,26 @@ def test_escape_unescapable():
     entries = [{"id": 1, "parent": {"child": 1, "sibling": "test"}}]
     unencoded = Exporter.setup_export(entries, [["parent", "child"]])
     assert unencoded == [{"id": 1, "parent": {"child": 1, "sibling": "test"}}]
+
+
+def test_download_media_store(tmp_path, mocked_responses):
+    for name in ["a", "b"]:
+        mocked_responses.get(
+            f"https://example.org/wp-content/uploads/{name}.jpg", body=b"image"
+        )
+    store = ContentStore(tmp_path)
+
+    count = Exporter.download_media(
+        RequestSession(),
+        [
+            "https://example.org/wp-content/uploads/a.jpg",
+            "https://example.org/wp-content/uploads/b.jpg",
+        ],
+        tmp_path,
+        store=store,
+    )
+
+    assert count == 2
+    assert store.duplicates == 1
+    assert len(list(store.blobs())) == 1
+    assert (tmp_path / "wp-content" / "uploads" / "b.jpg").read_bytes() == b"image"
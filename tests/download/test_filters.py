@@ -0,0 +1,54 @@
+import logging
+from datetime import datetime
+
+from wpextract.download.filters import DownloadFilter
+
+
+def test_empty():
+    assert DownloadFilter().is_empty()
+    assert DownloadFilter().to_params("posts") == {}
+    assert not DownloadFilter(search="example").is_empty()
+
+
+def test_posts_params():
+    filters = DownloadFilter(
+        after=datetime(2024, 1, 1),
+        before=datetime(2024, 2, 1, 12, 30),
+        categories=[1, 2],
+        tags=[3],
+        author=[4, 5],
+        search="example",
+        status=["publish", "draft"],
+        lang="fr",
+    )
+
+    assert filters.to_params("posts") == {
+        "after": "2024-01-01T00:00:00",
+        "before": "2024-02-01T12:30:00",
+        "categories": "1,2",
+        "tags": "3",
+        "author": "4,5",
+        "search": "example",
+        "status": "publish,draft",
+        "lang": "fr",
+    }
+
+
+def test_unsupported_params(caplog):
+    filters = DownloadFilter(categories=[1], author=[2], status=["publish"])
+
+    with caplog.at_level(logging.WARNING):
+        assert filters.to_params("media") == {"author": "2"}
+
+    assert "not supported for media will not be applied: categories, status" in (
+        caplog.text
+    )
+
+
+def test_unfilterable_type(caplog):
+    filters = DownloadFilter(search="example")
+
+    with caplog.at_level(logging.WARNING):
+        assert filters.to_params("tags") == {}
+
+    assert caplog.text == ""
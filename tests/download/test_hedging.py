@@ -0,0 +1,68 @@
+import pytest
+from wpextract.download.hedging import HedgePolicy
+from wpextract.download.telemetry import RequestMetrics
+
+URL = "https://example.org/wp-json/wp/v2/posts?page=1"
+
+
+@pytest.fixture()
+def metrics():
+    metrics = RequestMetrics()
+    for latency in range(1, 21):
+        metrics.record(URL, 200, latency / 10)
+    return metrics
+
+
+def test_delay(metrics):
+    policy = HedgePolicy(percentile=95)
+
+    assert policy.delay(metrics, URL) == 1.9
+
+
+def test_delay_too_few_samples(metrics):
+    policy = HedgePolicy(min_samples=50)
+
+    assert policy.delay(metrics, URL) is None
+    assert policy.delay(metrics, "https://example.org/wp-json/wp/v2/pages") is None
+
+
+def test_min_delay(metrics):
+    policy = HedgePolicy(percentile=1, min_delay=0.5)
+
+    assert policy.delay(metrics, URL) == 0.5
+
+
+def test_budget(metrics):
+    policy = HedgePolicy(budget=0.25, burst=2)
+
+    allowed = []
+    for _ in range(20):
+        policy.delay(metrics, URL)
+        allowed.append(policy.try_acquire())
+
+    assert allowed[:3] == [False, False, False]
+    assert sum(allowed) == 5
+    assert policy.hedges == 5
+
+
+def test_budget_burst(metrics):
+    policy = HedgePolicy(budget=1, burst=2)
+    for _ in range(10):
+        policy.delay(metrics, URL)
+
+    assert [policy.try_acquire() for _ in range(3)] == [True, True, False]
+
+
+def test_has_budget(metrics):
+    policy = HedgePolicy(budget=0.5, burst=1)
+    policy.delay(metrics, URL)
+    assert not policy.has_budget()
+
+    policy.delay(metrics, URL)
+    assert policy.has_budget()
+    assert policy.hedges == 0
+
+
+def test_invalid_budget():
+    with pytest.raises(ValueError, match="between 0 and 1"):
+        HedgePolicy(budget=1.5)
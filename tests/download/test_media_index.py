@@ -0,0 +1,98 @@
+from wpextract.download.media_index import MediaIndex
+from wpextract.download.media_size import MediaSize
+
+
+def _media(n):
+    return {
+        "id": n,
+        "slug": f"image{n}",
+        "source_url": f"https://example.org/wp-content/uploads/image{n}.jpg",
+    }
+
+
+def test_add_urls():
+    index = MediaIndex()
+    assert index.add([_media(2), _media(1)]) == 2
+    assert index.add([_media(3)]) == 1
+
+    assert len(index) == 3
+    assert list(index.urls()) == [_media(n)["source_url"] for n in [2, 1, 3]]
+
+
+def test_skip_without_source_url():
+    index = MediaIndex()
+    assert index.add([_media(1), {"id": 2, "slug": "no-url"}, None]) == 1
+
+    assert len(index) == 1
+
+
+def test_urls_batched(mocker):
+    mocker.patch.object(MediaIndex, "BATCH_SIZE", 2)
+    index = MediaIndex()
+    index.add([_media(n) for n in range(5)])
+
+    assert len(list(index.urls())) == 5
+
+
+def test_temporary_file_removed():
+    index = MediaIndex()
+    path = index.path
+    assert path.is_file()
+
+    index.close()
+
+    assert not path.exists()
+
+
+def test_persistent_file(tmp_path):
+    index = MediaIndex(tmp_path / "media.db")
+    index.add([_media(1)])
+    index.close()
+
+    assert (tmp_path / "media.db").is_file()
+    assert list(MediaIndex(tmp_path / "media.db").urls()) == [_media(1)["source_url"]]
+
+
+def test_sized_urls():
+    sized = {
+        **_media(1),
+        "media_details": {
+            "sizes": {"medium": {"source_url": "https://example.org/image1-300.jpg"}}
+        },
+    }
+    index = MediaIndex(size=MediaSize(name="medium"))
+    index.add([sized, _media(2)])
+
+    assert list(index.urls()) == [
+        "https://example.org/image1-300.jpg",
+        _media(2)["source_url"],
+    ]
+    assert list(index.entries()) == [
+        {
+            "id": 1,
+            "slug": "image1",
+            "source_url": _media(1)["source_url"],
+            "url": "https://example.org/image1-300.jpg",
+            "size": "medium",
+        },
+        {
+            "id": 2,
+            "slug": "image2",
+            "source_url": _media(2)["source_url"],
+            "url": _media(2)["source_url"],
+            "size": "full",
+        },
+    ]
+
+
+def test_set_hash():
+    index = MediaIndex()
+    index.add([_media(1), _media(2)])
+
+    index.set_hash(_media(2)["source_url"], "abc123")
+
+    assert [entry["sha256"] for entry in index.entries(hashes=True)] == [
+        None,
+        "abc123",
+    ]
+    assert "sha256" not in next(index.entries())
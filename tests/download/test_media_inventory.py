@@ -0,0 +1,70 @@
+import time
+
+import responses
+from wpextract.download import RequestSession
+from wpextract.download.media_inventory import inventory_media
+
+URL = "https://example.org/wp-content/uploads/"
+
+
+def test_inventory(mocked_responses):
+    mocked_responses.head(
+        URL + "a.jpg",
+        headers={
+            "Content-Length": "1234",
+            "Content-Type": "image/jpeg",
+            "Last-Modified": "Mon, 01 Jan 2024 00:00:00 GMT",
+        },
+    )
+    mocked_responses.head(URL + "b.jpg", status=404)
+    mocked_responses.head(URL + "c.jpg", body=ConnectionError())
+
+    entries = list(
+        inventory_media(
+            RequestSession(max_retries=0),
+            [URL + n for n in ["a.jpg", "b.jpg", "c.jpg"]],
+        )
+    )
+
+    assert entries[0] == {
+        "url": URL + "a.jpg",
+        "status": 200,
+        "content_length": 1234,
+        "content_type": "image/jpeg",
+        "last_modified": "Mon, 01 Jan 2024 00:00:00 GMT",
+    }
+    assert entries[1]["status"] == 404
+    assert entries[1]["content_length"] is None
+    assert entries[2]["status"] is None
+    assert entries[2]["error"] == "ConnectionError"
+
+
+def test_inventory_order(mocked_responses):
+    urls = [URL + f"{n}.jpg" for n in range(25)]
+    for url in urls:
+        mocked_responses.head(url)
+
+    entries = inventory_media(RequestSession(), iter(urls), workers=4)
+
+    assert [entry["url"] for entry in entries] == urls
+    assert len(mocked_responses.calls) == 25
+
+
+def test_inventory_wait_shared(mocked_responses):
+    starts = []
+
+    def callback(request):
+        starts.append(time.monotonic())
+        return 200, {}, ""
+
+    urls = [URL + f"{n}.jpg" for n in range(8)]
+    for url in urls:
+        mocked_responses.add_callback(responses.HEAD, url, callback)
+
+    entries = list(inventory_media(RequestSession(wait=0.05), urls, workers=4))
+
+    assert len(entries) == 8
+    # Each start is reserved a wait after the previous one, but threads may be scheduled
+    # slightly late, so check the total time rather than each gap
+    starts.sort()
+    assert starts[-1] - starts[0] >= (len(starts) - 1) * 0.045
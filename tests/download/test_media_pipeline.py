@@ -0,0 +1,101 @@
+import re
+import time
+
+import pytest
+import responses
+from wpextract.download import RequestSession
+from wpextract.download.content_store import ContentStore
+from wpextract.download.media_pipeline import MediaPipeline
+
+URL = "https://example.org/wp-content/uploads/"
+
+
+def test_pipeline(mocked_responses, tmp_path):
+    for name in ["a", "b", "c"]:
+        mocked_responses.get(URL + f"{name}.jpg", body=name.encode())
+
+    with MediaPipeline(RequestSession(), tmp_path, workers=2) as pipeline:
+        pipeline.submit([URL + "a.jpg", URL + "b.jpg"])
+        pipeline.submit(iter([URL + "b.jpg", URL + "c.jpg"]))
+
+    assert pipeline.downloaded == 3
+    assert len(pipeline) == 3
+    assert len(mocked_responses.calls) == 3
+    for name in ["a", "b", "c"]:
+        path = tmp_path / "wp-content" / "uploads" / f"{name}.jpg"
+        assert path.read_bytes() == name.encode()
+
+
+def test_pipeline_wait_shared(mocked_responses, tmp_path):
+    starts = []
+
+    def callback(request):
+        starts.append(time.monotonic())
+        return 200, {}, b"media"
+
+    mocked_responses.add_callback(responses.GET, re.compile(URL + r".*\.jpg"), callback)
+
+    with MediaPipeline(RequestSession(wait=0.05), tmp_path, workers=4) as pipeline:
+        pipeline.submit([URL + f"{idx}.jpg" for idx in range(8)])
+
+    assert pipeline.downloaded == 8
+    # The workers share the wait, rather than each waiting between its own requests
+    # (threads may start slightly late, so the total time is checked rather than each gap)
+    starts.sort()
+    assert starts[-1] - starts[0] >= (len(starts) - 1) * 0.045
+
+
+def test_pipeline_store(mocked_responses, tmp_path):
+    for name in ["a", "b"]:
+        mocked_responses.get(URL + f"{name}.jpg", body=b"same")
+    store = ContentStore(tmp_path)
+
+    with MediaPipeline(RequestSession(), tmp_path, workers=2, store=store) as pipeline:
+        pipeline.submit([URL + "a.jpg", URL + "b.jpg"])
+
+    assert pipeline.downloaded == 2
+    assert store.duplicates == 1
+
+
+def test_pipeline_http_error(mocked_responses, tmp_path, caplog):
+    mocked_responses.get(URL + "missing.jpg", status=404)
+    mocked_responses.get(URL + "forbidden.jpg", status=403)
+    for name in ["a", "b"]:
+        mocked_responses.get(URL + f"{name}.jpg", body=name.encode())
+
+    pipeline = MediaPipeline(RequestSession(), tmp_path, workers=2)
+    pipeline.submit([URL + "missing.jpg", URL + "a.jpg"])
+    pipeline.submit([URL + "forbidden.jpg", URL + "b.jpg"])
+
+    assert pipeline.close() == 2
+    assert pipeline.failed == 2
+    assert f'Failed to download "{URL}missing.jpg"' in caplog.text
+    assert (tmp_path / "wp-content" / "uploads" / "b.jpg").read_bytes() == b"b"
+
+
+def test_pipeline_error(mocker, tmp_path):
+    mocker.patch(
+        "wpextract.download.exporter.Exporter.download_media_file",
+        side_effect=OSError("disk full"),
+    )
+
+    pipeline = MediaPipeline(RequestSession(), tmp_path)
+    pipeline.submit([URL + "a.jpg"])
+
+    with pytest.raises(OSError, match="disk full"):
+        pipeline.close()
+
+
+def test_pipeline_error_not_masked(mocker, tmp_path):
+    mocker.patch(
+        "wpextract.download.exporter.Exporter.download_media_file",
+        side_effect=OSError("disk full"),
+    )
+
+    def fail_listing():
+        with MediaPipeline(RequestSession(), tmp_path) as pipeline:
+            pipeline.submit([URL + "a.jpg"])
+            raise ValueError("listing failed")
+
+    with pytest.raises(ValueError, match="listing failed"):
+        fail_listing()
@@ -0,0 +1,79 @@
+import pytest
+from wpextract.download.media_size import MediaSize
+
+SOURCE_URL = "https://example.org/wp-content/uploads/image.jpg"
+
+
+def _size(width, height, suffix):
+    return {
+        "width": width,
+        "height": height,
+        "source_url": f"https://example.org/wp-content/uploads/image-{suffix}.jpg",
+    }
+
+
+MEDIA = {
+    "id": 1,
+    "source_url": SOURCE_URL,
+    "media_details": {
+        "width": 2048,
+        "height": 1536,
+        "sizes": {
+            "thumbnail": _size(150, 150, "thumb"),
+            "medium": _size(300, 225, "300"),
+            "medium_large": _size(768, 576, "768"),
+            "large": _size(1024, 768, "1024"),
+        },
+    },
+}
+
+
+@pytest.mark.parametrize(
+    ("spec", "expected"),
+    [
+        ("large", MediaSize(name="large")),
+        ("1024", MediaSize(max_px=1024)),
+        (" 800 ", MediaSize(max_px=800)),
+    ],
+)
+def test_parse(spec, expected):
+    assert MediaSize.parse(spec) == expected
+
+
+@pytest.mark.parametrize("kwargs", [{}, {"name": "large", "max_px": 1024}])
+def test_invalid(kwargs):
+    with pytest.raises(ValueError, match="Exactly one"):
+        MediaSize(**kwargs)
+
+
+@pytest.mark.parametrize(
+    ("size", "expected_size"),
+    [
+        (MediaSize(name="medium"), "medium"),
+        (MediaSize(name="missing"), "full"),
+        (MediaSize(max_px=1000), "medium_large"),
+        (MediaSize(max_px=1024), "large"),
+        (MediaSize(max_px=4096), "full"),
+        (MediaSize(max_px=100), "full"),
+    ],
+)
+def test_select(size, expected_size):
+    url, selected = size.select(MEDIA)
+
+    assert selected == expected_size
+    if expected_size == "full":
+        assert url == SOURCE_URL
+    else:
+        assert url == MEDIA["media_details"]["sizes"][expected_size]["source_url"]
+
+
+@pytest.mark.parametrize(
+    "media",
+    [
+        {"source_url": SOURCE_URL},
+        {"source_url": SOURCE_URL, "media_details": []},
+        {"source_url": SOURCE_URL, "media_details": {"sizes": []}},
+    ],
+)
+def test_select_no_sizes(media):
+    assert MediaSize(max_px=1024).select(media) == (SOURCE_URL, "full")
@@ -0,0 +1,242 @@
+import json
+import logging
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+from helpers.wp_server import MockWordPressServer, SiteConfig
+from wpextract import WPDownloader
+from wpextract.download import RequestSession
+from wpextract.download.merge import merge_downloads, merge_entries
+
+SERVER_TYPES = ["categories", "comments", "media", "pages", "posts", "tags", "users"]
+
+
+def _write_partial(
+    path, shard, shards, files, target="https://example.org/", boundaries=None
+):
+    path.mkdir()
+    if shard is not None:
+        info = {"target": target, "shard": shard, "shards": shards}
+        if boundaries is not None:
+            info["boundaries"] = boundaries
+        (path / "shard.json").write_text(json.dumps(info))
+    for name, entries in files.items():
+        (path / f"{name}.json").write_text(json.dumps(entries))
+    return path
+
+
+def _posts(*ids):
+    return [{"id": idx, "date": f"2024-01-{idx:02d}T00:00:00"} for idx in ids]
+
+
+def _tags(*ids):
+    return [{"id": idx, "name": f"tag {idx}"} for idx in ids]
+
+
+def test_merge_entries_dated():
+    merged = merge_entries([_posts(1, 5, 3), _posts(4, 3, 2)])
+    assert [entry["id"] for entry in merged] == [5, 4, 3, 2, 1]
+
+
+def test_merge_entries_undated_keeps_order():
+    merged = merge_entries([_tags(3, 1), _tags(1, 2)])
+    assert [entry["id"] for entry in merged] == [3, 1, 2]
+
+
+def test_merge_downloads(tmp_path):
+    # Given out of order to check sorting by shard
+    partials = [
+        _write_partial(
+            tmp_path / "b", 1, 2, {"posts": _posts(1, 2), "tags": _tags(3, 4)}
+        ),
+        _write_partial(
+            tmp_path / "a", 0, 2, {"posts": _posts(3, 4), "tags": _tags(1, 2)}
+        ),
+    ]
+    out_path = tmp_path / "out"
+    out_path.mkdir()
+
+    counts = merge_downloads(partials, out_path)
+
+    assert counts == {"posts": 4, "tags": 4}
+    posts = json.loads((out_path / "posts.json").read_text())
+    assert [post["id"] for post in posts] == [4, 3, 2, 1]
+    tags = json.loads((out_path / "tags.json").read_text())
+    assert [tag["id"] for tag in tags] == [1, 2, 3, 4]
+    assert not (out_path / "shard.json").exists()
+    assert not (out_path / "pages.json").exists()
+
+
+def test_merge_downloads_prefix(tmp_path):
+    partial = tmp_path / "a"
+    partial.mkdir()
+    (partial / "example-posts.json").write_text(json.dumps(_posts(1)))
+    (partial / "posts.json").write_text(json.dumps(_posts(2)))
+
+    merge_downloads([partial], tmp_path, json_prefix="example")
+
+    assert json.loads((tmp_path / "example-posts.json").read_text()) == _posts(1)
+
+
+def test_merge_downloads_passthrough(tmp_path):
+    partials = [
+        _write_partial(tmp_path / "a", 0, 2, {}),
+        _write_partial(tmp_path / "b", 1, 2, {}),
+    ]
+    # One page of the API response per line
+    (partials[0] / "posts.jsonl").write_text(
+        json.dumps(_posts(4)) + "\n" + json.dumps(_posts(3)) + "\n"
+    )
+    (partials[1] / "posts.jsonl").write_text(json.dumps(_posts(2, 1)) + "\n")
+    out_path = tmp_path / "out"
+    out_path.mkdir()
+
+    counts = merge_downloads(partials, out_path)
+
+    assert counts == {"posts": 4}
+    posts = json.loads((out_path / "posts.json").read_text())
+    assert [post["id"] for post in posts] == [4, 3, 2, 1]
+    assert not (out_path / "posts.jsonl").exists()
+
+
+def test_merge_missing_shard(tmp_path, caplog):
+    partials = [
+        _write_partial(tmp_path / "a", 0, 3, {"posts": _posts(1)}),
+        _write_partial(tmp_path / "b", 2, 3, {"posts": _posts(2)}),
+    ]
+
+    with caplog.at_level(logging.WARNING):
+        merge_downloads(partials, tmp_path)
+
+    assert "missing shards 2/3" in caplog.text
+
+
+def test_merge_mismatched_shards(tmp_path):
+    partials = [
+        _write_partial(tmp_path / "a", 0, 2, {"posts": _posts(1)}),
+        _write_partial(tmp_path / "b", 1, 3, {"posts": _posts(2)}),
+    ]
+
+    with pytest.raises(ValueError, match="differing numbers of shards"):
+        merge_downloads(partials, tmp_path)
+
+
+def test_merge_mismatched_targets(tmp_path):
+    partials = [
+        _write_partial(tmp_path / "a", 0, 2, {}),
+        _write_partial(tmp_path / "b", 1, 2, {}, target="https://example.com/"),
+    ]
+
+    with pytest.raises(ValueError, match="differing targets"):
+        merge_downloads(partials, tmp_path)
+
+
+def _boundaries(total, newest):
+    return {
+        "posts": {
+            "total": total,
+            "oldest": "2024-01-01T00:00:00",
+            "newest": newest,
+            "windows": 2,
+        }
+    }
+
+
+def test_merge_matching_boundaries(tmp_path, caplog):
+    boundaries = _boundaries(2, "2024-01-02T00:00:00")
+    partials = [
+        _write_partial(
+            tmp_path / "a", 0, 2, {"posts": _posts(1)}, boundaries=boundaries
+        ),
+        _write_partial(
+            tmp_path / "b", 1, 2, {"posts": _posts(2)}, boundaries=boundaries
+        ),
+    ]
+
+    with caplog.at_level(logging.WARNING):
+        merge_downloads(partials, tmp_path)
+
+    assert caplog.text == ""
+
+
+def test_merge_mismatched_boundaries(tmp_path, caplog):
+    partials = [
+        _write_partial(
+            tmp_path / "a",
+            0,
+            2,
+            {"posts": _posts(1)},
+            boundaries=_boundaries(2, "2024-01-02T00:00:00"),
+        ),
+        _write_partial(
+            tmp_path / "b",
+            1,
+            2,
+            {"posts": _posts(2, 3)},
+            boundaries=_boundaries(3, "2024-01-03T00:00:00"),
+        ),
+    ]
+
+    with caplog.at_level(logging.WARNING):
+        merge_downloads(partials, tmp_path)
+
+    assert "Shards divided posts differently" in caplog.text
+
+
+def _download_shard(target, out_path, shard, partition_size):
+    downloader = WPDownloader(
+        target=target,
+        out_path=out_path,
+        data_types=SERVER_TYPES,
+        session=RequestSession(max_retries=0),
+        partition_size=partition_size,
+        shard=shard,
+    )
+    downloader.download()
+
+
+@pytest.mark.parametrize("partition_size", [None, 30])
+def test_merge_server_shards(tmp_path, partition_size):
+    n_shards = 3
+    config = SiteConfig(posts=95, pages=12, media=40, tags=25, comments=33)
+    with MockWordPressServer(config) as server:
+        full_path = tmp_path / "full"
+        full_path.mkdir()
+        _download_shard(server.url, full_path, None, None)
+
+        shard_paths = [tmp_path / f"shard_{idx}" for idx in range(n_shards)]
+        for path in shard_paths:
+            path.mkdir()
+        # Each shard is downloaded by a separate process, as it would be in use
+        with ProcessPoolExecutor(max_workers=n_shards) as executor:
+            futures = [
+                executor.submit(
+                    _download_shard,
+                    server.url,
+                    path,
+                    (idx, n_shards),
+                    partition_size,
+                )
+                for idx, path in enumerate(shard_paths)
+            ]
+            for future in futures:
+                future.result()
+
+    out_path = tmp_path / "out"
+    out_path.mkdir()
+    counts = merge_downloads(shard_paths, out_path)
+
+    infos = [json.loads((path / "shard.json").read_text()) for path in shard_paths]
+    assert all(info["boundaries"] == infos[0]["boundaries"] for info in infos)
+    assert infos[0]["boundaries"]["posts"]["total"] == 95
+    for type_name in SERVER_TYPES:
+        full = json.loads((full_path / f"{type_name}.json").read_text())
+        merged = json.loads((out_path / f"{type_name}.json").read_text())
+        assert counts[type_name] == len(full)
+        assert sorted(entry["id"] for entry in merged) == sorted(
+            entry["id"] for entry in full
+        )
+    # Dated types are in the same order as the API
+    full_posts = json.loads((full_path / "posts.json").read_text())
+    merged_posts = json.loads((out_path / "posts.json").read_text())
+    assert merged_posts == full_posts
@@ -0,0 +1,159 @@
+import pytest
+from wpextract.download import DownloadFilter, RequestSession
+from wpextract.download.plan import (
+    DownloadPlan,
+    TypeEstimate,
+    estimate_download,
+    estimate_type,
+)
+from wpextract.download.wpapi import WPApi
+
+FAKE_TARGET = "https://example.org/"
+
+
+def _api(**kwargs):
+    return WPApi(FAKE_TARGET, session=RequestSession(), **kwargs)
+
+
+def _mock_probe(mocked_responses, type_name, total, entry=b'[{"id": 1}]'):
+    mocked_responses.get(
+        f"{FAKE_TARGET}wp-json/wp/v2/{type_name}?page=1&per_page=1",
+        body=entry if total > 0 else b"[]",
+        headers={"X-WP-Total": str(total)},
+    )
+
+
+def test_estimate_type():
+    est = estimate_type(_api(), "posts", entries=95, latency=0.5, entry_bytes=1000)
+
+    assert est.requests == 10
+    assert est.bytes == 95_000
+    assert est.seconds == pytest.approx(5)
+
+
+def test_estimate_type_empty():
+    est = estimate_type(_api(), "tags", entries=0, latency=0.5, entry_bytes=2)
+
+    assert est.requests == 1
+    assert est.bytes == 0
+
+
+def test_estimate_type_wait():
+    api = WPApi(FAKE_TARGET, session=RequestSession(wait=1))
+    est = estimate_type(api, "posts", entries=95, latency=0.5, entry_bytes=1000)
+
+    assert est.seconds == pytest.approx(15)
+
+
+def test_estimate_type_partitioned():
+    api = _api(partition_size=50, workers=2)
+    est = estimate_type(api, "posts", entries=95, latency=0.5, entry_bytes=1000)
+
+    # 2 range probes, 2 window probes and 10 pages
+    assert est.requests == 14
+    assert est.seconds == pytest.approx(3.5)
+
+
+def test_estimate_type_partition_unsupported():
+    api = _api(partition_size=50, workers=2)
+    est = estimate_type(api, "tags", entries=95, latency=0.5, entry_bytes=1000)
+
+    assert est.requests == 10
+    assert est.seconds == pytest.approx(5)
+
+
+def test_estimate_type_shard():
+    api = _api(shard=(0, 2))
+    est = estimate_type(api, "posts", entries=95, latency=0.5, entry_bytes=1000)
+
+    assert est.requests == 6
+    assert est.bytes == 47_500
+
+
+def test_estimate_download(mocked_responses):
+    _mock_probe(mocked_responses, "posts", 95, b'[{"id": 1, "title": "a"}]')
+    _mock_probe(mocked_responses, "tags", 0)
+
+    plan = estimate_download(_api(), ["tags", "posts"])
+
+    assert [est.name for est in plan.types] == ["posts", "tags"]
+    assert plan.types[0].entries == 95
+    assert plan.types[0].bytes == 95 * len(b'[{"id": 1, "title": "a"}]')
+    assert plan.requests == 11
+    assert plan.media_files is None
+
+
+def test_estimate_download_filtered(mocked_responses):
+    mocked_responses.get(
+        f"{FAKE_TARGET}wp-json/wp/v2/posts?page=1&search=foo&per_page=1",
+        body=b"[]",
+        headers={"X-WP-Total": "0"},
+    )
+
+    plan = estimate_download(_api(filters=DownloadFilter(search="foo")), ["posts"])
+
+    assert plan.types[0].entries == 0
+
+
+def test_estimate_download_media_files(mocked_responses):
+    _mock_probe(mocked_responses, "media", 30)
+
+    plan = estimate_download(_api(), [], media_files=True)
+
+    assert plan.types == []
+    assert plan.media_files == 30
+    assert plan.requests == 30
+
+
+def test_estimate_download_media_host_wait(mocked_responses):
+    _mock_probe(
+        mocked_responses,
+        "media",
+        30,
+        b'[{"id": 1, "source_url": "https://cdn.example.org/a.jpg"}]',
+    )
+    session = RequestSession(wait=0.1, host_waits={"cdn.example.org": 2})
+    api = WPApi(FAKE_TARGET, session=session)
+
+    plan = estimate_download(api, ["media"], media_files=True)
+
+    assert plan.seconds_per_media_file >= 2
+    assert plan.types[0].seconds < 2
+
+
+@pytest.mark.parametrize("status", [401, 403, 404])
+def test_estimate_download_unavailable(mocked_responses, status):
+    _mock_probe(mocked_responses, "posts", 95)
+    mocked_responses.get(
+        f"{FAKE_TARGET}wp-json/wp/v2/users?page=1&per_page=1", status=status
+    )
+    mocked_responses.get(
+        f"{FAKE_TARGET}wp-json/wp/v2/media?page=1&per_page=1", status=status
+    )
+
+    plan = estimate_download(_api(), ["users", "posts"], media_files=True)
+
+    assert [est.name for est in plan.types] == ["posts", "users"]
+    assert not plan.types[1].available
+    assert plan.types[1].entries == 0
+    assert plan.types[1].requests == 0
+    assert plan.media_files == 0
+    assert plan.requests == 10
+    assert "unavailable" in plan.format().splitlines()[2]
+
+
+def test_format():
+    plan = DownloadPlan(
+        types=[
+            TypeEstimate("posts", 95, 10, 95_000, 5),
+            TypeEstimate("tags", 0, 1, 0, 0.5),
+        ],
+        media_files=20,
+        seconds_per_media_file=1,
+    )
+
+    lines = plan.format().splitlines()
+    assert lines[0].split() == ["type", "entries", "requests", "size", "time"]
+    assert lines[1].split() == ["posts", "95", "10", "95.0", "kB", "0:00:05"]
+    assert lines[3].split() == ["media", "files", "20", "20", "unknown", "0:00:20"]
+    assert lines[4].split() == ["total", "31", "95.0", "kB", "0:00:26"]
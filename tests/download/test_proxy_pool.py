@@ -0,0 +1,111 @@
+import pytest
+import requests
+from wpextract.download.proxy_pool import ProxyPool
+
+PROXIES = ["http://proxy1:3128", "http://proxy2:3128", "http://proxy3:3128"]
+
+
+@pytest.fixture()
+def now(mocker):
+    clock = mocker.patch("wpextract.download.proxy_pool.time.monotonic")
+    clock.return_value = 1000.0
+    return clock
+
+
+def test_round_robin():
+    pool = ProxyPool(PROXIES)
+
+    assert [pool.choose() for _ in range(6)] == PROXIES * 2
+    assert pool.summary()[PROXIES[0]] == {
+        "requests": 2,
+        "failures": 0,
+        "healthy": True,
+    }
+
+
+def test_requires_proxy():
+    with pytest.raises(ValueError, match="At least one proxy"):
+        ProxyPool([])
+
+
+def test_failing_proxy_removed(now):
+    pool = ProxyPool(PROXIES, max_failures=2, cooldown=60)
+
+    pool.record_failure(PROXIES[1])
+    assert pool.is_healthy(PROXIES[1])
+    pool.record_failure(PROXIES[1])
+
+    assert not pool.is_healthy(PROXIES[1])
+    assert [pool.choose() for _ in range(4)] == [PROXIES[0], PROXIES[2]] * 2
+
+
+def test_success_resets_failures(now):
+    pool = ProxyPool(PROXIES, max_failures=2)
+
+    pool.record_failure(PROXIES[0])
+    pool.record_success(PROXIES[0])
+    pool.record_failure(PROXIES[0])
+
+    assert pool.is_healthy(PROXIES[0])
+    assert pool.stats[PROXIES[0]].failures == 2
+
+
+def test_cooldown(now):
+    pool = ProxyPool(PROXIES, max_failures=1, cooldown=60, max_cooldown=200)
+
+    pool.record_failure(PROXIES[0])
+    now.return_value += 60
+    assert pool.is_healthy(PROXIES[0])
+
+    # A further failure after returning doubles the cooldown
+    pool.record_failure(PROXIES[0])
+    now.return_value += 60
+    assert not pool.is_healthy(PROXIES[0])
+    now.return_value += 60
+    assert pool.is_healthy(PROXIES[0])
+
+    pool.record_failure(PROXIES[0])
+    assert pool.stats[PROXIES[0]].removed_until == now.return_value + 200
+
+
+def test_failures_while_removed(now):
+    pool = ProxyPool(PROXIES, max_failures=1, cooldown=60, max_cooldown=900)
+
+    pool.record_failure(PROXIES[0])
+    for _ in range(8):
+        now.return_value += 1
+        pool.record_failure(PROXIES[0])
+
+    assert pool.stats[PROXIES[0]].failures == 9
+    assert pool.stats[PROXIES[0]].removed_until == 1060.0
+
+    # Only a failure after the cooldown has passed doubles it
+    now.return_value = 1060.0
+    pool.record_failure(PROXIES[0])
+    assert pool.stats[PROXIES[0]].removed_until == 1060.0 + 120
+
+
+def test_all_removed(now):
+    pool = ProxyPool(PROXIES[:2], max_failures=1, cooldown=60)
+
+    pool.record_failure(PROXIES[0])
+    now.return_value += 10
+    pool.record_failure(PROXIES[1])
+
+    assert pool.choose() == PROXIES[0]
+
+
+def test_check(mocker, now):
+    def head(url, proxies, timeout, headers):
+        if proxies["https"] == PROXIES[1]:
+            raise requests.ConnectionError("Proxy refused")
+        return mocker.Mock(status_code=200)
+
+    head_mock = mocker.patch("requests.head", side_effect=head)
+    pool = ProxyPool(PROXIES)
+
+    healthy = pool.check("https://example.org/", headers={"User-Agent": "test"})
+
+    assert healthy == [PROXIES[0], PROXIES[2]]
+    assert not pool.is_healthy(PROXIES[1])
+    assert head_mock.call_args.kwargs["headers"] == {"User-Agent": "test"}
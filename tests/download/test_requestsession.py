@@ -1,11 +1,22 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 import pytest
+import requests
+import responses
 from responses import matchers
-from wpextract.download import RequestSession
+from wpextract.download import ProxyPool, RequestSession, ResponseArchive
+from wpextract.download.archive import INDEX_FILE_NAME
+from wpextract.download.hedging import HedgePolicy
 from wpextract.download.requestsession import (
+    HTTPError,
+    HTTPError400,
     HTTPError404,
     HTTPError500,
     HTTPTooManyRedirects,
 )
+from wpextract.download.scheduler import RequestScheduler
 
 
 def test_request_session_get(mocked_responses):
@@ -38,6 +49,17 @@ def test_no_retry_404_error(mocked_responses):
     mocked_responses.assert_call_count("https://example.org", 1)
 
 
+@pytest.mark.parametrize("status", [404, 410])
+def test_error_status_code(mocked_responses, status):
+    sess = RequestSession()
+    mocked_responses.get("https://example.org", status=status)
+
+    with pytest.raises(HTTPError) as exc_info:
+        sess.get("https://example.org")
+
+    assert exc_info.value.status_code == status
+
+
 def test_no_retries(mocked_responses, caplog):
     sess_no_retries = RequestSession(max_retries=0)
     mocked_responses.get("https://example.org/a", status=500)
@@ -76,21 +98,44 @@ def test_wait(mocked_responses, mocked_sleep):
     sess = RequestSession(wait=1)
     mocked_responses.get("https://example.org", body="Example response")
 
+    sess.get("https://example.org")
+    mocked_sleep.assert_not_called()
     sess.get("https://example.org")
 
-    mocked_sleep.assert_called_once_with(1)
+    mocked_sleep.assert_called_once()
+    assert mocked_sleep.call_args[0][0] == pytest.approx(1, abs=0.1)
 
 
 def test_rand_wait(mocked_responses, mocked_sleep):
     sess = RequestSession(wait=1, random_wait=True)
     mocked_responses.get("https://example.org", body="Example response")
     sess.get("https://example.org")
+    sess.get("https://example.org")
 
     mocked_sleep.assert_called_once()
-    assert mocked_sleep.call_args[0][0] >= 0.5
+    assert mocked_sleep.call_args[0][0] >= 0.4
     assert mocked_sleep.call_args[0][0] <= 1.5
 
 
+def test_wait_shared(mocked_responses):
+    sess = RequestSession(wait=0.05, single_flight=False)
+    starts = []
+
+    def callback(request):
+        starts.append(time.monotonic())
+        return 200, {}, "Example response"
+
+    mocked_responses.add_callback(responses.GET, "https://example.org/", callback)
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        list(executor.map(lambda _: sess.get("https://example.org/"), range(8)))
+
+    # Concurrent requests are spaced out as if made one at a time
+    # (threads may start slightly late, so the total time is checked rather than each gap)
+    starts.sort()
+    assert starts[-1] - starts[0] >= (len(starts) - 1) * 0.045
+
+
 def test_max_redirects(mocked_responses):
     for i in range(1, 5):
         mocked_responses.get(
@@ -116,3 +161,363 @@ def test_max_redirects_within_limit(mocked_responses):
     resp = sess.get("https://example.org/1")
     assert resp.status_code == 200
     assert resp.text == "Example response"
+
+
+def test_request_session_head(mocked_responses):
+    sess = RequestSession()
+    mocked_responses.head(
+        "https://example.org/1",
+        status=301,
+        headers={"Location": "https://example.org/2"},
+    )
+    mocked_responses.head("https://example.org/2")
+
+    resp = sess.head("https://example.org/1")
+    assert resp.status_code == 200
+    assert resp.url == "https://example.org/2"
+
+
+def test_head_bad_request(mocked_responses):
+    sess = RequestSession()
+    mocked_responses.head(
+        "https://example.org", status=400, content_type="application/json"
+    )
+
+    with pytest.raises(HTTPError400):
+        sess.head("https://example.org")
+
+
+def test_host_waits(mocked_responses, mocked_sleep):
+    sess = RequestSession(wait=2, host_waits={"CDN.example.org": 0.5})
+    mocked_responses.get("https://example.org/a", body="a")
+    mocked_responses.get("https://cdn.example.org/b.jpg", body="b")
+
+    sess.get("https://example.org/a")
+    sess.get("https://example.org/a")
+    assert mocked_sleep.call_args[0][0] == pytest.approx(2, abs=0.1)
+    mocked_sleep.reset_mock()
+    sess.do_request("get", "https://cdn.example.org/b.jpg", stream=True)
+    mocked_sleep.assert_not_called()
+    sess.do_request("get", "https://cdn.example.org/b.jpg", stream=True)
+    assert mocked_sleep.call_args[0][0] == pytest.approx(0.5, abs=0.1)
+
+    assert sess.waiter_for("https://example.org/c") is sess.waiter_for(
+        "http://example.org/d"
+    )
+    assert sess.waiter_for("http://cdn.example.org:8080/").wait_s == 0.5
+
+
+def test_host_waiters_default(mocked_responses):
+    sess = RequestSession(wait=0.2)
+    starts = []
+
+    def callback(request):
+        starts.append((request.url, time.monotonic()))
+        return 200, {}, "body"
+
+    for host in ["example.org", "cdn.example.org"]:
+        mocked_responses.add_callback(
+            responses.GET, f"https://{host}/a", callback=callback
+        )
+
+    sess.get("https://example.org/a")
+    sess.get("https://cdn.example.org/a")
+
+    # The CDN has its own default wait, so isn't held up by the request to the site
+    assert starts[1][1] - starts[0][1] < 0.1
+    assert sess.waiter_for("https://cdn.example.org/").wait_s == 0.2
+    assert sess.waiter_for("https://cdn.example.org/") is not sess.waiter_for(
+        "https://example.org/"
+    )
+
+
+def test_metrics(mocked_responses, mocked_sleep):
+    sess = RequestSession(wait=1, max_retries=0)
+    mocked_responses.get(
+        "https://example.org/wp-json/wp/v2/posts?page=1",
+        body="Example response",
+        headers={"X-WP-TotalPages": "3"},
+    )
+    mocked_responses.get("https://example.org/wp-json/wp/v2/posts/1", status=500)
+
+    sess.get("https://example.org/wp-json/wp/v2/posts?page=1")
+    with pytest.raises(HTTPError500):
+        sess.get("https://example.org/wp-json/wp/v2/posts/1")
+
+    summary = sess.metrics.summary()
+    posts = summary["endpoints"]["example.org/wp-json/wp/v2/posts"]
+    assert posts["requests"] == 1
+    assert posts["bytes"] == len("Example response")
+    assert posts["statuses"] == {"200": 1}
+    assert posts["wait_s"] == 0
+    assert posts["eta_s"] is not None
+
+    post = summary["endpoints"]["example.org/wp-json/wp/v2/posts/{id}"]
+    assert post["failures"] == 1
+    # Waited before the second request
+    assert post["wait_s"] == pytest.approx(1, abs=0.1)
+    assert post["statuses"] == {"500": 1}
+
+
+def test_metrics_connection_error(mocked_responses):
+    sess = RequestSession(max_retries=0)
+    mocked_responses.get("https://example.org", body=ConnectionError())
+
+    with pytest.raises(ConnectionError):
+        sess.get("https://example.org")
+
+    assert sess.metrics.summary()["endpoints"]["example.org/"]["statuses"] == {
+        "error": 1
+    }
+
+
+def test_scheduler(mocked_responses, mocker):
+    scheduler = mocker.MagicMock()
+    sess = RequestSession(scheduler=scheduler)
+    mocked_responses.get("https://example.org", body="Example response")
+
+    sess.get("https://example.org")
+
+    scheduler.slot.assert_called_once_with(sess, "https://example.org")
+
+
+class TestHedging:
+    URL = "https://example.org/wp-json/wp/v2/posts?page=1"
+
+    @pytest.fixture()
+    def released(self):
+        released = threading.Event()
+        yield released
+        released.set()
+
+    @pytest.fixture()
+    def stalled(self, mocked_responses, released):
+        # The first request stalls until released by the test
+        calls = []
+
+        def callback(request):
+            calls.append(request)
+            if len(calls) == 1:
+                released.wait(timeout=0.3)
+                return 200, {}, "slow"
+            return 200, {}, "fast"
+
+        mocked_responses.add_callback("GET", self.URL, callback=callback)
+        return calls
+
+    def _session(self, budget, **kwargs):
+        sess = RequestSession(
+            hedge=HedgePolicy(budget=budget, burst=1, min_samples=5, min_delay=0),
+            **kwargs,
+        )
+        for _ in range(5):
+            sess.metrics.record(self.URL, 200, 0.05)
+        return sess
+
+    def test_hedge_wins(self, stalled):
+        sess = self._session(budget=1)
+
+        assert sess.get(self.URL).text == "fast"
+        assert len(stalled) == 2
+        posts = sess.metrics.summary()["endpoints"]["example.org/wp-json/wp/v2/posts"]
+        assert posts["hedges"] == 1
+        assert posts["hedge_wins"] == 1
+
+    def test_hedge_archives_winner(self, stalled, released, tmp_path):
+        archive = ResponseArchive(tmp_path / "archive")
+        sess = self._session(budget=1, archive=archive)
+
+        assert sess.get(self.URL).text == "fast"
+        released.set()
+        # Wait for the losing request to finish
+        time.sleep(0.1)
+
+        index = (tmp_path / "archive" / INDEX_FILE_NAME).read_text().splitlines()
+        assert len(index) == 1
+        assert archive.get("GET", self.URL).body == b"fast"
+
+    def test_hedge_takes_slot(self, stalled):
+        scheduler = RequestScheduler(concurrency=2, per_host=2)
+        sess = self._session(budget=1, scheduler=scheduler)
+
+        assert sess.get(self.URL).text == "fast"
+        assert len(stalled) == 2
+
+    def test_hedge_needs_slot(self, stalled):
+        scheduler = RequestScheduler(concurrency=2, per_host=1)
+        sess = self._session(budget=1, scheduler=scheduler)
+
+        assert sess.get(self.URL).text == "slow"
+        assert len(stalled) == 1
+        # The hedge wasn't made, so the budget wasn't spent
+        assert sess.hedge.hedges == 0
+
+    def test_budget_exhausted(self, stalled):
+        sess = self._session(budget=0)
+
+        assert sess.get(self.URL).text == "slow"
+        assert len(stalled) == 1
+
+    def test_stream_not_hedged(self, stalled):
+        sess = self._session(budget=1)
+
+        assert sess.do_request("get", self.URL, stream=True).text == "slow"
+        assert len(stalled) == 1
+
+    def test_error_before_delay(self, mocked_responses):
+        calls = []
+
+        def callback(request):
+            calls.append(request)
+            if len(calls) == 1:
+                raise ConnectionError
+            return 200, {}, "fast"
+
+        mocked_responses.add_callback("GET", self.URL, callback=callback)
+        sess = self._session(budget=1)
+        sess.hedge.min_delay = 0.5
+
+        # The original request fails before the hedge delay, so is not hedged
+        with pytest.raises(ConnectionError):
+            sess.get(self.URL)
+        assert len(calls) == 1
+
+
+class TestSingleFlight:
+    URL = "https://example.org/wp-json/wp/v2/media/1"
+
+    @pytest.fixture()
+    def released(self):
+        released = threading.Event()
+        yield released
+        released.set()
+
+    def _concurrent_get(self, sess, released, n=3):
+        results = [None] * n
+
+        def get(idx):
+            try:
+                results[idx] = sess.get(self.URL)
+            except Exception as e:
+                results[idx] = e
+
+        threads = [threading.Thread(target=get, args=(i,)) for i in range(n)]
+        for thread in threads:
+            thread.start()
+        # Release the request once the other threads are waiting for it
+        endpoint = "example.org/wp-json/wp/v2/media/{id}"
+        while sess.metrics.endpoints.get(endpoint) is None or (
+            sess.metrics.endpoints[endpoint].coalesced < n - 1
+        ):
+            released.wait(0.01)
+        released.set()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def test_coalesced(self, mocked_responses, released):
+        mocked_responses.add_callback(
+            "GET",
+            self.URL,
+            callback=lambda request: released.wait(1) and (200, {}, "media"),
+        )
+        sess = RequestSession()
+
+        results = self._concurrent_get(sess, released)
+
+        assert [r.text for r in results] == ["media"] * 3
+        mocked_responses.assert_call_count(self.URL, 1)
+        assert sess.metrics.summary()["requests"] == 1
+
+    def test_coalesced_error(self, mocked_responses, released):
+        mocked_responses.add_callback(
+            "GET",
+            self.URL,
+            callback=lambda request: released.wait(1) and (404, {}, ""),
+        )
+        sess = RequestSession()
+
+        results = self._concurrent_get(sess, released)
+
+        assert all(isinstance(r, HTTPError404) for r in results)
+        mocked_responses.assert_call_count(self.URL, 1)
+
+    def test_sequential_not_coalesced(self, mocked_responses):
+        mocked_responses.get(self.URL, body="media")
+        sess = RequestSession()
+
+        sess.get(self.URL)
+        sess.get(self.URL)
+
+        mocked_responses.assert_call_count(self.URL, 2)
+
+    def test_disabled(self, mocked_responses):
+        # Only responds once all three requests are in progress
+        barrier = threading.Barrier(3, timeout=1)
+        mocked_responses.add_callback(
+            "GET",
+            self.URL,
+            callback=lambda request: (barrier.wait() or True) and (200, {}, "media"),
+        )
+        sess = RequestSession(single_flight=False)
+
+        threads = [
+            threading.Thread(target=sess.get, args=(self.URL,)) for _ in range(3)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        mocked_responses.assert_call_count(self.URL, 3)
+
+
+class TestProxies:
+    def test_set_proxy(self):
+        sess = RequestSession(proxy="https://proxy:3128")
+
+        assert sess.s.proxies == {
+            "http": "https://proxy:3128",
+            "https": "https://proxy:3128",
+        }
+
+    def test_pool_rotation(self, mocked_responses):
+        pool = ProxyPool(["http://proxy1:3128", "http://proxy2:3128"])
+        sess = RequestSession(proxy_pool=pool)
+        mocked_responses.get("https://example.org")
+
+        for _ in range(4):
+            sess.get("https://example.org")
+
+        used = [
+            call.request.req_kwargs["proxies"]["https"]
+            for call in mocked_responses.calls
+        ]
+        assert used == ["http://proxy1:3128", "http://proxy2:3128"] * 2
+
+    def test_pool_failure(self, mocked_responses):
+        pool = ProxyPool(["http://proxy1:3128", "http://proxy2:3128"], max_failures=1)
+        sess = RequestSession(proxy_pool=pool, max_retries=0)
+        mocked_responses.get(
+            "https://example.org", body=requests.exceptions.ProxyError("refused")
+        )
+
+        with pytest.raises(requests.exceptions.ProxyError):
+            sess.get("https://example.org")
+
+        assert not pool.is_healthy("http://proxy1:3128")
+        assert pool.is_healthy("http://proxy2:3128")
+
+    def test_check_proxies(self, mocker):
+        pool = ProxyPool(["http://proxy1:3128"])
+        check = mocker.patch.object(pool, "check", return_value=["http://proxy1:3128"])
+        sess = RequestSession(proxy_pool=pool, user_agent="test", timeout=5)
+
+        assert sess.check_proxies("https://example.org") == ["http://proxy1:3128"]
+        check.assert_called_once_with(
+            "https://example.org", timeout=5, headers={"User-Agent": "test"}
+        )
+
+    def test_check_proxies_no_pool(self):
+        with pytest.raises(ValueError, match="proxy pool"):
+            RequestSession().check_proxies("https://example.org")
@@ -0,0 +1,102 @@
+import threading
+import time
+
+from wpextract.download.scheduler import RequestScheduler
+
+
+def _run_concurrently(scheduler, requests, hold=0.05):
+    lock = threading.Lock()
+    state = {"current": 0, "max": 0, "hosts": {}, "max_host": 0}
+
+    def make_request(owner, url):
+        with scheduler.slot(owner, url):
+            with lock:
+                state["current"] += 1
+                state["max"] = max(state["max"], state["current"])
+                host = url.split("/")[2]
+                state["hosts"][host] = state["hosts"].get(host, 0) + 1
+                state["max_host"] = max(state["max_host"], state["hosts"][host])
+            time.sleep(hold)
+            with lock:
+                state["current"] -= 1
+                state["hosts"][host] -= 1
+
+    threads = [
+        threading.Thread(target=make_request, args=request) for request in requests
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return state
+
+
+def test_concurrency_limit():
+    scheduler = RequestScheduler(concurrency=2, per_host=10)
+    state = _run_concurrently(
+        scheduler, [(f"site{n}", f"https://site{n}.org/") for n in range(6)]
+    )
+
+    assert state["max"] == 2
+
+
+def test_per_host_limit():
+    scheduler = RequestScheduler(concurrency=10, per_host=1)
+    state = _run_concurrently(
+        scheduler, [(f"site{n}", "https://example.org/") for n in range(4)]
+    )
+
+    assert state["max_host"] == 1
+
+
+def test_host_interval():
+    scheduler = RequestScheduler(concurrency=10, per_host=10, host_interval=0.1)
+    start = time.monotonic()
+    _run_concurrently(
+        scheduler, [(f"site{n}", "https://example.org/") for n in range(3)], hold=0
+    )
+
+    assert time.monotonic() - start >= 0.2
+
+
+def test_try_acquire():
+    scheduler = RequestScheduler(concurrency=2, per_host=1)
+
+    assert scheduler.try_acquire("a", "https://example.org/")
+    assert not scheduler.try_acquire("a", "https://example.org/")
+    assert scheduler.try_acquire("a", "https://example.com/")
+    assert not scheduler.try_acquire("a", "https://example.net/")
+
+    scheduler.release("https://example.org/")
+    assert scheduler.try_acquire("a", "https://example.org/")
+
+
+def _wait_for_waiting(scheduler, n):
+    while len(scheduler._waiting) < n:
+        time.sleep(0.001)
+
+
+def test_fair_order():
+    scheduler = RequestScheduler(concurrency=1, per_host=10)
+    order = []
+
+    # Site A has made a request before, site B has not
+    with scheduler.slot("A", "https://a.org/"):
+        pass
+
+    def make_request(owner, url):
+        with scheduler.slot(owner, url):
+            order.append(owner)
+
+    scheduler.acquire("C", "https://c.org/")
+    thread_a = threading.Thread(target=make_request, args=("A", "https://a.org/"))
+    thread_a.start()
+    _wait_for_waiting(scheduler, 1)
+    thread_b = threading.Thread(target=make_request, args=("B", "https://b.org/"))
+    thread_b.start()
+    _wait_for_waiting(scheduler, 2)
+    scheduler.release("https://c.org/")
+    thread_a.join()
+    thread_b.join()
+
+    assert order == ["B", "A"]
@@ -0,0 +1,93 @@
+import pytest
+from wpextract.download import RequestSession
+from wpextract.download.sitemap import SitemapUrl, parse_lastmod, read_sitemaps
+
+FAKE_TARGET = "https://example.org/"
+
+
+def _mock_sitemap(mocked_responses, datadir, name):
+    mocked_responses.get(
+        FAKE_TARGET + name,
+        body=(datadir / name).read_text(),
+        content_type="application/xml",
+    )
+
+
+def test_read_core_sitemaps(mocked_responses, datadir):
+    for name in [
+        "wp-sitemap.xml",
+        "wp-sitemap-posts-post-1.xml",
+        "wp-sitemap-posts-page-1.xml",
+    ]:
+        _mock_sitemap(mocked_responses, datadir, name)
+
+    urls = read_sitemaps(RequestSession(), FAKE_TARGET, ["posts", "pages"])
+
+    assert urls[0] == SitemapUrl(
+        loc="https://example.org/2024/01/first-post/",
+        type_name="posts",
+        lastmod="2024-01-04T10:00:00",
+    )
+    assert urls[1].lastmod == "2024-01-02T00:00:00"
+    assert urls[3].lastmod is None
+    assert [url.type_name for url in urls] == ["posts"] * 4 + ["pages"]
+
+
+def test_read_only_requested_types(mocked_responses, datadir):
+    for name in ["wp-sitemap.xml", "wp-sitemap-posts-page-1.xml"]:
+        _mock_sitemap(mocked_responses, datadir, name)
+
+    urls = read_sitemaps(RequestSession(), FAKE_TARGET, ["pages"])
+
+    assert [url.loc for url in urls] == ["https://example.org/about/"]
+
+
+def test_read_yoast_sitemaps(mocked_responses, datadir):
+    mocked_responses.get(FAKE_TARGET + "wp-sitemap.xml", status=404)
+    _mock_sitemap(mocked_responses, datadir, "sitemap_index.xml")
+    mocked_responses.get(
+        FAKE_TARGET + "post-sitemap.xml",
+        body=(datadir / "wp-sitemap-posts-post-1.xml").read_text(),
+    )
+    mocked_responses.get(FAKE_TARGET + "post-sitemap2.xml", body="not xml")
+
+    urls = read_sitemaps(RequestSession(), FAKE_TARGET, ["posts"])
+
+    assert len(urls) == 4
+
+
+def test_no_sitemaps(mocked_responses):
+    mocked_responses.get(FAKE_TARGET + "wp-sitemap.xml", status=404)
+    mocked_responses.get(FAKE_TARGET + "sitemap_index.xml", body="<html></html>")
+
+    assert read_sitemaps(RequestSession(), FAKE_TARGET, ["posts"]) is None
+
+
+@pytest.mark.parametrize(
+    ("lastmod", "expected"),
+    [
+        ("2024-01-01T12:00:00+00:00", "2024-01-01T12:00:00"),
+        ("2024-01-01T12:00:00Z", "2024-01-01T12:00:00"),
+        ("2024-01-01T12:00:00.123+02:00", "2024-01-01T10:00:00"),
+        ("2024-01-01", "2024-01-01T00:00:00"),
+        ("yesterday", None),
+    ],
+)
+def test_parse_lastmod(lastmod, expected):
+    assert parse_lastmod(lastmod) == expected
+
+
+@pytest.mark.parametrize(
+    ("loc", "type_name", "expected_id", "expected_slug"),
+    [
+        ("https://example.org/2024/01/My-Post/", "posts", None, "my-post"),
+        ("https://example.org/?p=12", "posts", 12, None),
+        ("https://example.org/?page_id=5", "pages", 5, None),
+        ("https://example.org/parent/caf%C3%A9", "pages", None, "café"),
+    ],
+)
+def test_sitemap_url(loc, type_name, expected_id, expected_slug):
+    url = SitemapUrl(loc=loc, type_name=type_name)
+
+    assert url.object_id() == expected_id
+    assert url.slug() == expected_slug
@@ -0,0 +1,301 @@
+import json
+import logging
+
+import pytest
+from wpextract.download import RequestSession
+from wpextract.download.sync import SiteSync
+from wpextract.download.wpapi import WPApi
+
+FAKE_TARGET = "https://example.org/"
+
+
+def _list_url(page, per_page=2):
+    return (
+        f"{FAKE_TARGET}wp-json/wp/v2/posts?page={page}"
+        f"&orderby=modified&order=desc&per_page={per_page}"
+    )
+
+
+def _post(idx, date, modified, title="Post", slug=None):
+    return {
+        "id": idx,
+        "date": date,
+        "modified_gmt": modified,
+        "link": f"{FAKE_TARGET}{slug or f'post-{idx}'}/",
+        "title": {"rendered": title},
+        "content": {"rendered": ""},
+        "excerpt": {"rendered": ""},
+    }
+
+
+SITEMAP_INDEX = """<?xml version="1.0" encoding="UTF-8"?>
+<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+  <sitemap><loc>https://example.org/wp-sitemap-posts-post-1.xml</loc></sitemap>
+</sitemapindex>
+"""
+
+SITEMAP = """<?xml version="1.0" encoding="UTF-8"?>
+<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+  <url>
+    <loc>https://example.org/post-1/</loc>
+    <lastmod>2024-01-04T00:00:00+00:00</lastmod>
+  </url>
+  <url>
+    <loc>https://example.org/post-2</loc>
+    <lastmod>2024-01-02T00:00:00+00:00</lastmod>
+  </url>
+  <url>
+    <loc>https://example.org/new-post/</loc>
+    <lastmod>2024-01-05T00:00:00+00:00</lastmod>
+  </url>
+</urlset>
+"""
+
+
+@pytest.fixture()
+def site_sync(tmp_path):
+    def make_sync(sitemap=False):
+        api = WPApi(FAKE_TARGET, session=RequestSession())
+        return SiteSync(api, tmp_path, ["posts"], per_page=2, sitemap=sitemap)
+
+    return make_sync
+
+
+def _write_posts(path, posts):
+    (path / "posts.json").write_text(json.dumps(posts))
+
+
+def _read_posts(path):
+    return json.loads((path / "posts.json").read_text())
+
+
+def test_poll_changes(mocked_responses, tmp_path, site_sync):
+    _write_posts(
+        tmp_path,
+        [
+            _post(2, "2024-01-02T00:00:00", "2024-01-02T00:00:00"),
+            _post(1, "2024-01-01T00:00:00", "2024-01-01T00:00:00"),
+        ],
+    )
+    mocked_responses.get(
+        _list_url(1),
+        json=[
+            _post(3, "2024-01-03T00:00:00", "2024-01-05T00:00:00", "New &amp; post"),
+            _post(1, "2024-01-01T00:00:00", "2024-01-04T00:00:00", "Changed"),
+        ],
+        headers={"X-WP-TotalPages": "2"},
+    )
+    mocked_responses.get(
+        _list_url(2),
+        json=[
+            _post(2, "2024-01-02T00:00:00", "2024-01-02T00:00:00"),
+            _post(4, "2023-12-01T00:00:00", "2023-12-01T00:00:00"),
+        ],
+        headers={"X-WP-TotalPages": "2"},
+    )
+
+    sync = site_sync()
+    assert sync.latest_modified("posts") == "2024-01-02T00:00:00"
+    assert sync.poll() == {"posts": 2}
+
+    posts = _read_posts(tmp_path)
+    assert [post["id"] for post in posts] == [3, 2, 1]
+    assert posts[0]["title"]["rendered"] == "New & post"
+    assert posts[2]["title"]["rendered"] == "Changed"
+
+    state = json.loads((tmp_path / "sync.json").read_text())
+    assert state["posts"]["modified_gmt"] == "2024-01-05T00:00:00"
+    assert site_sync().latest_modified("posts") == "2024-01-05T00:00:00"
+
+
+def test_poll_no_changes(mocked_responses, tmp_path, site_sync):
+    _write_posts(tmp_path, [_post(1, "2024-01-01T00:00:00", "2024-01-01T00:00:00")])
+    mocked_responses.get(
+        _list_url(1),
+        json=[_post(1, "2024-01-01T00:00:00", "2024-01-01T00:00:00")],
+        headers={"X-WP-TotalPages": "1"},
+    )
+
+    assert site_sync().poll() == {"posts": 0}
+    assert len(_read_posts(tmp_path)) == 1
+
+
+def test_poll_passthrough(mocked_responses, tmp_path, site_sync):
+    # One page of the API response per line, with a duplicate from a retried page
+    (tmp_path / "posts.jsonl").write_text(
+        json.dumps(
+            [
+                _post(3, "2024-01-03T00:00:00", "2024-01-03T00:00:00", "A &amp; B"),
+                _post(2, "2024-01-02T00:00:00", "2024-01-02T00:00:00"),
+            ]
+        )
+        + "\n"
+        + json.dumps(
+            [
+                _post(2, "2024-01-02T00:00:00", "2024-01-02T00:00:00"),
+                _post(1, "2024-01-01T00:00:00", "2024-01-01T00:00:00"),
+            ]
+        )
+        + "\n"
+    )
+    mocked_responses.get(
+        _list_url(1),
+        json=[
+            _post(1, "2024-01-01T00:00:00", "2024-01-04T00:00:00", "Changed"),
+            _post(3, "2024-01-03T00:00:00", "2024-01-03T00:00:00", "A &amp; B"),
+        ],
+        headers={"X-WP-TotalPages": "1"},
+    )
+
+    sync = site_sync()
+    assert sync.latest_modified("posts") == "2024-01-03T00:00:00"
+    assert sync.poll() == {"posts": 1}
+
+    posts = _read_posts(tmp_path)
+    assert [post["id"] for post in posts] == [3, 2, 1]
+    assert posts[0]["title"]["rendered"] == "A & B"
+    assert posts[2]["title"]["rendered"] == "Changed"
+
+
+def test_poll_empty_then_published(mocked_responses, tmp_path, site_sync):
+    mocked_responses.get(_list_url(1), json=[], headers={"X-WP-TotalPages": "0"})
+    mocked_responses.get(
+        _list_url(1),
+        json=[_post(1, "2024-01-01T00:00:00", "2024-01-01T00:00:00")],
+        headers={"X-WP-TotalPages": "1"},
+    )
+
+    assert site_sync().poll() == {"posts": 0}
+    state = json.loads((tmp_path / "sync.json").read_text())
+    assert state["posts"]["modified_gmt"] is None
+
+    # A new sync, reading the state of the empty poll
+    sync = site_sync()
+    assert sync.latest_modified("posts") is None
+    assert sync.poll() == {"posts": 1}
+    assert [post["id"] for post in _read_posts(tmp_path)] == [1]
+
+
+def test_poll_without_download(mocked_responses, tmp_path, site_sync):
+    for page in [1, 2]:
+        mocked_responses.get(
+            _list_url(page),
+            json=[
+                _post(idx, "2024-01-01T00:00:00", f"2024-01-0{idx}T00:00:00")
+                for idx in [5 - page * 2, 4 - page * 2]
+            ],
+            headers={"X-WP-TotalPages": "3"},
+        )
+    mocked_responses.get(
+        _list_url(3),
+        status=400,
+        json={"code": "rest_post_invalid_page_number"},
+    )
+
+    assert site_sync().poll() == {"posts": 4}
+    assert len(_read_posts(tmp_path)) == 4
+
+
+def test_poll_sitemap(mocked_responses, tmp_path, site_sync):
+    _write_posts(
+        tmp_path,
+        [
+            _post(2, "2024-01-02T00:00:00", "2024-01-02T00:00:00"),
+            _post(1, "2024-01-01T00:00:00", "2024-01-01T00:00:00"),
+        ],
+    )
+    mocked_responses.get(f"{FAKE_TARGET}wp-sitemap.xml", body=SITEMAP_INDEX)
+    mocked_responses.get(f"{FAKE_TARGET}wp-sitemap-posts-post-1.xml", body=SITEMAP)
+    mocked_responses.get(
+        f"{FAKE_TARGET}wp-json/wp/v2/posts?page=1&include=1&per_page=1",
+        json=[_post(1, "2024-01-01T00:00:00", "2024-01-04T00:00:00", "Changed")],
+    )
+    mocked_responses.get(
+        f"{FAKE_TARGET}wp-json/wp/v2/posts?page=1&slug=new-post&per_page=1",
+        json=[_post(3, "2024-01-03T00:00:00", "2024-01-05T00:00:00", slug="new-post")],
+    )
+
+    sync = site_sync(sitemap=True)
+    assert sync.poll() == {"posts": 2}
+    assert sync.sitemap_counts == {"posts": 3}
+
+    posts = _read_posts(tmp_path)
+    assert [post["id"] for post in posts] == [3, 2, 1]
+    assert posts[2]["title"]["rendered"] == "Changed"
+
+
+def _unresolved_sitemap(lastmod):
+    return f"""<?xml version="1.0" encoding="UTF-8"?>
+<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+  <url>
+    <loc>https://example.org/2024/01/123.html</loc>
+    <lastmod>{lastmod}</lastmod>
+  </url>
+</urlset>
+"""
+
+
+def test_poll_sitemap_unresolved(mocked_responses, tmp_path, site_sync, caplog):
+    mocked_responses.get(f"{FAKE_TARGET}wp-sitemap.xml", body=SITEMAP_INDEX)
+    sitemap_url = f"{FAKE_TARGET}wp-sitemap-posts-post-1.xml"
+    # Registered responses are returned in turn
+    mocked_responses.get(sitemap_url, body=_unresolved_sitemap("2024-01-01"))
+    mocked_responses.get(sitemap_url, body=_unresolved_sitemap("2024-01-01"))
+    mocked_responses.get(sitemap_url, body=_unresolved_sitemap("2024-01-02"))
+    slug_resp = mocked_responses.get(
+        f"{FAKE_TARGET}wp-json/wp/v2/posts?page=1&slug=123.html&per_page=1",
+        json=[],
+    )
+
+    sync = site_sync(sitemap=True)
+    with caplog.at_level(logging.INFO):
+        assert sync.poll() == {"posts": 0}
+    assert slug_resp.call_count == 1
+    assert "1 posts URLs in the sitemaps could not be resolved" in caplog.text
+
+    # Not looked up again until the lastmod changes
+    assert sync.poll() == {"posts": 0}
+    assert slug_resp.call_count == 1
+    assert sync.poll() == {"posts": 0}
+    assert slug_resp.call_count == 2
+
+
+def test_poll_sitemap_fallback(mocked_responses, tmp_path, site_sync, caplog):
+    mocked_responses.get(f"{FAKE_TARGET}wp-sitemap.xml", status=404)
+    mocked_responses.get(f"{FAKE_TARGET}sitemap_index.xml", status=404)
+    mocked_responses.get(
+        _list_url(1),
+        json=[_post(1, "2024-01-01T00:00:00", "2024-01-01T00:00:00")],
+        headers={"X-WP-TotalPages": "1"},
+    )
+
+    assert site_sync(sitemap=True).poll() == {"posts": 1}
+    assert "No sitemaps found" in caplog.text
+
+
+def test_unsupported_type(tmp_path):
+    with pytest.raises(ValueError, match="Cannot sync types: users"):
+        SiteSync(WPApi(FAKE_TARGET), tmp_path, ["posts", "users"])
+
+
+def test_run_backoff(mocker, tmp_path, site_sync):
+    sleep = mocker.patch("wpextract.download.sync.time.sleep")
+    sync = site_sync()
+    sync.poll = mocker.Mock(
+        side_effect=[{"posts": 0}, {"posts": 0}, {"posts": 0}, {"posts": 1}, {}]
+    )
+
+    sync.run(10, max_interval=30, max_polls=5)
+
+    assert [call.args[0] for call in sleep.call_args_list] == [20, 30, 30, 10]
+
+
+def test_run_error(mocker, tmp_path, site_sync, caplog):
+    mocker.patch("wpextract.download.sync.time.sleep")
+    sync = site_sync()
+    sync.poll = mocker.Mock(side_effect=[ConnectionError, {"posts": 1}])
+
+    sync.run(10, max_polls=2)
+
+    assert sync.poll.call_count == 2
+    assert "Error while polling" in caplog.text
@@ -0,0 +1,119 @@
+import json
+
+import pytest
+from wpextract.download.telemetry import RequestMetrics, endpoint_name
+
+
+@pytest.mark.parametrize(
+    ("url", "expected"),
+    [
+        ("https://example.org/wp-json/", "example.org/wp-json"),
+        (
+            "https://example.org/wp-json/wp/v2/posts?page=2&per_page=10",
+            "example.org/wp-json/wp/v2/posts",
+        ),
+        (
+            "https://example.org/wp-json/wp/v2/media/123",
+            "example.org/wp-json/wp/v2/media/{id}",
+        ),
+        (
+            "https://cdn.example.org/wp-content/uploads/2024/01/image.jpg",
+            "cdn.example.org/wp-content/uploads",
+        ),
+        ("https://example.org", "example.org/"),
+    ],
+)
+def test_endpoint_name(url, expected):
+    assert endpoint_name(url) == expected
+
+
+def test_record():
+    metrics = RequestMetrics()
+    metrics.record("https://example.org/wp-json/wp/v2/posts?page=1", 200, 0.2, 0, 100)
+    metrics.record("https://example.org/wp-json/wp/v2/posts?page=2", 200, 0.4, 2, 50)
+    metrics.record("https://example.org/wp-json/wp/v2/posts?page=3", None, 1.5)
+    metrics.record_wait("https://example.org/wp-json/wp/v2/posts?page=1", 1)
+
+    summary = metrics.summary()
+    assert summary["requests"] == 3
+    assert summary["failures"] == 1
+    assert summary["bytes"] == 150
+
+    stats = summary["endpoints"]["example.org/wp-json/wp/v2/posts"]
+    assert stats["retries"] == 2
+    assert stats["statuses"] == {"200": 2, "error": 1}
+    assert stats["wait_s"] == 1
+    assert stats["latency_s"]["sum"] == pytest.approx(2.1)
+    assert stats["latency_s"]["max"] == 1.5
+    assert stats["latency_s"]["p50"] == 0.4
+    assert stats["latency_s"]["buckets"]["0.25"] == 1
+    assert stats["latency_s"]["buckets"]["0.5"] == 2
+    assert stats["latency_s"]["buckets"]["+Inf"] == 3
+    assert stats["eta_s"] is None
+
+
+def test_eta():
+    metrics = RequestMetrics()
+    url = "https://example.org/wp-json/wp/v2/posts?page=%d"
+    metrics.record(url % 1, 200, 0.5, total_pages=10)
+    metrics.record(url % 2, 200, 0.5, total_pages=10)
+    metrics.record_wait(url % 2, 1)
+
+    stats = metrics.summary()["endpoints"]["example.org/wp-json/wp/v2/posts"]
+    # 8 pages remaining at an average of 1 second per page
+    assert stats["eta_s"] == pytest.approx(8)
+
+
+def test_latency_percentile():
+    metrics = RequestMetrics()
+    assert metrics.latency_percentile("https://example.org/a", 95) is None
+
+    for i in range(1, 101):
+        metrics.record(f"https://example.org/a?page={i}", 200, i / 100)
+
+    assert metrics.latency_percentile("https://example.org/a", 95) == 0.95
+    assert (
+        metrics.latency_percentile("https://example.org/a", 95, min_samples=200) is None
+    )
+
+
+def test_record_hedge():
+    metrics = RequestMetrics()
+    metrics.record_hedge("https://example.org/a", won=True)
+    metrics.record_hedge("https://example.org/a", won=False)
+
+    stats = metrics.summary()["endpoints"]["example.org/a"]
+    assert stats["hedges"] == 2
+    assert stats["hedge_wins"] == 1
+    assert (
+        'wpextract_hedges_total{endpoint="example.org/a"} 2' in metrics.to_openmetrics()
+    )
+
+
+def test_write_json(tmp_path):
+    metrics = RequestMetrics()
+    metrics.record("https://example.org/wp-json/", 200, 0.1, n_bytes=10)
+
+    metrics.write(tmp_path / "metrics.json")
+
+    written = json.loads((tmp_path / "metrics.json").read_text())
+    assert written["requests"] == 1
+    assert written["endpoints"]["example.org/wp-json"]["bytes"] == 10
+
+
+def test_write_openmetrics(tmp_path):
+    metrics = RequestMetrics()
+    metrics.record("https://example.org/wp-json/", 200, 0.1, n_bytes=10)
+    metrics.record("https://example.org/wp-json/", 404, 0.3)
+
+    metrics.write(tmp_path / "metrics.txt")
+
+    lines = (tmp_path / "metrics.txt").read_text().splitlines()
+    label = 'endpoint="example.org/wp-json"'
+    assert "# TYPE wpextract_request_duration_seconds histogram" in lines
+    assert f'wpextract_request_duration_seconds_bucket{{{label},le="0.1"}} 1' in lines
+    assert f'wpextract_request_duration_seconds_bucket{{{label},le="+Inf"}} 2' in lines
+    assert f"wpextract_request_duration_seconds_count{{{label}}} 2" in lines
+    assert f'wpextract_requests_total{{{label},status="404"}} 1' in lines
+    assert f"wpextract_response_bytes_total{{{label}}} 10" in lines
+    assert lines[-1] == "# EOF"
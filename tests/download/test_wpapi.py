@@ -1,10 +1,22 @@
 import json
+import math
+from datetime import datetime, timedelta
+from urllib.parse import parse_qsl, urlsplit
 
 import pytest
+import responses
 from responses import matchers
 from wpextract.download.exceptions import NoWordpressApi
+from wpextract.download.filters import DownloadFilter
 from wpextract.download.requestsession import HTTPError
-from wpextract.download.wpapi import WPApi
+from wpextract.download.utils import passthrough_segment
+from wpextract.download.wpapi import (
+    BASIC_INFO_FIELDS,
+    WP_DATE_FORMAT,
+    WPApi,
+    shard_page_range,
+    split_date_range,
+)
 
 FAKE_TARGET = "https://example.org"
 WP_POSTS_ENDPOINT = f"{FAKE_TARGET}/wp-json/wp/v2/posts"
@@ -90,6 +102,77 @@ class TestBasicInfo:
         with pytest.raises(NoWordpressApi):
             wpapi.get_basic_info()
 
+    def test_fast_probe(self, mock_api_root, mocked_responses):
+        fields = {key: mock_api_root[key] for key in BASIC_INFO_FIELDS}
+        mocked_responses.get(
+            f"{FAKE_TARGET}/wp-json",
+            match=[
+                matchers.query_param_matcher({"_fields": "name,description,namespaces"})
+            ],
+            json=fields,
+        )
+        wpapi = WPApi(target=FAKE_TARGET, fast_probe=True)
+        wpapi.get_basic_info()
+
+        assert wpapi.name == "Example WordPress Site"
+        assert wpapi.has_v2 is True
+        assert "routes" not in wpapi.basic_info
+
+    def test_fast_probe_rest_route(self, mock_api_root, mocked_responses):
+        fields = {key: mock_api_root[key] for key in BASIC_INFO_FIELDS}
+        mocked_responses.get(
+            f"{FAKE_TARGET}/",
+            match=[
+                matchers.query_param_matcher(
+                    {"rest_route": "/", "_fields": "name,description,namespaces"}
+                )
+            ],
+            json=fields,
+        )
+        wpapi = WPApi(target=FAKE_TARGET, api_path="?rest_route=/", fast_probe=True)
+        wpapi.get_basic_info()
+
+        assert wpapi.name == "Example WordPress Site"
+
+
+class TestRoutes:
+    def test_routes(self, mock_api_root, mocked_responses):
+        index = mocked_responses.get(f"{FAKE_TARGET}/wp-json", json=mock_api_root)
+        wpapi = WPApi(target=FAKE_TARGET)
+
+        assert wpapi.get_routes() == mock_api_root["routes"]
+        assert wpapi.get_routes() == mock_api_root["routes"]
+        assert index.call_count == 1
+
+    def test_fast_probe_lazy_routes(self, mock_api_root, mocked_responses):
+        fields = {key: mock_api_root[key] for key in BASIC_INFO_FIELDS}
+        probe = mocked_responses.get(
+            f"{FAKE_TARGET}/wp-json",
+            match=[matchers.query_param_matcher({"_fields": ",".join(fields)})],
+            json=fields,
+        )
+        wpapi = WPApi(target=FAKE_TARGET, fast_probe=True)
+        wpapi.get_basic_info()
+        assert probe.call_count == 1
+
+        index = mocked_responses.get(
+            f"{FAKE_TARGET}/wp-json",
+            match=[matchers.query_param_matcher({})],
+            json=mock_api_root,
+        )
+        assert wpapi.get_routes() == mock_api_root["routes"]
+        assert wpapi.get_routes() == mock_api_root["routes"]
+        assert probe.call_count == 1
+        assert index.call_count == 1
+
+    def test_fast_probe_routes_error(self, mock_api_root, mocked_responses):
+        wpapi = WPApi(target=FAKE_TARGET, fast_probe=True)
+        wpapi.has_v2 = True
+        wpapi.basic_info = {key: mock_api_root[key] for key in BASIC_INFO_FIELDS}
+        mocked_responses.get(f"{FAKE_TARGET}/wp-json", status=403)
+
+        assert wpapi.get_routes() == {}
+
 
 POSTS_API_PATH = "wp/v2/posts?page=%d"
 
@@ -166,6 +249,14 @@ class TestCrawl:
         self._assert_ids(entries, 1, 30)
         assert total_entries == 30
 
+    def test_on_page(self, wpapi, mock_3_pages):
+        pages = []
+
+        entries, _ = wpapi.crawl_pages(POSTS_API_PATH, on_page=pages.append)
+
+        assert [len(page) for page in pages] == [10, 10, 10]
+        assert [entry for page in pages for entry in page] == entries
+
     def test_start_page_2(self, wpapi, mock_optional_3_pages_with_per_page):
         entries, total_entries = wpapi.crawl_pages(POSTS_API_PATH, start=11)
         self._assert_ids(entries, 12, 30)
@@ -303,6 +394,55 @@ class TestCrawl:
         assert total_entries == 5
         self._assert_ids(entries, 1, 5)
 
+    def test_raw_crawl(self, wpapi, mock_3_pages):
+        segments = []
+        total_entries = wpapi.crawl_pages_raw(POSTS_API_PATH, segments.append)
+
+        assert total_entries == 30
+        assert len(segments) == 3
+        assert all(b"\n" not in segment for segment in segments)
+        entries = [entry for segment in segments for entry in json.loads(segment)]
+        self._assert_ids(entries, 1, 30)
+
+    def test_raw_crawl_ends_empty(self, wpapi, mocked_responses):
+        headers = {"X-WP-Total": "5", "X-WP-TotalPages": "1"}
+        mocked_responses.get(
+            WP_POSTS_ENDPOINT,
+            match=[matchers.query_param_matcher({"page": 1})],
+            json=_fake_api_page(1, 5),
+            headers=headers,
+        )
+        mocked_responses.get(
+            WP_POSTS_ENDPOINT,
+            match=[matchers.query_param_matcher({"page": 2})],
+            json=[],
+            headers=headers,
+        )
+        segments = []
+        wpapi.crawl_pages_raw(POSTS_API_PATH, segments.append)
+
+        assert len(segments) == 1
+
+    def test_raw_http_error_first_page(self, wpapi, mocked_responses):
+        mocked_responses.get(WP_POSTS_ENDPOINT, status=500)
+        with pytest.raises(HTTPError):
+            wpapi.crawl_pages_raw(POSTS_API_PATH, lambda segment: None)
+
+
+@pytest.mark.parametrize(
+    ("content", "expected"),
+    [
+        (b'[{"id": 1}]', b'[{"id": 1}]'),
+        (b'\xef\xbb\xbf\n[{"id": 1},\r\n{"id": 2}]\n', b'[{"id": 1},  {"id": 2}]'),
+        (b"[]", None),
+        (b"  [ ]  ", None),
+        (b'{"code": "error"}', None),
+        (b"", None),
+    ],
+)
+def test_passthrough_segment(content, expected):
+    assert passthrough_segment(content) == expected
+
 
 @pytest.mark.parametrize(
     ("obj_type", "test_method"),
@@ -392,3 +532,339 @@ class TestGetData:
         assert data[0]["id"] == start_idx
         assert data[-1]["id"] == start + num
         assert n_max == 30
+
+
+def _fake_dated_posts(n, start=datetime(2024, 1, 1), step=timedelta(hours=1)):
+    return [
+        {"id": idx, "date": (start + step * (idx - 1)).strftime(WP_DATE_FORMAT)}
+        for idx in range(1, n + 1)
+    ]
+
+
+def _dated_list_callback(posts, calls):
+    def callback(request):
+        params = dict(parse_qsl(urlsplit(request.url).query))
+        calls.append(params)
+        matched = posts
+        if "after" in params:
+            after = datetime.fromisoformat(params["after"])
+            matched = [p for p in matched if datetime.fromisoformat(p["date"]) > after]
+        if "before" in params:
+            before = datetime.fromisoformat(params["before"])
+            matched = [p for p in matched if datetime.fromisoformat(p["date"]) < before]
+        matched = sorted(
+            matched, key=lambda p: p["date"], reverse=params.get("order") != "asc"
+        )
+        per_page = int(params.get("per_page", 10))
+        page = int(params.get("page", 1))
+        total_pages = math.ceil(len(matched) / per_page)
+        if page > max(total_pages, 1):
+            return (
+                400,
+                {"content-type": "application/json"},
+                json.dumps(no_more_pages_body),
+            )
+        headers = {
+            "content-type": "application/json",
+            "X-WP-Total": str(len(matched)),
+            "X-WP-TotalPages": str(total_pages),
+        }
+        body = matched[(page - 1) * per_page : page * per_page]
+        return 200, headers, json.dumps(body)
+
+    return callback
+
+
+def test_split_date_range():
+    start = datetime(2024, 1, 1)
+    windows = split_date_range(start, start + timedelta(days=10), 5)
+
+    assert len(windows) == 5
+    assert windows[0][0] == start
+    assert windows[-1][1] == start + timedelta(days=10)
+    for prev, cur in zip(windows, windows[1:]):
+        assert prev[1] == cur[0]
+
+
+def test_split_date_range_short():
+    start = datetime(2024, 1, 1)
+    windows = split_date_range(start, start + timedelta(seconds=2), 10)
+
+    assert windows == [
+        (start, start + timedelta(seconds=1)),
+        (start + timedelta(seconds=1), start + timedelta(seconds=2)),
+    ]
+
+
+class TestCrawlDateWindows:
+    @pytest.fixture()
+    def calls(self):
+        return []
+
+    def _mock_posts(self, mocked_responses, posts, calls):
+        mocked_responses.add_callback(
+            responses.GET,
+            WP_POSTS_ENDPOINT,
+            callback=_dated_list_callback(posts, calls),
+        )
+
+    @pytest.mark.parametrize("workers", [1, 4])
+    def test_matches_full_crawl(self, mocked_responses, calls, workers):
+        posts = _fake_dated_posts(95)
+        self._mock_posts(mocked_responses, posts, calls)
+        wpapi = WPApi(target=FAKE_TARGET, workers=workers)
+
+        full_entries, full_total = wpapi.crawl_pages(POSTS_API_PATH)
+        entries, total = wpapi.crawl_pages(POSTS_API_PATH, partition_size=20)
+
+        assert total == full_total == 95
+        assert entries == full_entries
+
+    def test_on_page(self, mocked_responses, calls):
+        posts = _fake_dated_posts(95)
+        self._mock_posts(mocked_responses, posts, calls)
+        wpapi = WPApi(target=FAKE_TARGET, workers=4)
+        pages = []
+
+        entries, _ = wpapi.crawl_pages(
+            POSTS_API_PATH, partition_size=20, on_page=pages.append
+        )
+
+        assert {entry["id"] for page in pages for entry in page} == {
+            entry["id"] for entry in entries
+        }
+
+    def test_windows_stay_shallow(self, mocked_responses, calls):
+        posts = _fake_dated_posts(95)
+        self._mock_posts(mocked_responses, posts, calls)
+        wpapi = WPApi(target=FAKE_TARGET)
+
+        wpapi.crawl_pages(POSTS_API_PATH, partition_size=20)
+
+        window_pages = [int(c["page"]) for c in calls if "after" in c]
+        assert max(window_pages) <= 4
+
+    def test_skewed_window_split(self, mocked_responses, calls):
+        # Most posts are published within a short period at the end
+        posts = _fake_dated_posts(5, step=timedelta(days=30)) + [
+            {"id": idx, "date": f"2024-06-01T00:{idx - 6:02d}:00"}
+            for idx in range(6, 56)
+        ]
+        self._mock_posts(mocked_responses, posts, calls)
+        wpapi = WPApi(target=FAKE_TARGET)
+
+        entries, total = wpapi.crawl_pages(POSTS_API_PATH, partition_size=10)
+
+        assert total == 55
+        assert sorted(entry["id"] for entry in entries) == list(range(1, 56))
+        window_pages = [int(c["page"]) for c in calls if "after" in c]
+        assert max(window_pages) <= 3
+
+    def test_small_collection_not_partitioned(self, mocked_responses, calls):
+        posts = _fake_dated_posts(15)
+        self._mock_posts(mocked_responses, posts, calls)
+        wpapi = WPApi(target=FAKE_TARGET)
+
+        entries, total = wpapi.crawl_pages(POSTS_API_PATH, partition_size=20)
+
+        assert total == 15
+        assert len(entries) == 15
+        assert not any("after" in c for c in calls)
+
+    def test_comments(self, mocked_responses, calls):
+        comments = _fake_dated_posts(45)
+        mocked_responses.add_callback(
+            responses.GET,
+            f"{FAKE_TARGET}/wp-json/wp/v2/comments",
+            callback=_dated_list_callback(comments, calls),
+        )
+        wpapi = WPApi(target=FAKE_TARGET, partition_size=10)
+
+        entries, total = wpapi.get_comments()
+
+        assert total == 45
+        assert sorted(entry["id"] for entry in entries) == list(range(1, 46))
+        assert any("after" in c or "before" in c for c in calls)
+
+    @pytest.mark.parametrize("shard", [None, (1, 2)])
+    def test_undecodable_probe(self, mocked_responses, calls, shard):
+        posts = _fake_dated_posts(95)
+        list_callback = _dated_list_callback(posts, calls)
+
+        def callback(request):
+            if "order=asc" in request.url:
+                return 200, {"X-WP-Total": "95"}, "<html>Not JSON</html>"
+            return list_callback(request)
+
+        mocked_responses.add_callback(responses.GET, WP_POSTS_ENDPOINT, callback)
+        wpapi = WPApi(target=FAKE_TARGET, shard=shard)
+
+        entries, total = wpapi.crawl_pages(POSTS_API_PATH, partition_size=20)
+
+        # Falls back to crawling by page
+        assert total == 95
+        assert len(entries) == (95 if shard is None else 45)
+        assert not any("after" in c for c in calls)
+
+    def test_start_ignores_partition(self, mocker):
+        wpapi = WPApi(target=FAKE_TARGET)
+        windows_mock = mocker.patch.object(wpapi, "crawl_date_windows")
+        get_mock = mocker.patch.object(wpapi.s, "get", side_effect=HTTPError)
+
+        with pytest.raises(HTTPError):
+            wpapi.crawl_pages(POSTS_API_PATH, start=5, partition_size=20)
+
+        windows_mock.assert_not_called()
+        get_mock.assert_called_once()
+
+
+@pytest.mark.parametrize(
+    ("total_pages", "shard", "expected"),
+    [
+        (10, (0, 3), (1, 4)),
+        (10, (1, 3), (5, 8)),
+        (10, (2, 3), (9, 10)),
+        (1, (0, 2), (1, 1)),
+        (1, (1, 2), (2, 1)),
+        (0, (0, 2), (1, 0)),
+    ],
+)
+def test_shard_page_range(total_pages, shard, expected):
+    assert shard_page_range(total_pages, shard) == expected
+
+
+class TestShards:
+    @pytest.fixture()
+    def posts(self, mocked_responses_optional):
+        posts = _fake_dated_posts(95)
+        mocked_responses_optional.add_callback(
+            responses.GET,
+            WP_POSTS_ENDPOINT,
+            callback=_dated_list_callback(posts, []),
+        )
+        return posts
+
+    @pytest.mark.parametrize("n_shards", [1, 2, 3, 7])
+    @pytest.mark.parametrize("partition_size", [None, 20])
+    def test_shards_cover_all(self, posts, n_shards, partition_size):
+        full_entries, _ = WPApi(target=FAKE_TARGET).crawl_pages(POSTS_API_PATH)
+
+        shard_entries = []
+        for idx in range(n_shards):
+            wpapi = WPApi(target=FAKE_TARGET, shard=(idx, n_shards))
+            entries, total = wpapi.crawl_pages(
+                POSTS_API_PATH, partition_size=partition_size
+            )
+            assert total == 95
+            shard_entries.append(entries)
+
+        all_ids = [entry["id"] for entries in shard_entries for entry in entries]
+        assert sorted(all_ids) == sorted(entry["id"] for entry in full_entries)
+        if n_shards > 1:
+            assert all(len(entries) < 95 for entries in shard_entries)
+
+    @pytest.mark.parametrize(
+        ("partition_size", "expected"),
+        [
+            (
+                None,
+                {
+                    "total": 95,
+                    "oldest": None,
+                    "newest": "2024-01-04T22:00:00",
+                    "windows": None,
+                },
+            ),
+            (
+                20,
+                {
+                    "total": 95,
+                    "oldest": "2024-01-01T00:00:00",
+                    "newest": "2024-01-04T22:00:00",
+                    "windows": 5,
+                },
+            ),
+        ],
+    )
+    def test_boundaries(self, posts, partition_size, expected):
+        wpapi = WPApi(target=FAKE_TARGET, shard=(0, 2))
+        wpapi.crawl_pages(POSTS_API_PATH, partition_size=partition_size)
+
+        assert wpapi.shard_boundaries == {"posts": expected}
+
+    def test_no_boundaries_without_shard(self, posts):
+        wpapi = WPApi(target=FAKE_TARGET)
+        wpapi.crawl_pages(POSTS_API_PATH, partition_size=20)
+
+        assert wpapi.shard_boundaries == {}
+
+    def test_page_shard_without_shard(self):
+        with pytest.raises(ValueError, match="without a shard"):
+            WPApi(target=FAKE_TARGET).crawl_page_shard(POSTS_API_PATH)
+
+
+class TestFilters:
+    @pytest.fixture()
+    def wpapi(self):
+        api = WPApi(
+            target=FAKE_TARGET,
+            filters=DownloadFilter(categories=[1, 2], search="example"),
+        )
+        api.has_v2 = True
+        return api
+
+    def test_filtered_type(self, wpapi, mocked_responses):
+        mocked_responses.get(
+            WP_POSTS_ENDPOINT,
+            match=[
+                matchers.query_param_matcher(
+                    {"page": "1", "categories": "1,2", "search": "example"}
+                )
+            ],
+            json=_fake_api_page(1, 5),
+            headers={"X-WP-Total": "5", "X-WP-TotalPages": "1"},
+        )
+        mocked_responses.get(
+            WP_POSTS_ENDPOINT,
+            match=[
+                matchers.query_param_matcher(
+                    {"page": "2", "categories": "1,2", "search": "example"}
+                )
+            ],
+            json=[],
+        )
+
+        entries, total = wpapi.get_posts()
+        assert total == 5
+
+    def test_unfilterable_type(self, wpapi, mocker):
+        crawl_mock = mocker.patch.object(wpapi, "crawl_pages")
+        wpapi.get_tags()
+        assert crawl_mock.call_args.args[0] == "wp/v2/tags?page=%d"
+
+    def test_partially_filterable_type(self, wpapi, mocker):
+        crawl_mock = mocker.patch.object(wpapi, "crawl_pages")
+        wpapi.get_pages()
+        assert crawl_mock.call_args.args[0] == "wp/v2/pages?page=%d&search=example"
+
+    def test_with_partition(self, mocked_responses):
+        posts = _fake_dated_posts(95)
+        calls = []
+        mocked_responses.add_callback(
+            responses.GET,
+            WP_POSTS_ENDPOINT,
+            callback=_dated_list_callback(posts, calls),
+        )
+        wpapi = WPApi(
+            target=FAKE_TARGET,
+            filters=DownloadFilter(after=datetime(2024, 1, 2), before=None),
+            partition_size=20,
+        )
+        wpapi.has_v2 = True
+
+        entries, total = wpapi.get_posts()
+
+        expected = [p for p in posts if p["date"] > "2024-01-02T00:00:00"]
+        assert total == len(expected)
+        assert sorted(e["id"] for e in entries) == [p["id"] for p in expected]
+        assert all("after" in call for call in calls)
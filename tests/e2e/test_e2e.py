@@ -2,7 +2,9 @@ import json
 import logging
 import sys
 
+import pytest
 from wpextract.cli import cli
+from wpextract.extractors.io import load_from_path
 
 
 def _load_data(path):
@@ -49,7 +51,64 @@ def test_download(mocked_responses, caplog, shared_datadir, tmp_path, runner):
         ), f"{datatype} data mismatch"
 
 
-def test_extract(runner, shared_datadir, tmp_path, caplog):
+def test_download_replay(mocked_responses, shared_datadir, tmp_path, runner):
+    mocked_responses._add_from_file(
+        file_path=shared_datadir / "dl_requests_record.yaml"
+    )
+    archive_path = tmp_path / "archive"
+    recorded_path = tmp_path / "out_recorded"
+    replayed_path = tmp_path / "out_replayed"
+    result = runner.invoke(
+        cli,
+        [
+            "download",
+            "http://localhost",
+            str(recorded_path.resolve()),
+            "--archive",
+            str(archive_path),
+        ],
+    )
+    assert result.exit_code == 0
+
+    n_calls = len(mocked_responses.calls)
+    result = runner.invoke(
+        cli,
+        [
+            "download",
+            "http://localhost",
+            str(replayed_path.resolve()),
+            "--replay-archive",
+            str(archive_path),
+        ],
+    )
+    assert result.exit_code == 0
+    assert len(mocked_responses.calls) == n_calls
+
+    for datatype in EXPECTED_DATA_LEN:
+        assert _load_data(replayed_path / f"{datatype}.json") == _load_data(
+            recorded_path / f"{datatype}.json"
+        ), f"{datatype} data mismatch"
+
+
+def test_download_passthrough(mocked_responses, shared_datadir, tmp_path, runner):
+    mocked_responses._add_from_file(
+        file_path=shared_datadir / "dl_requests_record.yaml"
+    )
+    out_path = tmp_path / "out_passthrough"
+    result = runner.invoke(
+        cli, ["download", "http://localhost", str(out_path.resolve()), "--passthrough"]
+    )
+    assert result.exit_code == 0
+
+    for datatype in EXPECTED_DATA_LEN:
+        assert not (out_path / f"{datatype}.json").exists()
+        assert load_from_path(out_path / f"{datatype}.json") == _load_data(
+            shared_datadir / f"download_out/{datatype}.json"
+        ), f"{datatype} data mismatch"
+
+
+@pytest.mark.parametrize("backend", ["bs4", "lxml"])
+def test_extract(runner, shared_datadir, tmp_path, caplog, backend):
     dl_data = (shared_datadir / "download_out").resolve()
     scrape_data = (shared_datadir / "site_scrape").resolve()
     out_path = tmp_path / "out_extract"
@@ -62,6 +121,8 @@ def test_extract(runner, shared_datadir, tmp_path, caplog):
                 str(out_path.resolve()),
                 "--scrape-root",
                 str(scrape_data),
+                "--backend",
+                backend,
             ],
         )
     sys.stdout.write(result.stdout)
@@ -1,6 +1,7 @@
 from pathlib import Path
 
 import pandas as pd
+import pytest
 from wpextract.extract import WPExtractor
 
 
@@ -46,3 +47,27 @@ def test_extract_scrape(datadir):
     out_dir.mkdir()
     extractor.export(out_dir)
     _assert_output_valid(out_dir)
+
+
+def test_extract_parallel(datadir):
+    out_dirs = []
+    for jobs in [1, 2]:
+        extractor = WPExtractor(
+            json_root=datadir / "json", scrape_root=datadir / "scrape", jobs=jobs
+        )
+        extractor.extract()
+        _assert_extractor_valid(extractor)
+
+        out_dir = datadir / f"out_json_{jobs}"
+        out_dir.mkdir()
+        extractor.export(out_dir)
+        out_dirs.append(out_dir)
+
+    for name in ["posts.json", "pages.json"]:
+        serial, parallel = ((out_dir / name).read_text() for out_dir in out_dirs)
+        assert serial == parallel
+
+
+def test_extract_unknown_backend(datadir):
+    with pytest.raises(ValueError, match="Unknown parse backend: html5lib"):
+        WPExtractor(json_root=datadir / "json", backend="html5lib")
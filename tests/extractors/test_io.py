@@ -25,6 +25,12 @@ def test_load_from_path_doesnt_exist(datadir):
     assert loaded is None
 
 
+def test_load_from_path_passthrough(datadir):
+    loaded = load_from_path(datadir / "example-posts.json")
+
+    assert [entry["id"] for entry in loaded] == [1, 2, 3]
+
+
 def test_load_df(datadir):
     df = load_df(datadir / "example.json")
 
@@ -25,6 +25,14 @@ def test_equals_expected(datadir, pages_df):
     assert pages_df.equals(expected_df)
 
 
+def test_parallel_equals_expected(datadir):
+    expected_df = pd.read_json(datadir / "pages_df_out.json", orient="table")
+
+    pages_df = load_pages(datadir / "pages.json", LinkRegistry(), jobs=2)
+
+    assert pages_df.equals(expected_df)
+
+
 def test_post_times(pages_df):
     post_1 = pages_df.loc[1]
     assert isinstance(post_1.date_gmt, pd.Timestamp)
@@ -0,0 +1,385 @@
+"""A local mock WordPress site for tests and benchmarks.
+
+The site serves synthetic content through a subset of the WordPress REST API, with the
+pagination, filtering and error behaviour relied upon by the downloader.
+"""
+
+import json
+import math
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Optional
+from urllib.parse import parse_qs, urlsplit
+
+from wpextract.download.wpapi import WP_DATE_FORMAT
+
+LIST_TYPES = ("posts", "pages", "media", "tags", "categories", "users", "comments")
+DATED_TYPES = ("posts", "pages", "media", "comments")
+START_DATE = datetime(2020, 1, 1)
+
+MEDIA_BODY = bytes(range(256)) * 16
+
+
+@dataclass
+class SiteConfig:
+    """Scale and behaviour of a mock site."""
+
+    posts: int = 100
+    pages: int = 10
+    media: int = 50
+    tags: int = 20
+    categories: int = 5
+    users: int = 3
+    comments: int = 0
+    content_size: int = 2000
+    """Approximate length in characters of the content of each post and page."""
+    date_step: timedelta = timedelta(hours=7)
+    """Time between the publication of consecutive entries."""
+    max_per_page: int = 100
+    latency: float = 0.0
+    """Seconds to wait before responding to each request."""
+    rate_limit: Optional[float] = None
+    """Maximum requests per second before responding with 429."""
+    retry_after: int = 0
+    """Value of the Retry-After header of 429 responses."""
+
+
+def _rendered(value: str) -> dict[str, str]:
+    return {"rendered": value}
+
+
+def _generate(config: SiteConfig, base_url: str) -> dict[str, list[dict[str, Any]]]:
+    def date(idx: int) -> str:
+        return (START_DATE + config.date_step * idx).strftime(WP_DATE_FORMAT)
+
+    paragraph = "<p>Lorem ipsum dolor sit amet &amp; consectetur adipiscing elit.</p>\n"
+    content = paragraph * max(config.content_size // len(paragraph), 1)
+
+    data: dict[str, list[dict[str, Any]]] = {
+        "users": [
+            {
+                "id": idx,
+                "name": f"User {idx}",
+                "slug": f"user-{idx}",
+                "link": f"{base_url}author/user-{idx}/",
+                "description": "",
+            }
+            for idx in range(1, config.users + 1)
+        ],
+        "tags": [
+            {
+                "id": idx,
+                "name": f"Tag {idx}",
+                "slug": f"tag-{idx}",
+                "count": 0,
+                "link": f"{base_url}tag/tag-{idx}/",
+                "taxonomy": "post_tag",
+            }
+            for idx in range(1, config.tags + 1)
+        ],
+        "categories": [
+            {
+                "id": idx,
+                "name": f"Category {idx}",
+                "slug": f"category-{idx}",
+                "count": 0,
+                "link": f"{base_url}category/category-{idx}/",
+                "taxonomy": "category",
+                "parent": 0,
+            }
+            for idx in range(1, config.categories + 1)
+        ],
+        "media": [
+            {
+                "id": idx,
+                "date": date(idx),
+                "modified": date(idx),
+                "slug": f"image-{idx}",
+                "link": f"{base_url}image-{idx}/",
+                "title": _rendered(f"Image {idx}"),
+                "author": idx % max(config.users, 1) + 1,
+                "caption": _rendered(f"<p>Caption {idx}</p>"),
+                "alt_text": f"Alt text {idx}",
+                "media_type": "image",
+                "mime_type": "image/jpeg",
+                "source_url": f"{base_url}wp-content/uploads/image-{idx}.jpg",
+            }
+            for idx in range(1, config.media + 1)
+        ],
+    }
+    for type_name in ("posts", "pages"):
+        n = config.posts if type_name == "posts" else config.pages
+        offset = 0 if type_name == "posts" else config.posts
+        data[type_name] = [
+            {
+                "id": offset + idx,
+                "date": date(idx),
+                "date_gmt": date(idx),
+                "modified": date(idx),
+                "modified_gmt": date(idx),
+                "slug": f"{type_name}-{idx}",
+                "status": "publish",
+                "type": type_name[:-1],
+                "link": f"{base_url}{type_name}-{idx}/",
+                "title": _rendered(f"Entry {idx} &amp; more"),
+                "content": _rendered(content),
+                "excerpt": _rendered(paragraph),
+                "author": idx % max(config.users, 1) + 1,
+                "featured_media": idx if idx <= config.media else 0,
+                "categories": [idx % config.categories + 1]
+                if type_name == "posts" and config.categories
+                else [],
+                "tags": [idx % config.tags + 1]
+                if type_name == "posts" and config.tags
+                else [],
+            }
+            for idx in range(1, n + 1)
+        ]
+    data["comments"] = [
+        {
+            "id": idx,
+            "post": idx % max(config.posts, 1) + 1,
+            "date": date(idx),
+            "author_name": f"Commenter {idx}",
+            "content": _rendered("<p>A comment</p>"),
+        }
+        for idx in range(1, config.comments + 1)
+    ]
+    return data
+
+
+def _wp_error(code: str, message: str, status: int) -> dict[str, Any]:
+    return {"code": code, "message": message, "data": {"status": status}}
+
+
+def _select_fields(entry: dict[str, Any], fields: Optional[list[str]]) -> Any:
+    if fields is None:
+        return entry
+    return {key: value for key, value in entry.items() if key in fields}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: "MockWordPressServer"
+    protocol_version = "HTTP/1.1"
+    # Headers and body are written separately, which would otherwise be delayed by Nagle's algorithm
+    disable_nagle_algorithm = True
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+    def do_HEAD(self) -> None:
+        self._handle(send_body=False)
+
+    def do_GET(self) -> None:
+        self._handle(send_body=True)
+
+    def _handle(self, send_body: bool) -> None:
+        status, headers, body = self.server.respond(self.path)
+        self.send_response(status)
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if send_body:
+            self.wfile.write(body)
+
+
+class MockWordPressServer(ThreadingHTTPServer):
+    """A local HTTP server serving a synthetic WordPress site.
+
+    Supports the home page, the API index, list and single endpoints of each type, and media
+    files. Lists support `page`, `per_page`, `_fields`, `include`, `after`, `before`,
+    `modified_after`, `orderby`, `order` and `search`, and respond with the same pagination
+    headers and errors as WordPress.
+
+    Use as a context manager to serve in a background thread.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, config: Optional[SiteConfig] = None) -> None:
+        """Create a server listening on a free local port.
+
+        Args:
+            config: the scale and behaviour of the site
+        """
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.config = config if config is not None else SiteConfig()
+        self.url = f"http://127.0.0.1:{self.server_address[1]}/"
+        self.data = _generate(self.config, self.url)
+        self.request_count = 0
+        self.throttled_count = 0
+        self._lock = threading.Lock()
+        self._window_start = time.monotonic()
+        self._window_count = 0
+        self._thread: Optional[threading.Thread] = None
+
+    def __enter__(self) -> "MockWordPressServer":
+        self._thread = threading.Thread(
+            target=self.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        self.shutdown()
+        self.server_close()
+
+    def _throttled(self) -> bool:
+        with self._lock:
+            self.request_count += 1
+            if self.config.rate_limit is None:
+                return False
+            now = time.monotonic()
+            if now - self._window_start >= 1:
+                self._window_start = now
+                self._window_count = 0
+            self._window_count += 1
+            if self._window_count > self.config.rate_limit:
+                self.throttled_count += 1
+                return True
+            return False
+
+    def respond(self, path: str) -> tuple[int, dict[str, str], bytes]:
+        """Produce the response to a request.
+
+        Args:
+            path: the request path, including any query string
+
+        Returns:
+            The status, headers and body of the response
+        """
+        if self.config.latency > 0:
+            time.sleep(self.config.latency)
+        if self._throttled():
+            return self._json(
+                429,
+                _wp_error("too_many_requests", "Too many requests", 429),
+                {"Retry-After": str(self.config.retry_after)},
+            )
+
+        parts = urlsplit(path)
+        params = {key: values[-1] for key, values in parse_qs(parts.query).items()}
+        segments = [seg for seg in parts.path.split("/") if seg != ""]
+
+        if len(segments) == 0:
+            return (
+                200,
+                {"Content-Type": "text/html; charset=UTF-8"},
+                f'<html><head><link rel="https://api.w.org/" href="{self.url}wp-json/" /></head><body></body></html>'.encode(),
+            )
+        if segments[0] == "wp-content":
+            return 200, {"Content-Type": "image/jpeg"}, MEDIA_BODY
+        if segments[0] != "wp-json":
+            return 404, {"Content-Type": "text/html"}, b"Not Found"
+        if len(segments) == 1:
+            return self._json(200, self._index(params.get("_fields")))
+        if segments[1:3] != ["wp", "v2"] or len(segments) < 4:
+            return self._json(404, _wp_error("rest_no_route", "No route", 404))
+
+        type_name = segments[3]
+        if type_name not in LIST_TYPES:
+            return self._json(404, _wp_error("rest_no_route", "No route", 404))
+        fields = params["_fields"].split(",") if "_fields" in params else None
+        if len(segments) == 5:
+            return self._single(type_name, segments[4], fields)
+        return self._list(type_name, params, fields)
+
+    def _json(
+        self, status: int, body: Any, headers: Optional[dict[str, str]] = None
+    ) -> tuple[int, dict[str, str], bytes]:
+        return (
+            status,
+            {"Content-Type": "application/json; charset=UTF-8", **(headers or {})},
+            json.dumps(body).encode(),
+        )
+
+    def _index(self, fields: Optional[str]) -> Any:
+        index = {
+            "name": "Mock WordPress Site",
+            "description": "Synthetic content for testing",
+            "url": self.url.rstrip("/"),
+            "namespaces": ["oembed/1.0", "wp/v2"],
+            "routes": {
+                f"/wp/v2/{type_name}": {"methods": ["GET"]} for type_name in LIST_TYPES
+            },
+        }
+        return _select_fields(index, fields.split(",") if fields else None)
+
+    def _single(
+        self, type_name: str, obj_id: str, fields: Optional[list[str]]
+    ) -> tuple[int, dict[str, str], bytes]:
+        for entry in self.data[type_name]:
+            if str(entry["id"]) == obj_id:
+                return self._json(200, _select_fields(entry, fields))
+        return self._json(404, _wp_error("rest_post_invalid_id", "Invalid ID", 404))
+
+    def _list(
+        self, type_name: str, params: dict[str, str], fields: Optional[list[str]]
+    ) -> tuple[int, dict[str, str], bytes]:
+        try:
+            page = int(params.get("page", 1))
+            per_page = int(params.get("per_page", 10))
+        except ValueError:
+            return self._json(400, _wp_error("rest_invalid_param", "Invalid", 400))
+        if page < 1 or not 1 <= per_page <= self.config.max_per_page:
+            return self._json(
+                400, _wp_error("rest_invalid_param", "Invalid parameter(s)", 400)
+            )
+
+        entries = self.data[type_name]
+        if "include" in params:
+            include = {int(obj_id) for obj_id in params["include"].split(",")}
+            entries = [e for e in entries if e["id"] in include]
+        if type_name in DATED_TYPES:
+            for param, key, after in [
+                ("after", "date", True),
+                ("before", "date", False),
+                ("modified_after", "modified", True),
+                ("modified_before", "modified", False),
+            ]:
+                if param in params:
+                    bound = datetime.fromisoformat(params[param])
+                    entries = [
+                        e
+                        for e in entries
+                        if (datetime.fromisoformat(e[key]) > bound) == after
+                        and datetime.fromisoformat(e[key]) != bound
+                    ]
+        if "search" in params:
+            entries = [
+                e
+                for e in entries
+                if params["search"].lower() in json.dumps(e.get("title", "")).lower()
+            ]
+
+        default_order = "date" if type_name in DATED_TYPES else "id"
+        orderby = params.get("orderby", default_order)
+        if len(entries) > 0 and orderby not in entries[0]:
+            orderby = "id"
+        entries = sorted(
+            entries,
+            key=lambda e: (e.get(orderby), e["id"]),
+            reverse=params.get("order", "desc" if orderby != "id" else "asc") == "desc",
+        )
+
+        total = len(entries)
+        total_pages = math.ceil(total / per_page)
+        if page > max(total_pages, 1):
+            return self._json(
+                400,
+                _wp_error(
+                    f"rest_{type_name[:-1]}_invalid_page_number",
+                    "The page number requested is larger than the number of pages available.",
+                    400,
+                ),
+            )
+        page_entries = entries[(page - 1) * per_page : page * per_page]
+        return self._json(
+            200,
+            [_select_fields(e, fields) for e in page_entries],
+            {"X-WP-Total": str(total), "X-WP-TotalPages": str(total_pages)},
+        )
@@ -1,10 +1,12 @@
 from pathlib import Path
 
+import pytest
 from bs4 import BeautifulSoup
 from wpextract.extractors.data.images import MediaUse, ResolvableMediaUse
 from wpextract.extractors.data.links import Link, ResolvableLink
 from wpextract.parse.content import (
     extract_content_data,
+    extract_content_data_lxml,
     extract_embeds,
     extract_images,
     extract_links,
@@ -124,3 +126,61 @@ def test_extract_content_whitespace_collapse(datadir: Path):
     text = content_series[0]
 
     assert text == "First para.\nAfter empty.\nAfter gap in doc."
+
+
+def test_extract_content_matches_extractors(datadir: Path):
+    html = (datadir / "mixed.html").read_text()
+    doc = BeautifulSoup(html, "lxml")
+
+    text, internal, external, embeds, images = extract_content_data(
+        doc, "https://example.org/home"
+    )
+
+    assert text == "Some  text\non two lines with a link."
+    assert (internal, external) == extract_links(doc, "https://example.org/home")
+    assert embeds == extract_embeds(doc)
+    assert images == extract_images(doc, "https://example.org/home")
+    assert [image.caption for image in images] == [
+        "A caption before",
+        "Inner caption",
+        "Inner caption",
+    ]
+    # The document is not modified
+    assert str(doc) == str(BeautifulSoup(html, "lxml"))
+
+
+def test_extract_content_deeply_nested():
+    doc = BeautifulSoup("<div>" * 2000 + "Deep" + "</div>" * 2000, "lxml")
+
+    content_series = extract_content_data(doc, "https://example.org/home")
+
+    assert content_series[0] == "Deep"
+
+
+@pytest.mark.parametrize(
+    "file_name",
+    [
+        "content_extraction.html",
+        "embeds.html",
+        "images.html",
+        "links.html",
+        "mixed.html",
+        "whitespace_br.html",
+        "whitespace_collapse.html",
+    ],
+)
+def test_extract_content_lxml(datadir: Path, file_name: str):
+    html = (datadir / file_name).read_text()
+
+    expected = extract_content_data(
+        BeautifulSoup(html, "lxml"), "https://example.org/home"
+    )
+    content_series = extract_content_data_lxml(html, "https://example.org/home")
+
+    assert content_series.to_list() == expected.to_list()
+
+
+def test_extract_content_lxml_empty():
+    content_series = extract_content_data_lxml("", "https://example.org/home")
+
+    assert content_series.to_list() == ["", [], [], [], []]
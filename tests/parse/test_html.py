@@ -0,0 +1,21 @@
+import pytest
+from wpextract.parse.html import extract_html_text, extract_html_text_lxml
+
+
+@pytest.mark.parametrize(
+    "html",
+    [
+        "",
+        "   ",
+        "No HTML here",
+        "An &amp; entity",
+        "<p>A <strong>bold</strong> title</p>",
+        "<p>a<script>var x = 1;</script>b<!-- comment -->c</p>",
+        "<style>.a { color: red; }</style>Styled",
+        "<template><p>Hidden</p></template>Shown",
+        "<!-- only a comment -->",
+        "<p>First</p>\n\n  <p>Second</p>",
+    ],
+)
+def test_extract_html_text_lxml(html):
+    assert extract_html_text_lxml(html) == extract_html_text(html)
@@ -1,4 +1,4 @@
-from wpextract.util.file import prefix_filename
+from wpextract.util.file import prefix_filename, read_json, read_passthrough
 
 
 def test_prefix_filename():
@@ -7,3 +7,21 @@ def test_prefix_filename():
 
 def test_prefix_filename_none():
     assert prefix_filename("test.txt", None) == "test.txt"
+
+
+def test_read_json_passthrough(datadir):
+    loaded = read_json(datadir / "example-posts.json")
+
+    assert [entry["id"] for entry in loaded] == [1, 2, 3]
+
+
+def test_read_json_doesnt_exist(datadir):
+    assert read_json(datadir / "notreal.json") is None
+
+
+def test_read_passthrough(datadir):
+    loaded = read_passthrough(datadir / "example-posts.jsonl")
+
+    assert len(loaded) == 3
+    assert loaded[0]["title"]["rendered"] == "Fish & Chips"
+    assert loaded[1]["title"]["rendered"] == "Two"